@@ -25,6 +25,7 @@ class BackendProtocol(Protocol):
     async def send_prompt(self, user_text: str) -> AsyncGenerator[Any, None]: ...
     async def explain_risk(self, command: str) -> str: ...
     async def execute_tool(self, tool_name: str, command: str, cwd: str | None = None) -> AsyncGenerator[Any, None]: ...
+    async def execute_batch(self, calls: list, cwd: str | None = None) -> AsyncGenerator[Any, None]: ...
     async def close(self) -> None: ...
 
 
@@ -49,7 +50,8 @@ def get_backend() -> BackendProtocol:
         try:
             from .llm_providers.localllm import LocalLLMBackend
             backend = LocalLLMBackend(base_url=local_llm_url)
-            print(f"[OK] Local LLM connected - {backend.model} (SAFEST)")
+            # The server is probed in the background; startup does not wait for it
+            print(f"[OK] Local LLM - {backend.model or 'model not known yet'} ({backend.state}) (SAFEST)")
             return backend
         except ImportError as e:
             print(f"[WARN] LocalLLM import failed: {e}")
@@ -111,7 +113,12 @@ class MinimalMockBackend:
     
     async def execute_tool(self, tool_name: str = "shell", command: str = "", cwd: str | None = None):
         from .tools.executor import execute_tool as real_execute
-        async for event in real_execute(tool_name, command, cwd):
+        async for event in real_execute(tool_name, command, cwd, stream=True):
+            yield event
+    
+    async def execute_batch(self, calls: list, cwd: str | None = None):
+        from .tools.executor import execute_tool_batch
+        async for event in execute_tool_batch(calls, cwd):
             yield event
     
     async def close(self):
@@ -1,5 +1,6 @@
 """Main CLI application loop for AgentZeroCLI."""
 
+import asyncio
 import sys
 from pathlib import Path
 
@@ -7,6 +8,7 @@ import yaml
 from rich.console import Console
 
 from ..backend import get_backend
+from ..llm_providers import transport
 
 from .approval import ToolApprovalHandler
 from .commands import CLISlashCommands
@@ -104,6 +106,9 @@ class CLIApp:
         # Main loop
         while self.running:
             try:
+                # Connect to the backend while the user types
+                if hasattr(self.backend, "warm_up"):
+                    self._warm_task = asyncio.ensure_future(self.backend.warm_up())
                 user_input = await self.input_handler.get_input("> ")
 
                 if not user_input:
@@ -125,6 +130,9 @@ class CLIApp:
             except Exception as e:
                 self.renderer.error(str(e))
 
+        # Pooled connections live for the whole session
+        await transport.aclose()
+
     async def handle_message(self, text: str) -> None:
         """Send message to agent and handle response.
 
@@ -172,12 +180,44 @@ class CLIApp:
         elif event_type == "final_response":
             self.renderer.agent_response(content)
 
+        elif event_type == "tool_output" and event.get("partial"):
+            self.renderer.tool_stream(content)
+
         elif event_type == "tool_output":
-            self.renderer.tool_output(content)
+            self.renderer.tool_output(content, event.get("handle", ""))
 
         elif event_type == "tool_request":
             await self._handle_tool_request(event)
 
+        elif event_type == "tool_batch":
+            await self._handle_tool_batch(event.get("calls") or [])
+
+    async def _handle_tool_batch(self, calls: list[dict]) -> None:
+        """Approve each call of a batch, then run the approved ones together.
+
+        Args:
+            calls: tool_request-style dicts
+        """
+        approved = []
+        for call in calls:
+            decision = await self.approval.request_approval(call)
+            if decision == "approved":
+                approved.append(call)
+            elif hasattr(self.backend, "reject_tool"):
+                async for exec_event in self.backend.reject_tool(call):
+                    await self._process_event(exec_event)
+
+        if not approved:
+            return
+        with self.console.status(f"[bold cyan]Executing {len(approved)} tools...", spinner="dots"):
+            if hasattr(self.backend, "execute_batch"):
+                async for exec_event in self.backend.execute_batch(approved):
+                    await self._process_event(exec_event)
+            else:
+                for call in approved:
+                    async for exec_event in self.backend.execute_tool(call):
+                        await self._process_event(exec_event)
+
     async def _handle_tool_request(self, event: dict) -> None:
         """Handle tool approval and execution.
 
@@ -3,6 +3,9 @@
 import json
 from typing import Any
 
+from ..llm_providers.risk_explainer import get_risk_explainer
+from ..tools.executor import classify_command
+
 # Tools that are auto-approved in "balanced" mode
 READONLY_TOOLS = frozenset(
     {
@@ -14,6 +17,7 @@ READONLY_TOOLS = frozenset(
         "search_text",
         "search",
         "rg",
+        "read_output",
     }
 )
 
@@ -60,12 +64,8 @@ class ToolApprovalHandler:
 
     def _is_shell_whitelisted(self, command: str) -> bool:
         whitelist = getattr(self.backend, "whitelist", []) or []
-        cmd = (command or "").strip().lower()
-        for entry in whitelist:
-            entry_text = str(entry).strip().lower()
-            if entry_text and cmd.startswith(entry_text):
-                return True
-        return False
+        # Every segment must be whitelisted, so "ls; rm x" does not pass as "ls"
+        return classify_command(command or "").all_match(whitelist)
 
     async def request_approval(self, event: dict[str, Any]) -> str:
         """Request user approval for tool execution.
@@ -86,12 +86,13 @@ class ToolApprovalHandler:
         # Build preview for write operations
         preview = self._build_preview(tool_name, payload)
 
-        # Render tool request
+        # Render tool request; the explanation is fetched meanwhile
         self.renderer.tool_request(tool_name, command, reason, preview)
+        get_risk_explainer(self.backend).prefetch(command)
 
         # Interactive approval loop
         while True:
-            choice = self.input_handler.get_approval()
+            choice = await self._read_choice()
 
             if choice == "a":
                 self.renderer.approved(command)
@@ -105,11 +106,23 @@ class ToolApprovalHandler:
                 await self._show_explanation(command)
                 # Loop continues
 
+    async def _read_choice(self) -> str:
+        """Read the approval choice without blocking the event loop.
+
+        prompt_toolkit's async prompt lets background work (the risk
+        explanation prefetch) keep going while the operator decides, and
+        can be cancelled without a reader thread left holding stdin.
+        """
+        return await self.input_handler.get_approval_async()
+
     async def _show_explanation(self, command: str) -> None:
-        """Show AI risk explanation."""
+        """Show AI risk explanation, streamed as it arrives."""
         self.renderer.status("Analyzing risk...")
-        explanation = await self.backend.explain_risk(command)
-        self.renderer.info(explanation)
+        shown = ""
+        async for text in get_risk_explainer(self.backend).stream(command):
+            self.renderer.info_stream(text[len(shown):])
+            shown = text
+        self.renderer.info_stream("\n")
 
     def _build_preview(self, tool_name: str, payload: dict[str, Any]) -> str | None:
         """Build preview text for tool request."""
@@ -14,6 +14,9 @@ from typing import AsyncGenerator, Optional
 import asyncio
 import httpx
 
+from . import transport
+from .retry import RetryPolicy, request_with_retry, retrying_stream
+
 
 @dataclass
 class AgentEvent:
@@ -21,6 +24,10 @@ class AgentEvent:
     type: str  # status, thought, tool_request, tool_output, final_response, error
     content: str
     tool_call: Optional[dict] = None
+    partial: bool = False  # tool_output chunk of a command still running
+    calls: Optional[list] = None  # tool_batch: one tool_request-style dict per call
+    handle: Optional[str] = None  # tool_output: spool handle for read_output
+    duration: Optional[float] = None  # batch status header: the call's seconds
 
 
 class AgentZeroBackend:
@@ -44,8 +51,18 @@ class AgentZeroBackend:
         
         self.api_key = api_key or os.getenv("AGENTZERO_API_KEY", "")
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
         self.conversation_id: Optional[str] = None
+        # Transient errors are retried before any output (llm_providers/retry.py)
+        self.retry = RetryPolicy()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client shared by all backends (llm_providers/transport.py)."""
+        return transport.get_async_client()
+    
+    async def warm_up(self) -> bool:
+        """Pre-connect to Agent Zero so the next prompt skips connection setup."""
+        return await transport.warm_up(self.api_url)
     
     async def send_prompt(self, user_text: str) -> AsyncGenerator[AgentEvent, None]:
         """
@@ -69,11 +86,14 @@ class AgentZeroBackend:
             headers["X-API-KEY"] = self.api_key
         
         try:
-            async with self.client.stream(
+            async with retrying_stream(
+                self.client,
                 "POST",
                 self.api_url,
+                policy=self.retry,
                 headers=headers,
-                json=payload
+                json=payload,
+                timeout=self.timeout
             ) as response:
                 if response.status_code != 200:
                     error_text = await response.aread()
@@ -163,13 +183,17 @@ class AgentZeroBackend:
         prompt = f"Briefly analyze the security risk of this command (max 100 words):\n{command}"
         
         try:
-            response = await self.client.post(
-                self.api_url,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"X-API-KEY": self.api_key} if self.api_key else {})
-                },
-                json={"message": prompt, "stream": False}
+            response = await request_with_retry(
+                lambda: self.client.post(
+                    self.api_url,
+                    headers={
+                        "Content-Type": "application/json",
+                        **({"X-API-KEY": self.api_key} if self.api_key else {})
+                    },
+                    json={"message": prompt, "stream": False},
+                    timeout=self.timeout
+                ),
+                self.retry
             )
             
             if response.status_code == 200:
@@ -185,23 +209,44 @@ class AgentZeroBackend:
         """Execute a tool and stream results."""
         from .tools.executor import execute_tool as real_execute
         
-        async for event in real_execute(tool_name, command, cwd):
+        async for event in real_execute(tool_name, command, cwd, stream=True):
+            yield AgentEvent(
+                type=event.get("type", "status"),
+                content=event.get("content", ""),
+                partial=event.get("partial", False),
+                handle=event.get("handle"),
+                duration=event.get("duration")
+            )
+    
+    async def execute_batch(self, calls: list, cwd: str | None = None) -> AsyncGenerator[AgentEvent, None]:
+        """Execute several tool calls, read-only ones concurrently."""
+        from .tools.executor import execute_tool_batch
+        
+        async for event in execute_tool_batch(calls, cwd):
             yield AgentEvent(
                 type=event.get("type", "status"),
-                content=event.get("content", "")
+                content=event.get("content", ""),
+                handle=event.get("handle"),
+                duration=event.get("duration")
             )
     
     async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """Release the backend."""
+        # The HTTP transport is shared with other backends and stays open
+        pass
     
     def get_stats(self) -> dict:
         """Get backend statistics."""
+        from .tools.result_cache import get_result_cache
+        
         return {
             "backend": "AgentZero",
             "api_url": self.api_url,
             "conversation_id": self.conversation_id,
             "has_api_key": bool(self.api_key),
+            "retry": self.retry.get_stats(),
+            "tool_cache": get_result_cache().get_stats(),
+            "transport": transport.get_transport_stats(),
         }
 
 
@@ -15,3 +15,12 @@ class LLMProvider(ABC):
     def is_available(self) -> bool:
         """Check if provider is configured and available."""
         pass
+
+
+class AsyncLLMProvider(LLMProvider):
+    """LLM provider that can also complete without blocking the event loop."""
+
+    @abstractmethod
+    async def complete_async(self, prompt: str, system: str = "") -> str:
+        """Send completion request on the pooled async client and return text response."""
+        pass
@@ -0,0 +1,150 @@
+"""
+Per-model record of how tool calls work, kept on disk.
+
+Tool modes, best first:
+
+- ``tools``: native ``tools``/``tool_calls`` (OpenAI function calling)
+- ``grammar``: llama.cpp ``json_schema`` constrained decoding
+- ``xml``: ``<tool .../>`` tags described in the system prompt
+
+With native tools enabled (AGENTZERO_NATIVE_TOOLS=auto), a backend uses
+the recorded mode of a model, or tries the best mode its server offers.
+When the server rejects a request because of the tool parameters, the
+model is downgraded to the next mode and the request is retried; when a
+native call comes back, the mode is confirmed. The record survives
+restarts, so each model is only probed once.
+
+Env vars:
+- AGENTZERO_NATIVE_TOOLS: off (default), auto, or a fixed mode (tools,
+  grammar, xml)
+- AGENTZERO_CAPABILITIES_FILE: record location
+  (default ~/.cache/agentzero/model_capabilities.json)
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+from .disk_cache import cache_path, read_json, write_json_atomic
+
+TOOL_MODES = ("tools", "grammar", "xml")
+NATIVE_TOOLS = os.getenv("AGENTZERO_NATIVE_TOOLS", "off").lower()
+CAPABILITIES_FILE = os.getenv("AGENTZERO_CAPABILITIES_FILE", str(cache_path("model_capabilities.json")))
+
+# Error text that means "this server/model cannot do that tool mode"
+_REJECTION_HINTS = ("tool", "function", "jinja", "grammar", "json_schema", "response_format")
+
+
+def rejects_tools(status_code: int, body: str) -> bool:
+    """True if an error response blames the tool parameters."""
+    if status_code in (401, 402, 403, 408, 429) or status_code < 400:
+        return False
+    text = body.lower()
+    return any(hint in text for hint in _REJECTION_HINTS)
+
+
+class CapabilityStore:
+    """JSON file of ``endpoint|model -> {"tool_mode": ..., "updated": ...}``."""
+
+    def __init__(self, path: str | os.PathLike = CAPABILITIES_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] | None = None
+
+    @staticmethod
+    def key(endpoint: str, model: str) -> str:
+        return f"{endpoint.rstrip('/')}|{model}"
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            self._entries = read_json(self.path)
+        return self._entries
+
+    def _save(self) -> None:
+        # The record is an optimisation; a failed write is not an error
+        write_json_atomic(self.path, self._entries or {})
+
+    def get(self, endpoint: str, model: str) -> dict:
+        with self._lock:
+            return dict(self._load().get(self.key(endpoint, model), {}))
+
+    def tool_mode(self, endpoint: str, model: str) -> str | None:
+        return self.get(endpoint, model).get("tool_mode")
+
+    def record(self, endpoint: str, model: str, **fields) -> None:
+        """Merge fields into a model's entry and write the file."""
+        with self._lock:
+            entries = self._load()
+            entry = entries.setdefault(self.key(endpoint, model), {})
+            if all(entry.get(name) == value for name, value in fields.items()):
+                return
+            entry.update(fields, updated=time.time())
+            self._save()
+
+    def forget(self, endpoint: str, model: str) -> None:
+        with self._lock:
+            if self._load().pop(self.key(endpoint, model), None) is not None:
+                self._save()
+
+    def entries(self) -> dict[str, dict]:
+        with self._lock:
+            return {key: dict(value) for key, value in self._load().items()}
+
+
+class ToolModeSelector:
+    """Chooses and learns the tool mode per model for one backend."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        modes: tuple[str, ...] = ("tools", "xml"),
+        setting: str | None = None,
+        store: CapabilityStore | None = None,
+    ):
+        self.endpoint = endpoint
+        self.modes = modes
+        self.setting = (setting or NATIVE_TOOLS).lower()
+        self.store = store or get_capability_store()
+
+    @property
+    def enabled(self) -> bool:
+        return self.setting not in ("off", "false", "0", "no", "")
+
+    def mode(self, model: str) -> str:
+        """Tool mode to use for the next request to model."""
+        if not self.enabled:
+            return "xml"
+        if self.setting in TOOL_MODES:
+            return self.setting
+        recorded = self.store.tool_mode(self.endpoint, model)
+        if recorded in self.modes:
+            return recorded
+        return self.modes[0]
+
+    def downgrade(self, model: str, mode: str, reason: str = "") -> str | None:
+        """Record that mode failed; returns the next mode to try, or None."""
+        if self.setting in TOOL_MODES or mode not in self.modes:
+            return None
+        position = self.modes.index(mode)
+        if position + 1 >= len(self.modes):
+            return None
+        fallback = self.modes[position + 1]
+        self.store.record(self.endpoint, model, tool_mode=fallback, rejected=mode, reason=reason[:200])
+        return fallback
+
+    def confirm(self, model: str, mode: str) -> None:
+        """Record that mode produced a structured tool call."""
+        if self.enabled and self.setting not in TOOL_MODES:
+            self.store.record(self.endpoint, model, tool_mode=mode)
+
+
+_store: CapabilityStore | None = None
+
+
+def get_capability_store() -> CapabilityStore:
+    """Get the process-wide capability record."""
+    global _store
+    if _store is None:
+        _store = CapabilityStore()
+    return _store
@@ -0,0 +1,292 @@
+"""
+Token-budgeted conversation window.
+
+Providers resend the whole ``conversation_history`` with every prompt.
+``ContextWindow.compact`` keeps it under a token budget derived from the
+model's context length (read from the server's ``/models`` where
+available) minus the reply's ``max_tokens``:
+
+1. older tool outputs are cut to their head and tail
+2. older long messages are cut the same way
+3. the oldest turns are folded into one summary message
+
+The system prompt and the last ``keep_recent`` messages are never touched.
+Compaction edits the history in place and goes down to LOW_WATER of the
+budget, so it runs rarely and the history stays byte-stable in between.
+
+Tokens are estimated offline (no tokenizer download): the larger of the
+word/punctuation count and UTF-8 bytes / 4, which errs on the high side
+for code and non-English text.
+
+Env vars:
+- AGENTZERO_CONTEXT_BUDGET: max prompt tokens (default: model context
+  length minus max_tokens)
+- AGENTZERO_CONTEXT_KEEP: recent messages always kept verbatim (default 6)
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+DEFAULT_CONTEXT_LENGTH = 8192
+CONTEXT_BUDGET = int(os.getenv("AGENTZERO_CONTEXT_BUDGET", "0"))
+KEEP_RECENT = int(os.getenv("AGENTZERO_CONTEXT_KEEP", "6"))
+# Compact down to this fraction of the budget
+LOW_WATER = 0.75
+# Per-message overhead of the chat format
+MESSAGE_OVERHEAD = 4
+# Head + tail kept of compacted tool outputs / long messages
+TOOL_OUTPUT_KEEP = 600
+MESSAGE_KEEP = 1500
+SUMMARY_LINE_CHARS = 160
+
+TOOL_OUTPUT_PREFIX = "[tool output]"
+SUMMARY_PREFIX = "[earlier conversation, compacted]"
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=8192)
+def estimate_tokens(text: str) -> int:
+    """Fast offline token estimate for text."""
+    if not text:
+        return 0
+    return max(len(_PIECES.findall(text)), (len(text.encode("utf-8")) + 3) // 4)
+
+
+def message_tokens(message: dict) -> int:
+    content = message.get("content") or ""
+    if not isinstance(content, str):
+        content = str(content)
+    calls = sum(
+        estimate_tokens(str((call.get("function") or {}).get("arguments", ""))) + MESSAGE_OVERHEAD
+        for call in message.get("tool_calls") or []
+    )
+    return estimate_tokens(content) + calls + MESSAGE_OVERHEAD
+
+
+def context_length_of(entry: dict) -> int | None:
+    """Context length from a /models entry (OpenRouter, LM Studio, vLLM, llama.cpp)."""
+    candidates = (
+        entry.get("context_length"),
+        entry.get("max_context_length"),
+        entry.get("max_model_len"),
+        (entry.get("top_provider") or {}).get("context_length"),
+        (entry.get("meta") or {}).get("n_ctx_train"),
+    )
+    for value in candidates:
+        if isinstance(value, int) and value > 0:
+            return value
+    return None
+
+
+def is_tool_output(message: dict) -> bool:
+    return message.get("role") == "tool" or str(message.get("content", "")).startswith(TOOL_OUTPUT_PREFIX)
+
+
+def tool_output_message(title: str, output: str, call_id: str | None = None) -> dict:
+    """
+    History entry carrying a tool result back to the model.
+
+    With call_id it answers a native tool call (role "tool"); the content
+    is the same either way, so it reads the same when sent as text.
+    """
+    from ..tools.spool import MAX_OUTPUT_CHARS, clip
+
+    content = f"{TOOL_OUTPUT_PREFIX} {title}\n{clip(output, MAX_OUTPUT_CHARS)}"
+    if call_id:
+        return {"role": "tool", "tool_call_id": call_id, "content": content}
+    return {"role": "user", "content": content}
+
+
+class ToolTranscript:
+    """Collects a tool run's executor events into one history entry."""
+
+    _BATCH_HEADER = re.compile(r"^\[\d+/\d+\] ")
+
+    def __init__(self, title: str):
+        self.title = title
+        self.parts: list[str] = []
+        # Per-call output of a batch, split at the [n/m] headers
+        self.sections: list[list[str]] = []
+
+    def add(self, event: dict) -> None:
+        kind, content = event.get("type"), event.get("content") or ""
+        if kind == "tool_output":
+            text = content if event.get("partial") else content + "\n"
+            self.parts.append(text)
+            if self.sections:
+                self.sections[-1].append(text)
+        elif kind == "status" and self._BATCH_HEADER.match(content):
+            self.parts.append(f"{content}\n")
+            self.sections.append([])
+
+    def message(self, call_id: str | None = None) -> dict:
+        return tool_output_message(self.title, "".join(self.parts).rstrip("\n") or "(no output)", call_id)
+
+    def section_message(self, n: int, title: str, call_id: str | None = None) -> dict:
+        """History entry for the n-th call of a batch alone."""
+        output = "".join(self.sections[n]).rstrip("\n") if n < len(self.sections) else ""
+        return tool_output_message(title, output or "(no output)", call_id)
+
+
+def alternating(messages: list[dict]) -> list[dict]:
+    """
+    Copy of messages with consecutive user (or assistant) messages merged.
+
+    Tool results are user messages, so a result followed by the next
+    prompt gives two user turns in a row, which many chat templates
+    reject. Merging happens at send time only; the history keeps one
+    entry per event so compaction can still cut tool output on its own.
+    """
+    merged: list[dict] = []
+    for message in messages:
+        previous = merged[-1] if merged else None
+        if (
+            previous is not None
+            and message.get("role") in ("user", "assistant")
+            and message.get("role") == previous.get("role")
+            and isinstance(message.get("content"), str)
+            and isinstance(previous.get("content"), str)
+            and set(message) == set(previous) == {"role", "content"}
+        ):
+            merged[-1] = {"role": previous["role"], "content": f"{previous['content']}\n\n{message['content']}"}
+        else:
+            merged.append(message)
+    return merged
+
+
+def _cut(text: str, keep: int) -> str:
+    if len(text) <= keep + 100:
+        return text
+    head = keep * 2 // 3
+    tail = keep - head
+    return f"{text[:head]}\n[... {len(text) - keep} chars compacted ...]\n{text[-tail:]}"
+
+
+def _summary_lines(message: dict) -> list[str]:
+    content = str(message.get("content", ""))
+    if content.startswith(SUMMARY_PREFIX):
+        return content[len(SUMMARY_PREFIX):].strip().splitlines()
+    names = [(call.get("function") or {}).get("name", "") for call in message.get("tool_calls") or []]
+    if names:
+        content = f"{content} [called {', '.join(names)}]".strip()
+    content = " ".join(content.split())
+    if len(content) > SUMMARY_LINE_CHARS:
+        content = content[:SUMMARY_LINE_CHARS - 3] + "..."
+    return [f"- {message.get('role', 'user')}: {content}"]
+
+
+@dataclass
+class CompactionReport:
+    """What one compaction did."""
+    tokens_before: int
+    tokens_after: int
+    budget: int
+    tool_outputs_truncated: int = 0
+    messages_truncated: int = 0
+    messages_summarized: int = 0
+
+    def describe(self) -> str:
+        parts = []
+        if self.tool_outputs_truncated:
+            parts.append(f"{self.tool_outputs_truncated} tool outputs truncated")
+        if self.messages_truncated:
+            parts.append(f"{self.messages_truncated} messages truncated")
+        if self.messages_summarized:
+            parts.append(f"{self.messages_summarized} messages summarized")
+        return (
+            f"Context compacted: {self.tokens_before:,} -> {self.tokens_after:,} tokens "
+            f"(budget {self.budget:,}; {', '.join(parts) or 'nothing to compact'})"
+        )
+
+
+@dataclass
+class ContextWindow:
+    """Keeps a conversation history under a token budget."""
+    reserve: int = 1024
+    budget: int = CONTEXT_BUDGET
+    keep_recent: int = KEEP_RECENT
+    compactions: int = 0
+    last_tokens: int = 0
+    last_report: CompactionReport | None = None
+    tokens_saved: int = 0
+
+    def budget_for(self, context_length: int | None) -> int:
+        """Prompt-token budget for a model with the given context length."""
+        available = (context_length or DEFAULT_CONTEXT_LENGTH) - self.reserve
+        if self.budget > 0:
+            available = min(available, self.budget)
+        return max(available, 256)
+
+    def count(self, system_prompt: str, history: list[dict]) -> int:
+        return estimate_tokens(system_prompt) + MESSAGE_OVERHEAD + sum(message_tokens(m) for m in history)
+
+    def compact(
+        self, history: list[dict], system_prompt: str = "", context_length: int | None = None
+    ) -> CompactionReport | None:
+        """Shrink history in place if it is over budget; returns a report then."""
+        budget = self.budget_for(context_length)
+        total = self.count(system_prompt, history)
+        self.last_tokens = total
+        if total <= budget:
+            return None
+
+        target = int(budget * LOW_WATER)
+        report = CompactionReport(total, total, budget)
+        protected = max(len(history) - self.keep_recent, 0)
+
+        # 1-2: cut old tool outputs, then old long messages
+        for keep, tools_only in ((TOOL_OUTPUT_KEEP, True), (MESSAGE_KEEP, False)):
+            for i in range(protected):
+                if total <= target:
+                    break
+                message = history[i]
+                content = message.get("content")
+                if not isinstance(content, str) or is_tool_output(message) != tools_only:
+                    continue
+                if content.startswith(SUMMARY_PREFIX):
+                    continue
+                cut = _cut(content, keep)
+                if cut != content:
+                    before = message_tokens(message)
+                    history[i] = {**message, "content": cut}
+                    total -= before - message_tokens(history[i])
+                    if tools_only:
+                        report.tool_outputs_truncated += 1
+                    else:
+                        report.messages_truncated += 1
+
+        # 3: fold the oldest messages into a summary
+        if total > target and protected:
+            count = 0
+            running = total
+            while count < protected and running > target:
+                running -= message_tokens(history[count])
+                count += 1
+            folded = history[:count]
+            lines = [line for m in folded for line in _summary_lines(m)]
+            summary = {"role": "user", "content": f"{SUMMARY_PREFIX}\n" + "\n".join(lines)}
+            # The summary itself must fit: keep only its newest lines
+            while lines and message_tokens(summary) > max(target - running, MESSAGE_OVERHEAD * 4):
+                lines.pop(0)
+                summary["content"] = f"{SUMMARY_PREFIX}\n" + "\n".join(lines)
+            history[:count] = [summary]
+            report.messages_summarized += sum(1 for m in folded if not str(m.get("content", "")).startswith(SUMMARY_PREFIX))
+            total = running + message_tokens(summary)
+
+        report.tokens_after = total
+        self.last_tokens = total
+        self.last_report = report
+        self.compactions += 1
+        self.tokens_saved += report.tokens_before - report.tokens_after
+        return report
+
+    def get_stats(self) -> dict:
+        return {
+            "prompt_tokens_estimate": self.last_tokens,
+            "compactions": self.compactions,
+            "tokens_saved": self.tokens_saved,
+            "last_compaction": self.last_report.describe() if self.last_report else None,
+        }
@@ -16,6 +16,10 @@ class AgentEvent:
     type: str
     content: str
     tool_call: Optional[dict] = None
+    partial: bool = False  # tool_output chunk of a command still running
+    calls: Optional[list] = None  # tool_batch: one tool_request-style dict per call
+    handle: Optional[str] = None  # tool_output: spool handle for read_output
+    duration: Optional[float] = None  # batch status header: the call's seconds
 
 
 # Patterns and their tool responses
@@ -36,11 +40,11 @@ COMMAND_PATTERNS = [
     
     # Project info
     (r"(what|which).*(python|node|npm|version)", "shell", "python --version && node --version 2>/dev/null || echo 'node not found'", "Check versions"),
-    (r"(project|folder).*(structure|tree)", "shell", "find . -type f -name '*.py' | head -20", "Show project structure"),
+    (r"(project|folder).*(structure|tree)", "list_files", ".", "Show project structure"),
     
     # Search
-    (r"(find|search|grep|look for).+?['\"](.+?)['\"]", "shell", r"grep -rn '\2' --include='*.py' . | head -20", "Search in code"),
-    (r"(find|search).*(function|class|def)\s+(\w+)", "shell", r"grep -rn 'def \3\|class \3' --include='*.py' .", "Find definition"),
+    (r"(find|search|grep|look for).+?['\"](.+?)['\"]", "search_text", r"-F -m 20 -g '*.py' '\2' .", "Search in code"),
+    (r"(find|search).*(function|class|def)\s+(\w+)", "search_text", r"-g '*.py' '(def|class) \3\b' .", "Find definition"),
     
     # System info
     (r"(pwd|where|current).*(directory|folder|am i)", "shell", "pwd", "Show current directory"),
@@ -151,10 +155,25 @@ class LocalBackend:
         """Execute tool (real execution)."""
         from .tools.executor import execute_tool as real_execute
         
-        async for event in real_execute(tool_name, command, cwd):
+        async for event in real_execute(tool_name, command, cwd, stream=True):
             yield AgentEvent(
                 type=event.get("type", "status"),
-                content=event.get("content", "")
+                content=event.get("content", ""),
+                partial=event.get("partial", False),
+                handle=event.get("handle"),
+                duration=event.get("duration")
+            )
+    
+    async def execute_batch(self, calls: list, cwd: str | None = None) -> AsyncGenerator[AgentEvent, None]:
+        """Execute several tool calls, read-only ones concurrently."""
+        from .tools.executor import execute_tool_batch
+        
+        async for event in execute_tool_batch(calls, cwd):
+            yield AgentEvent(
+                type=event.get("type", "status"),
+                content=event.get("content", ""),
+                handle=event.get("handle"),
+                duration=event.get("duration")
             )
     
     async def close(self):
@@ -163,10 +182,13 @@ class LocalBackend:
     
     def get_stats(self) -> dict:
         """Get backend statistics."""
+        from .tools.result_cache import get_result_cache
+        
         return {
             "backend": "Local (Deterministic)",
             "patterns": len(COMMAND_PATTERNS),
             "history_length": len(self.history),
+            "tool_cache": get_result_cache().get_stats(),
         }
 
 
@@ -1,15 +1,16 @@
 """MCP Gateway LLM provider for fallback."""
 
-import json
 import os
-import urllib.error
-import urllib.request
 from typing import Any
 
-from .base import LLMProvider
+import httpx
 
+from . import transport
+from .base import AsyncLLMProvider
+from .retry import RetryPolicy, request_with_retry, request_with_retry_sync
 
-class MCPGatewayClient(LLMProvider):
+
+class MCPGatewayClient(AsyncLLMProvider):
     """MCP Gateway client (borg.tools) for LLM inference."""
 
     BASE_URL = "https://mcp.borg.tools/v1/inference"
@@ -18,31 +19,60 @@ class MCPGatewayClient(LLMProvider):
         """Initialize from observer config section."""
         self.api_key = os.environ.get("MCP_GATEWAY_API_KEY") or config.get("mcp_api_key", "")
         self.timeout = config.get("timeout", 30)
+        # Observer decisions are waited for: retry briefly, never for long
+        self.retry = RetryPolicy(attempts=2, max_delay=5)
 
     def is_available(self) -> bool:
         """Check if API key is configured."""
         return bool(self.api_key)
 
-    def complete(self, prompt: str, system: str = "") -> str:
-        """Send completion request to MCP Gateway."""
-        if not self.api_key:
-            return ""
-
+    def _request(self, prompt: str, system: str) -> tuple[dict, dict]:
+        """Payload and headers of a completion request."""
         payload = {"prompt": prompt}
         if system:
             payload["system"] = system
-
         headers = {
             "Content-Type": "application/json",
             "X-API-Key": self.api_key,
         }
+        return payload, headers
+
+    @staticmethod
+    def _text(resp: httpx.Response) -> str:
+        resp.raise_for_status()
+        data = resp.json()
+        return data.get("response", data.get("text", ""))
+
+    def complete(self, prompt: str, system: str = "") -> str:
+        """Send completion request to MCP Gateway (blocks; see complete_async)."""
+        if not self.api_key:
+            return ""
+
+        payload, headers = self._request(prompt, system)
+        try:
+            resp = request_with_retry_sync(
+                lambda: transport.get_sync_client().post(
+                    self.BASE_URL, json=payload, headers=headers, timeout=self.timeout
+                ),
+                self.retry,
+            )
+            return self._text(resp)
+        except (httpx.HTTPError, ValueError, KeyError):
+            return ""
 
-        body = json.dumps(payload).encode("utf-8")
-        request = urllib.request.Request(self.BASE_URL, data=body, headers=headers, method="POST")
+    async def complete_async(self, prompt: str, system: str = "") -> str:
+        """Send completion request to MCP Gateway on the pooled async client."""
+        if not self.api_key:
+            return ""
 
+        payload, headers = self._request(prompt, system)
         try:
-            with urllib.request.urlopen(request, timeout=self.timeout) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-                return data.get("response", data.get("text", ""))
-        except (urllib.error.URLError, urllib.error.HTTPError, KeyError):
+            resp = await request_with_retry(
+                lambda: transport.get_async_client().post(
+                    self.BASE_URL, json=payload, headers=headers, timeout=self.timeout
+                ),
+                self.retry,
+            )
+            return self._text(resp)
+        except (httpx.HTTPError, ValueError, KeyError):
             return ""
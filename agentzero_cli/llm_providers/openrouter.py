@@ -2,13 +2,37 @@
 OpenRouter Backend for AgentZeroCLI
 Real LLM integration with load balancing
 """
+import asyncio
 import os
-import json
 import random
+import time
 import httpx
 from typing import AsyncGenerator, Optional, List
 from dataclasses import dataclass
 
+from . import transport
+from .streaming import ChatStream, ReadAhead
+from .capabilities import ToolModeSelector, get_capability_store, rejects_tools
+from .context_window import ContextWindow, ToolTranscript, alternating, context_length_of
+from .hedging import HedgePolicy, race
+from .model_router import ModelRouter
+from .prompt_cache import PROMPT_CACHE, PromptCacheStats, supports_cache_control, with_cache_breakpoints
+from .request_metrics import RequestMetrics
+from .retry import RATE_LIMIT, RetryPolicy, get_rate_limiter, is_retryable, parse_retry_after, retrying_stream
+from .tool_schema import (
+    ReplyReader,
+    batch_results,
+    messages_for_mode,
+    request_fields,
+    system_prompt,
+    take_call,
+    unanswered,
+)
+from .tool_tags import ToolTag, parse_tool_tags
+
+# Only these share OpenRouter's per-account request limit (AGENTZERO_RATE_LIMIT)
+FREE_MODEL_SUFFIX = ":free"
+
 # Default models for load balancing
 DEFAULT_MODELS = [
     "openrouter/polaris-alpha",
@@ -32,6 +56,10 @@ class AgentEvent:
     type: str  # status, thought, tool_request, tool_output, final_response, error
     content: str
     tool_call: Optional[ToolCall] = None
+    partial: bool = False  # tool_output chunk of a command still running
+    calls: Optional[list] = None  # tool_batch: one tool_request-style dict per call
+    handle: Optional[str] = None  # tool_output: spool handle for read_output
+    duration: Optional[float] = None  # batch status header: the call's seconds
 
 
 class OpenRouterBackend:
@@ -41,6 +69,10 @@ class OpenRouterBackend:
     """
     
     BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
+    MODELS_URL = "https://openrouter.ai/api/v1/models"
+    MAX_TOKENS = 4096
+    # Errors that are about the account, not the model: no failover
+    ACCOUNT_ERRORS = (401, 402, 403)
     
     SYSTEM_PROMPT = """You are Agent Zero, an AI coding assistant running in a terminal.
 You help users with coding tasks by:
@@ -51,12 +83,16 @@ You help users with coding tasks by:
 
 IMPORTANT: When you need to execute a command, respond with a tool call in this format:
 <tool name="shell" command="the command" reason="why you need this"/>
+Use one tag per tool call; several tags may appear in one response. Escape a " inside a value as \\".
 
 Available tools:
 - shell: Execute shell commands
-- read_file: Read file contents
+- read_file: Read file contents (path, or path:START-END for a line range)
 - write_file: Write to a file
 - edit_file: Edit a file
+- list_files: List directory contents recursively (skips .gitignore'd files)
+- search_text: Search file contents (rg-style: [-i] [-F] [-C N] [-g GLOB] PATTERN [PATH])
+- read_output: Page through a truncated output by its handle (HANDLE [OFFSET [LIMIT]], in lines)
 
 Always explain your reasoning before executing commands.
 Be concise but thorough. Prioritize user safety."""
@@ -65,7 +101,8 @@ Be concise but thorough. Prioritize user safety."""
         self,
         api_key: Optional[str] = None,
         models: Optional[List[str]] = None,
-        timeout: int = 60
+        timeout: int = 60,
+        native_tools: Optional[str] = None
     ):
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         if not self.api_key:
@@ -81,118 +118,305 @@ Be concise but thorough. Prioritize user safety."""
             self.models = DEFAULT_MODELS
         
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
         self.conversation_history: list[dict] = []
+        # Native calls of the last reply still waiting for their result
+        self.pending_calls: list[ToolTag] = []
+        # Results of tools run while their reply is still streaming
+        self._held_results: Optional[list[dict]] = None
         self.current_model_index = 0
         self.request_count = 0
+        self.last_usage = None
+        # Native tool calling per model (AGENTZERO_NATIVE_TOOLS, llm_providers/capabilities.py)
+        self.tool_modes = ToolModeSelector("openrouter", ("tools", "xml"), native_tools)
+        # Token budget for the resent history (llm_providers/context_window.py)
+        self.context = ContextWindow(reserve=self.MAX_TOKENS)
+        self._models_fetched = False
+        self.prompt_cache = PromptCacheStats()
+        self.metrics = RequestMetrics()
+        # Latency averages and circuit breakers per model (llm_providers/model_router.py)
+        self.router = ModelRouter(self.models)
+        # Second request to another model when the first is slow (llm_providers/hedging.py)
+        self.hedge = HedgePolicy()
+        # Backoff for transient errors and a token bucket shared by all sessions
+        # for :free models (llm_providers/retry.py)
+        self.retry = RetryPolicy()
+        self.limiter = get_rate_limiter(self.BASE_URL, RATE_LIMIT)
     
-    def _get_next_model(self) -> str:
-        """Round-robin load balancing between models"""
-        model = self.models[self.current_model_index]
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client shared by all backends (llm_providers/transport.py)."""
+        return transport.get_async_client()
+    
+    async def warm_up(self) -> bool:
+        """Pre-connect to OpenRouter so the next prompt skips connection setup."""
+        return await transport.warm_up(self.BASE_URL)
+    
+    def _candidates(self) -> list[str]:
+        """Models for the next request, best first (round-robin among equals)"""
+        candidates = self.router.candidates(self.current_model_index)
         self.current_model_index = (self.current_model_index + 1) % len(self.models)
         self.request_count += 1
-        return model
+        return candidates
+    
+    def _limiter_for(self, model: str):
+        """The shared rate limiter if model is a rate-limited free model."""
+        return self.limiter if model.endswith(FREE_MODEL_SUFFIX) else None
+    
+    def _get_next_model(self) -> str:
+        """Best model for the next request"""
+        return self._candidates()[0]
+    
+    def _next_candidate(self, candidates: list[str], model: str) -> Optional[str]:
+        """Candidate after model, or None when all were tried"""
+        position = candidates.index(model)
+        return candidates[position + 1] if position + 1 < len(candidates) else None
+    
+    async def _attempt(self, model: str, mode: str) -> AsyncGenerator[tuple, None]:
+        """
+        One streamed request to model. Yields ("item", text or ToolTag) as the
+        reply arrives and then ("done", reader), or a single
+        ("error", status_code, body, retry_after) for a failed request.
+        """
+        # System prompt + history is a stable prefix; only compaction changes it
+        messages = alternating(messages_for_mode([
+            {"role": "system", "content": system_prompt(mode, self.SYSTEM_PROMPT)},
+            *self.conversation_history
+        ], mode))
+        if PROMPT_CACHE and supports_cache_control(model):
+            messages = with_cache_breakpoints(messages)
+        limiter = self._limiter_for(model)
+        if limiter:
+            await limiter.acquire()
+        async with self.client.stream(
+            "POST",
+            self.BASE_URL,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "HTTP-Referer": "https://agentzerocli.dev",
+                "X-Title": "AgentZeroCLI"
+            },
+            json={
+                "model": model,
+                "messages": messages,
+                "stream": True,
+                "max_tokens": self.MAX_TOKENS,
+                "usage": {"include": True},
+                **request_fields(mode)
+            },
+            timeout=self.timeout
+        ) as response:
+            if response.status_code != 200:
+                error_text = (await response.aread()).decode(errors="replace")
+                yield ("error", response.status_code, error_text, response.headers.get("retry-after"))
+                return
+            reader = ReplyReader(mode)
+            async for item in reader.items(response.aiter_bytes()):
+                yield ("item", item)
+            yield ("done", reader)
     
     def _get_random_model(self) -> str:
         """Random model selection"""
         return random.choice(self.models)
     
+    async def _context_length(self, model: str) -> Optional[int]:
+        """Context length of model, from the capability record or OpenRouter's model list"""
+        store = get_capability_store()
+        known = store.get("openrouter", model).get("context_length")
+        if known or self._models_fetched:
+            return known
+        self._models_fetched = True
+        try:
+            response = await self.client.get(self.MODELS_URL, timeout=10)
+            if response.status_code == 200:
+                for entry in response.json().get("data", []):
+                    length = context_length_of(entry)
+                    if entry.get("id") in self.models and length:
+                        store.record("openrouter", entry["id"], context_length=length)
+        except (httpx.HTTPError, ValueError):
+            pass
+        return store.get("openrouter", model).get("context_length")
+    
     async def send_prompt(self, user_text: str) -> AsyncGenerator[AgentEvent, None]:
         """
         Send a prompt to the LLM and stream the response.
         Yields AgentEvent objects for different response types.
         """
-        model = self._get_next_model()
+        candidates = self._candidates()
+        model = candidates[0]
         yield AgentEvent(type="status", content=f"Using model: {model}")
         
         # Add user message to history
+        # Calls the user rejected still need an answer before the next turn
+        self.conversation_history += unanswered(self.pending_calls)
         self.conversation_history.append({
             "role": "user",
             "content": user_text
         })
         
-        messages = [
-            {"role": "system", "content": self.SYSTEM_PROMPT},
-            *self.conversation_history
-        ]
+        mode = self.tool_modes.mode(model)
         
         try:
-            async with self.client.stream(
-                "POST",
-                self.BASE_URL,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "HTTP-Referer": "https://agentzerocli.dev",
-                    "X-Title": "AgentZeroCLI"
-                },
-                json={
-                    "model": model,
-                    "messages": messages,
-                    "stream": True,
-                    "max_tokens": 4096
-                }
-            ) as response:
-                if response.status_code != 200:
-                    error_text = await response.aread()
-                    yield AgentEvent(
-                        type="error",
-                        content=f"API Error {response.status_code}: {error_text.decode()}"
-                    )
-                    return
-                
-                full_response = ""
-                buffer = ""
-                
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:]
-                        if data == "[DONE]":
-                            break
+            self._held_results = []
+            report = self.context.compact(
+                self.conversation_history,
+                system_prompt(mode, self.SYSTEM_PROMPT),
+                await self._context_length(model)
+            )
+            if report:
+                yield AgentEvent(type="status", content=report.describe())
+            
+            retries = 0
+            while True:
+                self.router.started(model)
+                started = time.monotonic()
+                streamed = False
+                failure = None
+                error = None
+                retry_after = None
+                retryable = False
+                attempt = self._attempt(model, mode)
+                events = None
+                try:
+                    if self.hedge.enabled:
+                        hedged = []
                         
-                        try:
-                            chunk = json.loads(data)
-                            delta = chunk.get("choices", [{}])[0].get("delta", {})
-                            content = delta.get("content", "")
-                            
-                            if content:
-                                full_response += content
-                                buffer += content
-                                
-                                # Yield chunks for streaming display
-                                if len(buffer) > 10 or "\n" in buffer:
-                                    yield AgentEvent(
-                                        type="thought",
-                                        content=buffer
-                                    )
-                                    buffer = ""
-                                
-                        except json.JSONDecodeError:
-                            continue
+                        def start_hedge(candidates=candidates, model=model, hedged=hedged):
+                            fallback = self._next_candidate(candidates, model)
+                            if fallback is None or not self.hedge.allow():
+                                return None
+                            limiter = self._limiter_for(fallback)
+                            if limiter and not limiter.has_token():
+                                # A hedge is optional; don't queue it behind real requests
+                                return None
+                            self.hedge.hedges += 1
+                            self.router.started(fallback)
+                            hedged.append((fallback, self.tool_modes.mode(fallback), time.monotonic()))
+                            return self._attempt(*hedged[0][:2])
+                        
+                        self.hedge.requests += 1
+                        delay = self.hedge.delay()
+                        winner, event, attempt = await race(attempt, delay, start_hedge, lambda e: e[0] != "error")
+                        if hedged and winner == 1:
+                            self.hedge.wins += 1
+                            # The primary's TTFT was at least this long; without it
+                            # the slow tail never shows up in the averages
+                            lost_after = time.monotonic() - started
+                            self.router.record_censored_ttft(model, lost_after)
+                            self.hedge.record_ttft(lost_after)
+                            yield AgentEvent(type="status", content=f"No first token from {model} after {delay:.1f}s, continuing with {hedged[0][0]}")
+                            model, mode, started = hedged[0]
+                        elif hedged:
+                            self.hedge.losses += 1
+                            self.router.record_censored_ttft(hedged[0][0], time.monotonic() - hedged[0][2])
+                    else:
+                        event = await attempt.__anext__()
+                    
+                    # Text and tool requests are shown as they arrive; the reply is
+                    # read to the end meanwhile, so approval time is not request time
+                    events = ReadAhead(attempt)
+                    while event[0] == "item":
+                        streamed = True
+                        if isinstance(event[1], ToolTag):
+                            for tool_event in self._tool_requests(event[1], events):
+                                yield tool_event
+                        else:
+                            yield self._stream_event(event[1])
+                        event = await events.__anext__()
+                    
+                    if event[0] == "error":
+                        _, status_code, error_text, retry_after = event
+                        retry_after = parse_retry_after(retry_after)
+                        if mode != "xml" and rejects_tools(status_code, error_text):
+                            fallback = self.tool_modes.downgrade(model, mode, error_text)
+                            if fallback:
+                                yield AgentEvent(type="status", content=f"{model}: no {mode} support, using {fallback} tool calls")
+                                mode = fallback
+                                continue
+                        failure = f"API Error {status_code}: {error_text}"
+                        if status_code in self.ACCOUNT_ERRORS:
+                            # Key or credit problem: every model fails the same way
+                            yield AgentEvent(type="error", content=failure)
+                            return
+                        self.router.record_failure(model, failure, status_code, retry_after)
+                        self.metrics.record_failure(model)
+                        retryable = is_retryable(status_code)
+                    else:
+                        reader = event[1]
+                        if reader.stream.error and not streamed:
+                            failure = f"API Error: {reader.stream.error.message}"
+                            self.router.record_failure(model, failure)
+                            self.metrics.record_failure(model)
+                            retryable = is_retryable(reader.stream.error.code)
+                except httpx.TransportError as e:
+                    self.router.record_failure(model, f"{type(e).__name__}: {e}")
+                    self.metrics.record_failure(model)
+                    if streamed:
+                        raise
+                    failure, error, retryable = f"{model} unreachable ({type(e).__name__})", e, True
+                finally:
+                    await (events or attempt).aclose()
+                
+                if failure:
+                    # Failed before the first token: the next model gets the request
+                    fallback = self._next_candidate(candidates, model)
+                    if fallback is not None:
+                        self.router.failovers += 1
+                        yield AgentEvent(type="status", content=f"{model} failed ({failure[:80]}), switching to {fallback}")
+                        model, mode = fallback, self.tool_modes.mode(fallback)
+                        continue
+                    # Every model failed: back off and start over if it looks transient
+                    delay = self.retry.delay(retries + 1, retry_after) if retryable else None
+                    if delay is None:
+                        if error:
+                            raise error
+                        yield AgentEvent(type="error", content=failure)
+                        return
+                    retries += 1
+                    yield AgentEvent(type="status", content=f"{failure[:80]} - retrying in {delay:.1f}s ({retries}/{self.retry.attempts})")
+                    await asyncio.sleep(delay)
+                    candidates = self.router.candidates(self.current_model_index)
+                    model = candidates[0]
+                    mode = self.tool_modes.mode(model)
+                    continue
                 
-                # Yield remaining buffer
-                if buffer:
-                    yield AgentEvent(type="thought", content=buffer)
+                if reader.native_calls:
+                    self.tool_modes.confirm(model, mode)
                 
-                # Check for tool calls in full response
-                tool_call = self._parse_tool_call(full_response)
-                if tool_call:
-                    yield AgentEvent(
-                        type="tool_request",
-                        content=tool_call.command,
-                        tool_call=tool_call
+                self.last_usage = reader.stream.usage
+                first = reader.stream.first_token_at
+                self.prompt_cache.record(self.last_usage, first - started if first else None)
+                self.metrics.record(
+                    model,
+                    started,
+                    reader.stream,
+                    [{"role": "system", "content": system_prompt(mode, self.SYSTEM_PROMPT)}, *self.conversation_history],
+                    ended=events.closed_at
+                )
+                if reader.stream.error:
+                    self.router.record_failure(model, reader.stream.error.message)
+                    yield AgentEvent(type="error", content=f"API Error: {reader.stream.error.message}")
+                else:
+                    tokens = self.last_usage.completion_tokens if self.last_usage else 0
+                    if first:
+                        self.hedge.record_ttft(first - started)
+                    self.router.record_success(
+                        model,
+                        first - started if first else None,
+                        tokens,
+                        events.closed_at - first if first else 0.0
                     )
                 
-                # Save assistant response to history
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": full_response
-                })
+                # Save assistant response (with its tool calls) to history,
+                # then the results of tools that ran while it streamed
+                self.conversation_history.append(reader.history_message)
+                self._release_results()
                 
                 # Final response
                 yield AgentEvent(
                     type="final_response",
-                    content=self._clean_response(full_response)
+                    content=reader.prose.strip()
                 )
+                return
                 
         except httpx.TimeoutException:
             yield AgentEvent(type="error", content="Request timed out - try again")
@@ -200,9 +424,15 @@ Be concise but thorough. Prioritize user safety."""
             yield AgentEvent(type="error", content="Connection failed - check internet")
         except Exception as e:
             yield AgentEvent(type="error", content=f"Error: {str(e)}")
+        finally:
+            self._release_results()
     
     async def explain_risk(self, command: str) -> str:
         """Ask the LLM to explain the risk of a command."""
+        return "".join([chunk async for chunk in self.explain_risk_stream(command)])
+    
+    async def explain_risk_stream(self, command: str) -> AsyncGenerator[str, None]:
+        """Stream the risk explanation as it is generated."""
         model = self._get_random_model()
         
         prompt = f"""Analyze the security risk of this command:
@@ -217,28 +447,39 @@ Explain briefly:
 
 Be concise (max 100 words)."""
 
+        started = time.monotonic()
+        messages = [{"role": "user", "content": prompt}]
         try:
-            response = await self.client.post(
+            async with retrying_stream(
+                self.client,
+                "POST",
                 self.BASE_URL,
+                policy=self.retry,
+                limiter=self._limiter_for(model),
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "HTTP-Referer": "https://agentzerocli.dev"
                 },
                 json={
                     "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 512
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
-            else:
-                return f"Could not analyze risk: API error {response.status_code}"
+                    "messages": messages,
+                    "max_tokens": 512,
+                    "stream": True,
+                    "usage": {"include": True}
+                },
+                timeout=self.timeout
+            ) as response:
+                if response.status_code != 200:
+                    self.metrics.record_failure(model)
+                    yield f"Could not analyze risk: API error {response.status_code}"
+                    return
+                stream = ChatStream()
+                async for text in stream.text_chunks(response.aiter_bytes()):
+                    yield text
+                self.metrics.record(model, started, stream, messages)
                 
         except Exception as e:
-            return f"Could not analyze risk: {str(e)}"
+            yield f"Could not analyze risk: {str(e)}"
     
     async def execute_tool(self, tool_name: str, command: str, cwd: str | None = None) -> AsyncGenerator[AgentEvent, None]:
         """
@@ -252,45 +493,114 @@ Be concise (max 100 words)."""
         # Import here to avoid circular imports
         from .tools.executor import execute_tool as real_execute
         
-        async for event in real_execute(tool_name, command, cwd):
+        transcript = ToolTranscript(f"{tool_name}: {command}")
+        async for event in real_execute(tool_name, command, cwd, stream=True):
+            transcript.add(event)
             yield AgentEvent(
                 type=event.get("type", "status"),
-                content=event.get("content", "")
+                content=event.get("content", ""),
+                partial=event.get("partial", False),
+                handle=event.get("handle"),
+                duration=event.get("duration")
             )
+        # The result goes back to the model with the next prompt
+        call_id = take_call(self.pending_calls, tool_name, command)
+        self._add_results([transcript.message(call_id)])
     
-    def _parse_tool_call(self, text: str) -> Optional[ToolCall]:
-        """Parse tool call from LLM response"""
-        import re
-        
-        # Match <tool name="..." command="..." reason="..."/>
-        pattern = r'<tool\s+name="([^"]+)"\s+command="([^"]+)"\s+reason="([^"]+)"'
-        match = re.search(pattern, text)
+    async def execute_batch(self, calls: list, cwd: str | None = None) -> AsyncGenerator[AgentEvent, None]:
+        """Execute several tool calls, read-only ones concurrently."""
+        from .tools.executor import execute_tool_batch
         
-        if match:
-            return ToolCall(
-                name=match.group(1),
-                command=match.group(2),
-                reason=match.group(3)
+        transcript = ToolTranscript(f"batch of {len(calls)} calls")
+        async for event in execute_tool_batch(calls, cwd):
+            transcript.add(event)
+            yield AgentEvent(
+                type=event.get("type", "status"),
+                content=event.get("content", ""),
+                handle=event.get("handle"),
+                duration=event.get("duration")
             )
+        self._add_results(batch_results(transcript, calls, self.pending_calls))
+    
+    def _add_results(self, messages: list[dict]) -> None:
+        """Tool results go after the reply that asked for them, which may still be streaming"""
+        if self._held_results is None:
+            self.conversation_history += messages
+        else:
+            self._held_results += messages
+    
+    def _release_results(self) -> None:
+        """Add the results held back while the reply streamed"""
+        if self._held_results:
+            self.conversation_history += self._held_results
+        self._held_results = None
+    
+    def _stream_event(self, item: str | ToolTag) -> AgentEvent:
+        """Turn a parser item into a thought or tool_request event"""
+        if isinstance(item, str):
+            return AgentEvent(type="thought", content=item)
+        tool_call = ToolCall(name=item.name, command=item.command, reason=item.reason)
+        return AgentEvent(type="tool_request", content=tool_call.command, tool_call=tool_call)
+    
+    def _tool_requests(self, tag: ToolTag, events: ReadAhead) -> list[AgentEvent]:
+        """
+        Events for a tool call that just closed, batched with the calls
+        already read behind it. Native calls are kept until their result comes in.
+        """
+        ready = events.take_ready(
+            lambda e: e[0] == "item" and (isinstance(e[1], ToolTag) or not e[1].strip())
+        )
+        tags = [tag, *(e[1] for e in ready if isinstance(e[1], ToolTag))]
+        self.pending_calls += [t for t in tags if t.call_id]
+        return self._group_requests([self._stream_event(t) for t in tags])
+    
+    def _group_requests(self, requests: list[AgentEvent]) -> list[AgentEvent]:
+        """Several calls in one reply go out as one tool_batch event"""
+        if len(requests) < 2:
+            return requests
+        calls = [
+            {"tool_name": e.tool_call.name, "command": e.tool_call.command, "reason": e.tool_call.reason}
+            for e in requests
+        ]
+        return [AgentEvent(type="tool_batch", content=f"{len(calls)} tool calls", calls=calls)]
+    
+    def _parse_tool_call(self, text: str) -> Optional[ToolCall]:
+        """Parse the first tool call from an LLM response"""
+        _, tags = parse_tool_tags(text)
+        if tags:
+            return ToolCall(name=tags[0].name, command=tags[0].command, reason=tags[0].reason)
         return None
     
     def _clean_response(self, text: str) -> str:
         """Remove tool calls from final response"""
-        import re
-        return re.sub(r'<tool[^>]+/?>', '', text).strip()
+        return parse_tool_tags(text)[0].strip()
     
     def get_stats(self) -> dict:
         """Get backend statistics"""
+        from .tools.result_cache import get_result_cache
+        
         return {
             "models": self.models,
             "current_index": self.current_model_index,
             "total_requests": self.request_count,
-            "history_length": len(self.conversation_history)
+            "history_length": len(self.conversation_history),
+            "last_usage": self.last_usage.raw if self.last_usage else None,
+            "tool_modes": {model: self.tool_modes.mode(model) for model in self.models},
+            "context": self.context.get_stats(),
+            "prompt_cache": self.prompt_cache.get_stats(),
+            "metrics": self.metrics.get_stats(),
+            "routing": self.router.get_stats(),
+            "hedging": self.hedge.get_stats(),
+            "retry": self.retry.get_stats(),
+            "rate_limit": self.limiter.get_stats() if self.limiter else None,
+            "tool_cache": get_result_cache().get_stats(),
+            "transport": transport.get_transport_stats(),
         }
     
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """Release the backend"""
+        # The HTTP transport is shared with other backends and stays open
+        pass
 
 
 def create_backend(
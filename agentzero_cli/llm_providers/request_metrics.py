@@ -0,0 +1,221 @@
+"""
+Latency and token accounting per request.
+
+Every streamed call records time to first token (TTFT), inter-token
+latency (ITL: time from the first to the last token over the tokens in
+between), total duration, prompt/completion/cached tokens and tokens per
+second. Token counts come from the usage report (``stream_options.
+include_usage``, OpenRouter's ``usage.include``, llama.cpp ``timings``);
+without one they are estimated from the text and the request is marked
+``estimated``.
+
+``RequestMetrics`` aggregates the records per model and for the whole
+session in rolling histograms (the last METRICS_WINDOW samples). Backends
+report them in ``get_stats()["metrics"]``; the TUI live card and the CLI
+``/status`` show ``summary_lines()`` and ``export_json`` writes the lot.
+
+Env vars:
+- AGENTZERO_METRICS_WINDOW: samples kept per histogram (default 500)
+"""
+
+import json
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .context_window import estimate_tokens, message_tokens
+
+METRICS_WINDOW = int(os.getenv("AGENTZERO_METRICS_WINDOW", "500"))
+
+
+def _round(value: float | None, digits: int = 3) -> float | None:
+    return round(value, digits) if value is not None else None
+
+
+class RollingHistogram:
+    """Percentiles over the last ``window`` samples."""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.count = 0
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def add(self, value: float | None) -> None:
+        if value is not None:
+            self.count += 1
+            self._samples.append(value)
+
+    def percentile(self, p: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+    def get_stats(self) -> dict:
+        samples = self._samples
+        return {
+            "count": self.count,
+            "mean": _round(sum(samples) / len(samples)) if samples else None,
+            "p50": _round(self.percentile(50)),
+            "p90": _round(self.percentile(90)),
+            "p99": _round(self.percentile(99)),
+            "max": _round(max(samples)) if samples else None,
+        }
+
+
+@dataclass
+class RequestRecord:
+    """Timings and token counts of one streamed call."""
+    model: str
+    duration: float
+    ttft: float | None = None
+    itl: float | None = None
+    tokens_per_sec: float | None = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    estimated: bool = False
+    at: float = field(default_factory=time.time)
+
+
+class _Aggregate:
+    """Totals and histograms over a set of requests."""
+
+    def __init__(self, window: int):
+        self.requests = 0
+        self.failures = 0
+        self.estimated = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.ttft = RollingHistogram(window)
+        self.itl = RollingHistogram(window)
+        self.duration = RollingHistogram(window)
+        self.tokens_per_sec = RollingHistogram(window)
+
+    def add(self, record: RequestRecord) -> None:
+        self.requests += 1
+        self.estimated += record.estimated
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.cached_tokens += record.cached_tokens
+        self.ttft.add(record.ttft)
+        self.itl.add(record.itl)
+        self.duration.add(record.duration)
+        self.tokens_per_sec.add(record.tokens_per_sec)
+
+    def get_stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "estimated": self.estimated,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "ttft": self.ttft.get_stats(),
+            "itl": self.itl.get_stats(),
+            "duration": self.duration.get_stats(),
+            "tokens_per_sec": self.tokens_per_sec.get_stats(),
+        }
+
+
+class RequestMetrics:
+    """Per-model and per-session accounting of one backend's calls."""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self.started_at = time.time()
+        self.session = _Aggregate(window)
+        self.models: dict[str, _Aggregate] = {}
+        self.last: RequestRecord | None = None
+
+    def _model(self, model: str) -> _Aggregate:
+        if model not in self.models:
+            self.models[model] = _Aggregate(self.window)
+        return self.models[model]
+
+    def record(
+        self,
+        model: str,
+        started: float,
+        stream: Any = None,
+        messages: list[dict] | None = None,
+        text: str = "",
+        ended: float | None = None,
+    ) -> RequestRecord:
+        """
+        Add a finished call that started at monotonic time ``started``.
+
+        stream is the call's streaming.ChatStream (usage and token times);
+        messages and text (default: the streamed text) are only used to
+        estimate tokens when the server sent no usage. ended is when the
+        response closed (default: now).
+        """
+        if ended is None:
+            ended = time.monotonic()
+        usage = getattr(stream, "usage", None)
+        first = getattr(stream, "first_token_at", None)
+        last = getattr(stream, "last_token_at", None)
+        if usage is not None and (usage.prompt_tokens or usage.completion_tokens):
+            prompt, completion, cached, estimated = usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens, False
+        else:
+            prompt = sum(message_tokens(m) for m in messages or [])
+            completion = estimate_tokens(text or getattr(stream, "text", ""))
+            cached, estimated = 0, True
+        generating = last - first if first is not None and last is not None else 0.0
+        record = RequestRecord(
+            model=model,
+            duration=ended - started,
+            ttft=first - started if first is not None else None,
+            itl=generating / (completion - 1) if completion > 1 and generating > 0 else None,
+            tokens_per_sec=completion / generating if completion > 1 and generating > 0 else None,
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            cached_tokens=cached,
+            estimated=estimated,
+        )
+        self.session.add(record)
+        self._model(model).add(record)
+        self.last = record
+        return record
+
+    def record_failure(self, model: str) -> None:
+        """A call to model failed without a usable reply."""
+        self.session.failures += 1
+        self._model(model).failures += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "since": self.started_at,
+            "session": self.session.get_stats(),
+            "models": {model: aggregate.get_stats() for model, aggregate in self.models.items()},
+            "last": asdict(self.last) if self.last else None,
+        }
+
+    def summary_lines(self) -> list[str]:
+        """Short human-readable summary for status displays."""
+        session = self.session
+        if not session.requests:
+            return ["Requests: none yet"]
+        ttft, tps = session.ttft.get_stats(), session.tokens_per_sec.get_stats()
+        lines = [f"Requests: {session.requests}" + (f" ({session.failures} failed)" if session.failures else "")]
+        if ttft["p50"] is not None:
+            lines.append(f"TTFT: p50 {ttft['p50']:.2f}s p90 {ttft['p90']:.2f}s")
+        if tps["p50"] is not None:
+            lines.append(f"Speed: {tps['p50']:.1f} tok/s (p50)")
+        tokens = f"Tokens: {session.prompt_tokens} in / {session.completion_tokens} out"
+        if session.cached_tokens and session.prompt_tokens:
+            tokens += f" ({session.cached_tokens / session.prompt_tokens:.0%} cached)"
+        if session.estimated:
+            tokens += " ~"
+        lines.append(tokens)
+        return lines
+
+    def export_json(self, path: Path | str) -> Path:
+        """Write get_stats() as indented JSON; returns the path."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.get_stats(), indent=2), encoding="utf-8")
+        return path
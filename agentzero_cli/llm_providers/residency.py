@@ -0,0 +1,154 @@
+"""
+Keeps a local model loaded for the session.
+
+Local servers load a model on its first request (tens of seconds on a
+CPU-only box) and may unload it again when it sits idle, e.g. during a
+long approval pause. ``ResidencyManager`` sends a tiny warm-up request
+when the backend starts, and again whenever the backend has been idle for
+LOCAL_LLM_REWARM seconds, so prompts find the model resident:
+
+- Ollama: ``/api/generate`` with an empty prompt loads the model without
+  generating anything; ``keep_alive`` keeps it loaded and ``num_ctx``
+  (only when LOCAL_LLM_NUM_CTX is set) picks the context size. The
+  OpenAI-compatible endpoint used for chat takes neither, so num_ctx must
+  match what the server loads for it (OLLAMA_CONTEXT_LENGTH) or Ollama
+  reloads the model.
+- Other servers (LM Studio, llama.cpp, ...): a one-token completion.
+
+Load time (Ollama's ``load_duration``, else the warm-up's wall time) is
+reported separately from inference time in ``get_stats()``.
+
+Env vars:
+- LOCAL_LLM_WARMUP: set to false to send no warm-up requests
+- LOCAL_LLM_KEEP_ALIVE: Ollama keep_alive (default 30m)
+- LOCAL_LLM_NUM_CTX: Ollama context size to load the model with
+- LOCAL_LLM_REWARM: idle seconds before re-warming, 0 = never (default 240)
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Optional
+
+import httpx
+
+WARMUP = os.getenv("LOCAL_LLM_WARMUP", "true").lower() not in ("0", "false", "no")
+KEEP_ALIVE = os.getenv("LOCAL_LLM_KEEP_ALIVE", "30m")
+_num_ctx = os.getenv("LOCAL_LLM_NUM_CTX", "")
+NUM_CTX: Optional[int] = int(_num_ctx) if _num_ctx.isdigit() else None
+# Below Ollama's default 5 minute keep_alive, which each chat request resets
+REWARM_AFTER = float(os.getenv("LOCAL_LLM_REWARM", "240"))
+
+
+class ResidencyManager:
+    """Warm-up and idle re-warm of a LocalLLMBackend's model."""
+
+    def __init__(
+        self,
+        backend: Any,
+        enabled: bool = WARMUP,
+        keep_alive: str = KEEP_ALIVE,
+        num_ctx: Optional[int] = NUM_CTX,
+        rewarm_after: float = REWARM_AFTER,
+    ):
+        self.backend = backend
+        self.enabled = enabled
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.rewarm_after = rewarm_after
+        self.warmups = 0
+        self.failures = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.last_load: Optional[float] = None
+        self.requests = 0
+        self.inference_seconds = 0.0
+        self.last_used = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Warm up in the background and keep re-warming while idle."""
+        if not self.enabled or self._task is not None:
+            return
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        except RuntimeError:
+            pass
+
+    async def _run(self) -> None:
+        await self.backend.ready()
+        await self.warm()
+        while self.rewarm_after > 0:
+            idle_for = time.monotonic() - self.last_used
+            if idle_for < self.rewarm_after:
+                await asyncio.sleep(self.rewarm_after - idle_for)
+                continue
+            await self.warm()
+
+    def _ollama_root(self) -> str:
+        return self.backend.base_url.removesuffix("/v1")
+
+    async def warm(self) -> Optional[float]:
+        """Send one warm-up request; returns the load time, None on failure."""
+        model = self.backend.model
+        if not model or model == "default":
+            return None
+        started = time.monotonic()
+        try:
+            if self.backend.server_type == "ollama":
+                body: dict = {"model": model, "prompt": "", "keep_alive": self.keep_alive}
+                if self.num_ctx:
+                    body["options"] = {"num_ctx": self.num_ctx}
+                response = await self.backend.client.post(f"{self._ollama_root()}/api/generate", json=body, timeout=300)
+            else:
+                response = await self.backend.client.post(
+                    f"{self.backend.base_url}/chat/completions",
+                    json={
+                        "model": model,
+                        "messages": [{"role": "user", "content": "hi"}],
+                        "max_tokens": 1,
+                        "stream": False,
+                    },
+                    timeout=300,
+                )
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, ValueError):
+            self.failures += 1
+            return None
+        finally:
+            self.last_used = time.monotonic()
+        self.warmups += 1
+        load_duration = data.get("load_duration") if isinstance(data, dict) else None
+        seconds = load_duration / 1e9 if isinstance(load_duration, (int, float)) else time.monotonic() - started
+        self.last_load = seconds
+        # Ollama reports ~0 load time when the model was still resident
+        if seconds > 0.05:
+            self.loads += 1
+            self.load_seconds += seconds
+        return seconds
+
+    def record_request(self, seconds: float) -> None:
+        """A prompt took seconds of inference; the model was just used."""
+        self.requests += 1
+        self.inference_seconds += seconds
+        self.last_used = time.monotonic()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "warmups": self.warmups,
+            "failures": self.failures,
+            "loads": self.loads,
+            "load_seconds": round(self.load_seconds, 3),
+            "last_load": round(self.last_load, 3) if self.last_load is not None else None,
+            "requests": self.requests,
+            "inference_seconds": round(self.inference_seconds, 3),
+            "keep_alive": self.keep_alive if self.backend.server_type == "ollama" else None,
+        }
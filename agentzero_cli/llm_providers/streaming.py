@@ -0,0 +1,417 @@
+"""
+Incremental decoder for OpenAI-style streaming chat completions.
+
+Streaming providers read raw bytes from ``response.aiter_bytes()`` and
+hand them to a ``ChatStream``:
+
+    stream = ChatStream()
+    async for text in stream.text_chunks(response.aiter_bytes()):
+        yield AgentEvent(type="thought", content=text)
+    full_response = stream.text
+
+``items()`` additionally yields each native tool call (``ToolCallDelta``)
+as soon as it is complete. ``ReadAhead`` drains a reply in the background
+so the response is closed when the server finishes, not when the
+consumer gets to the last item.
+
+Layers:
+
+- ``SSEDecoder`` splits bytes into server-sent events. Chunk boundaries
+  can fall anywhere (inside a line, a ``\\r\\n`` pair or a multi-byte
+  UTF-8 character); lines are only decoded once complete.
+- ``ChatStream.feed`` turns each ``data:`` payload into typed events:
+  ``TextDelta``, ``ToolCallDelta``, ``Usage``, ``Finish``, ``StreamError``.
+  JSON is parsed with orjson when installed.
+- Text is accumulated in a list (no quadratic ``+=``) and coalesced for
+  display: a chunk is flushed at a newline, after FLUSH_CHARS characters
+  or FLUSH_INTERVAL seconds.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _JSONError: tuple = (orjson.JSONDecodeError, ValueError)
+except ImportError:  # pragma: no cover - orjson is optional
+    _loads = json.loads
+    _JSONError = (json.JSONDecodeError, ValueError)
+
+DONE = "[DONE]"
+# Display coalescing: flush at a newline, at this many chars, or this often
+FLUSH_CHARS = 24
+FLUSH_INTERVAL = 0.05
+
+
+@dataclass(slots=True)
+class TextDelta:
+    """A piece of assistant text."""
+    text: str
+
+
+@dataclass(slots=True)
+class ToolCallDelta:
+    """A fragment of a native tool call (arguments arrive in pieces)."""
+    index: int
+    id: str = ""
+    name: str = ""
+    arguments: str = ""
+
+
+@dataclass(slots=True)
+class Usage:
+    """Token usage, usually sent with the last chunk."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    raw: dict = field(default_factory=dict)
+    # Prompt tokens served from the server's prompt cache
+    cached_tokens: int = 0
+
+
+@dataclass(slots=True)
+class Finish:
+    """finish_reason of a choice (stop, length, tool_calls, ...)."""
+    reason: str
+
+
+@dataclass(slots=True)
+class StreamError:
+    """Error object sent inside the stream."""
+    message: str
+    code: str | int | None = None
+
+
+StreamEvent = TextDelta | ToolCallDelta | Usage | Finish | StreamError
+
+
+class SSEDecoder:
+    """
+    Byte-level server-sent events splitter.
+
+    ``feed`` returns the ``data`` of every event completed by the chunk
+    (multi-line data joined with "\\n"). Comments and other fields are
+    ignored. A lone ``data: [DONE]`` line also completes an event, since
+    some servers do not send the blank line after it.
+    """
+
+    def __init__(self):
+        self._pending = b""
+        self._data: list[str] = []
+
+    def feed(self, chunk: bytes) -> list[str]:
+        if self._pending:
+            chunk = self._pending + chunk
+        lines = chunk.split(b"\n")
+        self._pending = lines.pop()
+        events = []
+        for line in lines:
+            self._line(line, events)
+        return events
+
+    def flush(self) -> list[str]:
+        """Complete whatever is left at end of stream."""
+        events: list[str] = []
+        if self._pending:
+            self._line(self._pending, events)
+            self._pending = b""
+        if self._data:
+            events.append("\n".join(self._data))
+            self._data = []
+        return events
+
+    def _line(self, line: bytes, events: list[str]) -> None:
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        if not line:
+            if self._data:
+                events.append("\n".join(self._data))
+                self._data = []
+            return
+        if line.startswith(b"data:"):
+            value = line[6:] if line[5:6] == b" " else line[5:]
+            text = value.decode("utf-8", errors="replace")
+            if text == DONE and not self._data:
+                events.append(DONE)
+                return
+            self._data.append(text)
+        # ":" comments (keep-alives), event:, id:, retry: are not needed
+
+
+class ChatStream:
+    """
+    Accumulating decoder for one streamed chat completion.
+
+    After the stream ends: ``text`` (full assistant text), ``tool_calls``
+    (assembled native calls), ``usage``, ``finish_reason`` and ``error``.
+    ``first_token_at`` and ``last_token_at`` are the monotonic times of
+    the first and last text or tool call delta.
+    """
+
+    def __init__(self, flush_chars: int = FLUSH_CHARS, flush_interval: float = FLUSH_INTERVAL):
+        self.flush_chars = flush_chars
+        self.flush_interval = flush_interval
+        self.sse = SSEDecoder()
+        self.done = False
+        self.usage: Usage | None = None
+        self.finish_reason = ""
+        self.error: StreamError | None = None
+        self.tool_calls: dict[int, ToolCallDelta] = {}
+        self.chunks_received = 0
+        self.first_token_at: float | None = None
+        self.last_token_at: float | None = None
+        self._parts: list[str] = []
+        self._buffer: list[str] = []
+        self._buffer_len = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, chunk: bytes) -> list[StreamEvent]:
+        """Decode a chunk of raw bytes into events."""
+        events: list[StreamEvent] = []
+        if self.done:
+            return events
+        for data in self.sse.feed(chunk):
+            self._payload(data, events)
+            if self.done:
+                break
+        return events
+
+    def close(self) -> list[StreamEvent]:
+        """Decode what is left at end of stream."""
+        events: list[StreamEvent] = []
+        if not self.done:
+            for data in self.sse.flush():
+                self._payload(data, events)
+        self.done = True
+        return events
+
+    async def events(self, byte_iter: AsyncIterator[bytes]) -> AsyncIterator[StreamEvent]:
+        """Typed events from a byte stream (e.g. ``response.aiter_bytes()``)."""
+        async for chunk in byte_iter:
+            for event in self.feed(chunk):
+                yield event
+            if self.done:
+                break
+        for event in self.close():
+            yield event
+
+    async def text_chunks(self, byte_iter: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """Coalesced text for display; other events are only recorded."""
+        async for item in self.items(byte_iter):
+            if type(item) is str:
+                yield item
+
+    async def items(self, byte_iter: AsyncIterator[bytes]) -> AsyncIterator[str | ToolCallDelta]:
+        """
+        Coalesced text and complete native tool calls, in stream order.
+
+        A tool call is complete once a delta for another index arrives or
+        the choice finishes; it is yielded then, before the stream ends.
+        """
+        emitted: set[int] = set()
+        current: int | None = None
+        async for event in self.events(byte_iter):
+            kind = type(event)
+            if kind is TextDelta:
+                chunk = self._coalesce(event.text)
+                if chunk:
+                    yield chunk
+            elif kind is ToolCallDelta:
+                if current is not None and event.index != current and current not in emitted:
+                    for item in self._complete_call(current, emitted):
+                        yield item
+                current = event.index
+            elif kind is Finish:
+                for index in sorted(self.tool_calls):
+                    for item in self._complete_call(index, emitted):
+                        yield item
+        rest = self._drain()
+        if rest:
+            yield rest
+        for index in sorted(self.tool_calls):
+            if index not in emitted:
+                emitted.add(index)
+                yield self.tool_calls[index]
+
+    def _complete_call(self, index: int, emitted: set[int]) -> list[str | ToolCallDelta]:
+        if index in emitted:
+            return []
+        emitted.add(index)
+        rest = self._drain()
+        return [rest, self.tool_calls[index]] if rest else [self.tool_calls[index]]
+
+    def _coalesce(self, text: str) -> str:
+        self._buffer.append(text)
+        self._buffer_len += len(text)
+        if (
+            self._buffer_len >= self.flush_chars
+            or "\n" in text
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            return self._drain()
+        return ""
+
+    def _drain(self) -> str:
+        if not self._buffer:
+            return ""
+        text = "".join(self._buffer)
+        self._buffer = []
+        self._buffer_len = 0
+        self._last_flush = time.monotonic()
+        return text
+
+    def _payload(self, data: str, events: list[StreamEvent]) -> None:
+        if data == DONE:
+            self.done = True
+            return
+        try:
+            chunk = _loads(data)
+        except _JSONError:
+            return
+        if not isinstance(chunk, dict):
+            return
+        self.chunks_received += 1
+
+        choices = chunk.get("choices")
+        if choices:
+            choice = choices[0]
+            delta = choice.get("delta")
+            if delta:
+                if delta.get("content") or delta.get("tool_calls"):
+                    self.last_token_at = time.monotonic()
+                    if self.first_token_at is None:
+                        self.first_token_at = self.last_token_at
+                content = delta.get("content")
+                if content:
+                    self._parts.append(content)
+                    events.append(TextDelta(content))
+                calls = delta.get("tool_calls")
+                if calls:
+                    self._tool_calls(calls, events)
+            reason = choice.get("finish_reason")
+            if reason:
+                self.finish_reason = reason
+                events.append(Finish(reason))
+
+        usage = chunk.get("usage")
+        if usage:
+            details = usage.get("prompt_tokens_details") or {}
+            self.usage = Usage(
+                usage.get("prompt_tokens") or 0,
+                usage.get("completion_tokens") or 0,
+                usage.get("total_tokens") or 0,
+                usage,
+                details.get("cached_tokens") or usage.get("cache_read_input_tokens") or 0,
+            )
+            events.append(self.usage)
+
+        timings = chunk.get("timings")
+        if timings:
+            # llama.cpp: prompt_n tokens were evaluated, cache_n reused from the KV cache
+            cache_n = timings.get("cache_n") or 0
+            if self.usage is None:
+                prompt = (timings.get("prompt_n") or 0) + cache_n
+                completion = timings.get("predicted_n") or 0
+                self.usage = Usage(prompt, completion, prompt + completion, {"timings": timings}, cache_n)
+                events.append(self.usage)
+            elif not self.usage.cached_tokens:
+                self.usage.cached_tokens = cache_n
+
+        error = chunk.get("error")
+        if error:
+            if isinstance(error, dict):
+                self.error = StreamError(str(error.get("message", error)), error.get("code"))
+            else:
+                self.error = StreamError(str(error))
+            events.append(self.error)
+
+    def _tool_calls(self, calls: Iterable[dict], events: list[StreamEvent]) -> None:
+        for call in calls:
+            index = call.get("index", 0)
+            function = call.get("function") or {}
+            delta = ToolCallDelta(
+                index,
+                call.get("id") or "",
+                function.get("name") or "",
+                function.get("arguments") or "",
+            )
+            events.append(delta)
+            current = self.tool_calls.get(index)
+            if current is None:
+                self.tool_calls[index] = ToolCallDelta(index, delta.id, delta.name, delta.arguments)
+            else:
+                current.id = current.id or delta.id
+                current.name += delta.name
+                current.arguments += delta.arguments
+
+
+class ReadAhead:
+    """
+    Reads an async iterator to its end in a background task.
+
+    The response behind a streamed reply is closed (connection returned,
+    server slot freed) as soon as the server is done, even while the
+    consumer is paused, e.g. on a tool approval. ``closed_at`` is the
+    monotonic time the source finished; errors are re-raised to the
+    consumer after the items read before them.
+    """
+
+    def __init__(self, source: AsyncIterator):
+        self.source = source
+        self.closed_at: float | None = None
+        self._items: deque = deque()
+        self._error: BaseException | None = None
+        self._done = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.ensure_future(self._read())
+
+    async def _read(self) -> None:
+        try:
+            async for item in self.source:
+                self._items.append(item)
+                self._wakeup.set()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.closed_at = time.monotonic()
+            self._done = True
+            self._wakeup.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._items:
+            if self._done:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise error
+                raise StopAsyncIteration
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        return self._items.popleft()
+
+    def take_ready(self, accept) -> list:
+        """Items already read, from the front, while accept(item) holds."""
+        taken = []
+        while self._items and accept(self._items[0]):
+            taken.append(self._items.popleft())
+        return taken
+
+    async def aclose(self) -> None:
+        """Stop reading and close the source."""
+        if not self._task.done():
+            self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        if hasattr(self.source, "aclose"):
+            await self.source.aclose()
@@ -0,0 +1,232 @@
+"""
+Incremental parser for ``<tool .../>`` tags in streamed model output.
+
+Text-protocol providers ask the model to request tools with
+
+    <tool name="shell" command="the command" reason="why"/>
+
+``ToolTagParser.feed`` takes streamed text and returns prose and
+``ToolTag`` objects in order, each tag as soon as it closes, so a tool
+request does not wait for the rest of the answer. Any number of tags per
+response is supported, as well as:
+
+- attributes in any order, double or single quoted, or unquoted
+- ``\\"`` and XML entities (``&quot;``, ``&amp;``, ...) inside values
+- unescaped quotes inside a value (``command="grep "x" f"``): a quote only
+  closes the value when followed by another attribute or the end of the tag
+- ``<tool name="shell">command text</tool>`` (body used as the command)
+
+Only text that may still become a tag is held back; everything else is
+returned immediately.
+"""
+
+import html
+import re
+from dataclasses import dataclass, field
+
+TAG_OPEN = "<tool"
+CLOSE_TAG = "</tool>"
+# Give up on a "tag" that is still open after this many chars
+MAX_TAG_CHARS = 64 * 1024
+
+_NAME_RE = re.compile(r"[A-Za-z_][\w\-]*")
+# What may follow a closing quote: another attribute or the end of the tag
+_AFTER_VALUE_RE = re.compile(r"(?:\s*/?>|\s+[A-Za-z_][\w\-]*\s*=)")
+# A prefix of the above that needs more input to decide
+_AFTER_VALUE_PARTIAL_RE = re.compile(r"\s*(?:/|\s[A-Za-z_][\w\-]*\s*)?")
+
+
+@dataclass
+class ToolTag:
+    """A parsed tool request."""
+    name: str
+    command: str = ""
+    reason: str = ""
+    attrs: dict[str, str] = field(default_factory=dict)
+    raw: str = ""
+    call_id: str = ""  # native tool calls only; results are sent back with it
+
+
+class _NeedMore(Exception):
+    """The buffered text ends inside a tag."""
+
+
+class _NotATag(Exception):
+    """The buffered text starting with <tool is not a valid tag."""
+
+
+class ToolTagParser:
+    """Streaming splitter of model output into prose and ToolTags."""
+
+    def __init__(self):
+        self._buf = ""
+        self._prose: list[str] = []
+        self.tags: list[ToolTag] = []
+
+    @property
+    def prose(self) -> str:
+        """All text outside tool tags so far."""
+        return "".join(self._prose)
+
+    def feed(self, text: str) -> list[str | ToolTag]:
+        """Parse more text; returns prose strings and tags in order."""
+        self._buf += text
+        return self._drain(final=False)
+
+    def close(self) -> list[str | ToolTag]:
+        """End of stream: an unfinished tag is returned as text."""
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> list[str | ToolTag]:
+        out: list[str | ToolTag] = []
+        buf = self._buf
+        while buf:
+            start = buf.find("<")
+            if start == -1:
+                self._text(buf, out)
+                buf = ""
+                break
+            if start:
+                self._text(buf[:start], out)
+                buf = buf[start:]
+            head = buf[:6]
+            if len(head) < 6 and TAG_OPEN.startswith(head[:5]) and not final:
+                break  # "<", "<to", "<tool" - wait for more
+            if not head.startswith(TAG_OPEN) or not (head[5:6].isspace() or head[5:6] in "/>"):
+                self._text("<", out)
+                buf = buf[1:]
+                continue
+            try:
+                tag, end = _parse_tag(buf, final)
+            except _NeedMore:
+                if len(buf) > MAX_TAG_CHARS:
+                    self._text(buf[0], out)
+                    buf = buf[1:]
+                    continue
+                break
+            except _NotATag:
+                self._text("<", out)
+                buf = buf[1:]
+                continue
+            self.tags.append(tag)
+            out.append(tag)
+            buf = buf[end:]
+        self._buf = buf
+        if final and buf:
+            self._text(buf, out)
+            self._buf = ""
+        return out
+
+    def _text(self, text: str, out: list) -> None:
+        self._prose.append(text)
+        if out and isinstance(out[-1], str):
+            out[-1] += text
+        else:
+            out.append(text)
+
+
+def _parse_tag(buf: str, final: bool) -> tuple[ToolTag, int]:
+    """Parse the tag at the start of buf; returns it and its end offset."""
+    attrs: dict[str, str] = {}
+    pos = len(TAG_OPEN)
+    size = len(buf)
+    while True:
+        while pos < size and buf[pos].isspace():
+            pos += 1
+        if pos >= size:
+            raise _NeedMore
+        if buf.startswith("/>", pos):
+            end, body = pos + 2, None
+            break
+        if buf[pos] == "/" and pos + 1 >= size:
+            raise _NeedMore
+        if buf[pos] == ">":
+            close = buf.find(CLOSE_TAG, pos + 1)
+            if close == -1:
+                if final:
+                    raise _NotATag
+                raise _NeedMore
+            end, body = close + len(CLOSE_TAG), buf[pos + 1:close]
+            break
+        match = _NAME_RE.match(buf, pos)
+        if not match:
+            raise _NotATag
+        name = match.group().lower()
+        pos = match.end()
+        while pos < size and buf[pos].isspace():
+            pos += 1
+        if pos >= size:
+            raise _NeedMore
+        if buf[pos] != "=":
+            raise _NotATag
+        pos += 1
+        while pos < size and buf[pos].isspace():
+            pos += 1
+        if pos >= size:
+            raise _NeedMore
+        value, pos = _parse_value(buf, pos, final)
+        attrs[name] = value
+
+    if "name" not in attrs:
+        raise _NotATag
+    command = attrs.get("command")
+    if command is None:
+        command = html.unescape(body.strip()) if body else ""
+    return ToolTag(attrs["name"], command, attrs.get("reason", ""), attrs, buf[:end]), end
+
+
+def _parse_value(buf: str, pos: int, final: bool) -> tuple[str, int]:
+    """Parse an attribute value at pos; returns it and the offset after it."""
+    quote = buf[pos]
+    if quote not in "\"'":
+        end = pos
+        while end < len(buf) and not buf[end].isspace() and buf[end] not in "/>":
+            end += 1
+        if end >= len(buf):
+            raise _NeedMore
+        return html.unescape(buf[pos:end]), end
+
+    parts: list[str] = []
+    start = pos + 1
+    i = start
+    while True:
+        j = buf.find(quote, i)
+        k = buf.find("\\", i, j if j != -1 else len(buf))
+        if k != -1:
+            if k + 1 >= len(buf):
+                raise _NeedMore
+            parts.append(buf[start:k])
+            nxt = buf[k + 1]
+            # \" and \\ are escapes; anything else is a literal backslash
+            parts.append(nxt if nxt in (quote, "\\") else "\\" + nxt)
+            start = i = k + 2
+            continue
+        if j == -1:
+            raise _NeedMore
+        rest = buf[j + 1:j + 1 + 256]
+        if _AFTER_VALUE_RE.match(rest):
+            parts.append(buf[start:j])
+            return html.unescape("".join(parts)), j + 1
+        if not final and len(rest) < 256 and _AFTER_VALUE_PARTIAL_RE.fullmatch(rest):
+            raise _NeedMore
+        i = j + 1  # a quote inside the value
+
+
+def parse_tool_tags(text: str) -> tuple[str, list[ToolTag]]:
+    """Parse a complete response; returns (prose, tags)."""
+    parser = ToolTagParser()
+    parser.feed(text)
+    parser.close()
+    return parser.prose, parser.tags
+
+
+def format_tool_tag(name: str, command: str, reason: str = "") -> str:
+    """Render a call as a tag that ToolTagParser reads back unchanged."""
+    def quote(value: str) -> str:
+        value = value.replace("\\", "\\\\").replace("&", "&amp;").replace('"', "&quot;")
+        return f'"{value}"'
+
+    attrs = f"name={quote(name)} command={quote(command)}"
+    if reason:
+        attrs += f" reason={quote(reason)}"
+    return f"<tool {attrs}/>"
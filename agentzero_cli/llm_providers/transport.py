@@ -0,0 +1,287 @@
+"""
+Shared HTTP transport for AgentZeroCLI providers.
+
+Every provider, the observer's MCP gateway client and the news feeds use
+the clients from this module instead of building their own, so
+connections are pooled and kept alive across backends and requests:
+
+- HTTP/2 when the ``h2`` package is installed (``pip install httpx[http2]``)
+  and the server negotiates it; HTTP/1.1 keep-alive otherwise
+- keep-alive pool limits tuned for a few long-lived API hosts
+- a DNS cache in front of the connection pool
+- ``warm_up(url)``: connect and TLS-handshake ahead of the first request
+  (called at startup and when the user starts typing)
+
+Async clients are bound to the event loop they were created in, so one
+is kept per running loop. ``HTTP_PROXY``/``HTTPS_PROXY``/``ALL_PROXY`` and
+``NO_PROXY`` are honoured: httpx skips them once a transport is passed
+in, so each proxy gets its own mounted (DNS-cached) transport. Frontends
+call ``aclose()`` at exit.
+
+Env vars:
+- AGENTZERO_HTTP2: set to false to force HTTP/1.1
+- AGENTZERO_DNS_TTL: seconds to cache DNS answers (default 300)
+"""
+
+import asyncio
+import importlib.util
+import ipaddress
+import os
+import socket
+import threading
+import time
+import weakref
+from typing import Iterable
+from urllib.parse import urlsplit
+
+import anyio
+import httpcore
+import httpx
+
+try:
+    from httpx._utils import get_environment_proxies
+except ImportError:  # pragma: no cover - moved in a future httpx
+    def get_environment_proxies() -> dict:
+        return {}
+
+HTTP2_ENABLED = (
+    importlib.util.find_spec("h2") is not None
+    and os.getenv("AGENTZERO_HTTP2", "true").lower() not in ("0", "false", "no")
+)
+DNS_TTL = float(os.getenv("AGENTZERO_DNS_TTL", "300"))
+# Keep-alive: a handful of API hosts, long idle gaps between prompts
+POOL_LIMITS = httpx.Limits(
+    max_connections=32,
+    max_keepalive_connections=16,
+    keepalive_expiry=120.0,
+)
+DEFAULT_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+# Skip a warm-up if the same origin was warmed this recently
+WARM_INTERVAL = 30.0
+USER_AGENT = "AgentZeroCLI/0.2"
+
+
+class DNSCache:
+    """Host -> resolved addresses, expiring after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = DNS_TTL):
+        self.ttl = ttl
+        self.entries: dict[tuple[str, int], tuple[float, list[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, host: str, port: int) -> list[str] | None:
+        with self._lock:
+            entry = self.entries.get((host, port))
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, host: str, port: int, infos: Iterable[tuple]) -> list[str]:
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self.entries[(host, port)] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    def forget(self, host: str, port: int) -> None:
+        with self._lock:
+            self.entries.pop((host, port), None)
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class AsyncCachingBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that resolves hosts through a DNSCache.
+
+    TLS still uses the request's hostname for SNI and certificate checks;
+    only the TCP connect goes to the cached address.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, cache: DNSCache):
+        self._backend = backend
+        self.cache = cache
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        if _is_ip(host) or host == "localhost":
+            return await self._backend.connect_tcp(host, port, timeout, local_address, socket_options)
+        addresses = self.cache.get(host, port)
+        if addresses is None:
+            infos = await anyio.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addresses = self.cache.put(host, port, infos)
+        error: Exception | None = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout, local_address, socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        self.cache.forget(host, port)
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class SyncCachingBackend(httpcore.NetworkBackend):
+    """Blocking counterpart of AsyncCachingBackend."""
+
+    def __init__(self, backend: httpcore.NetworkBackend, cache: DNSCache):
+        self._backend = backend
+        self.cache = cache
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        if _is_ip(host) or host == "localhost":
+            return self._backend.connect_tcp(host, port, timeout, local_address, socket_options)
+        addresses = self.cache.get(host, port)
+        if addresses is None:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            addresses = self.cache.put(host, port, infos)
+        error: Exception | None = None
+        for address in addresses:
+            try:
+                return self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        self.cache.forget(host, port)
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    def sleep(self, seconds: float) -> None:
+        self._backend.sleep(seconds)
+
+
+_dns_cache = DNSCache()
+_async_clients: "weakref.WeakKeyDictionary[object, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_sync_client: httpx.Client | None = None
+_sync_lock = threading.Lock()
+_warmed: dict[str, float] = {}
+_stats = {"clients": 0, "warmups": 0, "warmup_errors": 0}
+
+
+def _install_dns_cache(transport: httpx.BaseTransport | httpx.AsyncBaseTransport, sync: bool) -> None:
+    # httpx has no public hook for the network backend; wrap the pool's
+    pool = getattr(transport, "_pool", None)
+    backend = getattr(pool, "_network_backend", None)
+    if backend is None:
+        return
+    wrapper = SyncCachingBackend if sync else AsyncCachingBackend
+    pool._network_backend = wrapper(backend, _dns_cache)
+
+
+def _transport(sync: bool, proxy: str | None = None) -> httpx.BaseTransport | httpx.AsyncBaseTransport:
+    kind = httpx.HTTPTransport if sync else httpx.AsyncHTTPTransport
+    transport = kind(http2=HTTP2_ENABLED, limits=POOL_LIMITS, proxy=proxy)
+    _install_dns_cache(transport, sync)
+    return transport
+
+
+def _proxy_mounts(sync: bool) -> dict:
+    """URL pattern -> transport for the env proxies (None: NO_PROXY, go direct)."""
+    return {
+        pattern: None if proxy is None else _transport(sync, proxy)
+        for pattern, proxy in get_environment_proxies().items()
+    }
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient for the running event loop."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    client = _async_clients.get(loop) if loop is not None else None
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            transport=_transport(sync=False),
+            mounts=_proxy_mounts(sync=False),
+            timeout=DEFAULT_TIMEOUT,
+            headers={"User-Agent": USER_AGENT},
+        )
+        _stats["clients"] += 1
+        if loop is not None:
+            _async_clients[loop] = client
+    return client
+
+
+def get_sync_client() -> httpx.Client:
+    """Return the shared blocking client (threads, non-async callers)."""
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(
+                transport=_transport(sync=True),
+                mounts=_proxy_mounts(sync=True),
+                timeout=DEFAULT_TIMEOUT,
+                headers={"User-Agent": USER_AGENT},
+            )
+            _stats["clients"] += 1
+        return _sync_client
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+async def warm_up(url: str, force: bool = False) -> bool:
+    """
+    Open (or keep alive) a pooled connection to the origin of ``url``.
+
+    Resolves DNS, connects and completes the TLS handshake with a HEAD
+    request, so the next real request reuses a ready connection. Cheap to
+    call repeatedly: skipped if the origin was warmed in the last
+    WARM_INTERVAL seconds. Errors are swallowed; returns True on success.
+    """
+    if not url:
+        return False
+    origin = _origin(url)
+    now = time.monotonic()
+    if not force and now - _warmed.get(origin, -WARM_INTERVAL) < WARM_INTERVAL:
+        return True
+    _warmed[origin] = now
+    try:
+        await get_async_client().head(origin, timeout=httpx.Timeout(10.0))
+    except httpx.HTTPError:
+        _warmed.pop(origin, None)
+        _stats["warmup_errors"] += 1
+        return False
+    _stats["warmups"] += 1
+    return True
+
+
+async def aclose() -> None:
+    """Close the shared clients of this event loop (at application exit)."""
+    global _sync_client
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def get_transport_stats() -> dict:
+    """Get shared transport statistics."""
+    return {
+        "http2": HTTP2_ENABLED,
+        "clients": _stats["clients"],
+        "dns_hits": _dns_cache.hits,
+        "dns_misses": _dns_cache.misses,
+        "warmups": _stats["warmups"],
+        "warmup_errors": _stats["warmup_errors"],
+    }
@@ -0,0 +1,602 @@
+"""
+Shell command classifier.
+
+Splits a command line the way a shell would (pipelines, ``&&``/``||``/``;``
+chains, ``( ... )`` subshells, ``$( ... )`` and backtick substitutions,
+redirections, here-documents) and classifies every simple command in it:
+
+    readonly  - program and arguments found in the read-only table
+    write     - found in the write table, writes via a redirection, or
+                uses a writing flag (``find -delete``, ``git branch -D``)
+    unknown   - anything else (including ``sh`` at the end of a pipe)
+
+The command tables are matched on whole words through a trie, so ``ls``
+does not match ``lsblk``, and a whole line is only read-only if every
+segment is. Blocked patterns are compiled into one regex; entries written
+as ``A.*|.*B`` mean "program A piped into program B" and are checked
+against the parsed pipelines.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+
+READONLY = "readonly"
+WRITE = "write"
+UNKNOWN = "unknown"
+
+# Wrappers that run the command given in their arguments
+_WRAPPERS = frozenset({"sudo", "doas", "env", "nice", "nohup", "time", "timeout", "xargs", "command", "exec", "builtin"})
+# Wrappers that change who runs the command: never read-only
+_PRIVILEGED = frozenset({"sudo", "doas"})
+# Words before the program that do not change what runs
+_PREFIX_WORDS = frozenset({"{", "}", "!"})
+# Redirection targets that do not write a file
+_NULL_TARGETS = frozenset({"/dev/null", "/dev/stdout", "/dev/stderr", "/dev/tty"})
+# Flags that turn a read-only program into a writing one
+_WRITE_FLAGS = {
+    "find": frozenset({"-delete", "-exec", "-execdir", "-ok", "-okdir", "-fprint", "-fprint0", "-fprintf", "-fls"}),
+    "git branch": frozenset({"-d", "-D", "-m", "-M", "-c", "-C", "--delete", "--move", "--copy",
+                             "--set-upstream-to", "-u", "--unset-upstream", "--edit-description"}),
+    "git diff": frozenset({"--output"}),
+}
+# git branch with a positional argument creates a branch unless listing
+_GIT_BRANCH_LIST_FLAGS = frozenset({"-l", "--list", "--contains", "--no-contains", "--merged",
+                                    "--no-merged", "--points-at", "--sort", "--format"})
+
+_TOKEN_RE = re.compile(
+    r"""
+    [ \t\r]*
+    (?:
+      (?P<comment>\#[^\n]*)
+    | (?P<redir>(?:\d+|&)?(?:>>|>\||>&|>|<<<|<<-|<<|<>|<&|<))
+    | (?P<op>\|\||&&|\|&|;;|[|;&\n])
+    | (?P<subst>\$\(|`)
+    | (?P<open>\()
+    | (?P<close>\))
+    | (?P<word>(?:[^\s|;&<>()`'"\\$\#]+|\\.|'[^']*'|"(?:[^"\\`$]|\\.|\$(?!\())*"|\$(?!\()|(?<=\S)\#)+)
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+# Anything the fast path (split on whitespace) cannot handle
+_SPECIAL_RE = re.compile(r"[|;&<>()`$'\"\\#\n]")
+# Anything the operator-split path cannot handle (quotes, groups, heredocs)
+_COMPLEX_RE = re.compile(r"[()`$\"\\#]|<<")
+# Single quotes are fine for that path unless they hide an operator
+_QUOTED_OPERATOR_RE = re.compile(r"'[^']*[|;&<>\n\s][^']*'")
+_OPERATOR_SPLIT_RE = re.compile(r"([|;&\n]+)")
+# Same, for lines where & is part of a redirection (2>&1, &>file)
+_OPERATOR_SPLIT_AMP_RE = re.compile(r"(\|\||&&|\|&|;;|;|\n|\||(?<![<>])&(?!>))")
+_REDIRECT_RE = re.compile(r"(\d*&?[<>][<>|&]?)[ \t]*([^\s<>|;&]*)")
+_QUOTES_RE = re.compile(r"""\\(.)|'([^']*)'|"((?:[^"\\]|\\.)*)\"""", re.DOTALL)
+
+
+@dataclass(slots=True)
+class Segment:
+    """One simple command inside a command line."""
+    text: str  # as written, redirections included
+    argv: list[str]  # words with quotes removed, wrappers included
+    program: str  # table key: "git status", "ls", ... ("" if none)
+    kind: str  # READONLY | WRITE | UNKNOWN
+    reason: str = ""
+    operator: str = ""  # operator before this segment ("", "|", "&&", ";", ...)
+    redirects: list[tuple[str, str]] = field(default_factory=list)
+    nested: bool = False  # inside ( ), $( ) or backticks
+    pipeline: int = 0  # segments of one pipeline share this id
+
+
+@dataclass(slots=True)
+class Verdict:
+    """Classification of a whole command line."""
+    command: str
+    segments: list[Segment]
+    blocked: bool = False
+    reason: str = ""
+
+    @property
+    def readonly(self) -> bool:
+        """Every segment is read-only (and there is at least one)."""
+        return not self.blocked and bool(self.segments) and all(
+            s.kind == READONLY for s in self.segments
+        )
+
+    @property
+    def writes(self) -> bool:
+        """Some segment writes."""
+        return any(s.kind == WRITE for s in self.segments)
+
+    def all_match(self, prefixes: list[str]) -> bool:
+        """
+        True if every segment starts with one of prefixes (whole words)
+        and none writes through a redirection. Used for whitelists.
+        """
+        if self.blocked or not self.segments:
+            return False
+        wanted = [str(p).lower().split() for p in prefixes if str(p).strip()]
+        for segment in self.segments:
+            argv = [a.lower() for a in segment.argv]
+            if any(_is_file_write(op, target) for op, target in segment.redirects):
+                return False
+            if not any(argv[:len(w)] == w for w in wanted):
+                return False
+        return True
+
+
+def _is_file_write(op: str, target: str) -> bool:
+    if ">" not in op or op.endswith("&") and target.isdigit():
+        return False
+    return target not in _NULL_TARGETS and target != "-"
+
+
+def _unquote(word: str) -> str:
+    if "\\" not in word and "'" not in word and '"' not in word:
+        return word
+    return _QUOTES_RE.sub(lambda m: next(g for g in m.groups() if g is not None), word)
+
+
+def _find_close(text: str, pos: int, closer: str) -> int:
+    """Index of the ``)``/backtick closing a group opened before pos (-1 if none)."""
+    depth = 0
+    i = pos
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "'":
+            end = text.find("'", i + 1)
+            i = n if end == -1 else end + 1
+            continue
+        if closer == "`":
+            if c == "`":
+                return i
+        elif c == '"':
+            i = _quote_end(text, i)
+            if i == -1:
+                return -1
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            if depth == 0:
+                return i
+            depth -= 1
+        i += 1
+    return -1
+
+
+def _quote_end(text: str, pos: int) -> int:
+    """Index of the '"' closing the double quote at pos (-1 if none)."""
+    n = len(text)
+    i = pos + 1
+    while i < n:
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == '"':
+            return i
+        if c == "`" or text.startswith("$(", i):
+            i = _find_close(text, i + (1 if c == "`" else 2), "`" if c == "`" else ")")
+            if i == -1:
+                return -1
+        i += 1
+    return -1
+
+
+def _scan_word(text: str, pos: int) -> int:
+    """End of the shell word starting at pos (quotes and $( ) aware)."""
+    n = len(text)
+    i = pos
+    while i < n:
+        c = text[i]
+        if c in " \t\r\n|;&<>()":
+            return i
+        if c == "\\":
+            i += 2
+            continue
+        if c == "'":
+            end = text.find("'", i + 1)
+            if end == -1:
+                return n
+            i = end + 1
+            continue
+        if c == '"' or c == "`" or text.startswith("$(", i):
+            if c == '"':
+                end = _quote_end(text, i)
+            else:
+                end = _find_close(text, i + (1 if c == "`" else 2), "`" if c == "`" else ")")
+            if end == -1:
+                return n
+            i = end + 1
+            continue
+        i += 1
+    return n
+
+
+def _substitutions(word: str) -> list[str]:
+    """Commands inside $( ) / backticks in a word (outside single quotes)."""
+    found = []
+    in_double = False
+    i = 0
+    n = len(word)
+    while i < n:
+        c = word[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == '"':
+            in_double = not in_double
+        elif c == "'" and not in_double:
+            end = word.find("'", i + 1)
+            i = n if end == -1 else end + 1
+            continue
+        elif c == "`" or word.startswith("$(", i):
+            start = i + (1 if c == "`" else 2)
+            end = _find_close(word, start, "`" if c == "`" else ")")
+            if end == -1:
+                found.append(word[start:])
+                return found
+            found.append(word[start:end])
+            i = end + 1
+            continue
+        i += 1
+    return found
+
+
+class _Trie:
+    """Word-level prefix trie: ["git", "status"] -> (kind, "git status")."""
+
+    __slots__ = ("root",)
+
+    def __init__(self):
+        self.root: dict = {}
+
+    def add(self, entry: str, kind: str) -> None:
+        node = self.root
+        words = entry.lower().split()
+        for word in words:
+            node = node.setdefault(word, {})
+        # Write wins if an entry is in both tables
+        if node.get("", (None,))[0] != WRITE:
+            node[""] = (kind, " ".join(words))
+
+    def longest(self, program: str, argv: list[str], rest: int) -> tuple[str, str] | None:
+        """Longest entry matching program followed by argv[rest:] (whole words)."""
+        node = self.root.get(program)
+        if node is None:
+            return None
+        best = node.get("")
+        for word in argv[rest:]:
+            node = node.get(word.lower())
+            if node is None:
+                break
+            best = node.get("", best)
+        return best
+
+
+class CommandClassifier:
+    """
+    Classifier built once from the executor's command tables.
+
+    Args:
+        blocked_patterns: Text patterns (``A.*|.*B`` = A piped into B)
+        readonly_commands: Word prefixes of read-only commands
+        write_commands: Word prefixes of writing commands
+    """
+
+    def __init__(
+        self,
+        blocked_patterns: list[str],
+        readonly_commands: list[str],
+        write_commands: list[str],
+    ):
+        self.tables = _Trie()
+        for entry in readonly_commands:
+            self.tables.add(entry, READONLY)
+        for entry in write_commands:
+            self.tables.add(entry, WRITE)
+        self.pipe_rules: list[tuple[re.Pattern, re.Pattern, str]] = []
+        self._blocked: list[tuple[re.Pattern, str]] = []
+        for pattern in blocked_patterns:
+            if ".*|.*" in pattern:
+                source, sink = pattern.split(".*|.*", 1)
+                self.pipe_rules.append(
+                    (re.compile(source + ".*"), re.compile(".*" + sink), pattern)
+                )
+                continue
+            self._blocked.append((re.compile(_pattern_regex(pattern.lower())), pattern))
+        # No named groups: plain alternation lets re skip ahead on first chars
+        self.blocked_re = (
+            re.compile("|".join(regex.pattern for regex, _ in self._blocked)) if self._blocked else None
+        )
+
+    def classify(self, command: str) -> Verdict:
+        """Tokenize and classify a command line."""
+        lowered = command.lower()
+        verdict = Verdict(command, [])
+        if self.blocked_re is not None:
+            match = self.blocked_re.search(lowered)
+            if match:
+                label = next(
+                    (label for regex, label in self._blocked if regex.match(lowered, match.start())),
+                    match.group(),
+                )
+                verdict.blocked = True
+                verdict.reason = f"Blocked dangerous pattern: {label}"
+        if _SPECIAL_RE.search(command) is None:
+            # Plain words only: one segment, no tokenizer needed
+            argv = command.split()
+            if argv:
+                segment = Segment(command.strip(), argv, "", UNKNOWN)
+                self._classify_segment(segment)
+                verdict.segments.append(segment)
+            return verdict
+        if _COMPLEX_RE.search(command) is None and (
+            "'" not in command
+            or (command.count("'") % 2 == 0 and _QUOTED_OPERATOR_RE.search(command) is None)
+        ):
+            self._split_operators(command, verdict.segments)
+        else:
+            self._split(command, verdict.segments, False, [0])
+        if not verdict.blocked and self.pipe_rules and "|" in command:
+            self._check_pipes(verdict)
+        return verdict
+
+    def _check_pipes(self, verdict: Verdict) -> None:
+        programs: dict[int, list[str]] = {}
+        for segment in verdict.segments:
+            if segment.argv:
+                programs.setdefault(segment.pipeline, []).append(_program_name(segment.argv))
+        for names in programs.values():
+            if len(names) < 2:
+                continue
+            for source, sink, label in self.pipe_rules:
+                for i in range(len(names) - 1):
+                    if source.fullmatch(names[i]) and any(sink.fullmatch(p) for p in names[i + 1:]):
+                        verdict.blocked = True
+                        verdict.reason = f"Blocked dangerous pattern: {label}"
+                        return
+
+    def _split_operators(self, text: str, out: list[Segment]) -> None:
+        """Split a line without quotes, groups or substitutions (C-level regex)."""
+        if "&" in text and (">&" in text or "&>" in text or "<&" in text):
+            parts = _OPERATOR_SPLIT_AMP_RE.split(text)
+        else:
+            parts = _OPERATOR_SPLIT_RE.split(text)
+        operator = ""
+        pipeline = 1
+        for index in range(0, len(parts), 2):
+            if index:
+                operator = parts[index - 1]
+                if operator != "|" and operator != "|&":
+                    pipeline += 1
+            part = parts[index]
+            redirects = []
+            if "<" in part or ">" in part:
+                # [text, op, target, text, op, target, ..., text]
+                pieces = _REDIRECT_RE.split(part)
+                redirects = list(zip(pieces[1::3], pieces[2::3]))
+                argv = " ".join(pieces[0::3]).split()
+            else:
+                argv = part.split()
+            if "'" in part:
+                argv = [_unquote(word) for word in argv]
+            if not argv and not redirects:
+                continue
+            segment = Segment(part.strip(), argv, "", UNKNOWN, "", operator, redirects, False, pipeline)
+            self._classify_segment(segment)
+            out.append(segment)
+
+    def _split(self, text: str, out: list[Segment], nested: bool, ids: list[int]) -> None:
+        """Tokenize text and append its segments to out."""
+        n = len(text)
+        pos = 0
+        words: list[str] = []
+        redirects: list[tuple[str, str]] = []
+        pending_redirect = ""
+        heredocs: list[str] = []
+        start = 0
+        operator = ""
+        ids[0] += 1
+        pipeline = ids[0]
+        match = _TOKEN_RE.match
+
+        while pos < n:
+            m = match(text, pos)
+            if m is None:
+                at = len(text) - len(text[pos:].lstrip(" \t\r"))
+                if at >= n:
+                    break
+                # Double quotes around $( ) / backticks, or an unbalanced quote
+                end = _scan_word(text, at)
+                kind = "word"
+                token = text[at:end]
+            else:
+                kind = m.lastgroup
+                at = m.start(kind)
+                token = m.group(kind)
+                end = m.end()
+
+            if kind == "word" or kind == "close":
+                # A stray ")" stays in the words so the segment is not clean
+                if pending_redirect:
+                    target = _unquote(token)
+                    redirects.append((pending_redirect, target))
+                    if pending_redirect.lstrip("0123456789") in ("<<", "<<-"):
+                        heredocs.append(target)
+                    pending_redirect = ""
+                else:
+                    if not words and not redirects:
+                        start = at
+                    words.append(token)
+            elif kind == "op":
+                if words or redirects:
+                    out.append(self._segment(text[start:at].rstrip(), words, redirects, operator, nested, pipeline))
+                    words = []
+                    redirects = []
+                if token != "|" and token != "|&":
+                    ids[0] += 1
+                    pipeline = ids[0]
+                operator = token
+                if token == "\n" and heredocs:
+                    end = _skip_heredocs(text, end, heredocs)
+                    heredocs = []
+            elif kind == "redir":
+                if not words and not redirects:
+                    start = at
+                pending_redirect = token
+            elif kind == "subst" or kind == "open":
+                close_at = _find_close(text, end, "`" if token == "`" else ")")
+                inner_end = n if close_at == -1 else close_at
+                if kind == "open" and words:
+                    # name() { ...: a function definition, body runs later
+                    words.append(text[at:inner_end + 1])
+                else:
+                    self._split(text[end:inner_end], out, True, ids)
+                    if kind == "subst":
+                        if pending_redirect:
+                            redirects.append((pending_redirect, text[at:inner_end + 1]))
+                            pending_redirect = ""
+                        else:
+                            if not words and not redirects:
+                                start = at
+                            words.append(text[at:inner_end + 1])
+                end = min(n, inner_end + 1)
+            pos = end
+
+        if pending_redirect:
+            redirects.append((pending_redirect, ""))
+        if words or redirects:
+            out.append(self._segment(text[start:].rstrip(), words, redirects, operator, nested, pipeline))
+
+    def _segment(
+        self,
+        text: str,
+        raw_words: list[str],
+        redirects: list[tuple[str, str]],
+        operator: str,
+        nested: bool,
+        pipeline: int,
+    ) -> Segment:
+        inner: list[str] = []
+        argv = []
+        for word in raw_words:
+            if '"' in word and ("$(" in word or "`" in word):
+                inner.extend(_substitutions(word))
+            argv.append(_unquote(word))
+        segment = Segment(text, argv, "", UNKNOWN, "", operator, redirects, nested, pipeline)
+        self._classify_segment(segment)
+        if inner:
+            # "$(...)" inside quotes: the quoted command decides as well
+            for command in inner:
+                sub = self.classify(command)
+                if sub.blocked or not sub.readonly:
+                    segment.kind = WRITE if sub.writes else UNKNOWN
+                    segment.reason = "command substitution"
+        return segment
+
+    def _classify_segment(self, segment: Segment) -> None:
+        argv = segment.argv
+        i = 0
+        privileged = False
+        program = argv[0].lower() if argv else ""
+        if "/" in program:
+            program = _basename(program)
+        if program in _WRAPPERS or program in _PREFIX_WORDS or "=" in program:
+            i, privileged = _skip_wrappers(argv)
+            program = _basename(argv[i]).lower() if i < len(argv) else ""
+
+        if segment.redirects:
+            for op, target in segment.redirects:
+                if _is_file_write(op, target):
+                    segment.kind = WRITE
+                    segment.reason = f"redirects output to {target or 'a file'}"
+                    segment.program = program
+                    return
+
+        if not program:
+            segment.reason = "empty command"
+            return
+        hit = self.tables.longest(program, argv, i + 1)
+        if hit is None:
+            segment.program = program
+            segment.reason = "not in the command tables"
+            return
+        kind, entry = hit
+        segment.program = entry
+        if kind == WRITE:
+            segment.kind = WRITE
+            segment.reason = f"write command: {entry}"
+            return
+        flags = _WRITE_FLAGS.get(entry)
+        if flags:
+            args = [a.lower().split("=", 1)[0] for a in argv[i + len(entry.split()):]]
+            if any(a in flags for a in args):
+                segment.kind = WRITE
+                segment.reason = f"{entry} with a writing flag"
+                return
+            if entry == "git branch" and any(not a.startswith("-") for a in args) and not any(
+                a in _GIT_BRANCH_LIST_FLAGS for a in args
+            ):
+                segment.kind = WRITE
+                segment.reason = "git branch creates a branch"
+                return
+        if privileged:
+            segment.reason = "runs with elevated privileges"
+            return
+        segment.kind = READONLY
+
+
+def _basename(word: str) -> str:
+    return os.path.basename(word) if "/" in word else word
+
+
+def _skip_wrappers(argv: list[str]) -> tuple[int, bool]:
+    """
+    Index of the program past VAR=value prefixes, { and wrappers like
+    sudo/env/xargs, and whether a privileged wrapper was skipped.
+    """
+    i = 0
+    privileged = False
+    while i < len(argv):
+        word = argv[i]
+        if word in _PREFIX_WORDS or ("=" in word and word.split("=", 1)[0].isidentifier()):
+            i += 1
+            continue
+        name = _basename(word).lower()
+        if name in _WRAPPERS and i + 1 < len(argv):
+            privileged = privileged or name in _PRIVILEGED
+            i += 1
+            while i < len(argv) and (argv[i].startswith("-") or (name == "timeout" and argv[i][:1].isdigit())):
+                i += 1
+            continue
+        break
+    return i, privileged
+
+
+def _program_name(argv: list[str]) -> str:
+    """Program a simple command runs (wrappers resolved), lowercased."""
+    i, _ = _skip_wrappers(argv)
+    return _basename(argv[i]).lower() if i < len(argv) else ""
+
+
+def _pattern_regex(pattern: str) -> str:
+    """Literal blocked pattern -> regex, whitespace-tolerant."""
+    # No end anchor: "rm -rf /" also blocks every path under the root
+    return r"\s+".join(re.escape(part) for part in pattern.split())
+
+
+def _skip_heredocs(text: str, pos: int, delimiters: list[str]) -> int:
+    """Skip here-document bodies starting at pos; return where commands resume."""
+    for delimiter in delimiters:
+        delimiter = delimiter.strip("'\"")
+        while pos < len(text):
+            nl = text.find("\n", pos)
+            line_end = len(text) if nl == -1 else nl
+            if text[pos:line_end].strip() == delimiter:
+                pos = line_end + 1
+                break
+            pos = line_end + 1
+    return min(pos, len(text))
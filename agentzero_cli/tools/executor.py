@@ -5,13 +5,27 @@ Executes shell commands, file operations with proper security checks.
 """
 
 import asyncio
+import codecs
 import os
+import re
+import shlex
 import shutil
+import signal
 import subprocess
+import time
+from collections import deque
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import AsyncGenerator
 
+from .command_classifier import CommandClassifier, Verdict
+from .file_reader import DEFAULT_MAX_BYTES, BinaryFileError, read_range
+from .result_cache import get_result_cache
+from .search import UnsupportedOption, format_matches, parse_query, search
+from .spool import DEFAULT_READ_LINES, MAX_OUTPUT_CHARS, SpoolWriter, get_output_spool
+from .walker import walk
+
 
 @dataclass
 class ToolResult:
@@ -20,9 +34,12 @@ class ToolResult:
     output: str
     error: str = ""
     return_code: int = 0
+    # Spool handle of the full output when it was too long to keep
+    output_handle: str = ""
 
 
-# Dangerous patterns that should never be executed
+# Dangerous patterns that should never be executed ("A.*|.*B" = A piped
+# into B; see tools/command_classifier.py)
 BLOCKED_PATTERNS = [
     "rm -rf /",
     "rm -rf /*",
@@ -36,6 +53,9 @@ BLOCKED_PATTERNS = [
     "curl.*|.*sh",
 ]
 
+# Opt-in persistent shell sessions (see tools/shell_session.py)
+PERSISTENT_SHELL = os.getenv("AGENTZERO_PERSISTENT_SHELL", "").lower() in ("1", "true", "yes")
+
 # Commands that modify system state (require confirmation in balanced mode)
 WRITE_COMMANDS = [
     "rm", "rmdir", "mv", "cp", "mkdir", "touch",
@@ -44,6 +64,29 @@ WRITE_COMMANDS = [
     "pip install", "npm install", "apt install",
 ]
 
+# Cache results of read-only calls (see tools/result_cache.py)
+RESULT_CACHE = os.getenv("AGENTZERO_RESULT_CACHE", "true").lower() not in ("0", "false", "no")
+
+# Read-only shell commands whose output changes without any file changing
+UNCACHEABLE_COMMANDS = ("date",)
+# Output depends on file contents no fingerprinted stat sees change
+# (git status/diff after an edit, ls -l sizes and times)
+WORKTREE_COMMANDS = ("git status", "git diff")
+_LS_NAME_FLAGS = set("aAdFpR1")
+
+# Max tool calls execute_batch runs at once
+BATCH_CONCURRENCY = int(os.getenv("AGENTZERO_BATCH_CONCURRENCY", "8"))
+
+# Threads prefetching directory listings for list_files (0 = walk inline)
+LIST_WORKERS = int(os.getenv("AGENTZERO_LIST_WORKERS", "0"))
+
+SHELL_TOOLS = ("shell", "terminal", "command", "bash")
+
+# Same as cli/approval.py READONLY_TOOLS
+READONLY_TOOLS = frozenset(
+    {"read_file", "read", "list_files", "tree", "ls", "search_text", "search", "rg", "read_output"}
+)
+
 # Safe read-only commands (auto-approve in balanced mode)
 READONLY_COMMANDS = [
     "ls", "cat", "head", "tail", "less", "more",
@@ -54,47 +97,265 @@ READONLY_COMMANDS = [
 ]
 
 
+_classifier = CommandClassifier(BLOCKED_PATTERNS, READONLY_COMMANDS, WRITE_COMMANDS)
+
+
+@lru_cache(maxsize=1024)
+def classify_command(command: str) -> Verdict:
+    """Split a command line into segments and classify each one."""
+    return _classifier.classify(command)
+
+
 def is_blocked(command: str) -> tuple[bool, str]:
     """Check if command matches any blocked pattern."""
-    cmd_lower = command.lower().strip()
-    
-    for pattern in BLOCKED_PATTERNS:
-        if pattern in cmd_lower:
-            return True, f"Blocked dangerous pattern: {pattern}"
-    
-    return False, ""
+    verdict = classify_command(command)
+    return verdict.blocked, verdict.reason
 
 
 def is_readonly(command: str) -> bool:
-    """Check if command is read-only (safe)."""
-    cmd_lower = command.lower().strip()
-    
-    for safe_cmd in READONLY_COMMANDS:
-        if cmd_lower.startswith(safe_cmd):
-            return True
-    
-    return False
+    """Check if every part of command is read-only (safe)."""
+    return classify_command(command).readonly
 
 
 def is_write_operation(command: str) -> bool:
-    """Check if command modifies state."""
-    cmd_lower = command.lower().strip()
-    
-    for write_cmd in WRITE_COMMANDS:
-        if cmd_lower.startswith(write_cmd):
-            return True
-    
-    # Check for redirections
-    if ">" in command or ">>" in command:
-        return True
-    
-    return False
+    """Check if any part of command modifies state."""
+    return classify_command(command).writes
+
+
+STREAM_CHUNK_BYTES = 4096
+# Max decoded chunks buffered before readers stop draining the pipes
+STREAM_QUEUE_SIZE = 16
+
+
+class OutputBuffer:
+    """Bounded head+tail buffer for command output.
+
+    Keeps the first and last ``max_chars // 2`` characters, so memory stays
+    flat no matter how much a command prints. With ``spool_label`` set, the
+    full output is written to the output spool once it overflows, and
+    ``handle`` names it for ``read_output``.
+    """
+
+    def __init__(self, max_chars: int = MAX_OUTPUT_CHARS, spool_label: str | None = None):
+        self.head_limit = max_chars // 2
+        self.tail_limit = max_chars - self.head_limit
+        self.total_chars = 0
+        self.spool_label = spool_label
+        self.spool: SpoolWriter | None = None
+        self._head: list[str] = []
+        self._head_len = 0
+        self._tail: deque[str] = deque()
+        self._tail_len = 0
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_chars > self.head_limit + self.tail_limit
+
+    @property
+    def handle(self) -> str:
+        return self.spool.handle if self.spool is not None else ""
+
+    def write(self, text: str) -> None:
+        """Append text, dropping the middle once the buffer is full."""
+        self.total_chars += len(text)
+        if self.spool is not None:
+            self.spool.write(text)
+        elif self.spool_label is not None and self.truncated:
+            # Nothing has been dropped yet: head + tail is all output so far
+            try:
+                self.spool = get_output_spool().open(self.spool_label)
+            except OSError:
+                self.spool_label = None
+            else:
+                self.spool.write("".join(self._head) + "".join(self._tail) + text)
+        if self._head_len < self.head_limit:
+            take = text[: self.head_limit - self._head_len]
+            self._head.append(take)
+            self._head_len += len(take)
+            text = text[len(take):]
+        if not text:
+            return
+        self._tail.append(text)
+        self._tail_len += len(text)
+        while len(self._tail) > 1 and self._tail_len - len(self._tail[0]) >= self.tail_limit:
+            self._tail_len -= len(self._tail.popleft())
+
+    def getvalue(self) -> str:
+        """Return buffered output with a marker where text was dropped."""
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if not self.truncated:
+            return head + tail
+        tail = tail[-self.tail_limit:] if self.tail_limit else ""
+        omitted = self.total_chars - len(head) - len(tail)
+        where = f"; full output: read_output {self.handle}" if self.handle else ""
+        return (
+            f"{head}\n... ({omitted} chars truncated, {self.total_chars} total chars{where}) ...\n{tail}"
+        )
+
+    def close(self) -> None:
+        """Finish the spool file, if any."""
+        if self.spool is not None:
+            self.spool.close()
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """Kill a shell and everything it spawned."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _pump_stream(
+    stream: asyncio.StreamReader,
+    name: str,
+    queue: asyncio.Queue,
+) -> None:
+    """Read a pipe, decode incrementally and push text chunks to queue.
+
+    The queue is bounded, so a slow consumer stops the reader, the pipe
+    fills up and the child blocks on write (backpressure).
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        data = await stream.read(STREAM_CHUNK_BYTES)
+        if not data:
+            rest = decoder.decode(b"", final=True)
+            if rest:
+                await queue.put((name, rest))
+            await queue.put((name, None))
+            return
+        text = decoder.decode(data)
+        if text:
+            await queue.put((name, text))
+
+
+class ShellStream:
+    """
+    Run a shell command and iterate its output while it is running.
+
+    Usage:
+        stream = ShellStream("make test", cwd=".")
+        async for chunk in stream:
+            print(chunk, end="")
+        result = stream.result
+
+    stdout and stderr chunks are yielded as they arrive. On timeout or
+    cancellation the whole process group is killed and ``result`` holds
+    whatever output was captured so far.
+    """
+
+    def __init__(
+        self,
+        command: str,
+        cwd: str | None = None,
+        timeout: int = 60,
+        max_output: int = MAX_OUTPUT_CHARS,
+    ):
+        self.command = command
+        self.cwd = cwd
+        self.timeout = timeout
+        self.stdout = OutputBuffer(max_output, spool_label=command)
+        self.stderr = OutputBuffer(max_output, spool_label=f"{command} (stderr)")
+        self.result: ToolResult | None = None
+
+    def __aiter__(self) -> AsyncGenerator[str, None]:
+        return self._run()
+
+    async def _run(self) -> AsyncGenerator[str, None]:
+        blocked, reason = is_blocked(self.command)
+        if blocked:
+            self.result = ToolResult(
+                success=False,
+                output="",
+                error=f"Command blocked: {reason}",
+                return_code=-1
+            )
+            return
+
+        try:
+            process = await asyncio.create_subprocess_shell(
+                self.command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self.cwd,
+                env={**os.environ, "TERM": "dumb"},  # Disable color codes
+                start_new_session=True,  # Own process group, killed as a unit
+            )
+        except Exception as e:
+            self.result = ToolResult(
+                success=False,
+                output="",
+                error=f"Execution error: {str(e)}",
+                return_code=-1
+            )
+            return
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        readers = [
+            asyncio.create_task(_pump_stream(process.stdout, "stdout", queue)),
+            asyncio.create_task(_pump_stream(process.stderr, "stderr", queue)),
+        ]
+        buffers = {"stdout": self.stdout, "stderr": self.stderr}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        error = ""
+
+        try:
+            open_streams = len(readers)
+            while open_streams:
+                name, text = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                if text is None:
+                    open_streams -= 1
+                    continue
+                buffers[name].write(text)
+                yield text
+            await asyncio.wait_for(process.wait(), max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            error = f"Command timed out after {self.timeout}s"
+        except (asyncio.CancelledError, GeneratorExit):
+            error = "Command cancelled"
+            raise
+        finally:
+            if process.returncode is None:
+                _kill_process_group(process)
+                await process.wait()
+            for reader in readers:
+                reader.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+            self.result = self._build_result(process, error)
+
+    def _build_result(self, process: asyncio.subprocess.Process, error: str) -> ToolResult:
+        self.stdout.close()
+        self.stderr.close()
+        output = self.stdout.getvalue().strip()
+        stderr = self.stderr.getvalue().strip()
+        if error:
+            return ToolResult(
+                success=False,
+                output=output,
+                error=f"{error}\n{stderr}".strip(),
+                return_code=-1,
+                output_handle=self.stdout.handle
+            )
+        return ToolResult(
+            success=process.returncode == 0,
+            output=output,
+            error=stderr,
+            return_code=process.returncode or 0,
+            output_handle=self.stdout.handle
+        )
 
 
 async def execute_shell(
     command: str,
     cwd: str | None = None,
-    timeout: int = 60
+    timeout: int = 60,
+    session: str | None = None
 ) -> ToolResult:
     """
     Execute a shell command asynchronously.
@@ -103,70 +364,40 @@ async def execute_shell(
         command: Shell command to execute
         cwd: Working directory (default: current)
         timeout: Timeout in seconds
+        session: Run in the persistent shell for this key instead of a
+            fresh /bin/sh (keeps cd/exports between calls)
     
     Returns:
         ToolResult with output, error, and return code
     """
-    # Security check
-    blocked, reason = is_blocked(command)
-    if blocked:
-        return ToolResult(
-            success=False,
-            output="",
-            error=f"Command blocked: {reason}",
-            return_code=-1
-        )
-    
-    try:
-        process = await asyncio.create_subprocess_shell(
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=cwd,
-            env={**os.environ, "TERM": "dumb"}  # Disable color codes
-        )
-        
-        try:
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
-            )
-        except asyncio.TimeoutError:
-            process.kill()
-            await process.wait()
-            return ToolResult(
-                success=False,
-                output="",
-                error=f"Command timed out after {timeout}s",
-                return_code=-1
-            )
-        
-        output = stdout.decode("utf-8", errors="replace").strip()
-        error = stderr.decode("utf-8", errors="replace").strip()
-        
-        # Truncate very long output
-        max_output = 10000
-        if len(output) > max_output:
-            output = output[:max_output] + f"\n... (truncated, {len(output)} total chars)"
-        
-        return ToolResult(
-            success=process.returncode == 0,
-            output=output,
-            error=error,
-            return_code=process.returncode or 0
-        )
-        
-    except Exception as e:
-        return ToolResult(
-            success=False,
-            output="",
-            error=f"Execution error: {str(e)}",
-            return_code=-1
-        )
+    if session is not None and shutil.which("bash"):
+        from .shell_session import get_session_pool
+
+        return await get_session_pool().run(command, session, cwd, timeout)
+
+    stream = ShellStream(command, cwd, timeout)
+    async for _ in stream:
+        pass
+    return stream.result
 
 
-async def read_file(path: str, max_lines: int = 500) -> ToolResult:
-    """Read file contents."""
+async def read_file(
+    path: str,
+    max_lines: int = 500,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> ToolResult:
+    """
+    Read file contents, optionally a line range.
+    
+    Args:
+        path: File path
+        max_lines: Lines returned when no range is given
+        start_line: First line (1-based)
+        end_line: Last line (inclusive)
+        max_bytes: Cap on returned bytes (hard cap 128KB)
+    """
     try:
         p = Path(path).expanduser()
         if not p.exists():
@@ -174,21 +405,43 @@ async def read_file(path: str, max_lines: int = 500) -> ToolResult:
         if not p.is_file():
             return ToolResult(False, "", f"Not a file: {path}")
         
-        content = p.read_text(encoding="utf-8", errors="replace")
-        lines = content.split("\n")
+        first = start_line or 1
+        last = end_line or first + max_lines - 1
+        chunk = await asyncio.to_thread(read_range, str(p), first, last, max_bytes)
+        content = chunk.content
         
-        if len(lines) > max_lines:
-            content = "\n".join(lines[:max_lines])
-            content += f"\n... ({len(lines) - max_lines} more lines)"
+        if chunk.end_line < chunk.start_line:
+            return ToolResult(True, f"(no lines from {first}, file has {chunk.total_lines} lines)")
+        
+        more = chunk.total_lines is None or chunk.end_line < chunk.total_lines
+        if chunk.truncated or more:
+            total = f" of {chunk.total_lines}" if chunk.total_lines is not None else ""
+            content += (
+                f"\n... (lines {chunk.start_line}-{chunk.end_line}{total}"
+                f"{', truncated at max_bytes' if chunk.truncated else ''}; "
+                f"use {path}:{chunk.end_line + 1}-{chunk.end_line + max_lines} to continue)"
+            )
         
         return ToolResult(True, content)
         
+    except BinaryFileError as e:
+        return ToolResult(False, "", f"{e}: {path}")
     except PermissionError:
         return ToolResult(False, "", f"Permission denied: {path}")
     except Exception as e:
         return ToolResult(False, "", f"Read error: {str(e)}")
 
 
+def _parse_line_range(command: str) -> tuple[str, int | None, int | None]:
+    """Split "path:START-END" into its parts (plain paths pass through)."""
+    match = re.match(r"^(.+):(\d+)(?:-(\d*))?$", command.strip())
+    if not match or Path(command.strip()).expanduser().exists():
+        return command.strip(), None, None
+    start = int(match.group(2))
+    end = int(match.group(3)) if match.group(3) else None
+    return match.group(1), start, end
+
+
 async def write_file(path: str, content: str) -> ToolResult:
     """Write content to file."""
     try:
@@ -203,8 +456,27 @@ async def write_file(path: str, content: str) -> ToolResult:
         return ToolResult(False, "", f"Write error: {str(e)}")
 
 
-async def list_files(path: str = ".", max_depth: int = 2) -> ToolResult:
-    """List files in directory."""
+async def list_files(
+    path: str = ".",
+    max_depth: int = 2,
+    max_entries: int = 2000,
+    max_bytes: int = 64000,
+    ignore_dirs: list[str] | None = None,
+    workers: int | None = None
+) -> ToolResult:
+    """
+    List files recursively, skipping ignored dirs and .gitignore matches.
+    
+    Args:
+        path: Directory to list
+        max_depth: 1 = direct children only
+        max_entries: Stop after this many entries
+        max_bytes: Stop once the listing reaches this size
+        ignore_dirs: Directory names to skip (default: context.ignore_dirs
+            from config.yaml)
+        workers: Threads for prefetching directory listings on wide trees
+            (default AGENTZERO_LIST_WORKERS)
+    """
     try:
         p = Path(path).expanduser()
         if not p.exists():
@@ -212,10 +484,20 @@ async def list_files(path: str = ".", max_depth: int = 2) -> ToolResult:
         if not p.is_dir():
             return ToolResult(False, "", f"Not a directory: {path}")
         
-        files = []
-        for item in sorted(p.iterdir()):
-            prefix = "d " if item.is_dir() else "f "
-            files.append(f"{prefix}{item.name}")
+        def collect() -> tuple[list[str], bool]:
+            files = []
+            size = 0
+            for entry in walk(str(p), max_depth, max_entries, ignore_dirs, workers=LIST_WORKERS if workers is None else workers):
+                line = f"{'d' if entry.is_dir else 'f'} {entry.path}"
+                size += len(line) + 1
+                if size > max_bytes:
+                    return files, True
+                files.append(line)
+            return files, len(files) >= max_entries
+        
+        files, truncated = await asyncio.to_thread(collect)
+        if truncated:
+            files.append(f"... (truncated at {len(files)} entries)")
         
         return ToolResult(True, "\n".join(files))
         
@@ -225,51 +507,421 @@ async def list_files(path: str = ".", max_depth: int = 2) -> ToolResult:
         return ToolResult(False, "", f"List error: {str(e)}")
 
 
-async def execute_tool(
+async def search_text(command: str, cwd: str | None = None, max_bytes: int = 64000) -> ToolResult:
+    """
+    Search file contents with the built-in engine (no ripgrep needed).
+    
+    Options the engine doesn't implement fall back to the real rg/grep
+    binary when one is installed.
+    
+    Args:
+        command: rg-style arguments, e.g. ``-i -C 2 -g '*.py' "def main" src``
+        cwd: Directory relative search paths start from
+        max_bytes: Cap on returned output
+    """
+    try:
+        query = parse_query(command)
+    except UnsupportedOption as e:
+        return await _search_with_binary(command, cwd, str(e))
+    except ValueError as e:
+        return ToolResult(False, "", f"Invalid search: {str(e)}")
+    root = os.path.expanduser(query.path)
+    if cwd and not os.path.isabs(root):
+        root = os.path.join(cwd, root)
+    if not os.path.exists(root):
+        return ToolResult(False, "", f"Path not found: {query.path}")
+    
+    try:
+        text, count, truncated = await asyncio.to_thread(
+            lambda: format_matches(search(query, cwd=cwd), max_bytes, query.files_only)
+        )
+    except re.error as e:
+        return ToolResult(False, "", f"Invalid pattern: {str(e)}")
+    except Exception as e:
+        return ToolResult(False, "", f"Search error: {str(e)}")
+    
+    if not count:
+        return ToolResult(True, f"No matches for {query.pattern!r}")
+    if truncated or (count >= query.max_matches and not query.files_only):
+        text += f"\n... (stopped at {count} matches)"
+    return ToolResult(True, text)
+
+
+async def _search_with_binary(command: str, cwd: str | None, reason: str) -> ToolResult:
+    """Run a search the built-in engine can't parse through rg (or grep)."""
+    try:
+        tokens = shlex.split(command)
+    except ValueError as e:
+        return ToolResult(False, "", f"Invalid search: {str(e)}")
+    if not tokens or tokens[0] not in ("rg", "grep"):
+        tokens.insert(0, "rg")
+    # Search is auto-approved as read-only; --pre runs arbitrary programs
+    if any(t.startswith(("--pre", "--search-zip", "-z")) for t in tokens[1:]):
+        return ToolResult(False, "", f"Invalid search: {reason}")
+    if not shutil.which(tokens[0]):
+        return ToolResult(False, "", f"Invalid search: {reason} ({tokens[0]} not installed)")
+    return await execute_shell(shlex.join(tokens), cwd)
+
+
+async def read_output(
+    handle: str,
+    offset: int = 0,
+    limit: int = DEFAULT_READ_LINES,
+    max_bytes: int = DEFAULT_MAX_BYTES
+) -> ToolResult:
+    """
+    Page through a spooled tool output.
+    
+    Args:
+        handle: Handle from a truncated result (e.g. out-3)
+        offset: Lines to skip
+        limit: Lines to return
+        max_bytes: Cap on returned bytes (hard cap 128KB)
+    """
+    try:
+        chunk = await asyncio.to_thread(get_output_spool().read, handle, offset, limit, max_bytes)
+    except KeyError:
+        return ToolResult(False, "", f"Unknown or expired output handle: {handle}")
+    except Exception as e:
+        return ToolResult(False, "", f"Read error: {str(e)}")
+    
+    if chunk.end_line < chunk.start_line:
+        return ToolResult(True, f"(no lines after {offset}, {handle} has {chunk.total_lines} lines)")
+    
+    content = chunk.content
+    more = chunk.total_lines is None or chunk.end_line < chunk.total_lines
+    if chunk.truncated or more:
+        total = f" of {chunk.total_lines}" if chunk.total_lines is not None else ""
+        content += (
+            f"\n... (lines {chunk.start_line}-{chunk.end_line}{total}"
+            f"{', truncated at max_bytes' if chunk.truncated else ''}; "
+            f"use read_output {handle} {chunk.end_line} {limit} to continue)"
+        )
+    return ToolResult(True, content)
+
+
+def _parse_read_output(command: str) -> tuple[str, int, int]:
+    """Split "HANDLE [OFFSET [LIMIT]]" into its parts."""
+    parts = command.split()
+    numbers = [int(part) for part in parts[1:3] if part.isdigit()]
+    offset = numbers[0] if numbers else 0
+    limit = numbers[1] if len(numbers) > 1 else DEFAULT_READ_LINES
+    return (parts[0] if parts else ""), offset, limit
+
+
+def _cache_name(tool_name: str, command: str) -> str | None:
+    """Cache namespace for a call, or None if its result must not be cached."""
+    if tool_name in ("read_file", "read"):
+        return "read_file"
+    if tool_name in ("list_files", "ls", "tree"):
+        return "list_files"
+    if tool_name in SHELL_TOOLS and is_concurrent_safe(tool_name, command):
+        words = command.split()
+        if words[0] in UNCACHEABLE_COMMANDS:
+            return None
+        if " ".join(words[:2]) in WORKTREE_COMMANDS:
+            return None
+        if words[0] == "ls" and any(
+            word.startswith("--") or not set(word[1:]) <= _LS_NAME_FLAGS
+            for word in words[1:] if word.startswith("-")
+        ):
+            return None
+        return "shell"
+    return None
+
+
+def _invalidates_cache(tool_name: str) -> bool:
+    """Anything that is not a known read-only tool may have written."""
+    return tool_name.lower() not in READONLY_TOOLS
+
+
+async def run_tool(
     tool_name: str,
     command: str,
-    cwd: str | None = None
-) -> AsyncGenerator[dict, None]:
+    cwd: str | None = None,
+    session: str | None = None
+) -> ToolResult:
     """
-    Execute a tool and yield status updates.
+    Run one tool call to completion.
+    
+    Successful read-only calls are served from the result cache while the
+    files they touch are unchanged; any other call clears the cache.
     
     Args:
         tool_name: Type of tool (shell, read_file, write_file, etc.)
         command: Command or arguments
         cwd: Working directory
-    
-    Yields:
-        Dict with type and content for each status update
+        session: Persistent shell key (None = one-shot shell)
     """
-    yield {"type": "status", "content": f"Executing: {tool_name}"}
+    if not RESULT_CACHE:
+        return await _dispatch_tool(tool_name, command, cwd, session)
+    
+    cache = get_result_cache()
+    name = _cache_name(tool_name, command)
+    if name is None:
+        try:
+            return await _dispatch_tool(tool_name, command, cwd, session)
+        finally:
+            if _invalidates_cache(tool_name):
+                cache.invalidate()
     
-    if tool_name in ("shell", "terminal", "command", "bash"):
-        result = await execute_shell(command, cwd)
+    # read_file/list_files resolve relative paths against the process cwd
+    key = cache.make_key(name, command, cwd if name == "shell" else None)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    generation = cache.generation
+    result = await _dispatch_tool(tool_name, command, cwd, session)
+    if result.success:
+        cache.put(key, result, len(result.output) + len(result.error), generation)
+    return result
+
+
+async def _dispatch_tool(
+    tool_name: str,
+    command: str,
+    cwd: str | None = None,
+    session: str | None = None
+) -> ToolResult:
+    if tool_name in SHELL_TOOLS:
+        return await execute_shell(command, cwd, session=session)
         
-    elif tool_name == "read_file":
-        result = await read_file(command)
+    elif tool_name in ("read_file", "read"):
+        path, start_line, end_line = _parse_line_range(command)
+        return await read_file(path, start_line=start_line, end_line=end_line)
         
     elif tool_name == "write_file":
         # Expect command as "path|||content"
         if "|||" in command:
             path, content = command.split("|||", 1)
-            result = await write_file(path.strip(), content)
-        else:
-            result = ToolResult(False, "", "Invalid write_file format")
+            return await write_file(path.strip(), content)
+        return ToolResult(False, "", "Invalid write_file format")
             
-    elif tool_name in ("list_files", "ls", "tree"):
-        result = await list_files(command or ".")
+    elif tool_name in ("search_text", "search", "rg"):
+        return await search_text(command, cwd)
         
-    else:
-        # Default to shell execution
-        result = await execute_shell(command, cwd)
+    elif tool_name in ("list_files", "ls", "tree"):
+        return await list_files(command or ".")
+    
+    elif tool_name == "read_output":
+        handle, offset, limit = _parse_read_output(command)
+        return await read_output(handle, offset, limit)
     
+    # Default to shell execution
+    return await execute_shell(command, cwd, session=session)
+
+
+async def execute_tool(
+    tool_name: str,
+    command: str,
+    cwd: str | None = None,
+    stream: bool = False,
+    session: str | None = None
+) -> AsyncGenerator[dict, None]:
+    """
+    Execute a tool and yield status updates.
+    
+    Args:
+        tool_name: Type of tool (shell, read_file, write_file, etc.)
+        command: Command or arguments
+        cwd: Working directory
+        stream: Yield shell output as it arrives (``partial`` tool_output
+            events). Only one-shot shells stream; a persistent session
+            returns the output when the command is done.
+        session: Persistent shell key (chat session); defaults to the
+            workspace when AGENTZERO_PERSISTENT_SHELL is set.
+
+    Yields:
+        Dict with type and content for each status update
+    """
+    yield {"type": "status", "content": f"Executing: {tool_name}"}
+    streamed = False
+    if session is None and PERSISTENT_SHELL:
+        session = cwd or os.getcwd()
+
+    result = None
+    if tool_name in SHELL_TOOLS and stream and session is None:
+        cache = get_result_cache() if RESULT_CACHE else None
+        name = _cache_name(tool_name, command) if cache else None
+        key = cache.make_key(name, command, cwd) if name else None
+        # A cached read-only command is returned whole
+        result = cache.get(key) if key else None
+        if result is None:
+            generation = cache.generation if cache else 0
+            shell_stream = ShellStream(command, cwd)
+            async for chunk in shell_stream:
+                streamed = True
+                yield {"type": "tool_output", "content": chunk, "partial": True}
+            result = shell_stream.result
+            if key and result.success:
+                cache.put(key, result, len(result.output) + len(result.error), generation)
+            elif cache and name is None:
+                cache.invalidate()
+    if result is None:
+        result = await run_tool(tool_name, command, cwd, session)
+    
+    for event in _result_events(result, streamed):
+        yield event
+    
+    yield {"type": "status", "content": "Execution complete"}
+
+
+def _result_events(result: ToolResult, streamed: bool = False) -> list[dict]:
+    """tool_output events for a finished call (output already streamed is skipped).
+
+    Events for spooled output carry its ``handle`` so frontends can page it.
+    """
+    handle = result.output_handle
     if result.success:
-        yield {"type": "tool_output", "content": result.output or "(no output)"}
+        if streamed:
+            events = []
+        else:
+            events = [{"type": "tool_output", "content": result.output or "(no output)"}]
     else:
         error_msg = result.error or f"Command failed with code {result.return_code}"
-        yield {"type": "tool_output", "content": f"[ERROR] {error_msg}"}
-        if result.output:
-            yield {"type": "tool_output", "content": result.output}
+        events = [{"type": "tool_output", "content": f"[ERROR] {error_msg}"}]
+        if result.output and not streamed:
+            events.append({"type": "tool_output", "content": result.output})
+    if handle:
+        for event in events:
+            event["handle"] = handle
+        if streamed:
+            events.append({
+                "type": "status",
+                "content": f"Full output saved as {handle} (/output {handle})",
+                "handle": handle,
+            })
+    return events
+
+
+@dataclass
+class BatchCall:
+    """One tool call submitted to execute_batch."""
+    tool_name: str
+    command: str
+    cwd: str | None = None
+
+    @classmethod
+    def coerce(cls, call: "BatchCall | dict") -> "BatchCall":
+        """Accept tool_request-style dicts as well as BatchCall."""
+        if isinstance(call, BatchCall):
+            return call
+        return cls(
+            tool_name=call.get("tool_name") or call.get("name") or "shell",
+            command=call.get("command", ""),
+            cwd=call.get("cwd"),
+        )
+
+
+@dataclass
+class BatchResult:
+    """Result of one call in a batch, with wall-clock timing."""
+    call: BatchCall
+    result: ToolResult
+    duration: float  # seconds
+    concurrent: bool  # False = ran alone as an ordering barrier
+
+
+def is_concurrent_safe(tool_name: str, command: str) -> bool:
+    """
+    True if a call only reads, so it can run alongside others.
     
-    yield {"type": "status", "content": "Execution complete"}
+    Read-only tools qualify; shell calls only when every segment of the
+    command line is read-only.
+    """
+    name = tool_name.lower()
+    if name in READONLY_TOOLS:
+        return True
+    if name not in SHELL_TOOLS:
+        return False
+    return is_readonly(command)
+
+
+async def execute_batch(
+    calls: list[BatchCall | dict],
+    cwd: str | None = None,
+    concurrency: int = BATCH_CONCURRENCY,
+    session: str | None = None
+) -> list[BatchResult]:
+    """
+    Run several independent tool calls, read-only ones concurrently.
+    
+    Consecutive read-only calls run together (at most ``concurrency`` at a
+    time). Any other call waits for the running group and then runs alone,
+    so a read after a write still sees the write. Results are returned in
+    request order.
+    
+    Args:
+        calls: BatchCall objects or tool_request-style dicts
+        cwd: Working directory for calls without their own
+        concurrency: Max calls in flight
+        session: Persistent shell key for the calls that run alone
+            (defaults as in execute_tool)
+    """
+    batch = [BatchCall.coerce(call) for call in calls]
+    if session is None and PERSISTENT_SHELL:
+        session = cwd or os.getcwd()
+    results: list[BatchResult | None] = [None] * len(batch)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, concurrent: bool) -> None:
+        call = batch[index]
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                # Concurrent shell calls get one-shot shells; a session
+                # would serialize them on its lock
+                result = await run_tool(
+                    call.tool_name, call.command, call.cwd or cwd,
+                    session=None if concurrent else session,
+                )
+            except Exception as e:
+                result = ToolResult(False, "", f"Execution error: {str(e)}", -1)
+            results[index] = BatchResult(call, result, time.perf_counter() - start, concurrent)
+
+    group: list[int] = []
+    for index, call in enumerate(batch):
+        if is_concurrent_safe(call.tool_name, call.command):
+            group.append(index)
+            continue
+        if group:
+            await asyncio.gather(*(run(i, True) for i in group))
+            group = []
+        await run(index, False)
+    if group:
+        await asyncio.gather(*(run(i, True) for i in group))
+
+    return results
+
+
+async def execute_tool_batch(
+    calls: list[BatchCall | dict],
+    cwd: str | None = None,
+    concurrency: int = BATCH_CONCURRENCY,
+    session: str | None = None
+) -> AsyncGenerator[dict, None]:
+    """
+    execute_batch as an event stream, for frontends.
+    
+    Yields:
+        Dict events like execute_tool, one status header per call (with its
+        timing) followed by that call's tool_output, in request order
+    """
+    yield {"type": "status", "content": f"Executing batch: {len(calls)} tools"}
+    start = time.perf_counter()
+    results = await execute_batch(calls, cwd, concurrency, session)
+    for n, item in enumerate(results, 1):
+        label = f"{item.call.tool_name} {item.call.command}".strip()
+        yield {
+            "type": "status",
+            "content": f"[{n}/{len(results)}] {label} ({item.duration:.2f}s)",
+            "duration": item.duration,
+        }
+        for event in _result_events(item.result):
+            yield event
+    elapsed = time.perf_counter() - start
+    serial = sum(item.duration for item in results)
+    yield {
+        "type": "status",
+        "content": f"Batch complete in {elapsed:.2f}s ({serial:.2f}s of tool time)",
+    }
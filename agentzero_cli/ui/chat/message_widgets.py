@@ -51,6 +51,31 @@ class AnimatedText(Static):
             pass
 
 
+class ToolOutputStream(Static):
+    """Tool output that grows as chunks arrive from a running command."""
+
+    def __init__(self, *, max_chars: int = 4000, **kwargs):
+        super().__init__("", **kwargs)
+        self.max_chars = max_chars
+        self._text = ""
+        self._dropped = 0
+
+    def append(self, chunk: str) -> None:
+        if not chunk:
+            return
+        self._text += chunk
+        if len(self._text) > self.max_chars:
+            cut = len(self._text) - self.max_chars
+            self._dropped += cut
+            self._text = self._text[cut:]
+        prefix = f"... ({self._dropped} chars above)\n" if self._dropped else ""
+        self.update(prefix + self._text)
+        try:
+            self.app.query_one("#chat-container").scroll_end()
+        except Exception:
+            pass
+
+
 class AnimatedMarkdown(Markdown):
     """Markdown widget that animates character by character."""
 
@@ -6,14 +6,13 @@ Provides contextual information during agent thinking:
 - Project-specific insights (bugs, suggestions, tips)
 """
 
-import json
 import random
 import time
-import urllib.error
-import urllib.request
 from pathlib import Path
 from typing import Any
 
+from ..llm_providers.transport import get_sync_client
+
 NEWS_URL = "https://feed.theones.io/api/news.json"
 NEWS_CACHE_TTL = 300  # 5 minutes
 
@@ -58,11 +57,11 @@ def fetch_news() -> list[dict[str, Any]]:
         return _news_cache.get("news", [])
 
     try:
-        req = urllib.request.Request(NEWS_URL, headers={"User-Agent": "AgentZeroCLI/0.2"})
-        with urllib.request.urlopen(req, timeout=3) as resp:
-            _news_cache = json.loads(resp.read().decode("utf-8"))
-            _news_cache_time = time.time()
-            return _news_cache.get("news", [])
+        resp = get_sync_client().get(NEWS_URL, timeout=3)
+        resp.raise_for_status()
+        _news_cache = resp.json()
+        _news_cache_time = time.time()
+        return _news_cache.get("news", [])
     except Exception:
         return []
 
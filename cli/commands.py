@@ -1,12 +1,18 @@
 """Slash command registry and handlers for CLI mode."""
 
+import asyncio
+import os
 import shlex
+import shutil
+import subprocess
 from collections.abc import Callable
 from typing import Any
 
 from rich.prompt import Prompt
 from rich.table import Table
 
+from tools.spool import get_output_spool
+
 
 class CLISlashCommands:
     """Registry and executor for CLI slash commands."""
@@ -22,13 +28,14 @@ class CLISlashCommands:
         self.register("quit", self._cmd_quit, "Exit CLI", [])
         self.register("exit", self._cmd_quit, "Exit CLI", [])
         self.register("clear", self._cmd_clear, "Clear screen", [])
-        self.register("status", self._cmd_status, "Show connection status", [])
+        self.register("status", self._cmd_status, "Show connection status and request metrics", ["export?"])
         self.register("mode", self._cmd_mode, "Change security mode", ["mode?"])
         self.register("security", self._cmd_security, "Security settings menu", [])
         self.register("ml", self._cmd_multiline, "Enter multi-line input mode", [])
         self.register("context", self._cmd_context, "Show context info", [])
         self.register("observer", self._cmd_observer, "Observer status", ["info?"])
         self.register("ai_observer", self._cmd_ai, "AI/LLM settings menu", [])
+        self.register("output", self._cmd_output, "Page through spooled tool output", ["handle?"])
 
     def register(
         self,
@@ -108,8 +115,16 @@ class CLISlashCommands:
         )
 
     async def _cmd_status(self, app: Any, args: list[str]) -> None:
-        """Show connection status."""
+        """Show connection status; /status export [path] writes the request metrics as JSON."""
         backend = app.backend
+        metrics = getattr(backend, "metrics", None)
+        if args and args[0] == "export":
+            if metrics is None:
+                app.renderer.error("This backend records no request metrics")
+                return
+            path = metrics.export_json(args[1] if len(args) > 1 else "agentzero-metrics.json")
+            app.renderer.info(f"Request metrics written to {path}")
+            return
         status = (
             f"Connection Status:\n"
             f"  API: {backend.api_url or 'not configured'}\n"
@@ -119,8 +134,49 @@ class CLISlashCommands:
             f"  Agent: {backend.agent_profile_name}\n"
             f"  Context ID: {backend.context_id or 'none'}"
         )
+        if metrics is not None:
+            status += "\nRequests:\n" + "\n".join(f"  {line}" for line in metrics.summary_lines())
+            for model, stats in metrics.get_stats()["models"].items():
+                ttft = stats["ttft"]["p50"]
+                tps = stats["tokens_per_sec"]["p50"]
+                status += (
+                    f"\n  {model}: {stats['requests']} ok, {stats['failures']} failed"
+                    + (f", TTFT {ttft:.2f}s" if ttft is not None else "")
+                    + (f", {tps:.1f} tok/s" if tps is not None else "")
+                )
         app.renderer.info(status)
 
+    async def _cmd_output(self, app: Any, args: list[str]) -> None:
+        """List spooled outputs or open one in the pager."""
+        spool = get_output_spool()
+        if not args:
+            entries = spool.recent()
+            if not entries:
+                app.renderer.info("No spooled output yet")
+                return
+            table = Table(title="Spooled Output", box=None)
+            table.add_column("Handle", style="cyan bold")
+            table.add_column("Bytes", justify="right")
+            table.add_column("Command")
+            for entry in entries:
+                table.add_row(entry.handle, str(entry.size), entry.label[:80])
+            app.console.print(table)
+            return
+
+        entry = spool.get(args[0])
+        if entry is None:
+            app.renderer.error(f"Unknown or expired output handle: {args[0]}")
+            return
+        pager = os.getenv("PAGER") or shutil.which("less")
+        if pager:
+            await asyncio.to_thread(subprocess.run, [*shlex.split(pager), entry.path])
+            return
+        # No pager available: show the first page
+        chunk = spool.read(entry.handle)
+        app.console.print(chunk.content, highlight=False, markup=False)
+        if chunk.total_lines is None or chunk.end_line < chunk.total_lines:
+            app.renderer.info(f"... more in {entry.path}")
+
     async def _cmd_mode(self, app: Any, args: list[str]) -> None:
         """Change security mode."""
         modes = ["paranoid", "balanced", "god_mode"]
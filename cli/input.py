@@ -85,6 +85,8 @@ class InputHandler:
             complete_while_typing=True,
             key_bindings=self.key_bindings,
         )
+        # Separate session: approvals stay out of the input history
+        self.approval_session: PromptSession | None = None
 
     def set_commands(self, commands: dict[str, tuple[Callable, str, list[str]]]) -> None:
         """Update completer with available commands."""
@@ -126,6 +128,30 @@ class InputHandler:
             pass
         return "\n".join(lines)
 
+    async def get_approval_async(self) -> str:
+        """Get tool approval input without blocking the event loop.
+
+        Cancelling the awaiting task closes the prompt and leaves stdin
+        alone, so the next prompt gets the next line.
+
+        Returns:
+            Single character: 'a', 'r', or 'e'
+        """
+        if self.approval_session is None:
+            self.approval_session = PromptSession()
+        while True:
+            try:
+                choice = (await self.approval_session.prompt_async("[A]pprove / [R]eject / [E]xplain? ")).strip().lower()
+            except (EOFError, KeyboardInterrupt):
+                return "r"
+            if choice in ("a", "approve", "y", "yes"):
+                return "a"
+            if choice in ("r", "reject", "n", "no"):
+                return "r"
+            if choice in ("e", "explain"):
+                return "e"
+            print("Enter A, R, or E")
+
     def get_approval(self) -> str:
         """Get tool approval input.
 
@@ -1,12 +1,13 @@
 """News feed from feed.theones.io for display during waiting."""
 
-import json
 import random
 import time
-import urllib.error
-import urllib.request
 from typing import Any
 
+import httpx
+
+from llm_providers.transport import get_sync_client
+
 NEWS_URL = "https://feed.theones.io/api/news.json"
 CACHE_TTL = 300  # 5 minutes
 
@@ -33,11 +34,12 @@ def fetch_news() -> list[dict[str, Any]]:
         return _cache.get("news", [])
 
     try:
-        with urllib.request.urlopen(NEWS_URL, timeout=3) as resp:
-            _cache = json.loads(resp.read().decode("utf-8"))
-            _cache_time = time.time()
-            return _cache.get("news", [])
-    except (urllib.error.URLError, urllib.error.HTTPError, json.JSONDecodeError):
+        resp = get_sync_client().get(NEWS_URL, timeout=3)
+        resp.raise_for_status()
+        _cache = resp.json()
+        _cache_time = time.time()
+        return _cache.get("news", [])
+    except (httpx.HTTPError, ValueError):
         return []
 
 
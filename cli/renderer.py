@@ -5,6 +5,8 @@ from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
 
+from tools.spool import DISPLAY_OUTPUT_CHARS, clip
+
 
 class OutputRenderer:
     """Renders output to terminal using Rich library."""
@@ -67,11 +69,14 @@ class OutputRenderer:
         )
         self.console.print(panel)
 
-    def tool_output(self, text: str) -> None:
-        """Render tool execution output."""
-        if len(text) > 2000:
-            text = text[:2000] + "\n... [truncated]"
-        self.console.print(f"[dim]{text}[/]")
+    def tool_output(self, text: str, handle: str = "") -> None:
+        """Render tool execution output (head + tail; /output pages the rest)."""
+        text = clip(text, DISPLAY_OUTPUT_CHARS, handle)
+        self.console.print(text, style="dim", highlight=False, markup=False)
+
+    def tool_stream(self, text: str) -> None:
+        """Render a live output chunk from a running command."""
+        self.console.print(text, end="", style="dim", highlight=False, markup=False)
 
     def approved(self, command: str, auto: bool = False) -> None:
         """Render approval confirmation."""
@@ -92,6 +97,10 @@ class OutputRenderer:
         """Render info message."""
         self.console.print(f"[cyan]{text}[/]")
 
+    def info_stream(self, text: str) -> None:
+        """Render a piece of a streamed info message."""
+        self.console.print(text, end="", style="cyan", highlight=False, markup=False)
+
     def goodbye(self) -> None:
         """Render goodbye message."""
         self.console.print("[dim]Goodbye![/]")
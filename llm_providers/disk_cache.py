@@ -0,0 +1,124 @@
+"""
+Small on-disk JSON caches shared by providers and the observer.
+
+``DiskLRUCache`` keeps ``key -> value`` entries with a TTL and an entry
+limit (least recently used evicted first) in one JSON file. Writes are
+atomic (temp file + rename) and merge with what other processes wrote
+since the file was read, so several sessions can share a cache.
+
+Files live in CACHE_DIR (AGENTZERO_CACHE_DIR, default ~/.cache/agentzero).
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+CACHE_DIR = Path(os.getenv("AGENTZERO_CACHE_DIR", str(Path.home() / ".cache" / "agentzero")))
+
+
+def cache_path(name: str) -> Path:
+    """Path of a cache file in CACHE_DIR."""
+    return CACHE_DIR / name
+
+
+def read_json(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_json_atomic(path: Path, data: dict) -> bool:
+    """Write data as JSON via a temp file and rename; False on failure."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        return False
+    return True
+
+
+class DiskLRUCache:
+    """JSON-file cache with a TTL and an LRU entry limit."""
+
+    def __init__(self, path: Path | str, max_entries: int = 500, ttl: float = 7 * 86400):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] | None = None
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            self._entries = read_json(self.path)
+        return self._entries
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None or now - entry.get("created", 0) > self.ttl:
+                self.misses += 1
+                return None
+            # Recency is written back with the next put
+            entry["used"] = now
+            self.hits += 1
+            return entry.get("value")
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            entries[key] = {"value": value, "created": now, "used": now}
+            # Merge entries other processes added meanwhile (newest use wins)
+            for other_key, other in read_json(self.path).items():
+                mine = entries.get(other_key)
+                if mine is None or other.get("used", 0) > mine.get("used", 0):
+                    entries[other_key] = other
+            self._trim(now)
+            write_json_atomic(self.path, entries)
+
+    def _trim(self, now: float) -> None:
+        entries = self._entries or {}
+        for key in [k for k, e in entries.items() if now - e.get("created", 0) > self.ttl]:
+            del entries[key]
+        overflow = len(entries) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(entries, key=lambda k: entries[k].get("used", 0))[:overflow]
+            for key in oldest:
+                del entries[key]
+            self.evictions += overflow
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                write_json_atomic(self.path, self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+            write_json_atomic(self.path, {})
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "path": str(self.path),
+        }
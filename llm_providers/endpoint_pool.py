@@ -0,0 +1,153 @@
+"""
+Least-loaded scheduling across several local LLM servers.
+
+``LOCAL_LLM_URL`` may list several OpenAI-compatible servers separated
+by commas. ``EndpointPool`` tracks, per server, whether it is up, how
+many streams are outstanding and an exponentially weighted moving
+average (EWMA) of tokens per second. Load is shared by all backends in
+the process, so every session sees the streams the others have open.
+
+A session picks the server with the fewest outstanding streams, the
+fastest one among equals, and then sticks to it so the server's KV
+cache keeps holding the conversation. It moves only when its server
+goes down, or is full (LOCAL_LLM_MAX_STREAMS, or llama.cpp's slot count)
+while another one has room. A server that went down is checked again
+after LOCAL_LLM_RECHECK seconds.
+
+Env vars:
+- LOCAL_LLM_MAX_STREAMS: streams one server serves at once (default 2)
+- LOCAL_LLM_RECHECK: seconds before a down server is checked again (default 30)
+"""
+
+import os
+import time
+from dataclasses import dataclass
+
+from .model_router import _ewma
+
+LOCAL_MAX_STREAMS = int(os.getenv("LOCAL_LLM_MAX_STREAMS", "2"))
+LOCAL_RECHECK = float(os.getenv("LOCAL_LLM_RECHECK", "30"))
+
+
+def parse_endpoints(value: str | list[str] | None) -> list[str]:
+    """Server URLs from a list or a comma-separated string, without duplicates."""
+    if not value:
+        return []
+    parts = value.split(",") if isinstance(value, str) else value
+    urls: list[str] = []
+    for part in parts:
+        url = part.strip().rstrip("/")
+        if url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+@dataclass
+class Endpoint:
+    """Health and load of one local server."""
+    url: str
+    state: str = "unknown"  # unknown, up, down
+    outstanding: int = 0
+    capacity: int = LOCAL_MAX_STREAMS
+    tokens_per_sec: float | None = None
+    requests: int = 0
+    failures: int = 0
+    recheck_at: float = 0.0
+    last_error: str = ""
+
+    @property
+    def full(self) -> bool:
+        return self.capacity > 0 and self.outstanding >= self.capacity
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "capacity": self.capacity,
+            "tokens_per_sec": round(self.tokens_per_sec, 1) if self.tokens_per_sec is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+_endpoints: dict[str, Endpoint] = {}
+
+
+class EndpointPool:
+    """Picks a server for a session; load counts are shared per process."""
+
+    def __init__(self, urls: list[str], capacity: int = LOCAL_MAX_STREAMS, recheck: float = LOCAL_RECHECK):
+        self.urls = list(urls)
+        self.recheck = recheck
+        self.moves = 0
+        for url in self.urls:
+            if url not in _endpoints:
+                _endpoints[url] = Endpoint(url, capacity=capacity)
+
+    def __getitem__(self, url: str) -> Endpoint:
+        return _endpoints[url]
+
+    def _rank_key(self, url: str) -> tuple:
+        endpoint = _endpoints[url]
+        # Unmeasured servers count as fast, so each one is tried
+        speed = endpoint.tokens_per_sec if endpoint.tokens_per_sec is not None else float("inf")
+        return (endpoint.full, endpoint.outstanding, -speed)
+
+    def rank(self) -> list[str]:
+        """Servers not known to be down, least loaded first; then the down ones."""
+        live = [url for url in self.urls if _endpoints[url].state != "down"]
+        down = [url for url in self.urls if _endpoints[url].state == "down"]
+        return sorted(live, key=self._rank_key) + sorted(down, key=lambda url: _endpoints[url].recheck_at)
+
+    def pick(self, current: str | None = None) -> str:
+        """Server for the next request of a session now on current."""
+        best = self.rank()[0]
+        if current in _endpoints and current in self.urls:
+            endpoint = _endpoints[current]
+            if endpoint.state != "down" and not (endpoint.full and not _endpoints[best].full):
+                return current
+            if best != current:
+                self.moves += 1
+        return best
+
+    def due_for_check(self) -> list[str]:
+        """Down servers whose recheck time has come (each is handed out once per period)."""
+        now = time.monotonic()
+        due = [url for url in self.urls if _endpoints[url].state == "down" and now >= _endpoints[url].recheck_at]
+        for url in due:
+            _endpoints[url].recheck_at = now + self.recheck
+        return due
+
+    def mark_up(self, url: str, capacity: int | None = None) -> None:
+        endpoint = _endpoints[url]
+        endpoint.state = "up"
+        if capacity:
+            endpoint.capacity = capacity
+
+    def mark_down(self, url: str, reason: str = "") -> None:
+        endpoint = _endpoints[url]
+        endpoint.state = "down"
+        endpoint.failures += 1
+        endpoint.last_error = reason[:200]
+        endpoint.recheck_at = time.monotonic() + self.recheck
+
+    def begin(self, url: str) -> None:
+        """A stream to url is being opened."""
+        endpoint = _endpoints[url]
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+
+    def end(self, url: str, tokens: int = 0, seconds: float = 0.0) -> None:
+        """A stream to url is closed; tokens were generated in seconds."""
+        endpoint = _endpoints[url]
+        endpoint.outstanding = max(endpoint.outstanding - 1, 0)
+        if tokens > 0 and seconds > 0:
+            endpoint.tokens_per_sec = _ewma(endpoint.tokens_per_sec, tokens / seconds)
+            endpoint.state = "up"
+
+    def get_stats(self) -> dict:
+        return {
+            "moves": self.moves,
+            "servers": {url: _endpoints[url].get_stats() for url in self.urls},
+        }
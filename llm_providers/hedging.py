@@ -0,0 +1,140 @@
+"""
+Hedged requests: a second model gets the request when the first is slow.
+
+With hedging on, a request that has produced no first token after the
+hedge delay is also sent to the next candidate model. Whichever stream
+starts first is kept; the other is cancelled at once, which closes its
+connection so the upstream stops generating (and billing) it.
+
+The delay is a percentile of recently observed times to first token, so
+only the slow tail is hedged. A budget caps hedges at a fraction of all
+requests (0.1: at most 10% extra requests).
+
+Env vars:
+- AGENTZERO_HEDGE: set to true to hedge OpenRouter requests (default off)
+- AGENTZERO_HEDGE_PERCENTILE: TTFT percentile used as the delay (default 90)
+- AGENTZERO_HEDGE_BUDGET: max hedges per request (default 0.1)
+- AGENTZERO_HEDGE_DELAY: delay in seconds until enough TTFTs are known (default 3)
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Callable
+
+HEDGE = os.getenv("AGENTZERO_HEDGE", "false").lower() in ("1", "true", "yes", "on")
+HEDGE_PERCENTILE = float(os.getenv("AGENTZERO_HEDGE_PERCENTILE", "90"))
+HEDGE_BUDGET = float(os.getenv("AGENTZERO_HEDGE_BUDGET", "0.1"))
+HEDGE_DELAY = float(os.getenv("AGENTZERO_HEDGE_DELAY", "3"))
+# TTFT samples needed before the percentile replaces HEDGE_DELAY
+MIN_SAMPLES = 5
+MIN_DELAY = 0.25
+
+
+class HedgePolicy:
+    """Hedge delay, budget and win/loss counts for one backend."""
+
+    def __init__(
+        self,
+        enabled: bool = HEDGE,
+        percentile: float = HEDGE_PERCENTILE,
+        budget: float = HEDGE_BUDGET,
+        initial_delay: float = HEDGE_DELAY,
+        window: int = 100,
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.initial_delay = initial_delay
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self.losses = 0
+        self._ttfts: deque[float] = deque(maxlen=window)
+
+    def record_ttft(self, seconds: float) -> None:
+        self._ttfts.append(seconds)
+
+    def delay(self) -> float:
+        """Seconds without a first token after which a request is hedged."""
+        if len(self._ttfts) < MIN_SAMPLES:
+            return self.initial_delay
+        ordered = sorted(self._ttfts)
+        index = min(int(len(ordered) * self.percentile / 100), len(ordered) - 1)
+        return max(ordered[index], MIN_DELAY)
+
+    def allow(self) -> bool:
+        """True if one more hedge stays within the budget."""
+        return self.enabled and self.hedges + 1 <= self.budget * self.requests
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_rate": round(self.hedges / self.requests, 3) if self.requests else 0.0,
+            "wins": self.wins,
+            "losses": self.losses,
+            "delay": round(self.delay(), 3),
+        }
+
+
+async def _close(task: asyncio.Task, stream: AsyncIterator) -> None:
+    """Cancel a pending read and close its stream (and connection)."""
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception:
+            pass
+
+
+async def race(
+    primary: AsyncIterator,
+    delay: float,
+    start_hedge: Callable[[], AsyncIterator | None],
+    started: Callable[[Any], bool] = lambda event: True,
+) -> tuple[int, Any, AsyncIterator]:
+    """
+    Wait for the first event of primary; after delay, also start a hedge.
+
+    Returns ``(index, first_event, stream)`` of the stream that started
+    first (0 = primary, 1 = hedge); the other one is closed. A stream
+    whose first event fails ``started`` (an error reply) or that raises
+    only wins if the other one fails too, primary first.
+    start_hedge returns None when no hedge should be sent.
+    """
+    streams = [primary]
+    tasks = [asyncio.ensure_future(primary.__anext__())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            hedge = start_hedge()
+            if hedge is not None:
+                streams.append(hedge)
+                tasks.append(asyncio.ensure_future(hedge.__anext__()))
+
+        chosen = None
+        pending = set(tasks)
+        while pending and chosen is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.index):
+                if task.exception() is None and started(task.result()):
+                    chosen = tasks.index(task)
+                    break
+        if chosen is None:
+            # Nothing started: the primary's error reply, else the hedge's
+            chosen = next((i for i, task in enumerate(tasks) if task.exception() is None), None)
+    except BaseException:
+        for task, stream in zip(tasks, streams):
+            await _close(task, stream)
+        raise
+
+    for index, task in enumerate(tasks):
+        if index != chosen:
+            await _close(task, streams[index])
+    if chosen is None:
+        raise tasks[0].exception()
+    return chosen, tasks[chosen].result(), streams[chosen]
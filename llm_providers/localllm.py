@@ -11,11 +11,34 @@ Supports OpenAI-compatible APIs:
 Uses standard /v1/chat/completions endpoint.
 """
 
-import json
+import asyncio
 import os
+import random
+import time
 import httpx
 from dataclasses import dataclass
 from typing import AsyncGenerator, Optional
+from urllib.parse import urlsplit
+
+from . import transport
+from .capabilities import ToolModeSelector, get_capability_store, rejects_tools
+from .context_window import ContextWindow, ToolTranscript, alternating, context_length_of
+from .endpoint_pool import EndpointPool, parse_endpoints
+from .streaming import ChatStream, ReadAhead
+from .prompt_cache import PROMPT_CACHE, PromptCacheStats, llamacpp_fields
+from .request_metrics import RequestMetrics
+from .residency import ResidencyManager
+from .retry import LOCAL_RATE_LIMIT, RetryPolicy, get_rate_limiter, is_retryable, parse_retry_after, retrying_stream
+from .tool_schema import (
+    ReplyReader,
+    batch_results,
+    messages_for_mode,
+    request_fields,
+    system_prompt,
+    take_call,
+    unanswered,
+)
+from .tool_tags import ToolTag, parse_tool_tags
 
 
 @dataclass 
@@ -24,7 +47,13 @@ class AgentEvent:
     type: str
     content: str
     tool_call: Optional[dict] = None
+    partial: bool = False  # tool_output chunk of a command still running
+    calls: Optional[list] = None  # tool_batch: one tool_request-style dict per call
+    handle: Optional[str] = None  # tool_output: spool handle for read_output
+    duration: Optional[float] = None  # batch status header: the call's seconds
+
 
+MAX_TOKENS = 2048
 
 # Default endpoints for common local LLM servers
 DEFAULT_ENDPOINTS = {
@@ -38,12 +67,15 @@ You help users with coding tasks by analyzing requests and executing tools when
 
 When you need to execute a command, respond with a tool call in this format:
 <tool name="shell" command="the command" reason="why you need this"/>
+Use one tag per tool call; several tags may appear in one response. Escape a " inside a value as \\".
 
 Available tools:
 - shell: Execute shell commands
-- read_file: Read file contents  
+- read_file: Read file contents (path, or path:START-END for a line range)
 - write_file: Write to a file
-- list_files: List directory contents
+- list_files: List directory contents recursively (skips .gitignore'd files)
+- search_text: Search file contents (rg-style: [-i] [-F] [-C N] [-g GLOB] PATTERN [PATH])
+- read_output: Page through a truncated output by its handle (HANDLE [OFFSET [LIMIT]], in lines)
 
 Always explain your reasoning. Be concise but thorough."""
 
@@ -52,210 +84,564 @@ class LocalLLMBackend:
     """
     Backend for local LLM servers (LM Studio, Ollama, etc.)
     
+    The server is probed in the background (``/models``, plus ``/props`` on
+    llama.cpp) and what it reports is kept in the capability record, so a
+    restart starts from the last known model list, context lengths and
+    server kind while the probe refreshes them. ``state`` is "probing"
+    until the first probe finishes, then "ready" or "offline".
+    
+    Several servers can be given; they are probed in parallel and the
+    session runs on the least loaded one until it goes down or fills up
+    (llm_providers/endpoint_pool.py). ``base_url`` is the current one.
+    
     Env vars:
-    - LOCAL_LLM_URL: Base URL (e.g., http://localhost:1234/v1)
+    - LOCAL_LLM_URL: Base URL (e.g., http://localhost:1234/v1), or several separated by commas
     - LOCAL_LLM_MODEL: Model name (optional, uses first available)
+    - LOCAL_LLM_SERVER: Server kind (optional, e.g. llamacpp; detected from /models)
     """
     
+    # Capability-record model name for server-wide facts
+    SERVER_ENTRY = "*"
+    
     def __init__(
         self,
-        base_url: Optional[str] = None,
+        base_url: Optional[str | list[str]] = None,
         model: Optional[str] = None,
-        timeout: int = 120
+        timeout: int = 120,
+        native_tools: Optional[str] = None
     ):
-        self.base_url = base_url or os.getenv("LOCAL_LLM_URL", "http://localhost:1234/v1")
-        self.base_url = self.base_url.rstrip("/")
+        self.endpoints = parse_endpoints(base_url or os.getenv("LOCAL_LLM_URL", "http://localhost:1234/v1"))
+        self.pool = EndpointPool(self.endpoints)
+        self.base_url = self.pool.pick()
         
         self.model = model or os.getenv("LOCAL_LLM_MODEL", "")
+        self._model_from_user = bool(self.model)
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
         self.conversation_history: list[dict] = []
+        # Native calls of the last reply still waiting for their result
+        self.pending_calls: list[ToolTag] = []
+        # Results of tools run while their reply is still streaming
+        self._held_results: Optional[list[dict]] = None
+        self.last_usage = None
+        self._server_from_env = bool(os.getenv("LOCAL_LLM_SERVER"))
+        self.server_type = os.getenv("LOCAL_LLM_SERVER", "").lower() or None
+        self.context_length: Optional[int] = None
+        self.context = ContextWindow(reserve=MAX_TOKENS)
+        self.state = "probing"
+        self.models: list[str] = []
+        self._probe_task: Optional[asyncio.Task] = None
+        self._recheck_task: Optional[asyncio.Task] = None
+        slot = os.getenv("LOCAL_LLM_SLOT", "")
+        self.slot_id: Optional[int] = int(slot) if slot.isdigit() else None
+        self.prompt_cache = PromptCacheStats()
+        self.metrics = RequestMetrics()
+        self.native_tools = native_tools
+        self._tool_modes: Optional[ToolModeSelector] = None
+        # A server still loading its model answers 503 for a while (llm_providers/retry.py)
+        self.retry = RetryPolicy()
+        self.limiter = get_rate_limiter(self.base_url, LOCAL_RATE_LIMIT)
+        # Warm-up and keep-alive so prompts don't pay a cold model load (llm_providers/residency.py)
+        self.residency = ResidencyManager(self)
         
-        # Auto-detect model if not specified
+        # Start from the last probe; no network here, so startup never waits on the server
+        self._known = self._apply_server_info(get_capability_store().get(self.base_url, self.SERVER_ENTRY))
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client shared by all backends (llm_providers/transport.py)."""
+        return transport.get_async_client()
+    
+    async def warm_up(self) -> bool:
+        """Pre-connect to the local servers, probe them and load the model."""
+        self.start_probe()
+        self.residency.start()
+        return any(await asyncio.gather(*(transport.warm_up(url) for url in self.endpoints)))
+    
+    def start_probe(self) -> Optional[asyncio.Task]:
+        """Probe the server in the background (once per backend)."""
+        if self._probe_task is None:
+            try:
+                self._probe_task = asyncio.get_running_loop().create_task(self._probe_server())
+            except RuntimeError:
+                return None
+        return self._probe_task
+    
+    async def ready(self) -> None:
+        """Wait until the probe has finished."""
+        task = self.start_probe()
+        if task is not None:
+            await asyncio.shield(task)
+    
+    async def _ensure_server(self) -> None:
+        """Wait for the probe only when nothing is known about the server yet."""
+        if self._known and self.model:
+            self.start_probe()
+        else:
+            await self.ready()
         if not self.model:
-            self.model = self._detect_model()
+            self.model = "default"
     
-    def _detect_model(self) -> str:
-        """Detect available model from server."""
+    def _apply_server_info(self, info: dict) -> bool:
+        """Use server facts (cached or just probed); False if there were none."""
+        if not info:
+            return False
+        if not self._server_from_env and info.get("server_type") is not None:
+            self.server_type = info["server_type"]
+        self.models = list(info.get("models", []))
+        if not self.model:
+            self.model = info.get("default_model", "")
+        model_info = get_capability_store().get(self.base_url, self.model) if self.model else {}
+        num_ctx = self.residency.num_ctx if self.server_type == "ollama" else None
+        self.context_length = num_ctx or info.get("n_ctx") or model_info.get("context_length") or self.context_length
+        slots = info.get("total_slots")
+        if self.slot_id is None and isinstance(slots, int) and slots > 0:
+            # One slot per session, so its KV cache holds this conversation
+            self.slot_id = random.randrange(slots)
+        return True
+    
+    @staticmethod
+    def _server_kind(url: str, owners: set) -> str:
+        """llamacpp, ollama (models owned_by "library", or the default port) or ""."""
+        if "llamacpp" in owners:
+            return "llamacpp"
+        if owners & {"library", "ollama"} or urlsplit(url).port == 11434:
+            return "ollama"
+        return ""
+    
+    @staticmethod
+    def _model_kind(entry: dict) -> str:
+        """chat or embedding (LM Studio and others list both under /models)."""
+        kind = str(entry.get("type", "")).lower()
+        if "embed" in kind or "embed" in str(entry.get("id", "")).lower():
+            return "embedding"
+        return "chat"
+    
+    async def _probe_server(self) -> None:
+        """Probe every server in parallel and settle on the least loaded one."""
+        infos = dict(zip(self.endpoints, await asyncio.gather(*(self._probe_endpoint(url) for url in self.endpoints))))
+        self.state = "ready" if any(self.pool[url].state == "up" for url in self.endpoints) else "offline"
+        if not self._switch(self.pool.pick(self.base_url)) and infos[self.base_url]:
+            self._known = self._apply_server_info(infos[self.base_url])
+        if self.server_type is None:
+            self.server_type = ""
+    
+    async def _probe_endpoint(self, url: str) -> dict:
+        """Ask one server about itself and record the answer."""
+        store = get_capability_store()
+        info: dict = {}
         try:
-            import urllib.request
-            with urllib.request.urlopen(f"{self.base_url}/models", timeout=5) as resp:
-                data = json.loads(resp.read().decode())
-                models = data.get("data", [])
-                if models:
-                    # Prefer chat models, avoid embedding models
-                    for m in models:
-                        model_id = m.get("id", "")
-                        if "embed" not in model_id.lower():
-                            return model_id
-                    return models[0].get("id", "default")
-        except Exception:
-            pass
-        return "default"
+            resp = await self.client.get(f"{url}/models", timeout=5)
+            self.pool.mark_up(url)
+            if resp.status_code == 200:
+                entries = resp.json().get("data", [])
+                owners = {m.get("owned_by", "") for m in entries}
+                info["server_type"] = self._server_kind(url, owners)
+                info["models"] = [m.get("id", "") for m in entries]
+                # Prefer chat models, avoid embedding models
+                chat = [m.get("id", "") for m in entries if self._model_kind(m) == "chat"]
+                if chat or entries:
+                    info["default_model"] = (chat or info["models"])[0]
+                for m in entries:
+                    store.record(url, m.get("id", ""), kind=self._model_kind(m), context_length=context_length_of(m))
+        except httpx.HTTPError as e:
+            self.pool.mark_down(url, type(e).__name__)
+        except (ValueError, AttributeError):
+            info = {}
+        if info.get("server_type") == "llamacpp":
+            info.update(await self._probe_props(url))
+            # Each slot serves one stream
+            self.pool.mark_up(url, capacity=info.get("total_slots"))
+        if info:
+            store.record(url, self.SERVER_ENTRY, **info)
+        return info
+    
+    async def _probe_props(self, url: str) -> dict:
+        """llama.cpp /props: runtime context size (/models only has the trained one) and slots."""
+        info = {}
+        try:
+            props = await self.client.get(f"{url.removesuffix('/v1')}/props", timeout=5)
+            data = props.json() if props.status_code == 200 else {}
+        except (httpx.HTTPError, ValueError):
+            return info
+        if not isinstance(data, dict):
+            return info
+        n_ctx = (data.get("default_generation_settings") or {}).get("n_ctx")
+        if isinstance(n_ctx, int) and n_ctx > 0:
+            info["n_ctx"] = n_ctx
+        if isinstance(data.get("total_slots"), int):
+            info["total_slots"] = data["total_slots"]
+        return info
+    
+    def _pick_server(self) -> bool:
+        """Choose the server for the next request; True if the session moved."""
+        due = self.pool.due_for_check()
+        if due and (self._recheck_task is None or self._recheck_task.done()):
+            # Down servers come back into rotation once they answer again
+            self._recheck_task = asyncio.ensure_future(asyncio.gather(*(self._probe_endpoint(url) for url in due)))
+        return self._switch(self.pool.pick(self.base_url))
+    
+    def _switch(self, url: str) -> bool:
+        """Move the session to another server; its per-server state starts over."""
+        if url == self.base_url:
+            return False
+        self.base_url = url
+        if not self._server_from_env:
+            self.server_type = None
+        if not self._model_from_user:
+            self.model = ""
+        self.context_length = None
+        if not os.getenv("LOCAL_LLM_SLOT", "").isdigit():
+            self.slot_id = None
+        self._tool_modes = None
+        self.limiter = get_rate_limiter(url, LOCAL_RATE_LIMIT)
+        self._known = self._apply_server_info(get_capability_store().get(url, self.SERVER_ENTRY))
+        if not self.model:
+            self.model = "default"
+        if self.server_type is None:
+            self.server_type = ""
+        return True
+    
+    async def _get_tool_modes(self) -> ToolModeSelector:
+        """Tool-mode selector; llama.cpp servers can also do grammar-constrained calls."""
+        if self._tool_modes is None:
+            self._tool_modes = ToolModeSelector(self.base_url, setting=self.native_tools)
+        if self._tool_modes.enabled and self.server_type is None:
+            await self.ready()
+        self._tool_modes.modes = ("tools", "grammar", "xml") if self.server_type == "llamacpp" else ("tools", "xml")
+        return self._tool_modes
     
     async def send_prompt(self, user_text: str) -> AsyncGenerator[AgentEvent, None]:
         """Send prompt to local LLM and stream response."""
+        if not self.model:
+            yield AgentEvent(type="status", content=f"Detecting model at {self.base_url}...")
+        await self._ensure_server()
+        if self._pick_server():
+            yield AgentEvent(type="status", content=f"Moved to less loaded server {self.base_url}")
         yield AgentEvent(type="status", content=f"Using local model: {self.model}")
         
+        # Calls the user rejected still need an answer before the next turn
+        self.conversation_history += unanswered(self.pending_calls)
         self.conversation_history.append({
             "role": "user",
             "content": user_text
         })
-        
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            *self.conversation_history
-        ]
+        tool_modes = await self._get_tool_modes()
+        mode = tool_modes.mode(self.model)
         
+        try:
+            self._held_results = []
+            report = self.context.compact(
+                self.conversation_history, system_prompt(mode, SYSTEM_PROMPT), self.context_length
+            )
+            if report:
+                yield AgentEvent(type="status", content=report.describe())
+            
+            retries = 0
+            delay = None
+            while True:
+                if delay is not None:
+                    await asyncio.sleep(delay)
+                    delay = None
+                # System prompt + history is a stable prefix; only compaction changes it
+                messages = alternating(messages_for_mode([
+                    {"role": "system", "content": system_prompt(mode, SYSTEM_PROMPT)},
+                    *self.conversation_history
+                ], mode))
+                cache_fields = llamacpp_fields(self.slot_id) if PROMPT_CACHE and self.server_type == "llamacpp" else {}
+                if self.limiter:
+                    await self.limiter.acquire()
+                streamed = False
+                url = self.base_url
+                attempt = self._attempt(url, mode, messages, cache_fields)
+                events = None
+                try:
+                    event = await attempt.__anext__()
+                    if event[0] == "error":
+                        _, status_code, error, retry_after = event
+                        if mode != "xml" and rejects_tools(status_code, error):
+                            fallback = tool_modes.downgrade(self.model, mode, error)
+                            if fallback:
+                                yield AgentEvent(type="status", content=f"{self.model}: no {mode} support, using {fallback} tool calls")
+                                mode = fallback
+                                continue
+                        if is_retryable(status_code):
+                            delay = self.retry.delay(retries + 1, parse_retry_after(retry_after))
+                        if delay is not None:
+                            retries += 1
+                            yield AgentEvent(type="status", content=f"Local LLM busy ({status_code}), retrying in {delay:.1f}s ({retries}/{self.retry.attempts})")
+                            continue
+                        self.metrics.record_failure(self.model)
+                        yield AgentEvent(
+                            type="error",
+                            content=f"Local LLM error {status_code}: {error[:200]}"
+                        )
+                        return
+                    
+                    # Text and tool requests are shown as they arrive; the reply is
+                    # read to the end meanwhile, so the server is free while the user decides
+                    events = ReadAhead(attempt)
+                    while event[0] == "item":
+                        streamed = True
+                        if isinstance(event[1], ToolTag):
+                            for tool_event in self._tool_requests(event[1], events):
+                                yield tool_event
+                        else:
+                            yield self._stream_event(event[1])
+                        event = await events.__anext__()
+                    reader = event[1]
+                    if reader.native_calls:
+                        tool_modes.confirm(self.model, mode)
+                    break
+                except httpx.TransportError as e:
+                    self.metrics.record_failure(self.model)
+                    if streamed:
+                        raise
+                    # Safe to resend only while nothing has been shown
+                    if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+                        self.pool.mark_down(url, type(e).__name__)
+                        if self._pick_server():
+                            yield AgentEvent(type="status", content=f"Local LLM at {url} is down, moving to {self.base_url}")
+                            tool_modes = await self._get_tool_modes()
+                            mode = tool_modes.mode(self.model)
+                            continue
+                    delay = self.retry.delay(retries + 1)
+                    if delay is None:
+                        raise
+                    retries += 1
+                    yield AgentEvent(type="status", content=f"Local LLM unreachable ({type(e).__name__}), retrying in {delay:.1f}s ({retries}/{self.retry.attempts})")
+                finally:
+                    await (events or attempt).aclose()
+            
+            if reader.stream.error:
+                yield AgentEvent(type="error", content=f"Local LLM error: {reader.stream.error.message}")
+            
+            # Save to history, then the results of tools that ran while it streamed
+            self.conversation_history.append(reader.history_message)
+            self._release_results()
+            
+            yield AgentEvent(
+                type="final_response",
+                content=reader.prose.strip()
+            )
+
+        except httpx.ConnectError:
+            yield AgentEvent(
+                type="error",
+                content=f"Cannot connect to local LLM at {self.base_url}. Is LM Studio/Ollama running?"
+            )
+        except httpx.TimeoutException:
+            yield AgentEvent(type="error", content="Local LLM request timed out")
+        except Exception as e:
+            yield AgentEvent(type="error", content=f"Local LLM error: {str(e)}")
+        finally:
+            self._release_results()
+    
+    async def _attempt(self, url: str, mode: str, messages: list[dict], cache_fields: dict) -> AsyncGenerator[tuple, None]:
+        """
+        One streamed request to url. Yields ("item", text or ToolTag) as the
+        reply arrives and then ("done", reader), or a single
+        ("error", status_code, body, retry_after). Usage and timings are
+        recorded, and the server released, as soon as the stream ends.
+        """
+        started = time.monotonic()
+        tokens, seconds = 0, 0.0
+        self.pool.begin(url)
         try:
             async with self.client.stream(
                 "POST",
-                f"{self.base_url}/chat/completions",
+                f"{url}/chat/completions",
                 json={
                     "model": self.model,
                     "messages": messages,
                     "stream": True,
-                    "max_tokens": 2048,
+                    "max_tokens": MAX_TOKENS,
                     "temperature": 0.7,
+                    "stream_options": {"include_usage": True},
+                    **cache_fields,
+                    **request_fields(mode),
                 },
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout
             ) as response:
                 if response.status_code != 200:
-                    error = await response.aread()
-                    yield AgentEvent(
-                        type="error",
-                        content=f"Local LLM error {response.status_code}: {error.decode()[:200]}"
-                    )
+                    error = (await response.aread()).decode(errors="replace")
+                    yield ("error", response.status_code, error, response.headers.get("retry-after"))
                     return
-                
-                full_response = ""
-                buffer = ""
-                
-                async for line in response.aiter_lines():
-                    if not line or not line.startswith("data: "):
-                        continue
-                    
-                    data = line[6:]
-                    if data == "[DONE]":
-                        break
-                    
-                    try:
-                        chunk = json.loads(data)
-                        delta = chunk.get("choices", [{}])[0].get("delta", {})
-                        content = delta.get("content", "")
-                        
-                        if content:
-                            full_response += content
-                            buffer += content
-                            
-                            # Yield in chunks
-                            if len(buffer) > 20 or "\n" in buffer:
-                                yield AgentEvent(type="thought", content=buffer)
-                                buffer = ""
-                                
-                    except json.JSONDecodeError:
-                        continue
-                
-                # Remaining buffer
-                if buffer:
-                    yield AgentEvent(type="thought", content=buffer)
-                
-                # Check for tool calls
-                tool_call = self._parse_tool_call(full_response)
-                if tool_call:
-                    yield AgentEvent(
-                        type="tool_request",
-                        content=tool_call["command"],
-                        tool_call=tool_call
-                    )
-                
-                # Save to history
-                self.conversation_history.append({
-                    "role": "assistant", 
-                    "content": full_response
-                })
-                
-                yield AgentEvent(
-                    type="final_response",
-                    content=self._clean_response(full_response)
-                )
-                
-        except httpx.ConnectError:
-            yield AgentEvent(
-                type="error",
-                content=f"Cannot connect to local LLM at {self.base_url}. Is LM Studio/Ollama running?"
-            )
-        except httpx.TimeoutException:
-            yield AgentEvent(type="error", content="Local LLM request timed out")
-        except Exception as e:
-            yield AgentEvent(type="error", content=f"Local LLM error: {str(e)}")
+                reader = ReplyReader(mode)
+                async for item in reader.items(response.aiter_bytes()):
+                    yield ("item", item)
+            
+            self.last_usage = reader.stream.usage
+            first = reader.stream.first_token_at
+            self.residency.record_request(time.monotonic() - started)
+            self.metrics.record(self.model, started, reader.stream, messages)
+            self.prompt_cache.record(self.last_usage, first - started if first else None)
+            if first and self.last_usage:
+                tokens, seconds = self.last_usage.completion_tokens, time.monotonic() - first
+        finally:
+            self.pool.end(url, tokens, seconds)
+        yield ("done", reader)
+    
+    def _stream_event(self, item: str | ToolTag) -> AgentEvent:
+        """Turn a parser item into a thought or tool_request event."""
+        if isinstance(item, str):
+            return AgentEvent(type="thought", content=item)
+        tool_call = {"name": item.name, "command": item.command, "reason": item.reason}
+        return AgentEvent(type="tool_request", content=item.command, tool_call=tool_call)
+    
+    def _tool_requests(self, tag: ToolTag, events: ReadAhead) -> list[AgentEvent]:
+        """
+        Events for a tool call that just closed, batched with the calls
+        already read behind it. Native calls are kept until their result comes in.
+        """
+        ready = events.take_ready(
+            lambda e: e[0] == "item" and (isinstance(e[1], ToolTag) or not e[1].strip())
+        )
+        tags = [tag, *(e[1] for e in ready if isinstance(e[1], ToolTag))]
+        self.pending_calls += [t for t in tags if t.call_id]
+        return self._group_requests([self._stream_event(t) for t in tags])
+    
+    def _group_requests(self, requests: list[AgentEvent]) -> list[AgentEvent]:
+        """Several calls in one reply go out as one tool_batch event."""
+        if len(requests) < 2:
+            return requests
+        calls = [
+            {"tool_name": e.tool_call["name"], "command": e.tool_call["command"], "reason": e.tool_call["reason"]}
+            for e in requests
+        ]
+        return [AgentEvent(type="tool_batch", content=f"{len(calls)} tool calls", calls=calls)]
     
     def _parse_tool_call(self, text: str) -> Optional[dict]:
-        """Parse tool call from response."""
-        import re
-        pattern = r'<tool\s+name="([^"]+)"\s+command="([^"]+)"\s+reason="([^"]+)"'
-        match = re.search(pattern, text)
-        
-        if match:
-            return {
-                "name": match.group(1),
-                "command": match.group(2),
-                "reason": match.group(3),
-            }
+        """Parse the first tool call from a response."""
+        _, tags = parse_tool_tags(text)
+        if tags:
+            return {"name": tags[0].name, "command": tags[0].command, "reason": tags[0].reason}
         return None
     
     def _clean_response(self, text: str) -> str:
         """Remove tool calls from response."""
-        import re
-        return re.sub(r'<tool[^>]+/?>', '', text).strip()
+        return parse_tool_tags(text)[0].strip()
     
     async def explain_risk(self, command: str) -> str:
         """Ask local LLM to explain command risk."""
+        return "".join([chunk async for chunk in self.explain_risk_stream(command)])
+    
+    async def explain_risk_stream(self, command: str) -> AsyncGenerator[str, None]:
+        """Stream the risk explanation as it is generated."""
         prompt = f"""Analyze the security risk of this command in max 50 words:
 {command}
 
 Format: RISK_LEVEL (LOW/MEDIUM/HIGH): brief explanation"""
 
+        url = self.base_url
+        self.pool.begin(url)
+        started = time.monotonic()
+        messages = [{"role": "user", "content": prompt}]
         try:
-            response = await self.client.post(
-                f"{self.base_url}/chat/completions",
+            async with retrying_stream(
+                self.client,
+                "POST",
+                f"{url}/chat/completions",
+                policy=self.retry,
+                limiter=self.limiter,
                 json={
                     "model": self.model,
-                    "messages": [{"role": "user", "content": prompt}],
+                    "messages": messages,
                     "max_tokens": 150,
                     "temperature": 0.3,
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
-            return f"Could not analyze: HTTP {response.status_code}"
+                    "stream": True,
+                    "stream_options": {"include_usage": True},
+                },
+                timeout=self.timeout
+            ) as response:
+                if response.status_code != 200:
+                    self.metrics.record_failure(self.model)
+                    yield f"Could not analyze: HTTP {response.status_code}"
+                    return
+                stream = ChatStream()
+                async for text in stream.text_chunks(response.aiter_bytes()):
+                    yield text
+                self.metrics.record(self.model, started, stream, messages)
             
         except Exception as e:
-            return f"Could not analyze: {str(e)}"
+            yield f"Could not analyze: {str(e)}"
+        finally:
+            self.pool.end(url)
     
     async def execute_tool(self, tool_name: str, command: str, cwd: str | None = None) -> AsyncGenerator[AgentEvent, None]:
         """Execute tool."""
         from tools.executor import execute_tool as real_execute
         
-        async for event in real_execute(tool_name, command, cwd):
+        transcript = ToolTranscript(f"{tool_name}: {command}")
+        async for event in real_execute(tool_name, command, cwd, stream=True):
+            transcript.add(event)
             yield AgentEvent(
                 type=event.get("type", "status"),
-                content=event.get("content", "")
+                content=event.get("content", ""),
+                partial=event.get("partial", False),
+                handle=event.get("handle"),
+                duration=event.get("duration")
             )
+        # The result goes back to the model with the next prompt
+        call_id = take_call(self.pending_calls, tool_name, command)
+        self._add_results([transcript.message(call_id)])
+    
+    async def execute_batch(self, calls: list, cwd: str | None = None) -> AsyncGenerator[AgentEvent, None]:
+        """Execute several tool calls, read-only ones concurrently."""
+        from tools.executor import execute_tool_batch
+        
+        transcript = ToolTranscript(f"batch of {len(calls)} calls")
+        async for event in execute_tool_batch(calls, cwd):
+            transcript.add(event)
+            yield AgentEvent(
+                type=event.get("type", "status"),
+                content=event.get("content", ""),
+                handle=event.get("handle"),
+                duration=event.get("duration")
+            )
+        self._add_results(batch_results(transcript, calls, self.pending_calls))
+    
+    def _add_results(self, messages: list[dict]) -> None:
+        """Tool results go after the reply that asked for them, which may still be streaming."""
+        if self._held_results is None:
+            self.conversation_history += messages
+        else:
+            self._held_results += messages
+    
+    def _release_results(self) -> None:
+        """Add the results held back while the reply streamed."""
+        if self._held_results:
+            self.conversation_history += self._held_results
+        self._held_results = None
     
     async def close(self):
-        """Close HTTP client."""
-        await self.client.aclose()
+        """Release the backend."""
+        # The HTTP transport is shared with other backends and stays open
+        await self.residency.close()
     
     def get_stats(self) -> dict:
         """Get backend stats."""
+        from tools.result_cache import get_result_cache
+        
         return {
             "backend": "LocalLLM",
             "url": self.base_url,
             "model": self.model,
+            "state": self.state,
+            "models": self.models,
+            "endpoints": self.pool.get_stats(),
             "history_length": len(self.conversation_history),
+            "last_usage": self.last_usage.raw if self.last_usage else None,
+            "tool_mode": self._tool_modes.mode(self.model) if self._tool_modes else None,
+            "context_length": self.context_length,
+            "context": self.context.get_stats(),
+            "prompt_cache": self.prompt_cache.get_stats(),
+            "metrics": self.metrics.get_stats(),
+            "residency": self.residency.get_stats(),
+            "retry": self.retry.get_stats(),
+            "rate_limit": self.limiter.get_stats() if self.limiter else None,
+            "tool_cache": get_result_cache().get_stats(),
+            "transport": transport.get_transport_stats(),
         }
 
 
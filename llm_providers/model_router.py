@@ -0,0 +1,182 @@
+"""
+Latency-aware model routing with circuit breaking.
+
+``ModelRouter`` keeps an exponentially weighted moving average (EWMA) of
+time to first token, tokens per second and error rate per model, and
+orders the configured models for each request:
+
+1. Healthy models whose expected latency is within ROUTER_SLACK of the
+   best one, in rotation, so comparable models share the load.
+2. The other healthy models, fastest first.
+3. Models whose circuit is open but whose cooldown is over, as probes.
+4. Models still cooling down (or being probed), soonest to reopen
+   first; only used when nothing else is left.
+
+Models without measurements score as fast, so every model is tried
+once before the averages decide. A stream cancelled before its first
+token (it lost a hedge race) still tells something: its TTFT was at
+least the time it ran, and that censored sample raises the average when
+it is above it.
+
+A model's circuit opens after ROUTER_FAILURES consecutive failures or at
+once on HTTP 429 (for Retry-After seconds when given). After the
+cooldown the next request probes it: success closes the circuit, failure
+opens it again with a doubled cooldown (up to ROUTER_MAX_COOLDOWN).
+
+Env vars:
+- AGENTZERO_ROUTER_FAILURES: consecutive failures that open a circuit (default 3)
+- AGENTZERO_ROUTER_COOLDOWN: first cooldown in seconds (default 30)
+- AGENTZERO_ROUTER_SLACK: share load among models up to this factor
+  slower than the best (default 1.5)
+"""
+
+import os
+import time
+from dataclasses import dataclass
+
+ROUTER_FAILURES = int(os.getenv("AGENTZERO_ROUTER_FAILURES", "3"))
+ROUTER_COOLDOWN = float(os.getenv("AGENTZERO_ROUTER_COOLDOWN", "30"))
+ROUTER_MAX_COOLDOWN = 600.0
+ROUTER_SLACK = float(os.getenv("AGENTZERO_ROUTER_SLACK", "1.5"))
+# EWMA weight of the newest sample
+ALPHA = 0.3
+# Reply length used to turn tokens/sec into seconds when scoring
+TYPICAL_REPLY_TOKENS = 256
+
+
+def _ewma(current: float | None, sample: float) -> float:
+    return sample if current is None else ALPHA * sample + (1 - ALPHA) * current
+
+
+@dataclass
+class ModelHealth:
+    """Latency averages and circuit state of one model."""
+    ttft: float | None = None
+    tokens_per_sec: float | None = None
+    error_rate: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    censored: int = 0  # requests cancelled before their first token
+    consecutive_failures: int = 0
+    state: str = "closed"  # closed, open, half_open
+    open_until: float = 0.0
+    cooldown: float = ROUTER_COOLDOWN
+    last_error: str = ""
+
+    def score(self) -> float:
+        """Expected seconds for a typical reply, inflated by the error rate."""
+        if self.ttft is None:
+            return 0.0
+        seconds = self.ttft
+        if self.tokens_per_sec:
+            seconds += TYPICAL_REPLY_TOKENS / self.tokens_per_sec
+        return seconds / max(1.0 - self.error_rate, 0.1)
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "ttft": round(self.ttft, 3) if self.ttft is not None else None,
+            "tokens_per_sec": round(self.tokens_per_sec, 1) if self.tokens_per_sec is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "censored": self.censored,
+            "last_error": self.last_error,
+        }
+
+
+class ModelRouter:
+    """Orders models by measured latency and keeps failing ones out."""
+
+    def __init__(
+        self,
+        models: list[str],
+        failure_threshold: int = ROUTER_FAILURES,
+        cooldown: float = ROUTER_COOLDOWN,
+        slack: float = ROUTER_SLACK,
+    ):
+        self.models = list(models)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slack = slack
+        self.failovers = 0
+        self.health: dict[str, ModelHealth] = {model: ModelHealth(cooldown=cooldown) for model in self.models}
+
+    def _health(self, model: str) -> ModelHealth:
+        if model not in self.health:
+            self.health[model] = ModelHealth(cooldown=self.cooldown)
+        return self.health[model]
+
+    def candidates(self, start: int = 0) -> list[str]:
+        """All models, best first; ties keep rotation order from start."""
+        now = time.monotonic()
+        start %= len(self.models)
+        rotated = self.models[start:] + self.models[:start]
+
+        healthy, probes, cooling = [], [], []
+        for model in rotated:
+            health = self._health(model)
+            if health.state == "closed":
+                healthy.append(model)
+            elif health.state == "open" and now >= health.open_until:
+                probes.append(model)
+            else:
+                cooling.append(model)
+
+        ranked = sorted(healthy, key=lambda m: self.health[m].score())
+        if ranked:
+            limit = self.health[ranked[0]].score() * self.slack
+            near = [m for m in healthy if self.health[m].score() <= limit]
+            ranked = near + [m for m in ranked if m not in near]
+        cooling.sort(key=lambda m: self.health[m].open_until)
+        return ranked + probes + cooling
+
+    def started(self, model: str) -> None:
+        """A request to model is being sent; an expired open circuit turns half open."""
+        health = self._health(model)
+        health.requests += 1
+        if health.state == "open" and time.monotonic() >= health.open_until:
+            health.state = "half_open"
+
+    def record_success(self, model: str, ttft: float | None, tokens: int = 0, seconds: float = 0.0) -> None:
+        """A reply from model arrived; update its averages and close its circuit."""
+        health = self._health(model)
+        if ttft is not None:
+            health.ttft = _ewma(health.ttft, ttft)
+        if tokens > 0 and seconds > 0:
+            health.tokens_per_sec = _ewma(health.tokens_per_sec, tokens / seconds)
+        health.error_rate = _ewma(health.error_rate, 0.0)
+        health.consecutive_failures = 0
+        health.state = "closed"
+        health.cooldown = self.cooldown
+
+    def record_censored_ttft(self, model: str, at_least: float) -> None:
+        """
+        A request to model was cancelled after at_least seconds without a
+        first token; its TTFT was at least that. Not a failure.
+        """
+        health = self._health(model)
+        health.censored += 1
+        if health.ttft is None or at_least > health.ttft:
+            health.ttft = _ewma(health.ttft, at_least)
+
+    def record_failure(self, model: str, reason: str = "", status_code: int | None = None,
+                       retry_after: float | None = None) -> None:
+        """A request to model failed; open its circuit when it keeps failing."""
+        health = self._health(model)
+        health.failures += 1
+        health.consecutive_failures += 1
+        health.error_rate = _ewma(health.error_rate, 1.0)
+        health.last_error = reason[:200]
+        if health.state == "half_open":
+            health.cooldown = min(health.cooldown * 2, ROUTER_MAX_COOLDOWN)
+        elif status_code != 429 and health.consecutive_failures < self.failure_threshold:
+            return
+        health.state = "open"
+        health.open_until = time.monotonic() + (retry_after if retry_after is not None else health.cooldown)
+
+    def get_stats(self) -> dict:
+        return {
+            "failovers": self.failovers,
+            "models": {model: health.get_stats() for model, health in self.health.items()},
+        }
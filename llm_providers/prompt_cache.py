@@ -0,0 +1,114 @@
+"""
+Prompt-cache hints and accounting.
+
+Every turn resends ``[system prompt, *history, new message]``. The system
+prompt is constant per tool mode and the history only changes when it
+is compacted (llm_providers/context_window.py), so everything before the
+new message is a byte-stable prefix the server can reuse:
+
+- OpenRouter: models with explicit caching (Anthropic, Gemini) get
+  ``cache_control`` breakpoints on the system prompt and the newest
+  message; others (OpenAI, DeepSeek, ...) cache prefixes automatically.
+- llama.cpp: ``cache_prompt`` keeps the KV cache of the prompt, and
+  ``id_slot`` pins a conversation to one server slot so the next turn
+  finds its prefix there.
+
+``PromptCacheStats`` adds up cached prompt tokens from the usage reports
+(or llama.cpp ``timings``) and time to first token, split by whether the
+request hit the cache, so the gain can be measured.
+
+Env vars:
+- AGENTZERO_PROMPT_CACHE: set to false to send no cache hints
+- LOCAL_LLM_SLOT: llama.cpp slot to use (default: one picked per session)
+"""
+
+import os
+from dataclasses import dataclass
+
+PROMPT_CACHE = os.getenv("AGENTZERO_PROMPT_CACHE", "true").lower() not in ("0", "false", "no")
+# OpenRouter model prefixes that need explicit cache_control breakpoints
+CACHE_CONTROL_PREFIXES = ("anthropic/", "google/gemini")
+EPHEMERAL = {"type": "ephemeral"}
+
+
+def supports_cache_control(model: str) -> bool:
+    return model.lower().startswith(CACHE_CONTROL_PREFIXES)
+
+
+def _marked(message: dict) -> dict:
+    content = message.get("content")
+    if isinstance(content, str):
+        parts = [{"type": "text", "text": content, "cache_control": EPHEMERAL}]
+    elif isinstance(content, list) and content:
+        parts = [*content[:-1], {**content[-1], "cache_control": EPHEMERAL}]
+    else:
+        return message
+    return {**message, "content": parts}
+
+
+def with_cache_breakpoints(messages: list[dict]) -> list[dict]:
+    """
+    Copy of messages with breakpoints on the system prompt and the last
+    message: this turn reads the prefix cached by the previous turn's
+    breakpoint and writes one for the next turn.
+    """
+    if not messages:
+        return messages
+    marked = list(messages)
+    if marked[0].get("role") == "system":
+        marked[0] = _marked(marked[0])
+    if len(marked) > 1:
+        marked[-1] = _marked(marked[-1])
+    return marked
+
+
+def llamacpp_fields(slot: int | None) -> dict:
+    """Request fields that keep a conversation's KV cache on llama.cpp."""
+    fields: dict = {"cache_prompt": True}
+    if slot is not None:
+        fields["id_slot"] = slot
+    return fields
+
+
+@dataclass
+class PromptCacheStats:
+    """Cached prompt tokens and TTFT over a backend's requests."""
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    last_cached_tokens: int = 0
+    last_ttft: float | None = None
+    _ttft_hit: float = 0.0
+    _hits: int = 0
+    _ttft_miss: float = 0.0
+    _misses: int = 0
+
+    def record(self, usage, ttft: float | None) -> None:
+        """Add one request (usage is a streaming.Usage or None)."""
+        self.requests += 1
+        cached = usage.cached_tokens if usage else 0
+        if usage:
+            self.prompt_tokens += usage.prompt_tokens
+            self.cached_tokens += cached
+        self.last_cached_tokens = cached
+        self.last_ttft = ttft
+        if ttft is None:
+            return
+        if cached:
+            self._ttft_hit += ttft
+            self._hits += 1
+        else:
+            self._ttft_miss += ttft
+            self._misses += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_ratio": round(self.cached_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+            "last_cached_tokens": self.last_cached_tokens,
+            "last_ttft": round(self.last_ttft, 3) if self.last_ttft is not None else None,
+            "ttft_cached_avg": round(self._ttft_hit / self._hits, 3) if self._hits else None,
+            "ttft_uncached_avg": round(self._ttft_miss / self._misses, 3) if self._misses else None,
+        }
@@ -0,0 +1,311 @@
+"""
+Retries with backoff and shared rate limiting for provider calls.
+
+``RetryPolicy`` decides whether and how long to wait before retrying a
+failed request: transient HTTP statuses (429, 5xx, ...) and transport
+errors are retried with jittered exponential backoff, or after the
+server's ``Retry-After`` when it sends one. Streaming calls are only
+retried before the first token is read, so nothing is shown twice.
+
+``RateLimiter`` is a token bucket per endpoint. Its state lives in a
+small JSON file guarded by a lock file (``fcntl.flock``), so every
+AgentZeroCLI process on the machine draws from the same bucket and
+parallel sessions don't set off 429 storms against free-tier models.
+Without ``fcntl`` (Windows) the bucket is per process.
+
+Env vars:
+- AGENTZERO_RETRY_ATTEMPTS: retries after the first try (default 3)
+- AGENTZERO_RETRY_MAX_DELAY: longest wait in seconds; a longer
+  Retry-After gives up instead (default 30)
+- AGENTZERO_RATE_LIMIT: requests per minute to OpenRouter ``:free`` models
+  (their account-wide limit), 0 = off (default 20); paid models are never
+  limited here
+- LOCAL_LLM_RATE_LIMIT: local server requests per minute, 0 = off (default 0)
+- AGENTZERO_RATE_BURST: requests allowed back to back (default 5)
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from .disk_cache import cache_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: per-process buckets
+    fcntl = None
+
+RETRY_ATTEMPTS = int(os.getenv("AGENTZERO_RETRY_ATTEMPTS", "3"))
+RETRY_MAX_DELAY = float(os.getenv("AGENTZERO_RETRY_MAX_DELAY", "30"))
+RATE_LIMIT = float(os.getenv("AGENTZERO_RATE_LIMIT", "20"))
+LOCAL_RATE_LIMIT = float(os.getenv("LOCAL_LLM_RATE_LIMIT", "0"))
+RATE_BURST = float(os.getenv("AGENTZERO_RATE_BURST", "5"))
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(status_code: int | str | None = None, error: BaseException | None = None) -> bool:
+    """True for transient failures: busy/overloaded statuses and transport errors."""
+    if error is not None:
+        return isinstance(error, httpx.TransportError)
+    try:
+        return int(status_code) in RETRYABLE_STATUS
+    except (TypeError, ValueError):
+        return False
+
+
+@dataclass
+class RetryPolicy:
+    """Backoff schedule and retry counts of one backend."""
+    attempts: int = RETRY_ATTEMPTS
+    base: float = 0.5
+    max_delay: float = RETRY_MAX_DELAY
+    retries: int = 0
+    gave_up: int = 0
+
+    def delay(self, retry: int, retry_after: float | None = None) -> float | None:
+        """Seconds to wait before retry number ``retry`` (1-based), or None to give up."""
+        if retry > self.attempts or (retry_after is not None and retry_after > self.max_delay):
+            self.gave_up += 1
+            return None
+        self.retries += 1
+        if retry_after is not None:
+            return retry_after
+        # Equal jitter: half the exponential step, plus up to as much again
+        step = min(self.max_delay, self.base * 2 ** (retry - 1))
+        return step / 2 + random.uniform(0, step / 2)
+
+    def get_stats(self) -> dict:
+        return {"attempts": self.attempts, "retries": self.retries, "gave_up": self.gave_up}
+
+
+class RateLimiter:
+    """Token bucket shared by all processes through a state file and a lock file."""
+
+    def __init__(self, name: str, per_minute: float, burst: float = RATE_BURST, directory: Path | None = None):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = max(burst, 1.0)
+        directory = Path(directory) if directory else cache_path("ratelimit")
+        self.path = directory / f"{name}.json"
+        self.lock_path = directory / f"{name}.lock"
+        self.waits = 0
+        self.waited = 0.0
+        self._thread_lock = threading.Lock()
+        self._state = {"tokens": self.burst, "updated": time.time()}
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            try:
+                self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+                handle = open(self.lock_path, "a")
+            except OSError:
+                yield
+                return
+            with handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read(self) -> dict:
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+            return {"tokens": float(state["tokens"]), "updated": float(state["updated"])}
+        except (OSError, ValueError, KeyError, TypeError):
+            return dict(self._state)
+
+    def _write(self, state: dict) -> None:
+        self._state = state
+        try:
+            self.path.write_text(json.dumps(state), encoding="utf-8")
+        except OSError:
+            pass
+
+    def reserve(self) -> float:
+        """Take one token; returns the seconds to wait before using it."""
+        with self._locked():
+            now = time.time()
+            state = self._read()
+            elapsed = max(now - state["updated"], 0.0)
+            tokens = min(self.burst, state["tokens"] + elapsed * self.rate) - 1
+            # A negative balance queues the request behind earlier reservations
+            self._write({"tokens": tokens, "updated": now})
+        return -tokens / self.rate if tokens < 0 else 0.0
+
+    def has_token(self) -> bool:
+        """True if a request could go out now without waiting."""
+        with self._locked():
+            state = self._read()
+        elapsed = max(time.time() - state["updated"], 0.0)
+        return min(self.burst, state["tokens"] + elapsed * self.rate) >= 1
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            self.waits += 1
+            self.waited += wait
+            await asyncio.sleep(wait)
+        return wait
+
+    def acquire_sync(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            self.waits += 1
+            self.waited += wait
+            time.sleep(wait)
+        return wait
+
+    def get_stats(self) -> dict:
+        return {
+            "per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "waits": self.waits,
+            "waited": round(self.waited, 3),
+            "shared": fcntl is not None,
+        }
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def endpoint_name(url: str) -> str:
+    """File-safe name of a URL's host and port."""
+    parts = urlsplit(url)
+    return re.sub(r"[^A-Za-z0-9.-]", "_", parts.netloc or url)
+
+
+def get_rate_limiter(url: str, per_minute: float, burst: float = RATE_BURST) -> RateLimiter | None:
+    """Shared limiter for url's endpoint, or None when per_minute is 0."""
+    if per_minute <= 0:
+        return None
+    name = endpoint_name(url)
+    if name not in _limiters:
+        _limiters[name] = RateLimiter(name, per_minute, burst)
+    return _limiters[name]
+
+
+@asynccontextmanager
+async def retrying_stream(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    policy: RetryPolicy | None = None,
+    limiter: RateLimiter | None = None,
+    **kwargs,
+) -> AsyncIterator[httpx.Response]:
+    """
+    ``client.stream`` that retries transient failures before the body is read.
+
+    The response handed out is the first one that is not retryable (or
+    the last one when retries run out); errors while reading it are not
+    retried.
+    """
+    policy = policy or RetryPolicy()
+    retry = 0
+    while True:
+        if limiter:
+            await limiter.acquire()
+        handed_out = False
+        try:
+            async with client.stream(method, url, **kwargs) as response:
+                delay = None
+                if response.status_code in RETRYABLE_STATUS:
+                    delay = policy.delay(retry + 1, parse_retry_after(response.headers.get("retry-after")))
+                if delay is None:
+                    handed_out = True
+                    yield response
+                    return
+        except httpx.TransportError:
+            if handed_out:
+                raise
+            delay = policy.delay(retry + 1)
+            if delay is None:
+                raise
+        retry += 1
+        await asyncio.sleep(delay)
+
+
+async def request_with_retry(
+    send: Callable[[], Awaitable[httpx.Response]],
+    policy: RetryPolicy | None = None,
+    limiter: RateLimiter | None = None,
+) -> httpx.Response:
+    """Run a non-streaming request, retrying transient failures."""
+    policy = policy or RetryPolicy()
+    retry = 0
+    while True:
+        if limiter:
+            await limiter.acquire()
+        try:
+            response = await send()
+        except httpx.TransportError:
+            delay = policy.delay(retry + 1)
+            if delay is None:
+                raise
+        else:
+            if response.status_code not in RETRYABLE_STATUS:
+                return response
+            delay = policy.delay(retry + 1, parse_retry_after(response.headers.get("retry-after")))
+            if delay is None:
+                return response
+        retry += 1
+        await asyncio.sleep(delay)
+
+
+def request_with_retry_sync(
+    send: Callable[[], httpx.Response],
+    policy: RetryPolicy | None = None,
+    limiter: RateLimiter | None = None,
+) -> httpx.Response:
+    """Blocking variant of request_with_retry for the sync clients."""
+    policy = policy or RetryPolicy()
+    retry = 0
+    while True:
+        if limiter:
+            limiter.acquire_sync()
+        try:
+            response = send()
+        except httpx.TransportError:
+            delay = policy.delay(retry + 1)
+            if delay is None:
+                raise
+        else:
+            if response.status_code not in RETRYABLE_STATUS:
+                return response
+            delay = policy.delay(retry + 1, parse_retry_after(response.headers.get("retry-after")))
+            if delay is None:
+                return response
+        retry += 1
+        time.sleep(delay)
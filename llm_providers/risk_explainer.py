@@ -0,0 +1,182 @@
+"""
+Background prefetch and persistent cache for ``explain_risk``.
+
+Frontends call ``get_risk_explainer(backend).prefetch(command)`` as soon
+as a tool request needs approval, so the explanation is usually ready
+(or on its way) when the operator asks for it. ``stream(command)`` then
+yields the explanation text so far as it grows, whether it comes from
+the cache, an in-flight prefetch or a new request.
+
+Finished explanations go in a DiskLRUCache keyed by the normalized
+command and the backend/model, so the same command is explained once.
+Backends with ``explain_risk_stream`` are streamed token by token; others
+fall back to ``explain_risk``. Local servers with a single slot are not
+prefetched: the speculative request would hold the only slot and make
+the next prompt wait behind an explanation nobody may ask for.
+
+Env vars:
+- AGENTZERO_RISK_CACHE_TTL: seconds an explanation stays valid (default 7 days)
+- AGENTZERO_RISK_CACHE_SIZE: max cached explanations (default 500)
+"""
+
+import asyncio
+import hashlib
+import os
+import shlex
+import weakref
+from typing import Any, AsyncIterator
+
+from .disk_cache import DiskLRUCache, cache_path
+
+RISK_CACHE_TTL = float(os.getenv("AGENTZERO_RISK_CACHE_TTL", str(7 * 86400)))
+RISK_CACHE_SIZE = int(os.getenv("AGENTZERO_RISK_CACHE_SIZE", "500"))
+# Explanations starting with this are errors and are not cached
+ERROR_PREFIX = "Could not analyze"
+
+
+def normalize_command(command: str) -> str:
+    """Command with insignificant whitespace and quoting removed."""
+    try:
+        return shlex.join(shlex.split(command))
+    except ValueError:
+        return " ".join(command.split())
+
+
+def backend_key(backend: Any) -> str:
+    """Identify who explains: backend type and model(s)."""
+    model = getattr(backend, "model", "") or ",".join(getattr(backend, "models", None) or [])
+    return f"{type(backend).__name__}:{model}"
+
+
+def single_slot(backend: Any) -> bool:
+    """True for a local endpoint that serves one request at a time."""
+    pool, url = getattr(backend, "pool", None), getattr(backend, "base_url", None)
+    if pool is None or url is None:
+        return False
+    try:
+        return pool[url].capacity == 1
+    except KeyError:
+        return False
+
+
+class _Fetch:
+    """One explanation being fetched; any number of readers follow it."""
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.done = False
+        self.changed = asyncio.Condition()
+        self.task: asyncio.Task | None = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class RiskExplainer:
+    """Prefetching, caching front for a backend's explain_risk."""
+
+    def __init__(self, backend: Any, cache: DiskLRUCache | None = None):
+        self.backend = backend
+        self.cache = cache if cache is not None else get_risk_cache()
+        self.prefetches = 0
+        self._inflight: dict[str, _Fetch] = {}
+
+    def key(self, command: str) -> str:
+        raw = f"{backend_key(self.backend)}\n{normalize_command(command)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def cached(self, command: str) -> str | None:
+        return self.cache.get(self.key(command))
+
+    def prefetch(self, command: str) -> None:
+        """Start fetching the explanation in the background (no-op if known)."""
+        if not command or single_slot(self.backend):
+            return
+        key = self.key(command)
+        if key in self._inflight or self.cache.get(key) is not None:
+            return
+        self.prefetches += 1
+        self._start(key, command)
+
+    def _start(self, key: str, command: str) -> _Fetch:
+        fetch = _Fetch()
+        self._inflight[key] = fetch
+        fetch.task = asyncio.ensure_future(self._run(key, command, fetch))
+        return fetch
+
+    async def _run(self, key: str, command: str, fetch: _Fetch) -> None:
+        try:
+            stream = getattr(self.backend, "explain_risk_stream", None)
+            if stream is not None:
+                async for chunk in stream(command):
+                    if chunk.startswith(ERROR_PREFIX):
+                        # Failed mid-stream: show the error, not half an answer
+                        fetch.parts = [chunk]
+                        break
+                    fetch.parts.append(chunk)
+                    async with fetch.changed:
+                        fetch.changed.notify_all()
+            else:
+                fetch.parts.append(await self.backend.explain_risk(command))
+        except Exception as e:
+            fetch.parts = [f"{ERROR_PREFIX} risk: {e}"]
+        finally:
+            fetch.done = True
+            self._inflight.pop(key, None)
+            text = fetch.text.strip()
+            if text and not text.startswith(ERROR_PREFIX):
+                self.cache.put(key, text)
+            async with fetch.changed:
+                fetch.changed.notify_all()
+
+    async def stream(self, command: str) -> AsyncIterator[str]:
+        """Yield the explanation so far each time it grows (last = complete)."""
+        key = self.key(command)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        fetch = self._inflight.get(key) or self._start(key, command)
+        shown = 0
+        while True:
+            async with fetch.changed:
+                await fetch.changed.wait_for(lambda shown=shown: fetch.done or len(fetch.parts) != shown)
+                shown = len(fetch.parts)
+                text, done = fetch.text, fetch.done
+            if text:
+                yield text
+            if done:
+                return
+
+    async def explain(self, command: str) -> str:
+        text = ""
+        async for partial in self.stream(command):
+            text = partial
+        return text
+
+    def get_stats(self) -> dict:
+        return {"prefetches": self.prefetches, "inflight": len(self._inflight), "cache": self.cache.get_stats()}
+
+
+_cache: DiskLRUCache | None = None
+_explainers: "weakref.WeakKeyDictionary[Any, RiskExplainer]" = weakref.WeakKeyDictionary()
+
+
+def get_risk_cache() -> DiskLRUCache:
+    """Get the shared on-disk explanation cache."""
+    global _cache
+    if _cache is None:
+        _cache = DiskLRUCache(cache_path("risk_explanations.json"), RISK_CACHE_SIZE, RISK_CACHE_TTL)
+    return _cache
+
+
+def get_risk_explainer(backend: Any) -> RiskExplainer:
+    """Get the RiskExplainer of a backend (one per backend object)."""
+    try:
+        explainer = _explainers.get(backend)
+    except TypeError:  # not weak-referenceable
+        return RiskExplainer(backend)
+    if explainer is None:
+        explainer = _explainers[backend] = RiskExplainer(backend)
+    return explainer
@@ -0,0 +1,417 @@
+"""
+JSON-schema tool definitions for native (structured) tool calling.
+
+OpenAI-compatible servers that support function calling get ``TOOLS`` in
+the request's ``tools`` array and answer with streamed ``tool_calls``
+deltas instead of ``<tool .../>`` tags. llama.cpp servers without tool
+templates get ``GRAMMAR_SCHEMA`` as a ``json_schema`` constraint instead, so
+decoding can only produce a valid reply object.
+
+Either way, calls are converted back to the ``(tool_name, command)`` pairs
+the executor understands with ``to_command``. ``ReplyReader`` hides the
+mode from the providers: it turns a streamed reply into prose and
+``ToolTag`` items for all three modes (see llm_providers/capabilities.py).
+
+Native calls stay native in the history: the assistant message carries
+``tool_calls`` and each result is a ``role: "tool"`` message with the
+call's id. ``messages_for_mode`` rewrites them as tags and user messages
+when the request goes to a model in another mode.
+"""
+
+import json
+import shlex
+import uuid
+from typing import AsyncIterator
+
+from .context_window import tool_output_message
+from .streaming import ChatStream, ToolCallDelta
+from .tool_tags import ToolTag, ToolTagParser, format_tool_tag
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional
+    _loads = json.loads
+
+_REASON = {"type": "string", "description": "Why this call is needed"}
+
+
+def _tool(name: str, description: str, properties: dict, required: list[str]) -> dict:
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {
+                "type": "object",
+                "properties": {**properties, "reason": _REASON},
+                "required": required,
+            },
+        },
+    }
+
+
+TOOLS = [
+    _tool(
+        "shell",
+        "Execute a shell command in the workspace",
+        {"command": {"type": "string"}},
+        ["command"],
+    ),
+    _tool(
+        "read_file",
+        "Read a file, optionally a 1-based inclusive line range",
+        {
+            "path": {"type": "string"},
+            "start_line": {"type": "integer"},
+            "end_line": {"type": "integer"},
+        },
+        ["path"],
+    ),
+    _tool(
+        "write_file",
+        "Write content to a file, replacing it",
+        {"path": {"type": "string"}, "content": {"type": "string"}},
+        ["path", "content"],
+    ),
+    _tool(
+        "list_files",
+        "List directory contents recursively (skips .gitignore'd files)",
+        {"path": {"type": "string"}},
+        [],
+    ),
+    _tool(
+        "search_text",
+        "Search file contents with a regular expression",
+        {
+            "pattern": {"type": "string"},
+            "path": {"type": "string"},
+            "glob": {"type": "string"},
+            "ignore_case": {"type": "boolean"},
+            "fixed_strings": {"type": "boolean"},
+            "context": {"type": "integer"},
+        },
+        ["pattern"],
+    ),
+    _tool(
+        "read_output",
+        "Page through a truncated tool output by its handle (offset/limit in lines)",
+        {
+            "handle": {"type": "string"},
+            "offset": {"type": "integer"},
+            "limit": {"type": "integer"},
+        },
+        ["handle"],
+    ),
+]
+
+TOOL_NAMES = [tool["function"]["name"] for tool in TOOLS]
+
+# llama.cpp constrained decoding: the whole reply is one JSON object
+GRAMMAR_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reply": {"type": "string"},
+        "tool_calls": {
+            "type": "array",
+            "items": {
+                "anyOf": [
+                    {
+                        "type": "object",
+                        "properties": {
+                            "name": {"const": tool["function"]["name"]},
+                            "arguments": tool["function"]["parameters"],
+                        },
+                        "required": ["name", "arguments"],
+                    }
+                    for tool in TOOLS
+                ]
+            },
+        },
+    },
+    "required": ["reply", "tool_calls"],
+}
+
+NATIVE_PROMPT = """You are Agent Zero, an AI coding assistant running in a terminal.
+You help users with coding tasks by analyzing requests and calling the provided tools when needed.
+Independent tool calls may be made in parallel. Always explain your reasoning. Be concise but thorough."""
+
+GRAMMAR_PROMPT = NATIVE_PROMPT + """
+Answer with a JSON object: "reply" is your message to the user, "tool_calls" lists the tools to call
+(name and arguments; an empty list if none). Available tools: """ + ", ".join(TOOL_NAMES) + "."
+
+
+def parse_arguments(raw: str | dict | None) -> dict:
+    """Decode a tool call's JSON arguments; tolerant of junk."""
+    if isinstance(raw, dict):
+        return raw
+    if not raw:
+        return {}
+    try:
+        value = _loads(raw)
+    except ValueError:
+        # Some models send the bare command instead of JSON
+        return {"command": raw}
+    return value if isinstance(value, dict) else {"command": str(value)}
+
+
+def to_command(name: str, args: dict) -> str:
+    """Build the executor's command string for a structured call."""
+    if name == "read_file":
+        path = str(args.get("path", ""))
+        start, end = args.get("start_line"), args.get("end_line")
+        if start:
+            return f"{path}:{start}-{end or ''}"
+        return path
+    if name == "write_file":
+        return f"{args.get('path', '')}|||{args.get('content', '')}"
+    if name == "list_files":
+        return str(args.get("path") or ".")
+    if name == "search_text":
+        parts = []
+        if args.get("ignore_case"):
+            parts.append("-i")
+        if args.get("fixed_strings"):
+            parts.append("-F")
+        if args.get("context"):
+            parts += ["-C", str(int(args["context"]))]
+        if args.get("glob"):
+            parts += ["-g", str(args["glob"])]
+        parts += ["--", str(args.get("pattern", ""))]
+        if args.get("path"):
+            parts.append(str(args["path"]))
+        return shlex.join(parts)
+    if name == "read_output":
+        return " ".join(
+            str(args[key]) for key in ("handle", "offset", "limit") if args.get(key) not in (None, "")
+        )
+    return str(args.get("command", ""))
+
+
+def request_fields(mode: str) -> dict:
+    """Extra chat-completion fields for a tool mode."""
+    if mode == "tools":
+        return {"tools": TOOLS, "tool_choice": "auto", "parallel_tool_calls": True}
+    if mode == "grammar":
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": "reply", "schema": GRAMMAR_SCHEMA},
+            }
+        }
+    return {}
+
+
+def system_prompt(mode: str, xml_prompt: str) -> str:
+    """System prompt for a tool mode; xml_prompt is the provider's own."""
+    if mode == "tools":
+        return NATIVE_PROMPT
+    if mode == "grammar":
+        return GRAMMAR_PROMPT
+    return xml_prompt
+
+
+def _tag(name: str, args: dict, call_id: str = "") -> ToolTag:
+    command, reason = to_command(name, args), str(args.get("reason", ""))
+    return ToolTag(name, command, reason, args, format_tool_tag(name, command, reason), call_id)
+
+
+def _call_tag(call: dict) -> ToolTag:
+    function = call.get("function") or {}
+    name = str(function.get("name", ""))
+    return _tag(name, parse_arguments(function.get("arguments")), str(call.get("id", "")))
+
+
+def _as_text(message: dict) -> dict:
+    """Assistant message with its tool_calls written as tags."""
+    tags = [_call_tag(call).raw for call in message.get("tool_calls") or []]
+    content = "\n".join([str(message.get("content") or "").strip(), *tags]).strip()
+    return {"role": "assistant", "content": content}
+
+
+def _as_user(message: dict) -> dict:
+    """Tool result as the user message tag-mode models expect."""
+    return {"role": "user", "content": str(message.get("content") or "")}
+
+
+def messages_for_mode(messages: list[dict], mode: str) -> list[dict]:
+    """
+    Copy of messages that a model in mode accepts.
+
+    In tools mode, an assistant message keeps its tool_calls only when
+    all of its results follow it directly (a rejected call, a result
+    recorded as plain text or compaction can break that); otherwise the
+    calls become tags and the results user messages, as in every other
+    mode. Tool results whose call was compacted away become user messages.
+    """
+    out: list[dict] = []
+    i = 0
+    while i < len(messages):
+        message = messages[i]
+        i += 1
+        if message.get("role") == "tool":
+            out.append(_as_user(message))
+            continue
+        if not message.get("tool_calls"):
+            out.append(message)
+            continue
+        results = []
+        while i < len(messages) and messages[i].get("role") == "tool":
+            results.append(messages[i])
+            i += 1
+        ids = {call.get("id") for call in message["tool_calls"]}
+        if mode == "tools" and ids == {result.get("tool_call_id") for result in results}:
+            out += [message, *results]
+        else:
+            out += [_as_text(message), *(_as_user(result) for result in results)]
+    return out
+
+
+def take_call(pending: list[ToolTag], tool_name: str, command: str) -> str | None:
+    """Pop the pending native call a tool run answers; returns its id."""
+    for n, tag in enumerate(pending):
+        if tag.name == tool_name and tag.command == command:
+            return pending.pop(n).call_id
+    return None
+
+
+def batch_results(transcript, calls: list, pending: list[ToolTag]) -> list[dict]:
+    """
+    History entries for a batch run (transcript: its ToolTranscript).
+
+    Calls that answer pending native calls get one tool message each,
+    placed first so they stay next to their assistant message; the rest
+    share one text message as before.
+    """
+    from tools.executor import BatchCall
+
+    answered, other = [], []
+    for n, call in enumerate(BatchCall.coerce(call) for call in calls):
+        title = f"{call.tool_name}: {call.command}"
+        call_id = take_call(pending, call.tool_name, call.command)
+        if call_id:
+            answered.append(transcript.section_message(n, title, call_id))
+        else:
+            other.append(transcript.section_message(n, title))
+    if not answered:
+        return [transcript.message()]
+    return answered + other
+
+
+def unanswered(pending: list[ToolTag]) -> list[dict]:
+    """Results for native calls that never ran (rejected or skipped)."""
+    results = [
+        tool_output_message(f"{tag.name}: {tag.command}", "(not run)", tag.call_id)
+        for tag in pending
+    ]
+    pending.clear()
+    return results
+
+
+class ReplyReader:
+    """
+    Streamed reply -> prose and ToolTags, whatever the tool mode.
+
+    Tags in the text are parsed in every mode (models drift back to them);
+    native calls are yielded as soon as they are complete. Grammar-mode
+    replies are one JSON object, so they are only yielded at the end.
+    """
+
+    def __init__(self, mode: str = "xml"):
+        self.mode = mode
+        self.stream = ChatStream()
+        self.parser = ToolTagParser()
+        self.native_calls = 0
+        self._prose: list[str] = []
+        self._tags: list[ToolTag] = []
+
+    async def items(self, byte_iter: AsyncIterator[bytes]) -> AsyncIterator[str | ToolTag]:
+        if self.mode == "grammar":
+            async for _ in self.stream.text_chunks(byte_iter):
+                pass
+            for item in self._grammar_reply(self.stream.text):
+                yield self._keep(item)
+            return
+        async for chunk in self.stream.items(byte_iter):
+            if isinstance(chunk, ToolCallDelta):
+                self.native_calls += 1
+                call_id = chunk.id or f"call_{uuid.uuid4().hex[:24]}"
+                items = [_tag(chunk.name, parse_arguments(chunk.arguments), call_id)]
+            else:
+                items = self.parser.feed(chunk)
+            for item in items:
+                yield self._keep(item)
+        for item in self.parser.close():
+            yield self._keep(item)
+
+    def _keep(self, item: str | ToolTag) -> str | ToolTag:
+        if isinstance(item, str):
+            self._prose.append(item)
+        else:
+            self._tags.append(item)
+        return item
+
+    def _grammar_reply(self, text: str) -> list[str | ToolTag]:
+        try:
+            reply = _loads(text)
+        except ValueError:
+            reply = None
+        if not isinstance(reply, dict):
+            # Not constrained after all: treat it as a plain reply
+            parser = ToolTagParser()
+            return parser.feed(text) + parser.close()
+        items: list[str | ToolTag] = []
+        if reply.get("reply"):
+            items.append(str(reply["reply"]))
+        for call in reply.get("tool_calls") or []:
+            if isinstance(call, dict) and call.get("name"):
+                self.native_calls += 1
+                items.append(_tag(str(call["name"]), parse_arguments(call.get("arguments"))))
+        return items
+
+    @property
+    def prose(self) -> str:
+        """Reply text without tool calls."""
+        return "".join(self._prose)
+
+    @property
+    def tags(self) -> list[ToolTag]:
+        return list(self._tags)
+
+    @property
+    def history_text(self) -> str:
+        """Reply as text, every tool call written as a tag."""
+        if self.mode == "xml" and not self.native_calls:
+            return self.stream.text
+        calls = "\n".join(tag.raw for tag in self._tags)
+        return f"{self.prose.strip()}\n{calls}".strip()
+
+    @property
+    def native_tags(self) -> list[ToolTag]:
+        """Calls that came back as structured tool_calls."""
+        return [tag for tag in self._tags if tag.call_id]
+
+    @property
+    def history_message(self) -> dict:
+        """Reply as stored in the conversation history.
+
+        Native calls are kept as tool_calls (messages_for_mode turns them
+        into tags for other modes); tags the model wrote stay in the text.
+        """
+        native = self.native_tags
+        if not native:
+            return {"role": "assistant", "content": self.history_text}
+        tags = [tag.raw for tag in self._tags if not tag.call_id]
+        return {
+            "role": "assistant",
+            "content": "\n".join([self.prose.strip(), *tags]).strip(),
+            "tool_calls": [
+                {
+                    "id": tag.call_id,
+                    "type": "function",
+                    "function": {"name": tag.name, "arguments": json.dumps(tag.attrs)},
+                }
+                for tag in native
+            ],
+        }
@@ -11,6 +11,9 @@ from textual.binding import Binding
 
 # Import backend factory (auto-detects OpenRouter or Mock)
 from backend import get_backend
+from llm_providers import transport
+from tools.executor import OutputBuffer
+from tools.spool import DISPLAY_OUTPUT_CHARS
 
 # --- Ładowanie Konfiguracji ---
 try:
@@ -302,6 +305,10 @@ class AgentZeroCLI(App):
         welcome_msg = f"[bold green]● System Online.[/]\\nZaładowano: [i]{CONFIG['security']['mode']}[/i]."
         chat.mount(Static(welcome_msg, classes="agent-msg"))
 
+    async def on_unmount(self) -> None:
+        # Pooled connections live for the whole session
+        await transport.aclose()
+
     def action_push_game(self) -> None:
         self.push_screen(RetroGameScreen())
 
@@ -351,22 +358,59 @@ class AgentZeroCLI(App):
                 )
                 if decision == "approved":
                     await chat.mount(Static(f"[OK] APPROVED: {command}", classes="system-msg"))
-                    async for exec_event in self.backend.execute_tool(tool_name, command):
-                        if hasattr(exec_event, 'type'):
-                            exec_type = exec_event.type
-                            exec_content = exec_event.content
-                        else:
-                            exec_type = exec_event.get('type', '')
-                            exec_content = exec_event.get('content', '')
-                        
-                        if exec_type == 'tool_output':
-                            await chat.mount(Static(exec_content, classes="tool-output"))
-                        elif exec_type == 'status':
-                            await chat.mount(Label(f"[EXEC] {exec_content}", classes="agent-thought"))
+                    await self.show_tool_events(self.backend.execute_tool(tool_name, command))
                 else:
                     await chat.mount(Static("[REJECTED] Command denied.", classes="system-msg"))
+            elif event_type == 'tool_batch':
+                # Several calls from one reply: approve each, run the approved ones together
+                calls = getattr(event, 'calls', None) if hasattr(event, 'type') else event.get('calls')
+                approved = []
+                for call in calls or []:
+                    command = call.get('command', '')
+                    decision = await self.push_screen_wait(
+                        ToolApprovalScreen(call.get('tool_name', 'unknown'), command, call.get('reason', ''), self.backend)
+                    )
+                    if decision == "approved":
+                        approved.append(call)
+                        await chat.mount(Static(f"[OK] APPROVED: {command}", classes="system-msg"))
+                    else:
+                        await chat.mount(Static(f"[REJECTED] {command}", classes="system-msg"))
+                if approved and hasattr(self.backend, 'execute_batch'):
+                    await self.show_tool_events(self.backend.execute_batch(approved))
+                else:
+                    for call in approved:
+                        await self.show_tool_events(self.backend.execute_tool(call.get('tool_name', 'shell'), call.get('command', '')))
             chat.scroll_end()
 
+    async def show_tool_events(self, events):
+        chat = self.query_one("#chat-container")
+        live_output = None
+        async for exec_event in events:
+            if hasattr(exec_event, 'type'):
+                exec_type = exec_event.type
+                exec_content = exec_event.content
+                partial = getattr(exec_event, 'partial', False)
+            else:
+                exec_type = exec_event.get('type', '')
+                exec_content = exec_event.get('content', '')
+                partial = exec_event.get('partial', False)
+
+            if exec_type == 'tool_output' and partial:
+                # Output of a running command: grow one widget
+                if live_output is None:
+                    # Head + tail only: a chatty command can't grow the widget without bound
+                    live_text = OutputBuffer(DISPLAY_OUTPUT_CHARS)
+                    live_output = Static("", classes="tool-output")
+                    await chat.mount(live_output)
+                live_text.write(exec_content)
+                live_output.update(live_text.getvalue())
+                chat.scroll_end()
+            elif exec_type == 'tool_output':
+                live_output = None
+                await chat.mount(Static(exec_content, classes="tool-output"))
+            elif exec_type == 'status':
+                await chat.mount(Label(f"[EXEC] {exec_content}", classes="agent-thought"))
+
 if __name__ == "__main__":
     app = AgentZeroCLI()
     app.run()
\ No newline at end of file
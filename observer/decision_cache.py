@@ -0,0 +1,69 @@
+"""
+Persistent cache of the observer's LLM decisions.
+
+An unknown tool called again with the same parameters gets the decision
+the LLM gave last time without another request. Keys combine:
+
+- the tool name and a normalized parameter signature (key order,
+  surrounding whitespace and runs of spaces do not matter; values do, so
+  an "auto" for one argument never auto-runs a different one);
+- the security settings (mode, whitelist, blacklist patterns), so
+  changing any of them invalidates every cached decision;
+- the provider and model that decided.
+
+Entries live in a DiskLRUCache (llm_providers/disk_cache.py) shared by
+all sessions, with a TTL and an LRU entry limit.
+
+Env vars:
+- AGENTZERO_DECISION_CACHE_TTL: seconds a decision stays valid (default 1 day)
+- AGENTZERO_DECISION_CACHE_SIZE: max cached decisions (default 1000)
+"""
+
+import hashlib
+import json
+import os
+from typing import Any
+
+from llm_providers.disk_cache import DiskLRUCache, cache_path
+
+DECISION_CACHE_TTL = float(os.getenv("AGENTZERO_DECISION_CACHE_TTL", "86400"))
+DECISION_CACHE_SIZE = int(os.getenv("AGENTZERO_DECISION_CACHE_SIZE", "1000"))
+DECISIONS = ("auto", "approve", "block")
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+def param_signature(params: dict[str, Any]) -> str:
+    """Canonical JSON of params."""
+    return json.dumps(_normalize(params), sort_keys=True, separators=(",", ":"))
+
+
+def security_fingerprint(security_mode: str, whitelist: list[str], blacklist: list[str]) -> str:
+    raw = json.dumps([security_mode, sorted(map(str, whitelist)), sorted(map(str, blacklist))])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def decision_key(tool_name: str, params: dict[str, Any], fingerprint: str, decider: str = "") -> str:
+    raw = f"{fingerprint}\n{decider}\n{tool_name.lower()}\n{param_signature(params)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_cache: DiskLRUCache | None = None
+
+
+def get_decision_cache() -> DiskLRUCache:
+    """Get the shared on-disk decision cache."""
+    global _cache
+    if _cache is None:
+        _cache = DiskLRUCache(cache_path("observer_decisions.json"), DECISION_CACHE_SIZE, DECISION_CACHE_TTL)
+    return _cache
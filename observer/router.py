@@ -1,10 +1,15 @@
 """Hybrid observer router: rules first, LLM fallback for edge cases."""
 
+import asyncio
 import logging
 from typing import Any
 
+from .decision_cache import DECISIONS, decision_key, get_decision_cache, security_fingerprint
 from .rules import route_by_rules
 
+# Seconds route_async waits for an LLM decision before asking the user
+DECISION_TIMEOUT = 5.0
+
 
 class ObserverRouter:
     """Routes tool requests using rules + optional LLM fallback."""
@@ -24,6 +29,16 @@ class ObserverRouter:
         self.llm_provider = None
         self._provider_name = observer_cfg.get("provider", "")
         self._observer_cfg = observer_cfg
+        self.decision_timeout = float(observer_cfg.get("decision_timeout", DECISION_TIMEOUT))
+
+        # LLM decisions are remembered across runs (observer/decision_cache.py)
+        self.decision_cache = get_decision_cache() if observer_cfg.get("decision_cache", True) else None
+
+        # Identical unknown-tool decisions in flight share one LLM request
+        self._pending: dict[str, asyncio.Future] = {}
+        self.llm_requests = 0
+        self.coalesced = 0
+        self.timeouts = 0
 
     def _init_llm_provider(self):
         """Lazy-load LLM provider on first use."""
@@ -43,48 +58,158 @@ class ObserverRouter:
         """
         Determine routing for a tool request.
 
+        Blocks while the LLM fallback runs; use route_async in an event loop.
+
         Returns: "auto" | "approve" | "block"
         """
-        # Try rules first (instant, no latency)
-        decision = route_by_rules(
-            tool_name,
-            params,
-            self.security_mode,
-            self.whitelist,
-            self.blacklist,
-        )
-
+        decision = self._rule_decision(tool_name, params)
         if decision is not None:
-            self.logger.debug("Rule decision for %s: %s", tool_name, decision)
             return decision
 
         # LLM fallback for unknown tools
         self._init_llm_provider()
         if self.llm_provider and self.llm_provider.is_available():
+            cached = self._cached_decision(tool_name, params)
+            if cached is not None:
+                return cached
             return self._llm_decide(tool_name, params)
 
         # Default to approval if no LLM
         self.logger.warning("No rule or LLM for %s, defaulting to approve", tool_name)
         return "approve"
 
-    def _llm_decide(self, tool_name: str, params: dict[str, Any]) -> str:
-        """Use LLM to decide on unknown tool."""
-        prompt = (
+    async def route_async(
+        self, tool_name: str, params: dict[str, Any], deadline: float | None = None
+    ) -> str:
+        """
+        Determine routing for a tool request without blocking the event loop.
+
+        The LLM fallback gets at most deadline seconds (default: observer
+        decision_timeout); past it the request goes to the user ("approve").
+
+        Returns: "auto" | "approve" | "block"
+        """
+        decision = self._rule_decision(tool_name, params)
+        if decision is not None:
+            return decision
+
+        self._init_llm_provider()
+        if not (self.llm_provider and self.llm_provider.is_available()):
+            self.logger.warning("No rule or LLM for %s, defaulting to approve", tool_name)
+            return "approve"
+
+        cached = self._cached_decision(tool_name, params)
+        if cached is not None:
+            return cached
+
+        key = self._decision_key(tool_name, params)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._llm_decide_async(tool_name, params))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        timeout = self.decision_timeout if deadline is None else deadline
+        try:
+            # Shielded: other waiters may have a later deadline
+            return await asyncio.wait_for(asyncio.shield(pending), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.logger.warning("LLM decision for %s took over %.1fs, defaulting to approve", tool_name, timeout)
+            return "approve"
+
+    def _rule_decision(self, tool_name: str, params: dict[str, Any]) -> str | None:
+        """Rules first (instant, no latency); None when no rule applies."""
+        decision = route_by_rules(
+            tool_name,
+            params,
+            self.security_mode,
+            self.whitelist,
+            self.blacklist,
+        )
+        if decision is not None:
+            self.logger.debug("Rule decision for %s: %s", tool_name, decision)
+        return decision
+
+    def _decision_key(self, tool_name: str, params: dict[str, Any]) -> str:
+        """Same tool, parameters, security settings and deciding model: same key."""
+        model = getattr(self.llm_provider, "model", "") or self._observer_cfg.get("model", "")
+        return decision_key(
+            tool_name,
+            params,
+            security_fingerprint(self.security_mode, self.whitelist, self.blacklist),
+            f"{type(self.llm_provider).__name__}:{model}",
+        )
+
+    def _cached_decision(self, tool_name: str, params: dict[str, Any]) -> str | None:
+        if self.decision_cache is None:
+            return None
+        decision = self.decision_cache.get(self._decision_key(tool_name, params))
+        if decision in DECISIONS:
+            self.logger.debug("Cached decision for %s: %s", tool_name, decision)
+            return decision
+        return None
+
+    def _remember(self, tool_name: str, params: dict[str, Any], decision: str) -> str:
+        if self.decision_cache is not None:
+            self.decision_cache.put(self._decision_key(tool_name, params), decision)
+        return decision
+
+    @staticmethod
+    def _decision_prompt(tool_name: str, params: dict[str, Any]) -> str:
+        return (
             f"Tool: {tool_name}\n"
             f"Params: {params}\n"
             "Is this tool safe to auto-execute? Reply with one word: AUTO, APPROVE, or BLOCK"
         )
 
+    def _parse_decision(self, tool_name: str, response: str) -> str:
+        response = response.strip().upper()
+        if "AUTO" in response:
+            self.logger.info("LLM decided AUTO for %s", tool_name)
+            return "auto"
+        if "BLOCK" in response:
+            self.logger.info("LLM decided BLOCK for %s", tool_name)
+            return "block"
+        self.logger.info("LLM decided APPROVE for %s", tool_name)
+        return "approve"
+
+    def _llm_decide(self, tool_name: str, params: dict[str, Any]) -> str:
+        """Use LLM to decide on unknown tool."""
+        self.llm_requests += 1
         try:
-            response = self.llm_provider.complete(prompt).strip().upper()
-            if "AUTO" in response:
-                self.logger.info("LLM decided AUTO for %s", tool_name)
-                return "auto"
-            if "BLOCK" in response:
-                self.logger.info("LLM decided BLOCK for %s", tool_name)
-                return "block"
-            self.logger.info("LLM decided APPROVE for %s", tool_name)
+            response = self.llm_provider.complete(self._decision_prompt(tool_name, params))
+            if not response.strip():
+                # Providers answer "" when the request failed: ask the user, remember nothing
+                return "approve"
+            return self._remember(tool_name, params, self._parse_decision(tool_name, response))
+        except Exception as e:
+            self.logger.error("LLM fallback failed: %s", e)
             return "approve"
+
+    async def _llm_decide_async(self, tool_name: str, params: dict[str, Any]) -> str:
+        """_llm_decide on the async client, or in a worker thread for sync-only providers."""
+        complete_async = getattr(self.llm_provider, "complete_async", None)
+        if complete_async is None:
+            return await asyncio.to_thread(self._llm_decide, tool_name, params)
+        self.llm_requests += 1
+        try:
+            response = await complete_async(self._decision_prompt(tool_name, params))
+            if not response.strip():
+                return "approve"
+            return self._remember(tool_name, params, self._parse_decision(tool_name, response))
         except Exception as e:
             self.logger.error("LLM fallback failed: %s", e)
             return "approve"
+
+    def get_stats(self) -> dict:
+        return {
+            "llm_requests": self.llm_requests,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts,
+            "pending": len(self._pending),
+            "decision_timeout": self.decision_timeout,
+            "decision_cache": self.decision_cache.get_stats() if self.decision_cache is not None else None,
+        }
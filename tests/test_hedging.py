@@ -0,0 +1,121 @@
+"""Tests for hedged requests."""
+
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.hedging import HedgePolicy, race
+from llm_providers.openrouter import OpenRouterBackend
+
+
+async def _events(*items, delay=0.0, closed=None):
+    try:
+        await asyncio.sleep(delay)
+        for item in items:
+            yield item
+    finally:
+        if closed is not None:
+            closed.append(items[0])
+
+
+class TestHedgePolicy:
+    """Tests for delay and budget."""
+
+    def test_delay_percentile(self):
+        policy = HedgePolicy(enabled=True, percentile=90, initial_delay=3.0)
+        assert policy.delay() == 3.0
+        for ttft in (0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 4.0):
+            policy.record_ttft(ttft)
+        assert policy.delay() == 4.0
+        policy.percentile = 50
+        assert policy.delay() == 1.0
+
+    def test_budget(self):
+        policy = HedgePolicy(enabled=True, budget=0.1)
+        policy.requests = 9
+        assert not policy.allow()
+        policy.requests = 10
+        assert policy.allow()
+        policy.hedges = 1
+        assert not policy.allow()
+        assert not HedgePolicy(enabled=False, budget=1.0).allow()
+
+
+class TestRace:
+    """Tests for the first-to-start race."""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_sends_no_hedge(self):
+        hedges = []
+        index, first, _ = await race(_events("a"), 1.0, lambda: hedges.append(1))
+        assert (index, first, hedges) == (0, "a", [])
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_and_primary_closed(self):
+        closed = []
+        primary = _events("slow", delay=10, closed=closed)
+        index, first, stream = await race(primary, 0.01, lambda: _events("fast", "more"))
+        assert (index, first) == (1, "fast")
+        assert closed == ["slow"]
+        assert [item async for item in stream] == ["more"]
+
+    @pytest.mark.asyncio
+    async def test_error_reply_loses(self):
+        primary = _events("error", delay=0.05)
+        hedge = _events("ok", delay=0.1)
+        index, first, _ = await race(primary, 0.01, lambda: hedge, lambda e: e != "error")
+        assert (index, first) == (1, "ok")
+
+    @pytest.mark.asyncio
+    async def test_both_fail(self):
+        async def broken():
+            raise httpx.ConnectError("down")
+            yield
+
+        with pytest.raises(httpx.ConnectError):
+            await race(broken(), 0.01, lambda: _events("error"), lambda e: e != "error")
+
+
+class TestBackendHedging:
+    """Tests for hedging in OpenRouterBackend.send_prompt."""
+
+    @pytest.mark.asyncio
+    async def test_slow_model_is_hedged(self, monkeypatch):
+        closed = []
+
+        async def reply(text, delay):
+            try:
+                await asyncio.sleep(delay)
+                yield b"data: " + json.dumps({"choices": [{"delta": {"content": text}}]}).encode() + b"\n\n"
+                yield b"data: [DONE]\n\n"
+            finally:
+                closed.append(text)
+
+        def handler(request):
+            if request.url.path.endswith("/models"):
+                return httpx.Response(404)
+            model = json.loads(request.content)["model"]
+            content = reply("slow", 10) if model == "a" else reply("fast", 0)
+            return httpx.Response(200, content=content, headers={"content-type": "text/event-stream"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(transport, "get_async_client", lambda: client)
+        backend = OpenRouterBackend(api_key="test", models=["a", "b"])
+        backend.hedge = HedgePolicy(enabled=True, budget=1.0, initial_delay=0.05)
+
+        events = [e async for e in backend.send_prompt("hi")]
+        assert events[-1].content == "fast"
+        assert "slow" in closed
+        stats = backend.get_stats()["hedging"]
+        assert (stats["requests"], stats["hedges"], stats["wins"], stats["losses"]) == (1, 1, 1, 0)
+        # The slow primary's TTFT is recorded as at least the time it ran
+        slow = backend.router.health["a"]
+        assert slow.censored == 1 and slow.ttft >= 0.05
+        assert backend.router.candidates(0)[0] == "b"
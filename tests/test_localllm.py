@@ -2,9 +2,11 @@
 Tests for Local LLM backend (LM Studio, Ollama, etc.)
 """
 
+import httpx
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from llm_providers import transport
 from llm_providers.localllm import (
     LocalLLMBackend,
     AgentEvent,
@@ -106,6 +108,59 @@ class TestLocalLLMBackend:
         assert len(backend.conversation_history) == 0
 
 
+class TestServerProbe:
+    """Model detection runs in the background and is remembered on disk."""
+
+    MODELS = {"data": [
+        {"id": "nomic-embed-text", "owned_by": "organization"},
+        {"id": "qwen-coder", "owned_by": "organization", "context_length": 32768},
+    ]}
+
+    @staticmethod
+    def _serve(monkeypatch, handler):
+        requests = []
+
+        def counted(request):
+            requests.append(request.url.path)
+            return handler(request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(counted))
+        monkeypatch.setattr(transport, "get_async_client", lambda: client)
+        monkeypatch.setattr(transport, "get_sync_client", lambda: pytest.fail("blocking request"))
+        return requests
+
+    @pytest.mark.asyncio
+    async def test_init_does_not_block(self, monkeypatch, capability_store):
+        requests = self._serve(monkeypatch, lambda request: httpx.Response(200, json=self.MODELS))
+        backend = LocalLLMBackend(base_url="http://local.test/v1")
+        assert (backend.model, backend.state, requests) == ("", "probing", [])
+
+        await backend.ready()
+        assert (backend.model, backend.state) == ("qwen-coder", "ready")
+        assert backend.context_length == 32768
+        assert backend.models == ["nomic-embed-text", "qwen-coder"]
+        assert capability_store.get("http://local.test/v1", "nomic-embed-text")["kind"] == "embedding"
+
+    @pytest.mark.asyncio
+    async def test_starts_from_cache(self, monkeypatch):
+        self._serve(monkeypatch, lambda request: httpx.Response(200, json=self.MODELS))
+        await LocalLLMBackend(base_url="http://local.test/v1").ready()
+
+        backend = LocalLLMBackend(base_url="http://local.test/v1")
+        assert (backend.model, backend.state, backend.context_length) == ("qwen-coder", "probing", 32768)
+
+    @pytest.mark.asyncio
+    async def test_offline(self, monkeypatch):
+        def refuse(request):
+            raise httpx.ConnectError("refused")
+
+        self._serve(monkeypatch, refuse)
+        backend = LocalLLMBackend(base_url="http://local.test/v1")
+        await backend.ready()
+        assert backend.state == "offline"
+        assert backend.get_stats()["state"] == "offline"
+
+
 class TestAgentEvent:
     """Tests for AgentEvent dataclass."""
 
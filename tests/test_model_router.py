@@ -0,0 +1,150 @@
+"""Tests for latency-aware model routing and failover."""
+
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.model_router import ModelRouter
+from llm_providers.openrouter import OpenRouterBackend
+
+
+def _frames(text: str) -> list[bytes]:
+    return [
+        b"data: " + json.dumps({"choices": [{"delta": {"content": text}}]}).encode() + b"\n\n",
+        b"data: " + json.dumps({"choices": [{"delta": {}, "finish_reason": "stop"}],
+                                "usage": {"prompt_tokens": 10, "completion_tokens": 5}}).encode() + b"\n\n",
+        b"data: [DONE]\n\n",
+    ]
+
+
+def _serve(monkeypatch, replies: dict) -> list[str]:
+    """replies maps model -> status code, exception or reply text."""
+    asked = []
+
+    async def stream(frames):
+        for frame in frames:
+            yield frame
+
+    def handler(request):
+        if request.url.path.endswith("/models"):
+            return httpx.Response(404)
+        model = json.loads(request.content)["model"]
+        asked.append(model)
+        reply = replies[model]
+        if isinstance(reply, Exception):
+            raise reply
+        if isinstance(reply, int):
+            return httpx.Response(reply, text="upstream error", headers={"retry-after": "120"})
+        return httpx.Response(200, content=stream(_frames(reply)), headers={"content-type": "text/event-stream"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(transport, "get_async_client", lambda: client)
+    return asked
+
+
+class TestModelRouter:
+    """Tests for ranking and the circuit breaker."""
+
+    def test_untried_models_rotate(self):
+        router = ModelRouter(["a", "b", "c"])
+        assert [router.candidates(i)[0] for i in range(4)] == ["a", "b", "c", "a"]
+
+    def test_fastest_model_preferred(self):
+        router = ModelRouter(["slow", "fast"], slack=1.2)
+        router.record_success("slow", ttft=4.0, tokens=100, seconds=10)
+        router.record_success("fast", ttft=0.5, tokens=100, seconds=1)
+        assert router.candidates(0) == ["fast", "slow"]
+        assert router.candidates(1) == ["fast", "slow"]
+
+    def test_comparable_models_share_load(self):
+        router = ModelRouter(["a", "b"], slack=1.5)
+        router.record_success("a", ttft=1.0)
+        router.record_success("b", ttft=1.2)
+        assert {router.candidates(0)[0], router.candidates(1)[0]} == {"a", "b"}
+
+    def test_censored_ttft_only_raises(self):
+        router = ModelRouter(["a"])
+        router.record_success("a", ttft=2.0)
+        router.record_censored_ttft("a", 1.0)
+        assert router.health["a"].ttft == 2.0
+        router.record_censored_ttft("a", 12.0)
+        assert router.health["a"].ttft > 2.0
+        assert router.health["a"].state == "closed"
+        assert router.get_stats()["models"]["a"]["censored"] == 2
+
+    def test_breaker_opens_after_failures(self):
+        router = ModelRouter(["a", "b"], failure_threshold=2, cooldown=30)
+        router.record_failure("a", "boom")
+        assert router.health["a"].state == "closed"
+        router.record_failure("a", "boom")
+        assert router.health["a"].state == "open"
+        assert router.candidates(0) == ["b", "a"]
+
+    def test_429_opens_at_once_and_half_open_probe(self):
+        router = ModelRouter(["a", "b"], cooldown=30)
+        router.record_failure("a", "rate limited", 429, retry_after=0)
+        assert router.health["a"].state == "open"
+        router.record_success("b", ttft=1.0)
+        assert router.candidates(0) == ["b", "a"]  # probe after the healthy model
+        router.started("a")
+        assert router.health["a"].state == "half_open"
+        router.record_failure("a", "still failing")
+        assert router.health["a"].state == "open"
+        assert router.health["a"].cooldown == 60
+        assert router.health["a"].open_until > time.monotonic() + 50
+        router.health["a"].open_until = 0
+        router.started("a")
+        router.record_success("a", ttft=0.5)
+        assert (router.health["a"].state, router.health["a"].cooldown) == ("closed", 30)
+
+
+class TestFailover:
+    """Tests for failover in OpenRouterBackend.send_prompt."""
+
+    @pytest.mark.asyncio
+    async def test_fails_over_before_first_token(self, monkeypatch):
+        asked = _serve(monkeypatch, {"a": 429, "b": "hello"})
+        backend = OpenRouterBackend(api_key="test", models=["a", "b"])
+        events = [e async for e in backend.send_prompt("hi")]
+        assert asked == ["a", "b"]
+        assert events[-1].type == "final_response" and events[-1].content == "hello"
+        assert not any(e.type == "error" for e in events)
+
+        routing = backend.get_stats()["routing"]
+        assert routing["failovers"] == 1
+        assert routing["models"]["a"]["state"] == "open"
+        assert routing["models"]["b"]["ttft"] is not None
+
+        # The open circuit keeps "a" out of the next turn
+        [e async for e in backend.send_prompt("again")]
+        assert asked == ["a", "b", "b"]
+
+    @pytest.mark.asyncio
+    async def test_connect_error_fails_over(self, monkeypatch):
+        asked = _serve(monkeypatch, {"a": httpx.ConnectError("refused"), "b": "ok"})
+        backend = OpenRouterBackend(api_key="test", models=["a", "b"])
+        events = [e async for e in backend.send_prompt("hi")]
+        assert asked == ["a", "b"]
+        assert events[-1].content == "ok"
+
+    @pytest.mark.asyncio
+    async def test_all_models_fail(self, monkeypatch):
+        _serve(monkeypatch, {"a": 503, "b": 503})
+        backend = OpenRouterBackend(api_key="test", models=["a", "b"])
+        events = [e async for e in backend.send_prompt("hi")]
+        assert events[-1].type == "error" and "503" in events[-1].content
+
+    @pytest.mark.asyncio
+    async def test_account_errors_do_not_fail_over(self, monkeypatch):
+        asked = _serve(monkeypatch, {"a": 401, "b": "ok"})
+        backend = OpenRouterBackend(api_key="test", models=["a", "b"])
+        events = [e async for e in backend.send_prompt("hi")]
+        assert asked == ["a"]
+        assert events[-1].type == "error"
@@ -0,0 +1,206 @@
+"""Tests for native tool calling and the per-model capability record."""
+
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import capabilities, transport
+from llm_providers.capabilities import CapabilityStore, ToolModeSelector, rejects_tools
+from llm_providers.localllm import LocalLLMBackend
+from llm_providers.openrouter import OpenRouterBackend
+from llm_providers.streaming import ChatStream, ToolCallDelta
+from llm_providers.tool_schema import messages_for_mode, to_command
+from tools.search import parse_query
+
+
+def _frame(delta: dict, finish: str | None = None) -> bytes:
+    chunk = {"choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+    return b"data: " + json.dumps(chunk).encode() + b"\n\n"
+
+
+def _call(index: int, args: str, name: str = "", call_id: str = "") -> bytes:
+    function = {"arguments": args}
+    if name:
+        function["name"] = name
+    return _frame({"tool_calls": [{"index": index, "id": call_id, "function": function}]})
+
+
+PARALLEL_CALLS = [
+    _frame({"content": "Checking both."}),
+    _call(0, '{"command": "ls \\"my dir\\"", ', "shell", "c0"),
+    _call(0, '"reason": "look"}'),
+    _call(1, '{"path": "a.py", "start_line": 3, "end_line": 9}', "read_file", "c1"),
+    _frame({}, "tool_calls"),
+    b"data: [DONE]\n\n",
+]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = CapabilityStore(tmp_path / "caps.json")
+    monkeypatch.setattr(capabilities, "_store", store)
+    return store
+
+
+def _serve(monkeypatch, handler):
+    async def stream(frames):
+        for frame in frames:
+            yield frame
+
+    def wrapped(request):
+        status, body = handler(request)
+        if isinstance(body, list):
+            return httpx.Response(status, content=stream(body), headers={"content-type": "text/event-stream"})
+        return httpx.Response(status, json=body) if isinstance(body, dict) else httpx.Response(status, text=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(wrapped))
+    monkeypatch.setattr(transport, "get_async_client", lambda: client)
+
+
+class TestSchema:
+    """Tests for structured call -> executor command conversion."""
+
+    def test_to_command(self):
+        assert to_command("shell", {"command": "ls -la"}) == "ls -la"
+        assert to_command("read_file", {"path": "a.py", "start_line": 3, "end_line": 9}) == "a.py:3-9"
+        assert to_command("write_file", {"path": "x", "content": "a|b"}) == "x|||a|b"
+        assert to_command("read_output", {"handle": "out-1", "offset": 200}) == "out-1 200"
+        query = parse_query(to_command("search_text", {"pattern": "-x 'y'", "glob": "*.py", "ignore_case": True}))
+        assert (query.pattern, query.globs, query.ignore_case) == ("-x 'y'", ["*.py"], True)
+
+    def test_messages_for_mode(self):
+        """tool_calls survive only in tools mode and only with all results next to them"""
+        call = {"id": "c0", "type": "function", "function": {"name": "shell", "arguments": '{"command": "ls"}'}}
+        assistant = {"role": "assistant", "content": "Looking.", "tool_calls": [call]}
+        result = {"role": "tool", "tool_call_id": "c0", "content": "[tool output] shell: ls\na.py"}
+        history = [{"role": "user", "content": "hi"}, assistant, result]
+        assert messages_for_mode(history, "tools") == history
+        as_xml = messages_for_mode(history, "xml")
+        assert as_xml[1] == {"role": "assistant", "content": 'Looking.\n<tool name="shell" command="ls"/>'}
+        assert as_xml[2] == {"role": "user", "content": result["content"]}
+        # Result missing, or call compacted away: both sides become text
+        assert "tool_calls" not in messages_for_mode(history[:2], "tools")[1]
+        assert messages_for_mode([result], "tools") == [{"role": "user", "content": result["content"]}]
+
+    @pytest.mark.asyncio
+    async def test_calls_complete_mid_stream(self):
+        """Call 0 is yielded when call 1 starts, before the stream finishes"""
+        seen = []
+
+        async def body():
+            for frame in PARALLEL_CALLS:
+                seen.append(frame)
+                yield frame
+
+        stream = ChatStream()
+        items = []
+        async for item in stream.items(body()):
+            items.append((item, len(seen)))
+        calls = [(i.name, json.loads(i.arguments), n) for i, n in items if isinstance(i, ToolCallDelta)]
+        assert [name for name, _, _ in calls] == ["shell", "read_file"]
+        assert calls[0][1]["command"] == 'ls "my dir"'
+        assert calls[0][2] == 4  # right after the first delta of call 1
+        assert items[0][0] == "Checking both."
+
+
+class TestCapabilities:
+    """Tests for the per-model tool mode record."""
+
+    def test_selector(self, store):
+        selector = ToolModeSelector("http://x", ("tools", "grammar", "xml"), "auto", store)
+        assert selector.mode("m") == "tools"
+        assert selector.downgrade("m", "tools", "no tools") == "grammar"
+        assert selector.downgrade("m", "grammar") == "xml"
+        assert selector.downgrade("m", "xml") is None
+        # Persisted: a new store reads the same record
+        assert CapabilityStore(store.path).tool_mode("http://x", "m") == "xml"
+        assert ToolModeSelector("http://x", setting="off", store=store).mode("other") == "xml"
+
+    def test_rejects_tools(self):
+        assert rejects_tools(400, '{"error": "tools param requires --jinja flag"}')
+        assert rejects_tools(404, "No endpoints found that support tool use")
+        assert not rejects_tools(429, "rate limited: tool")
+        assert not rejects_tools(500, "internal error")
+
+
+class TestProviders:
+    """Providers pick the tool mode per model and fall back."""
+
+    @pytest.mark.asyncio
+    async def test_openrouter_native(self, store, monkeypatch):
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return 200, PARALLEL_CALLS
+
+        _serve(monkeypatch, handler)
+        backend = OpenRouterBackend(api_key="test", models=["m"], native_tools="auto")
+        events = [e async for e in backend.send_prompt("hi")]
+        # Both calls of the reply arrive as one batch
+        [batch] = [e for e in events if e.type == "tool_batch"]
+        assert [(c["tool_name"], c["command"], c["reason"]) for c in batch.calls] == [
+            ("shell", 'ls "my dir"', "look"), ("read_file", "a.py:3-9", "")
+        ]
+        assert not any(e.type == "tool_request" for e in events)
+        assert bodies[0]["tools"] and "<tool" not in bodies[0]["messages"][0]["content"]
+        assert store.tool_mode("openrouter", "m") == "tools"
+        # Calls are stored as tool_calls, and as tags for models in other modes
+        assert [c["id"] for c in backend.conversation_history[-1]["tool_calls"]] == ["c0", "c1"]
+        as_xml = messages_for_mode(backend.conversation_history, "xml")
+        assert backend._parse_tool_call(as_xml[-1]["content"]).command == 'ls "my dir"'
+
+        # Results go back as tool messages; the rejected call gets a placeholder
+        [e async for e in backend.execute_tool("read_file", "a.py:3-9")]
+        [e async for e in backend.send_prompt("next")]
+        sent = bodies[1]["messages"]
+        assert [m["role"] for m in sent[-4:]] == ["assistant", "tool", "tool", "user"]
+        assert [m["tool_call_id"] for m in sent[-3:-1]] == ["c1", "c0"]
+        assert "(not run)" in sent[-2]["content"]
+
+    @pytest.mark.asyncio
+    async def test_openrouter_falls_back_to_xml(self, store, monkeypatch):
+        bodies = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            bodies.append(body)
+            if "tools" in body:
+                return 404, {"error": {"message": "No endpoints found that support tool use"}}
+            return 200, [_frame({"content": '<tool name="shell" command="pwd" reason="x"/>'}), b"data: [DONE]\n\n"]
+
+        _serve(monkeypatch, handler)
+        backend = OpenRouterBackend(api_key="test", models=["m"], native_tools="auto")
+        events = [e async for e in backend.send_prompt("hi")]
+        assert [e.content for e in events if e.type == "tool_request"] == ["pwd"]
+        assert store.tool_mode("openrouter", "m") == "xml"
+        # Recorded: the next prompt goes straight to XML
+        [e async for e in backend.send_prompt("again")]
+        assert ["tools" in b for b in bodies] == [True, False, False]
+
+    @pytest.mark.asyncio
+    async def test_llamacpp_grammar(self, store, monkeypatch):
+        reply = {"reply": "Reading it.", "tool_calls": [{"name": "read_file", "arguments": {"path": "b.py"}}]}
+        text = json.dumps(reply)
+
+        def handler(request):
+            if request.url.path.endswith("/models"):
+                return 200, {"data": [{"id": "qwen", "owned_by": "llamacpp"}]}
+            body = json.loads(request.content)
+            if "tools" in body:
+                return 500, {"error": {"message": "tools param requires --jinja flag"}}
+            assert body["response_format"]["type"] == "json_schema"
+            return 200, [_frame({"content": text[:10]}), _frame({"content": text[10:]}), b"data: [DONE]\n\n"]
+
+        _serve(monkeypatch, handler)
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="qwen", native_tools="auto")
+        events = [e async for e in backend.send_prompt("hi")]
+        assert [e.content for e in events if e.type == "tool_request"] == ["b.py"]
+        assert events[-1].content == "Reading it."
+        assert store.tool_mode("http://local.test/v1", "qwen") == "grammar"
+        assert backend.get_stats()["tool_mode"] == "grammar"
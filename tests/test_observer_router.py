@@ -0,0 +1,196 @@
+"""Tests for the observer router's async LLM fallback and decision cache."""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.base import AsyncLLMProvider, LLMProvider
+from llm_providers.mcp_gateway import MCPGatewayClient
+from observer.router import ObserverRouter
+
+CONFIG = {"observer": {"enabled": True}, "security": {"mode": "balanced"}}
+
+
+class FakeAsyncProvider(AsyncLLMProvider):
+    def __init__(self, reply: str = "AUTO", delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    def is_available(self) -> bool:
+        return True
+
+    def complete(self, prompt: str, system: str = "") -> str:
+        self.calls += 1
+        return self.reply
+
+    async def complete_async(self, prompt: str, system: str = "") -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.reply
+
+
+class FakeSyncProvider(LLMProvider):
+    def __init__(self, reply: str = "BLOCK"):
+        self.reply = reply
+        self.threads = []
+
+    def is_available(self) -> bool:
+        return True
+
+    def complete(self, prompt: str, system: str = "") -> str:
+        self.threads.append(threading.current_thread())
+        time.sleep(0.05)
+        return self.reply
+
+
+def _router(provider) -> ObserverRouter:
+    router = ObserverRouter(CONFIG)
+    router.llm_provider = provider
+    return router
+
+
+class TestRouteAsync:
+    """Tests for route_async."""
+
+    @pytest.mark.asyncio
+    async def test_rules_first(self):
+        provider = FakeAsyncProvider()
+        assert await _router(provider).route_async("read_file", {"path": "x"}) == "auto"
+        assert provider.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_llm_decision(self):
+        router = _router(FakeAsyncProvider("BLOCK - unsafe"))
+        assert await router.route_async("mystery_tool", {"x": 1}) == "block"
+        assert router.route("mystery_tool", {"x": 1}) == "block"
+
+    @pytest.mark.asyncio
+    async def test_deadline_falls_back_to_approve(self):
+        router = _router(FakeAsyncProvider("AUTO", delay=1.0))
+        started = time.monotonic()
+        assert await router.route_async("mystery_tool", {}, deadline=0.05) == "approve"
+        assert time.monotonic() - started < 0.5
+        assert router.get_stats()["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_identical_decisions_are_coalesced(self):
+        provider = FakeAsyncProvider("AUTO", delay=0.05)
+        router = _router(provider)
+        decisions = await asyncio.gather(*(router.route_async("mystery_tool", {"a": 1, "b": 2}) for _ in range(3)))
+        assert decisions == ["auto"] * 3
+        assert provider.calls == 1
+        assert router.get_stats()["coalesced"] == 2
+        assert router.get_stats()["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_decisions_run_separately(self):
+        provider = FakeAsyncProvider("AUTO", delay=0.01)
+        router = _router(provider)
+        await asyncio.gather(router.route_async("tool_a", {}), router.route_async("tool_b", {}))
+        assert provider.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_sync_provider_runs_off_the_loop(self):
+        provider = FakeSyncProvider("BLOCK")
+        router = _router(provider)
+        assert await router.route_async("mystery_tool", {}) == "block"
+        assert provider.threads[0] is not threading.main_thread()
+
+    @pytest.mark.asyncio
+    async def test_no_provider_approves(self):
+        router = ObserverRouter(CONFIG)
+        assert await router.route_async("mystery_tool", {}) == "approve"
+
+
+class TestMCPGatewayAsync:
+    """Tests for the pooled async MCP gateway client."""
+
+    @pytest.mark.asyncio
+    async def test_complete_async(self, monkeypatch):
+        sent = []
+
+        def handler(request):
+            sent.append((request.headers["X-API-Key"], json.loads(request.content)))
+            return httpx.Response(200, json={"response": "APPROVE"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(transport, "get_async_client", lambda: client)
+        monkeypatch.delenv("MCP_GATEWAY_API_KEY", raising=False)
+        gateway = MCPGatewayClient({"mcp_api_key": "k"})
+        assert await gateway.complete_async("hi", system="be brief") == "APPROVE"
+        assert sent == [("k", {"prompt": "hi", "system": "be brief"})]
+
+    @pytest.mark.asyncio
+    async def test_complete_async_error_is_empty(self, monkeypatch):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(401)))
+        monkeypatch.setattr(transport, "get_async_client", lambda: client)
+        gateway = MCPGatewayClient({"mcp_api_key": "k"})
+        assert await gateway.complete_async("hi") == ""
+
+
+class TestDecisionCache:
+    """LLM decisions are remembered per tool, parameters and security settings."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_is_served_from_cache(self, decision_cache):
+        provider = FakeAsyncProvider("AUTO")
+        router = _router(provider)
+        assert await router.route_async("mcp_search", {"query": "x", "limit": 5}) == "auto"
+        assert await router.route_async("mcp_search", {"limit": 5, "query": "  x "}) == "auto"
+        assert router.route("mcp_search", {"query": "x", "limit": 5}) == "auto"
+        assert provider.calls == 1
+        assert router.get_stats()["decision_cache"]["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_different_values_ask_again(self):
+        provider = FakeAsyncProvider("AUTO")
+        router = _router(provider)
+        await router.route_async("mcp_delete", {"path": "tmp"})
+        await router.route_async("mcp_delete", {"path": "/"})
+        assert provider.calls == 2
+
+    def test_persists_across_runs(self, decision_cache):
+        from llm_providers.disk_cache import DiskLRUCache
+
+        _router(FakeAsyncProvider("BLOCK")).route("mcp_shell", {"cmd": "x"})
+        provider = FakeAsyncProvider("AUTO")
+        router = _router(provider)
+        router.decision_cache = DiskLRUCache(decision_cache.path)
+        assert router.route("mcp_shell", {"cmd": "x"}) == "block"
+        assert provider.calls == 0
+
+    def test_security_change_invalidates(self):
+        provider = FakeAsyncProvider("AUTO")
+        router = _router(provider)
+        router.route("mcp_tool", {})
+        router.whitelist = ["git status"]
+        router.route("mcp_tool", {})
+        router.blacklist = ["rm -rf"]
+        router.route("mcp_tool", {})
+        assert provider.calls == 3
+
+    def test_failed_requests_are_not_cached(self):
+        provider = FakeAsyncProvider("")
+        router = _router(provider)
+        assert router.route("mcp_tool", {}) == "approve"
+        provider.reply = "AUTO"
+        assert router.route("mcp_tool", {}) == "auto"
+        assert provider.calls == 2
+
+    def test_can_be_disabled(self):
+        router = ObserverRouter({**CONFIG, "observer": {"enabled": True, "decision_cache": False}})
+        router.llm_provider = FakeAsyncProvider("AUTO")
+        router.route("mcp_tool", {})
+        router.route("mcp_tool", {})
+        assert router.llm_provider.calls == 2
+        assert router.get_stats()["decision_cache"] is None
@@ -226,6 +226,23 @@ class TestLocalBackend:
         assert "status" in event_types
         assert "tool_output" in event_types
 
+    
+    @pytest.mark.asyncio
+    async def test_execute_tool_streams_output(self):
+        """Shell output reaches the frontend while the command runs"""
+        backend = LocalBackend()
+        events = [e async for e in backend.execute_tool("shell", "echo one; sleep 0.2; echo two")]
+        partial = [e.content for e in events if e.type == "tool_output" and e.partial]
+        assert "one" in partial[0] and "two" in "".join(partial)
+
+    @pytest.mark.asyncio
+    async def test_execute_batch_keeps_timing(self):
+        """Batch status headers carry each call's duration"""
+        backend = LocalBackend()
+        events = [e async for e in backend.execute_batch([{"tool_name": "shell", "command": "echo hi"}])]
+        headers = [e for e in events if e.type == "status" and e.content.startswith("[1/1]")]
+        assert headers[0].duration is not None
+
 
 class TestOpenRouterIntegration:
     """Integration tests (require API key, skipped in CI)"""
@@ -0,0 +1,146 @@
+"""Tests for the stable prompt prefix and prompt-cache hints."""
+
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.localllm import LocalLLMBackend
+from llm_providers.openrouter import OpenRouterBackend
+from llm_providers.prompt_cache import PromptCacheStats, supports_cache_control, with_cache_breakpoints
+from llm_providers.streaming import ChatStream
+
+
+def _reply(final: dict) -> list[bytes]:
+    text = {"choices": [{"delta": {"content": "ok"}}]}
+    return [
+        b"data: " + json.dumps(text).encode() + b"\n\n",
+        b"data: " + json.dumps({"choices": [{"delta": {}, "finish_reason": "stop"}], **final}).encode() + b"\n\n",
+        b"data: [DONE]\n\n",
+    ]
+
+
+def _serve(monkeypatch, final: dict, props: dict | None = None) -> list[dict]:
+    sent = []
+
+    async def stream(frames):
+        for frame in frames:
+            yield frame
+
+    def handler(request):
+        if request.url.path.endswith("/models"):
+            owner = "llamacpp" if props else "organization"
+            return httpx.Response(200, json={"data": [{"id": "m", "owned_by": owner}]})
+        if request.url.path.endswith("/props"):
+            return httpx.Response(200, json=props)
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, content=stream(_reply(final)), headers={"content-type": "text/event-stream"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(transport, "get_async_client", lambda: client)
+    return sent
+
+
+class TestBreakpoints:
+    """Tests for cache_control placement."""
+
+    def test_marks_system_and_last(self):
+        messages = [
+            {"role": "system", "content": "sys"},
+            {"role": "user", "content": "a"},
+            {"role": "assistant", "content": "b"},
+            {"role": "user", "content": "c"},
+        ]
+        marked = with_cache_breakpoints(messages)
+        assert marked[0]["content"] == [{"type": "text", "text": "sys", "cache_control": {"type": "ephemeral"}}]
+        assert marked[-1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert marked[1:3] == messages[1:3]
+        assert messages[0]["content"] == "sys"  # input untouched
+
+    def test_supported_models(self):
+        assert supports_cache_control("anthropic/claude-sonnet-4")
+        assert supports_cache_control("google/gemini-2.5-pro")
+        assert not supports_cache_control("openai/gpt-4o")
+
+
+class TestUsage:
+    """Cached-token counts from the stream."""
+
+    def test_openai_style_usage(self):
+        stream = ChatStream()
+        usage = {"prompt_tokens": 900, "completion_tokens": 5, "total_tokens": 905,
+                 "prompt_tokens_details": {"cached_tokens": 800}}
+        stream.feed(b"".join(_reply({"usage": usage})))
+        assert stream.usage.cached_tokens == 800
+        assert stream.first_token_at is not None
+
+    def test_llamacpp_timings(self):
+        stream = ChatStream()
+        stream.feed(b"".join(_reply({"timings": {"prompt_n": 12, "cache_n": 480, "predicted_n": 7}})))
+        assert (stream.usage.prompt_tokens, stream.usage.cached_tokens, stream.usage.completion_tokens) == (492, 480, 7)
+
+    def test_stats(self):
+        stats = PromptCacheStats()
+
+        class U:
+            prompt_tokens, cached_tokens = 1000, 0
+
+        class C:
+            prompt_tokens, cached_tokens = 1000, 900
+
+        stats.record(U(), 0.8)
+        stats.record(C(), 0.2)
+        result = stats.get_stats()
+        assert result["cached_ratio"] == 0.45
+        assert (result["ttft_uncached_avg"], result["ttft_cached_avg"]) == (0.8, 0.2)
+
+
+class TestProviders:
+    """Request layout and hints per provider."""
+
+    @pytest.mark.asyncio
+    async def test_prefix_is_byte_stable(self, monkeypatch):
+        sent = _serve(monkeypatch, {"usage": {"prompt_tokens": 50, "prompt_tokens_details": {"cached_tokens": 40}}})
+        backend = OpenRouterBackend(api_key="test", models=["openai/gpt-4o"])
+        [e async for e in backend.send_prompt("first")]
+        [e async for e in backend.send_prompt("second")]
+        first, second = (json.dumps(body["messages"]) for body in sent)
+        assert second.startswith(first[:-1])
+        assert "cache_control" not in second
+        assert backend.get_stats()["prompt_cache"]["cached_tokens"] == 80
+
+    @pytest.mark.asyncio
+    async def test_openrouter_cache_control(self, monkeypatch):
+        sent = _serve(monkeypatch, {})
+        backend = OpenRouterBackend(api_key="test", models=["anthropic/claude-sonnet-4"])
+        [e async for e in backend.send_prompt("hi")]
+        messages = sent[0]["messages"]
+        assert messages[0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert messages[-1]["content"][0] == {"type": "text", "text": "hi", "cache_control": {"type": "ephemeral"}}
+        assert backend.conversation_history[0] == {"role": "user", "content": "hi"}
+
+    @pytest.mark.asyncio
+    async def test_llamacpp_slot(self, monkeypatch):
+        sent = _serve(
+            monkeypatch,
+            {"timings": {"prompt_n": 3, "cache_n": 97, "predicted_n": 1}},
+            props={"default_generation_settings": {"n_ctx": 8192}, "total_slots": 4},
+        )
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="m")
+        [e async for e in backend.send_prompt("one")]
+        [e async for e in backend.send_prompt("two")]
+        assert all(body["cache_prompt"] is True for body in sent)
+        assert sent[0]["id_slot"] == sent[1]["id_slot"] in range(4)
+        assert backend.get_stats()["prompt_cache"]["last_cached_tokens"] == 97
+
+    @pytest.mark.asyncio
+    async def test_no_llamacpp_fields_elsewhere(self, monkeypatch):
+        sent = _serve(monkeypatch, {})
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="m")
+        [e async for e in backend.send_prompt("one")]
+        assert "cache_prompt" not in sent[0] and "id_slot" not in sent[0]
@@ -0,0 +1,126 @@
+"""Tests for per-request latency and token accounting."""
+
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.context_window import estimate_tokens
+from llm_providers.localllm import LocalLLMBackend
+from llm_providers.request_metrics import RequestMetrics, RollingHistogram
+from llm_providers.streaming import ChatStream, Usage
+
+
+def _stream(first: float | None, last: float | None, usage: Usage | None = None, text: str = "") -> ChatStream:
+    stream = ChatStream()
+    stream.first_token_at, stream.last_token_at, stream.usage = first, last, usage
+    stream._parts = [text] if text else []
+    return stream
+
+
+class TestRollingHistogram:
+    """Tests for percentiles over the window."""
+
+    def test_percentiles(self):
+        histogram = RollingHistogram()
+        for value in range(1, 101):
+            histogram.add(value / 100)
+        stats = histogram.get_stats()
+        assert (stats["count"], stats["p50"], stats["p90"], stats["max"]) == (100, 0.51, 0.91, 1.0)
+
+    def test_window_drops_old_samples(self):
+        histogram = RollingHistogram(window=3)
+        for value in (10.0, 1.0, 2.0, 3.0, None):
+            histogram.add(value)
+        stats = histogram.get_stats()
+        assert (stats["count"], stats["max"], stats["mean"]) == (4, 3.0, 2.0)
+
+    def test_empty(self):
+        assert RollingHistogram().get_stats()["p50"] is None
+
+
+class TestRequestMetrics:
+    """Tests for recording and aggregating requests."""
+
+    def test_record_from_usage(self):
+        metrics = RequestMetrics()
+        now = time.monotonic()
+        record = metrics.record("m", now - 3.0, _stream(now - 2.5, now - 0.5, Usage(100, 41, 141, {}, 60)))
+        assert record.ttft == pytest.approx(0.5, abs=0.01)
+        assert record.itl == pytest.approx(0.05, abs=0.001)
+        assert record.tokens_per_sec == pytest.approx(20.5, abs=0.1)
+        assert record.duration == pytest.approx(3.0, abs=0.01)
+        assert (record.prompt_tokens, record.completion_tokens, record.cached_tokens, record.estimated) == (100, 41, 60, False)
+
+    def test_estimates_without_usage(self):
+        metrics = RequestMetrics()
+        now = time.monotonic()
+        record = metrics.record("m", now - 1.0, _stream(now - 0.9, now, text="one two three four"), [{"role": "user", "content": "hi"}])
+        assert record.estimated
+        assert record.completion_tokens == estimate_tokens("one two three four")
+        assert record.prompt_tokens > 0
+
+    def test_no_tokens_no_speed(self):
+        record = RequestMetrics().record("m", time.monotonic(), _stream(None, None))
+        assert (record.ttft, record.itl, record.tokens_per_sec) == (None, None, None)
+
+    def test_per_model_and_session(self):
+        metrics = RequestMetrics()
+        now = time.monotonic()
+        metrics.record("a", now - 1, _stream(now - 0.8, now, Usage(10, 5, 15, {})))
+        metrics.record("b", now - 1, _stream(now - 0.6, now, Usage(20, 5, 25, {})))
+        metrics.record_failure("b")
+        stats = metrics.get_stats()
+        assert stats["session"]["requests"] == 2 and stats["session"]["prompt_tokens"] == 30
+        assert (stats["models"]["b"]["requests"], stats["models"]["b"]["failures"]) == (1, 1)
+        assert stats["last"]["model"] == "b"
+        assert metrics.summary_lines()[0] == "Requests: 2 (1 failed)"
+
+    def test_export_json(self, tmp_path):
+        metrics = RequestMetrics()
+        metrics.record("m", time.monotonic(), _stream(None, None, Usage(3, 2, 5, {})))
+        path = metrics.export_json(tmp_path / "out" / "metrics.json")
+        assert json.loads(path.read_text())["models"]["m"]["completion_tokens"] == 2
+
+
+class TestBackendMetrics:
+    """Backends record every streamed call."""
+
+    @pytest.mark.asyncio
+    async def test_localllm_records_usage(self, monkeypatch):
+        def handler(request):
+            if request.url.path.endswith(("/models", "/props")):
+                return httpx.Response(404)
+
+            async def frames():
+                for word in ("Hello", " there", " friend"):
+                    yield b"data: " + json.dumps({"choices": [{"delta": {"content": word}}]}).encode() + b"\n\n"
+                usage = {"prompt_tokens": 50, "completion_tokens": 3, "total_tokens": 53}
+                yield b"data: " + json.dumps({"choices": [], "usage": usage}).encode() + b"\n\n"
+                yield b"data: [DONE]\n\n"
+
+            return httpx.Response(200, content=frames(), headers={"content-type": "text/event-stream"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(transport, "get_async_client", lambda: client)
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="m")
+        [e async for e in backend.send_prompt("hi")]
+
+        stats = backend.get_stats()["metrics"]
+        assert stats["models"]["m"]["prompt_tokens"] == 50
+        assert stats["last"]["ttft"] is not None and not stats["last"]["estimated"]
+
+    @pytest.mark.asyncio
+    async def test_localllm_counts_failures(self, monkeypatch):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(400, text="bad")))
+        monkeypatch.setattr(transport, "get_async_client", lambda: client)
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="m")
+        events = [e async for e in backend.send_prompt("hi")]
+        assert events[-1].type == "error"
+        assert backend.metrics.get_stats()["session"]["failures"] == 1
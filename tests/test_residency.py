@@ -0,0 +1,117 @@
+"""Tests for keeping local models resident."""
+
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.localllm import LocalLLMBackend
+from llm_providers.residency import ResidencyManager
+
+
+def _serve(monkeypatch, handler):
+    requests = []
+
+    def recorded(request):
+        body = json.loads(request.content) if request.content else None
+        requests.append((request.url.path, body))
+        return handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(recorded))
+    monkeypatch.setattr(transport, "get_async_client", lambda: client)
+    return requests
+
+
+def _ollama(request):
+    if request.url.path == "/v1/models":
+        return httpx.Response(200, json={"data": [{"id": "qwen2.5-coder:7b", "owned_by": "library"}]})
+    if request.url.path == "/api/generate":
+        return httpx.Response(200, json={"model": "qwen2.5-coder:7b", "done": True, "load_duration": 2_500_000_000})
+    return httpx.Response(404)
+
+
+class TestWarmUp:
+    """One warm-up request loads the model."""
+
+    async def test_ollama_generate_with_keep_alive(self, monkeypatch):
+        requests = _serve(monkeypatch, _ollama)
+        backend = LocalLLMBackend(base_url="http://ollama.test:11434/v1")
+        backend.residency = ResidencyManager(backend, keep_alive="1h", num_ctx=8192)
+        await backend.ready()
+        assert backend.server_type == "ollama"
+
+        assert await backend.residency.warm() == 2.5
+        assert requests[-1] == ("/api/generate", {
+            "model": "qwen2.5-coder:7b", "prompt": "", "keep_alive": "1h", "options": {"num_ctx": 8192},
+        })
+        stats = backend.get_stats()["residency"]
+        assert (stats["warmups"], stats["loads"], stats["load_seconds"], stats["keep_alive"]) == (1, 1, 2.5, "1h")
+
+    async def test_num_ctx_sets_context_length(self, monkeypatch):
+        _serve(monkeypatch, _ollama)
+        backend = LocalLLMBackend(base_url="http://ollama.test:11434/v1")
+        backend.residency = ResidencyManager(backend, num_ctx=8192)
+        await backend.ready()
+        assert backend.context_length == 8192
+
+    async def test_resident_model_is_not_a_load(self, monkeypatch):
+        _serve(monkeypatch, lambda request: httpx.Response(200, json={"done": True, "load_duration": 1_000_000}))
+        backend = LocalLLMBackend(base_url="http://ollama.test:11434/v1", model="qwen")
+        backend.server_type = "ollama"
+        await backend.residency.warm()
+        stats = backend.residency.get_stats()
+        assert (stats["warmups"], stats["loads"], stats["last_load"]) == (1, 0, 0.001)
+
+    async def test_other_servers_get_one_token(self, monkeypatch):
+        requests = _serve(monkeypatch, lambda request: httpx.Response(200, json={"choices": []}))
+        backend = LocalLLMBackend(base_url="http://lmstudio.test/v1", model="qwen")
+        await backend.residency.warm()
+        path, body = requests[-1]
+        assert path == "/v1/chat/completions"
+        assert (body["model"], body["max_tokens"], body["stream"]) == ("qwen", 1, False)
+
+    async def test_failure_is_counted(self, monkeypatch):
+        _serve(monkeypatch, lambda request: httpx.Response(500))
+        backend = LocalLLMBackend(base_url="http://lmstudio.test/v1", model="qwen")
+        assert await backend.residency.warm() is None
+        assert (backend.residency.failures, backend.residency.warmups) == (1, 0)
+
+    async def test_unknown_model_is_skipped(self, monkeypatch):
+        requests = _serve(monkeypatch, lambda request: httpx.Response(200, json={}))
+        backend = LocalLLMBackend(base_url="http://lmstudio.test/v1", model="default")
+        assert await backend.residency.warm() is None
+        assert requests == []
+
+
+class TestRewarm:
+    """Idle models are warmed again; used ones are left alone."""
+
+    async def test_rewarms_after_idle(self, monkeypatch):
+        requests = _serve(monkeypatch, _ollama)
+        backend = LocalLLMBackend(base_url="http://ollama.test:11434/v1")
+        backend.residency = ResidencyManager(backend, rewarm_after=0.05)
+        backend.residency.start()
+        await asyncio.sleep(0.2)
+        await backend.close()
+        assert sum(path == "/api/generate" for path, _ in requests) >= 2
+
+    async def test_disabled_sends_nothing(self, monkeypatch):
+        requests = _serve(monkeypatch, _ollama)
+        backend = LocalLLMBackend(base_url="http://ollama.test:11434/v1")
+        backend.residency = ResidencyManager(backend, enabled=False)
+        backend.residency.start()
+        await backend.ready()
+        await asyncio.sleep(0.05)
+        assert [path for path, _ in requests] == ["/v1/models"]
+
+    def test_inference_is_reported_apart_from_loads(self):
+        backend = LocalLLMBackend(base_url="http://lmstudio.test/v1", model="qwen")
+        backend.residency.record_request(1.25)
+        backend.residency.record_request(0.75)
+        stats = backend.residency.get_stats()
+        assert (stats["requests"], stats["inference_seconds"], stats["load_seconds"]) == (2, 2.0, 0.0)
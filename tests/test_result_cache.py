@@ -0,0 +1,172 @@
+"""Tests for the read-only tool result cache."""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import executor
+from tools.executor import run_tool
+from tools.result_cache import ResultCache, get_result_cache
+
+
+@pytest.fixture
+def workspace():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Path(tmpdir, "a.txt").write_text("alpha\n")
+        yield tmpdir
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Fresh process-wide cache, enabled."""
+    fresh = ResultCache()
+    monkeypatch.setattr("tools.result_cache._cache", fresh)
+    monkeypatch.setattr(executor, "RESULT_CACHE", True)
+    return fresh
+
+
+class TestResultCache:
+    """Tests for ResultCache."""
+
+    def test_hit_until_file_changes(self, workspace):
+        """Entries die with the fingerprint"""
+        cache = ResultCache()
+        key = cache.make_key("shell", "cat  a.txt", workspace)
+        cache.put(key, "alpha", 5)
+        assert cache.get(key) == "alpha"
+        assert cache.make_key("shell", "cat a.txt", workspace) == key
+
+        Path(workspace, "a.txt").write_text("alpha beta\n")
+        assert cache.get(key) is None
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    def test_lru_and_byte_budget(self, workspace):
+        """Least recently used entries go first"""
+        cache = ResultCache(max_entries=10, max_bytes=10)
+        keys = [cache.make_key("shell", f"ls {i}", workspace) for i in range(3)]
+        cache.put(keys[0], "x", 4)
+        cache.put(keys[1], "y", 4)
+        cache.get(keys[0])
+        cache.put(keys[2], "z", 4)
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == "x"
+        assert cache.bytes == 8
+
+    def test_ttl(self, workspace):
+        """Entries expire"""
+        cache = ResultCache(ttl=0)
+        key = cache.make_key("shell", "ls", workspace)
+        cache.put(key, "x", 1)
+        assert cache.get(key) is None
+
+    def test_stale_put_dropped(self, workspace):
+        """A result computed across an invalidation is not stored"""
+        cache = ResultCache()
+        key = cache.make_key("shell", "ls", workspace)
+        generation = cache.generation
+        cache.invalidate()
+        cache.put(key, "x", 1, generation)
+        assert cache.get(key) is None
+
+    def test_recursive_listing_sees_nested_changes(self, workspace):
+        """A file added deep in the tree invalidates find/list_files"""
+        os.makedirs(os.path.join(workspace, "pkg", "sub"))
+        cache = ResultCache()
+        find_key = cache.make_key("shell", "find .", workspace)
+        cache.put(find_key, "x", 1)
+        assert cache.get(find_key) == "x"
+        Path(workspace, "pkg", "sub", "new.py").write_text("")
+        assert cache.get(find_key) is None
+
+
+class TestExecutorCaching:
+    """Tests for caching in run_tool."""
+
+    @pytest.mark.asyncio
+    async def test_readonly_shell_cached(self, workspace, cache, monkeypatch):
+        """Second identical read-only call skips the subprocess"""
+        calls = []
+        original = executor._dispatch_tool
+
+        async def counting(*args, **kwargs):
+            calls.append(args)
+            return await original(*args, **kwargs)
+
+        monkeypatch.setattr(executor, "_dispatch_tool", counting)
+        first = await run_tool("shell", "cat a.txt", workspace)
+        second = await run_tool("shell", "cat  a.txt", workspace)
+        assert first.output == second.output == "alpha"
+        assert len(calls) == 1
+        assert cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates(self, workspace, cache):
+        """write_file and write commands clear the cache"""
+        path = os.path.join(workspace, "a.txt")
+        await run_tool("read_file", path)
+        assert cache.get_stats()["entries"] == 1
+        await run_tool("write_file", f"{path}|||changed")
+        assert cache.get_stats()["entries"] == 0
+
+        await run_tool("shell", "ls", workspace)
+        await run_tool("shell", "touch b.txt", workspace)
+        assert cache.get_stats()["entries"] == 0
+        result = await run_tool("shell", "ls", workspace)
+        assert "b.txt" in result.output
+
+    @pytest.mark.asyncio
+    async def test_failures_and_date_not_cached(self, workspace, cache):
+        """Only successful, deterministic results are stored"""
+        await run_tool("shell", "cat missing.txt", workspace)
+        await run_tool("shell", "date", workspace)
+        assert cache.get_stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_worktree_commands_not_cached(self, workspace, cache):
+        """git status and ls -l depend on file contents, so they always run"""
+        assert executor._cache_name("shell", "git status --short") is None
+        assert executor._cache_name("shell", "git diff") is None
+        assert executor._cache_name("shell", "ls -la") is None
+        assert executor._cache_name("shell", "ls -a src") == "shell"
+        await run_tool("shell", "ls -l", workspace)
+        assert cache.get_stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_read_alias(self, workspace, cache):
+        """read is served as read_file and shares its cache entries"""
+        path = os.path.join(workspace, "a.txt")
+        first = await run_tool("read", path)
+        second = await run_tool("read_file", path)
+        assert first.success and "alpha" in first.output
+        assert second.output == first.output
+        assert cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_streamed_shell_cached(self, workspace, cache):
+        """A streamed read-only command is stored and then served whole"""
+        first = [e async for e in executor.execute_tool("shell", "cat a.txt", workspace, stream=True)]
+        second = [e async for e in executor.execute_tool("shell", "cat a.txt", workspace, stream=True)]
+        assert any(e.get("partial") for e in first)
+        assert not any(e.get("partial") for e in second)
+        assert [e["content"] for e in second if e["type"] == "tool_output"] == ["alpha"]
+        assert cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, workspace, cache, monkeypatch):
+        """AGENTZERO_RESULT_CACHE=false bypasses the cache"""
+        monkeypatch.setattr(executor, "RESULT_CACHE", False)
+        await run_tool("shell", "ls", workspace)
+        assert cache.get_stats()["entries"] == 0
+
+    def test_backend_stats(self, cache):
+        """Counters show up in get_stats()"""
+        from llm_providers.local import LocalBackend
+
+        assert LocalBackend().get_stats()["tool_cache"]["hits"] == 0
+        assert get_result_cache() is cache
@@ -0,0 +1,183 @@
+"""Tests for retries, backoff and the shared rate limiter."""
+
+import json
+import multiprocessing
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.localllm import LocalLLMBackend
+from llm_providers.openrouter import OpenRouterBackend
+from llm_providers.retry import (
+    RateLimiter,
+    RetryPolicy,
+    is_retryable,
+    parse_retry_after,
+    request_with_retry,
+    retrying_stream,
+)
+
+
+def _ok_stream(text: str) -> httpx.Response:
+    async def frames():
+        yield b"data: " + json.dumps({"choices": [{"delta": {"content": text}}]}).encode() + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    return httpx.Response(200, content=frames(), headers={"content-type": "text/event-stream"})
+
+
+def _serve(monkeypatch, responses: list) -> list:
+    """Answer chat requests with responses in order (status, exception or text)."""
+    asked = []
+
+    def handler(request):
+        if request.url.path.endswith(("/models", "/props")):
+            return httpx.Response(404)
+        asked.append(json.loads(request.content).get("model"))
+        reply = responses.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        if isinstance(reply, int):
+            return httpx.Response(reply, text="busy", headers={"retry-after": "0"})
+        return _ok_stream(reply)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(transport, "get_async_client", lambda: client)
+    return asked
+
+
+def _take(directory: str, count: int) -> None:
+    limiter = RateLimiter("shared", per_minute=60, burst=5, directory=directory)
+    for _ in range(count):
+        limiter.reserve()
+
+
+class TestRetryPolicy:
+    """Tests for the backoff schedule."""
+
+    def test_backoff_grows_with_jitter(self):
+        policy = RetryPolicy(attempts=3, base=1.0, max_delay=30)
+        delays = [policy.delay(retry) for retry in (1, 2, 3)]
+        assert 0.5 <= delays[0] <= 1.0 and 1.0 <= delays[1] <= 2.0 and 2.0 <= delays[2] <= 4.0
+        assert policy.delay(4) is None
+        assert policy.get_stats() == {"attempts": 3, "retries": 3, "gave_up": 1}
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_delay=10)
+        assert policy.delay(1, retry_after=4.0) == 4.0
+        assert policy.delay(1, retry_after=60.0) is None
+        assert parse_retry_after("7") == 7.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("soon") is None
+
+    def test_retryable(self):
+        assert is_retryable(429) and is_retryable("503")
+        assert not is_retryable(400) and not is_retryable(None)
+        assert is_retryable(error=httpx.ConnectError("down"))
+        assert not is_retryable(error=ValueError())
+
+
+class TestRateLimiter:
+    """Tests for the token bucket."""
+
+    def test_burst_then_wait(self, tmp_path):
+        limiter = RateLimiter("api", per_minute=60, burst=2, directory=tmp_path)
+        assert limiter.reserve() == 0.0
+        assert limiter.reserve() == 0.0
+        assert limiter.reserve() == pytest.approx(1.0, abs=0.05)
+        assert limiter.reserve() == pytest.approx(2.0, abs=0.05)
+
+    def test_has_token(self, tmp_path):
+        limiter = RateLimiter("api", per_minute=60, burst=1, directory=tmp_path)
+        assert limiter.has_token()
+        limiter.reserve()
+        assert not limiter.has_token()
+
+    def test_shared_between_limiters(self, tmp_path):
+        first = RateLimiter("api", per_minute=60, burst=1, directory=tmp_path)
+        second = RateLimiter("api", per_minute=60, burst=1, directory=tmp_path)
+        assert first.reserve() == 0.0
+        assert second.reserve() > 0.9
+
+    def test_shared_between_processes(self, tmp_path):
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=_take, args=(str(tmp_path), 5)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+        limiter = RateLimiter("shared", per_minute=60, burst=5, directory=tmp_path)
+        # 10 reservations against a burst of 5: about 5 seconds of backlog
+        assert limiter.reserve() == pytest.approx(6.0, abs=0.5)
+
+
+class TestRetryingCalls:
+    """Tests for the retry helpers."""
+
+    @pytest.mark.asyncio
+    async def test_retrying_stream(self):
+        statuses = [503, 429, 200]
+
+        def handler(request):
+            return httpx.Response(statuses.pop(0), headers={"retry-after": "0"})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            policy = RetryPolicy()
+            async with retrying_stream(client, "GET", "http://api.test/", policy) as response:
+                assert response.status_code == 200
+            assert policy.retries == 2
+
+    @pytest.mark.asyncio
+    async def test_request_with_retry_gives_up(self):
+        calls = []
+
+        async def send():
+            calls.append(1)
+            return httpx.Response(502)
+
+        policy = RetryPolicy(attempts=2, base=0.01)
+        response = await request_with_retry(send, policy)
+        assert response.status_code == 502 and len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_openrouter_retries_after_all_models_fail(self, monkeypatch):
+        asked = _serve(monkeypatch, [429, "hello"])
+        backend = OpenRouterBackend(api_key="test", models=["only"])
+        events = [e async for e in backend.send_prompt("hi")]
+        assert asked == ["only", "only"]
+        assert any("retrying" in e.content for e in events if e.type == "status")
+        assert events[-1].type == "final_response" and events[-1].content == "hello"
+
+    @pytest.mark.asyncio
+    async def test_openrouter_limits_free_models_only(self, monkeypatch, tmp_path):
+        asked = _serve(monkeypatch, ["paid", "free"])
+        backend = OpenRouterBackend(api_key="test", models=["vendor/paid", "vendor/model:free"])
+        backend.limiter = RateLimiter("openrouter", per_minute=60, burst=2, directory=tmp_path)
+        backend.current_model_index = 0
+        [e async for e in backend.send_prompt("hi")]
+        [e async for e in backend.send_prompt("again")]
+        assert sorted(asked) == ["vendor/model:free", "vendor/paid"]
+        # Only the :free request took a token
+        assert backend.limiter.reserve() == 0.0
+        assert backend.limiter.reserve() > 0.9
+
+    @pytest.mark.asyncio
+    async def test_localllm_retries_while_loading(self, monkeypatch):
+        _serve(monkeypatch, [503, httpx.ConnectError("refused"), "ready"])
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="m")
+        backend.retry = RetryPolicy(base=0.01)
+        events = [e async for e in backend.send_prompt("hi")]
+        assert events[-1].content == "ready"
+        assert backend.get_stats()["retry"]["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_no_retry_for_client_errors(self, monkeypatch):
+        asked = _serve(monkeypatch, [400, "never"])
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="m")
+        events = [e async for e in backend.send_prompt("hi")]
+        assert events[-1].type == "error" and len(asked) == 1
@@ -0,0 +1,168 @@
+"""Tests for risk explanation prefetch and the on-disk LRU cache."""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.disk_cache import DiskLRUCache
+from llm_providers.endpoint_pool import EndpointPool
+from llm_providers.openrouter import OpenRouterBackend
+from llm_providers.risk_explainer import RiskExplainer, normalize_command
+
+
+class StreamingBackend:
+    """Backend whose explanation arrives in chunks when released."""
+
+    model = "test/model"
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def explain_risk_stream(self, command):
+        self.calls += 1
+        for chunk in self.chunks:
+            await self.release.wait()
+            yield chunk
+
+
+class PlainBackend:
+    model = "plain"
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    async def explain_risk(self, command):
+        self.calls += 1
+        return self.reply
+
+
+class TestDiskLRUCache:
+    """Tests for DiskLRUCache."""
+
+    def test_persists(self, tmp_path):
+        DiskLRUCache(tmp_path / "c.json").put("k", "v")
+        assert DiskLRUCache(tmp_path / "c.json").get("k") == "v"
+
+    def test_ttl(self, tmp_path):
+        cache = DiskLRUCache(tmp_path / "c.json", ttl=10)
+        cache.put("k", "v")
+        cache._entries["k"]["created"] = time.time() - 11
+        assert cache.get("k") is None
+        assert cache.get_stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = DiskLRUCache(tmp_path / "c.json", max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache._entries["a"]["used"] = time.time() + 1  # a used most recently
+        cache.put("c", 3)
+        assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_merges_other_writers(self, tmp_path):
+        first = DiskLRUCache(tmp_path / "c.json")
+        second = DiskLRUCache(tmp_path / "c.json")
+        first.put("a", 1)
+        second.put("b", 2)
+        assert DiskLRUCache(tmp_path / "c.json").get("a") == 1
+        assert second.get("a") == 1
+
+
+class TestRiskExplainer:
+    """Tests for prefetching and streaming explanations."""
+
+    def test_normalize_command(self):
+        assert normalize_command("ls   -la  'a b'") == normalize_command('ls -la "a b"')
+        assert normalize_command("echo 'unclosed") == "echo 'unclosed"
+
+    @pytest.mark.asyncio
+    async def test_prefetch_streams_and_caches(self, tmp_path):
+        backend = StreamingBackend(["Deletes ", "files. ", "Risk: HIGH"])
+        explainer = RiskExplainer(backend, DiskLRUCache(tmp_path / "r.json"))
+        explainer.prefetch("rm -rf build")
+        explainer.prefetch("rm  -rf build")  # same command, already in flight
+        backend.release.set()
+        snapshots = [text async for text in explainer.stream("rm -rf build")]
+        assert snapshots[-1] == "Deletes files. Risk: HIGH"
+        assert all(b.startswith(a) for a, b in zip(snapshots, snapshots[1:]))
+        assert backend.calls == 1
+
+        again = RiskExplainer(backend, DiskLRUCache(tmp_path / "r.json"))
+        assert [text async for text in again.stream("rm -rf  build")] == ["Deletes files. Risk: HIGH"]
+        again.prefetch("rm -rf build")
+        assert backend.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_no_prefetch_on_single_slot_server(self, tmp_path):
+        backend = PlainBackend("ok")
+        backend.base_url = "http://one-slot.test/v1"
+        backend.pool = EndpointPool([backend.base_url], capacity=1)
+        explainer = RiskExplainer(backend, DiskLRUCache(tmp_path / "r.json"))
+        explainer.prefetch("rm -rf build")
+        assert explainer.prefetches == 0
+        # Asking still works
+        assert await explainer.explain("rm -rf build") == "ok"
+
+    @pytest.mark.asyncio
+    async def test_reader_sees_text_before_done(self, tmp_path):
+        rest = asyncio.Event()
+
+        class Backend:
+            model = "m"
+
+            async def explain_risk_stream(self, command):
+                yield "first"
+                await rest.wait()
+                yield " second"
+
+        explainer = RiskExplainer(Backend(), DiskLRUCache(tmp_path / "r.json"))
+        stream = explainer.stream("ls")
+        assert await stream.__anext__() == "first"
+        assert explainer.cached("ls") is None
+        rest.set()
+        assert [text async for text in stream] == ["first second"]
+        assert explainer.cached("ls") == "first second"
+
+    @pytest.mark.asyncio
+    async def test_errors_not_cached(self, tmp_path):
+        backend = PlainBackend("Could not analyze risk: API error 500")
+        explainer = RiskExplainer(backend, DiskLRUCache(tmp_path / "r.json"))
+        assert (await explainer.explain("ls")).startswith("Could not analyze")
+        await explainer.explain("ls")
+        assert backend.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_key_includes_model(self, tmp_path):
+        cache = DiskLRUCache(tmp_path / "r.json")
+        first, second = PlainBackend("one"), PlainBackend("two")
+        second.model = "other"
+        assert await RiskExplainer(first, cache).explain("ls") == "one"
+        assert await RiskExplainer(second, cache).explain("ls") == "two"
+
+    @pytest.mark.asyncio
+    async def test_openrouter_stream(self, monkeypatch):
+        async def frames():
+            for text in ("Lists ", "files."):
+                yield b"data: " + json.dumps({"choices": [{"delta": {"content": text}}]}).encode() + b"\n\n"
+            yield b"data: [DONE]\n\n"
+
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(200, content=frames(), headers={"content-type": "text/event-stream"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(transport, "get_async_client", lambda: client)
+        backend = OpenRouterBackend(api_key="test", models=["openai/gpt-4o"])
+        assert "".join([c async for c in backend.explain_risk_stream("ls")]) == "Lists files."
+        assert await backend.explain_risk("ls") == "Lists files."
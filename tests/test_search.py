@@ -0,0 +1,211 @@
+"""Tests for the built-in code search."""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools import search as search_module
+from tools.executor import execute_tool, search_text
+from tools.search import SearchQuery, UnsupportedOption, parse_query, required_literal, search
+
+
+@pytest.fixture
+def project():
+    """Tree with sources, an ignored dir and a binary file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "src").mkdir()
+        (root / "src" / "app.py").write_text("import os\n\ndef main():\n    return run()\n")
+        (root / "src" / "util.py").write_text("def run():\n    return 42\n")
+        (root / "notes.md").write_text("TODO: write main docs\n")
+        (root / "node_modules").mkdir()
+        (root / "node_modules" / "lib.js").write_text("function main() {}\n")
+        (root / "blob.bin").write_bytes(b"def main\x00\x01")
+        yield str(root)
+
+
+class TestRequiredLiteral:
+    """Tests for the prefilter literal extraction."""
+
+    def test_plain_text(self):
+        assert required_literal("def main") == "def main"
+
+    def test_longest_run(self):
+        assert required_literal(r"def \w+_handler\(") == "_handler("
+
+    def test_optional_char_dropped(self):
+        assert required_literal("colou?r") == "colo"
+
+    def test_alternation_disables(self):
+        assert required_literal("foo|bar") is None
+
+    def test_group_contents_ignored(self):
+        assert required_literal("(abc)?xyz") == "xyz"
+
+
+class TestSearch:
+    """Tests for search()."""
+
+    def test_finds_matches_in_walk_order(self, project):
+        """Reports path and line number"""
+        found = [(m.path, m.line_number) for m in search(SearchQuery("main"), cwd=project)]
+        assert found == [("notes.md", 1), ("src/app.py", 3)]
+
+    def test_paths_include_search_path(self, project):
+        """Paths start with the searched directory, like rg"""
+        found = [m.path for m in search(SearchQuery("return", "src"), cwd=project)]
+        assert found == ["src/app.py", "src/util.py"]
+
+    def test_skips_binaries_and_ignored_dirs(self, project):
+        """Binary and node_modules files are not searched"""
+        paths = {m.path for m in search(SearchQuery("main"), cwd=project)}
+        assert "blob.bin" not in paths
+        assert not any(p.startswith("node_modules") for p in paths)
+
+    def test_context_lines(self, project):
+        """Returns surrounding lines"""
+        match = next(search(SearchQuery("def main", project, context=1)))
+        assert match.before == [(2, "")]
+        assert match.after == [(4, "    return run()")]
+
+    def test_ignore_case_and_regex(self, project):
+        """Regex with ignore case"""
+        found = list(search(SearchQuery(r"todo:\s+\w+", project, ignore_case=True)))
+        assert len(found) == 1
+
+    def test_inline_ignore_case(self, project):
+        """(?i) in the pattern is not defeated by the prefilter"""
+        found = [m.path for m in search(SearchQuery("(?i)TODO: WRITE"), cwd=project)]
+        assert found == ["notes.md"]
+
+    def test_prefilter_line_numbers_and_context(self, project):
+        """Lines around literal hits are numbered and cut like a full scan"""
+        lines = [f"line {n}" for n in range(1, 5001)]
+        for n in (1, 2500, 5000):
+            lines[n - 1] += " needle"
+        Path(project, "big.txt").write_text("\n".join(lines) + "\n")
+        found = list(search(SearchQuery("needle", "big.txt", context=1), cwd=project))
+        assert [m.line_number for m in found] == [1, 2500, 5000]
+        assert found[0].before == [] and found[0].after == [(2, "line 2")]
+        assert found[1].before == [(2499, "line 2499")] and found[1].after == [(2501, "line 2501")]
+        assert found[2].after == [(5001, "")]
+
+    def test_max_matches(self, project):
+        """Stops at the match cap"""
+        found = list(search(SearchQuery("return", project, max_matches=1)))
+        assert len(found) == 1
+
+    def test_process_pool(self, project, monkeypatch):
+        """Pool results equal in-process results"""
+        monkeypatch.setattr(search_module, "PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr(search_module, "BATCH_SIZE", 1)
+        serial = [(m.path, m.line_number) for m in search(SearchQuery("return", project), workers=1)]
+        parallel = [(m.path, m.line_number) for m in search(SearchQuery("return", project), workers=2)]
+        assert serial == parallel
+        assert len(serial) == 2
+
+
+class TestParseQuery:
+    """Tests for rg-style argument parsing."""
+
+    def test_flags_and_path(self):
+        query = parse_query("rg -i -C 2 -g '*.py' 'def main' src")
+        assert query.ignore_case
+        assert query.context == 2
+        assert query.globs == ["*.py"]
+        assert query.pattern == "def main"
+        assert query.path == "src"
+
+    def test_missing_pattern(self):
+        with pytest.raises(ValueError):
+            parse_query("rg -i")
+
+    def test_context_and_attached_values(self):
+        query = parse_query("rg -A 2 -B1 --max-count=5 foo")
+        assert (query.after, query.before, query.max_matches) == (2, 1, 5)
+        assert query.pattern == "foo"
+        assert query.path == "."
+
+    def test_boolean_flags(self):
+        query = parse_query("rg -lnw -F 'a.b' src")
+        assert query.files_only and query.word and query.fixed
+        assert (query.pattern, query.path) == ("a.b", "src")
+
+    def test_multiple_patterns(self):
+        query = parse_query("rg -e foo -e 'ba+r' lib")
+        assert query.pattern == "(?:foo)|(?:ba+r)"
+        assert query.path == "lib"
+
+    def test_type_filter(self):
+        query = parse_query("rg --type py -T md main")
+        assert "*.py" in query.type_globs
+        assert "!*.md" in query.globs
+
+    def test_smart_case(self):
+        assert parse_query("rg -S todo").ignore_case
+        assert not parse_query("rg -S Todo").ignore_case
+
+    def test_unknown_option(self):
+        with pytest.raises(UnsupportedOption):
+            parse_query("rg --multiline foo")
+
+
+class TestSearchTool:
+    """Tests for the executor entry points."""
+
+    @pytest.mark.asyncio
+    async def test_search_text_output(self, project):
+        """grep-style output relative to cwd"""
+        result = await search_text("-g '*.py' 'return'", cwd=project)
+        assert result.success
+        assert "src/app.py:4:    return run()" in result.output
+        assert "src/util.py:2:    return 42" in result.output
+
+    @pytest.mark.asyncio
+    async def test_after_context_with_path(self, project):
+        """rg -A 2 foo src works and keeps the src/ prefix"""
+        result = await search_text("rg -A 1 'def run' src", cwd=project)
+        assert result.success
+        assert "src/util.py:1:def run():" in result.output
+        assert "src/util.py-2-    return 42" in result.output
+
+    @pytest.mark.asyncio
+    async def test_files_with_matches(self, project):
+        """-l lists each file once"""
+        result = await search_text("rg -l return", cwd=project)
+        assert result.output.splitlines() == ["src/app.py", "src/util.py"]
+
+    @pytest.mark.asyncio
+    async def test_type_filter_output(self, project):
+        """--type py skips markdown"""
+        result = await search_text("rg -t py main", cwd=project)
+        assert "src/app.py:3:" in result.output
+        assert "notes.md" not in result.output
+
+    @pytest.mark.asyncio
+    async def test_unsupported_option_never_runs_preprocessor(self, project):
+        """Shell fallback refuses --pre"""
+        result = await search_text("rg --pre ./evil.sh --multiline main", cwd=project)
+        assert not result.success
+        assert "unsupported option" in result.error
+
+    @pytest.mark.asyncio
+    async def test_invalid_pattern(self, project):
+        """Bad regex is reported"""
+        result = await search_text("'(unclosed'", cwd=project)
+        assert not result.success
+        assert "invalid pattern" in result.error.lower()
+
+    @pytest.mark.asyncio
+    async def test_rg_tool_is_native(self, project):
+        """rg tool name no longer falls through to the shell"""
+        outputs = []
+        async for event in execute_tool("rg", "'def run'", cwd=project):
+            if event["type"] == "tool_output":
+                outputs.append(event["content"])
+        assert "src/util.py:1:def run():" in outputs[0]
@@ -0,0 +1,135 @@
+"""Tests for persistent shell sessions."""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.shell_session import ShellSession, ShellSessionPool
+
+
+class TestShellSession:
+    """Tests for a single persistent shell."""
+
+    @pytest.mark.asyncio
+    async def test_keeps_state_between_commands(self):
+        """cd and exports survive between calls"""
+        session = ShellSession()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            await session.run(f"cd {tmpdir} && export AZ_TEST_VAR=hello")
+            result = await session.run("pwd; echo $AZ_TEST_VAR")
+            assert result.success
+            assert tmpdir in result.output
+            assert "hello" in result.output
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_exit_code_and_stderr(self):
+        """Captures exit code and stderr per command"""
+        session = ShellSession()
+        result = await session.run("echo out; echo err >&2; false")
+        assert not result.success
+        assert result.return_code == 1
+        assert result.output == "out"
+        assert result.error == "err"
+
+        result = await session.run("printf 'no newline'")
+        assert result.success
+        assert result.output == "no newline"
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_timeout_restarts_session(self):
+        """Timed out command kills the shell, next command still works"""
+        session = ShellSession()
+        result = await session.run("echo before; sleep 10", timeout=1)
+        assert not result.success
+        assert "timed out" in result.error.lower()
+        assert "before" in result.output
+
+        result = await session.run("echo after")
+        assert result.success
+        assert result.output == "after"
+        assert session.restarts == 1
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_recovers_from_exit(self):
+        """Shell exiting mid-command is reported and restarted"""
+        session = ShellSession()
+        result = await session.run("exit 3")
+        assert not result.success
+        assert result.return_code == 3
+
+        result = await session.run("echo alive")
+        assert result.success
+        assert result.output == "alive"
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_closed_stdout_does_not_hang(self):
+        """A shell that closes its stdout but keeps running is killed"""
+        session = ShellSession()
+        result = await asyncio.wait_for(session.run("exec >&-"), 10)
+        assert not result.success
+        assert not session.alive
+        assert (await session.run("echo alive")).output == "alive"
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_quotes_are_preserved(self):
+        """Commands with quotes are passed through unchanged"""
+        session = ShellSession()
+        result = await session.run("""echo "a 'b' c" """)
+        assert result.output == "a 'b' c"
+        await session.close()
+
+
+class TestShellSessionPool:
+    """Tests for the session pool."""
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_isolated(self):
+        """Each key gets its own shell"""
+        pool = ShellSessionPool()
+        await pool.run("export AZ_KEY=one", key="a")
+        await pool.run("export AZ_KEY=two", key="b")
+        assert (await pool.run("echo $AZ_KEY", key="a")).output == "one"
+        assert (await pool.run("echo $AZ_KEY", key="b")).output == "two"
+        await pool.close_all()
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self):
+        """Oldest session is closed past max_sessions"""
+        pool = ShellSessionPool(max_sessions=2)
+        await pool.run("true", key="a")
+        await pool.run("true", key="b")
+        await pool.run("true", key="c")
+        assert list(pool.sessions) == ["b", "c"]
+        await pool.close_all()
+
+    @pytest.mark.asyncio
+    async def test_skips_busy_sessions(self):
+        """A session running a command is not evicted"""
+        pool = ShellSessionPool(max_sessions=2)
+        await pool.run("true", key="b")
+        running = asyncio.ensure_future(pool.run("sleep 0.3; echo done", key="a"))
+        await asyncio.sleep(0.1)
+        pool.sessions.move_to_end("b")
+        await pool.run("true", key="c")
+        assert list(pool.sessions) == ["a", "c"]
+        assert (await running).output == "done"
+        await pool.close_all()
+
+    @pytest.mark.asyncio
+    async def test_blocks_dangerous_commands(self):
+        """Security check still applies"""
+        pool = ShellSessionPool()
+        result = await pool.run("rm -rf /")
+        assert not result.success
+        assert "blocked" in result.error.lower()
+        assert not pool.sessions
@@ -0,0 +1,106 @@
+"""Tests for the tool output spool and read_output."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.executor import OutputBuffer, execute_shell, execute_tool
+from tools.spool import OutputSpool, clip
+
+
+@pytest.fixture
+def spool(monkeypatch, tmp_path):
+    """Fresh process-wide spool under tmp_path."""
+    fresh = OutputSpool(directory=str(tmp_path))
+    monkeypatch.setattr("tools.spool._spool", fresh)
+    yield fresh
+    fresh.cleanup()
+
+
+class TestOutputSpool:
+    """Tests for OutputSpool."""
+
+    def test_write_and_read_lines(self, spool):
+        """Pages are addressed by line offset and limit"""
+        writer = spool.open("seq 1 100")
+        writer.write("".join(f"{i}\n" for i in range(1, 101)))
+        writer.close()
+        chunk = spool.read(writer.handle, offset=10, limit=5)
+        assert chunk.content == "11\n12\n13\n14\n15"
+        assert chunk.total_lines == 100
+        assert spool.get(writer.handle).size == len("".join(f"{i}\n" for i in range(1, 101)))
+
+    def test_evicts_oldest_finished_output(self, spool):
+        """Keeps total spool size under max_bytes"""
+        spool.max_bytes = 150
+        first = spool.open("a")
+        first.write("x" * 100)
+        first.close()
+        second = spool.open("b")
+        second.write("y" * 100)
+        second.close()
+        assert spool.get(first.handle) is None
+        assert not os.path.exists(os.path.join(spool.directory, f"{first.handle}.log"))
+        assert spool.get(second.handle) is not None
+        assert spool.get_stats()["evictions"] == 1
+        with pytest.raises(KeyError):
+            spool.read(first.handle)
+
+    def test_clip_points_at_pager(self):
+        """Display clipping keeps head and tail and names the handle"""
+        text = "a" * 50 + "b" * 50
+        clipped = clip(text, 20, "out-7")
+        assert clipped.startswith("a" * 10)
+        assert clipped.endswith("b" * 10)
+        assert "/output out-7" in clipped
+        assert clip("short", 20) == "short"
+
+
+class TestSpilling:
+    """OutputBuffer and tool results spill to the spool."""
+
+    def test_buffer_spills_only_on_overflow(self, spool):
+        """Short output never touches disk; long output is kept in full"""
+        short = OutputBuffer(max_chars=20, spool_label="echo")
+        short.write("hello")
+        short.close()
+        assert short.handle == ""
+        assert spool.directory is None
+
+        buf = OutputBuffer(max_chars=20, spool_label="seq")
+        for i in range(100):
+            buf.write(f"{i:03d}\n")
+        buf.close()
+        assert buf.handle
+        assert f"read_output {buf.handle}" in buf.getvalue()
+        chunk = spool.read(buf.handle, 0, 1000)
+        assert chunk.content.split("\n") == [f"{i:03d}" for i in range(100)]
+
+    @pytest.mark.asyncio
+    async def test_shell_output_handle(self, spool):
+        """Truncated shell output can be paged with read_output"""
+        result = await execute_shell("seq 1 20000")
+        assert result.success
+        assert result.output_handle
+        assert "chars truncated" in result.output
+
+        events = [e async for e in execute_tool("read_output", f"{result.output_handle} 9999 3")]
+        outputs = [e for e in events if e["type"] == "tool_output"]
+        assert outputs[0]["content"].startswith("10000\n10001\n10002")
+        assert f"read_output {result.output_handle} 10002 3" in outputs[0]["content"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_handle(self, spool):
+        """Unknown handles are reported, not raised"""
+        events = [e async for e in execute_tool("read_output", "out-999")]
+        assert any("Unknown or expired output handle" in e["content"] for e in events)
+
+    @pytest.mark.asyncio
+    async def test_events_carry_handle(self, spool):
+        """tool_output events name the handle for frontends"""
+        events = [e async for e in execute_tool("shell", "seq 1 20000")]
+        outputs = [e for e in events if e["type"] == "tool_output"]
+        assert outputs and outputs[0]["handle"].startswith("out-")
@@ -0,0 +1,157 @@
+"""Tests for the incremental tool-tag parser."""
+
+import asyncio
+import json
+import os
+import random
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.localllm import LocalLLMBackend
+from llm_providers.openrouter import OpenRouterBackend
+from llm_providers.tool_tags import ToolTag, ToolTagParser, format_tool_tag, parse_tool_tags
+
+
+def _feed_split(text: str, rng: random.Random) -> list:
+    parser = ToolTagParser()
+    items, pos = [], 0
+    while pos < len(text):
+        size = rng.choice([1, 1, 2, 5, 17, 200])
+        items += parser.feed(text[pos:pos + size])
+        pos += size
+    items += parser.close()
+    return items
+
+
+class TestToolTagParser:
+    """Tests for ToolTagParser."""
+
+    def test_any_split_gives_same_result(self):
+        """Tags and prose survive every chunk boundary"""
+        text = (
+            'Checking. <tool name="shell" command="ls -la" reason="look"/> then '
+            '<tool name="read_file" command="a.py:1-20" reason="read"/> a < b <toolbox> done'
+        )
+        for seed in range(100):
+            items = _feed_split(text, random.Random(seed))
+            tags = [i for i in items if isinstance(i, ToolTag)]
+            prose = "".join(i for i in items if isinstance(i, str))
+            assert [(t.name, t.command) for t in tags] == [("shell", "ls -la"), ("read_file", "a.py:1-20")]
+            assert prose == "Checking.  then  a < b <toolbox> done", seed
+
+    def test_emits_when_tag_closes(self):
+        """A tag is returned by the feed that closes it, not later"""
+        parser = ToolTagParser()
+        assert parser.feed('Sure <tool name="shell" command="pwd"') == ["Sure "]
+        items = parser.feed(' reason="x"/> and more')
+        assert isinstance(items[0], ToolTag) and items[0].command == "pwd"
+        assert items[1:] == [" and more"]
+
+    def test_quotes_inside_values(self):
+        """Unescaped, escaped and entity quotes in commands"""
+        cases = {
+            '<tool name="shell" command="grep "foo bar" src" reason="find"/>': 'grep "foo bar" src',
+            '<tool name="shell" command="echo \\"hi\\" \\\\n" reason="x"/>': 'echo "hi" \\n',
+            '<tool name="shell" command="echo &quot;a&amp;b&quot;"/>': 'echo "a&b"',
+            "<tool name='shell' command='echo \"it works\"' reason='x'/>": 'echo "it works"',
+            '<tool reason="r" command="python -c \'print(1>0)\'" name="shell"/>': "python -c 'print(1>0)'",
+        }
+        for text, command in cases.items():
+            for seed in range(20):
+                tags = [i for i in _feed_split(text, random.Random(seed)) if isinstance(i, ToolTag)]
+                assert [t.command for t in tags] == [command], (text, seed)
+
+    def test_body_form_and_unknown_attrs(self):
+        """<tool name=...>body</tool> and extra attributes"""
+        prose, tags = parse_tool_tags('<tool name="shell" timeout=5>\n  make test\n</tool>ok')
+        assert prose == "ok"
+        assert (tags[0].name, tags[0].command, tags[0].attrs["timeout"]) == ("shell", "make test", "5")
+
+    def test_format_round_trip(self):
+        """format_tool_tag output parses back to the same values"""
+        for command in ['echo "a\\" b', "x\\", "a&quot;", 'f|||one\ntwo "q" <tool>']:
+            prose, tags = parse_tool_tags("x" + format_tool_tag("shell", command, 'why "so"') + "y")
+            assert (prose, tags[0].command, tags[0].reason) == ("xy", command, 'why "so"')
+
+    def test_unterminated_is_text(self):
+        """A tag cut off by the end of the stream is kept as prose"""
+        prose, tags = parse_tool_tags('text <tool name="shell" command="ls')
+        assert tags == []
+        assert prose == 'text <tool name="shell" command="ls'
+
+
+class TestProviderStreaming:
+    """Providers emit tool requests before the stream finishes."""
+
+    @pytest.fixture
+    def gated_server(self, monkeypatch):
+        """Streams two tags, then waits on a gate before [DONE]."""
+        gate = asyncio.Event()
+        tokens = ['Let me look. <tool name="shell" com', 'mand="ls \\"a b\\"" reason="x"/>',
+                  '<tool name="read_file" command="a.py" reason="y"/>']
+
+        async def pieces():
+            for token in tokens:
+                chunk = {"choices": [{"delta": {"content": token}}]}
+                yield b"data: " + json.dumps(chunk).encode() + b"\n\n"
+            await gate.wait()
+            yield b'data: {"choices": [{"delta": {"content": " Done."}}]}\n\ndata: [DONE]\n\n'
+
+        def handler(request):
+            if request.url.path.endswith("/models"):
+                return httpx.Response(404)
+            return httpx.Response(200, content=pieces(), headers={"content-type": "text/event-stream"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(transport, "get_async_client", lambda: client)
+        return gate
+
+    async def _collect(self, backend, gate):
+        requests, events = [], []
+        async for event in backend.send_prompt("hi"):
+            events.append(event)
+            if event.type in ("tool_request", "tool_batch"):
+                requests += [call["command"] for call in event.calls] if event.calls else [event.content]
+                if len(requests) == 2:
+                    # Both calls arrived while the server is still streaming
+                    assert not gate.is_set()
+                    gate.set()
+                    # A tool run now is answered after the reply that asked for it
+                    [e async for e in backend.execute_tool("shell", "echo hi")]
+        return requests, events
+
+    @pytest.mark.asyncio
+    async def test_openrouter(self, gated_server):
+        backend = OpenRouterBackend(api_key="test", models=["m"])
+        requests, events = await self._collect(backend, gated_server)
+        assert requests == ['ls "a b"', "a.py"]
+        assert events[-1].content == "Let me look.  Done."
+        assert "<tool" not in "".join(e.content for e in events if e.type == "thought")
+        assert [m["role"] for m in backend.conversation_history] == ["user", "assistant", "user"]
+        assert "echo hi" in backend.conversation_history[-1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_localllm(self, gated_server):
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="m")
+        requests, events = await self._collect(backend, gated_server)
+        assert requests == ['ls "a b"', "a.py"]
+        assert events[-1].type == "final_response"
+        assert backend.conversation_history[-2]["content"].count("<tool") == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_closes_during_approval(self, gated_server):
+        """The reply is read to the end while the user decides"""
+        backend = LocalLLMBackend(base_url="http://local.test/v1", model="m")
+        outstanding = []
+        async for event in backend.send_prompt("hi"):
+            if event.type in ("tool_request", "tool_batch"):
+                gated_server.set()
+                await asyncio.sleep(0.05)
+                outstanding.append(backend.pool[backend.base_url].outstanding)
+                assert backend.metrics.session.requests == 1
+        assert outstanding and set(outstanding) == {0}
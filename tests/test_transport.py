@@ -0,0 +1,150 @@
+"""Tests for the shared HTTP transport."""
+
+import os
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_providers import transport
+from llm_providers.localllm import LocalLLMBackend
+from llm_providers.transport import AsyncCachingBackend, DNSCache
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        body = b'{"data": [{"id": "test-model"}]}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.connections = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class _StubBackend:
+    def __init__(self):
+        self.hosts = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.hosts.append(host)
+        return object()
+
+
+class TestDNSCache:
+    """Tests for the caching network backend."""
+
+    @pytest.mark.asyncio
+    async def test_resolves_once(self, monkeypatch):
+        """Second connect to the same host skips getaddrinfo"""
+        lookups = []
+
+        async def fake_getaddrinfo(host, port, **kwargs):
+            lookups.append(host)
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.7", port))]
+
+        monkeypatch.setattr(transport.anyio, "getaddrinfo", fake_getaddrinfo)
+        stub = _StubBackend()
+        backend = AsyncCachingBackend(stub, DNSCache(ttl=60))
+        await backend.connect_tcp("api.example.com", 443)
+        await backend.connect_tcp("api.example.com", 443)
+        assert lookups == ["api.example.com"]
+        assert stub.hosts == ["10.0.0.7", "10.0.0.7"]
+        assert backend.cache.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_ip_and_expiry(self, monkeypatch):
+        """IP literals bypass the cache; expired entries are resolved again"""
+        lookups = []
+
+        async def fake_getaddrinfo(host, port, **kwargs):
+            lookups.append(host)
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.8", port))]
+
+        monkeypatch.setattr(transport.anyio, "getaddrinfo", fake_getaddrinfo)
+        backend = AsyncCachingBackend(_StubBackend(), DNSCache(ttl=0))
+        await backend.connect_tcp("127.0.0.1", 80)
+        await backend.connect_tcp("api.example.com", 80)
+        await backend.connect_tcp("api.example.com", 80)
+        assert lookups == ["api.example.com", "api.example.com"]
+
+
+class TestSharedClient:
+    """Tests for the shared clients and warm-up."""
+
+    @pytest.mark.asyncio
+    async def test_one_client_per_loop(self):
+        """Backends share the running loop's client"""
+        first = transport.get_async_client()
+        assert transport.get_async_client() is first
+        backend = LocalLLMBackend(base_url="http://127.0.0.1:9/v1", model="m")
+        assert backend.client is first
+
+    @pytest.mark.asyncio
+    async def test_env_proxies(self, monkeypatch):
+        """HTTPS_PROXY and NO_PROXY still apply with the shared transport"""
+        monkeypatch.setenv("HTTPS_PROXY", "http://proxy.test:3128")
+        monkeypatch.setenv("NO_PROXY", "localhost")
+        await transport.aclose()
+        client = transport.get_async_client()
+        try:
+            assert client._transport_for_url(httpx.URL("https://openrouter.ai/api")) is not client._transport
+            assert client._transport_for_url(httpx.URL("https://localhost:1234/v1")) is client._transport
+        finally:
+            await transport.aclose()
+        assert client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_warm_up_reuses_connection(self, server):
+        """A warmed connection serves the next request"""
+        url = f"http://127.0.0.1:{server.server_port}/v1"
+        assert await transport.warm_up(url, force=True)
+        response = await transport.get_async_client().get(f"{url}/models")
+        assert response.status_code == 200
+        assert server.connections == 1
+        # Throttled: a second warm-up inside WARM_INTERVAL does nothing
+        warmups = transport.get_transport_stats()["warmups"]
+        assert await transport.warm_up(url)
+        assert transport.get_transport_stats()["warmups"] == warmups
+
+    @pytest.mark.asyncio
+    async def test_warm_up_failure(self):
+        """Unreachable endpoints fail quietly"""
+        assert not await transport.warm_up("http://127.0.0.1:9/v1", force=True)
+
+    @pytest.mark.asyncio
+    async def test_detect_model_is_async(self, server):
+        """Model detection runs on the shared async client, not in __init__"""
+        backend = LocalLLMBackend(base_url=f"http://127.0.0.1:{server.server_port}/v1")
+        assert (backend.model, backend.state) == ("", "probing")
+        await backend.ready()
+        assert (backend.model, backend.state) == ("test-model", "ready")
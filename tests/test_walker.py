@@ -0,0 +1,135 @@
+"""Tests for the recursive workspace walker."""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.executor import list_files
+from tools import walker
+from tools.walker import GitIgnore, walk
+
+
+@pytest.fixture
+def workspace():
+    """Small project tree with ignored dirs and a .gitignore."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        for rel in (
+            "README.md",
+            "src/app.py",
+            "src/util/helpers.py",
+            "src/util/deep/leaf.py",
+            "node_modules/pkg/index.js",
+            "build/out.o",
+            "logs/run.log",
+            "logs/keep.log",
+            "src/debug.log",
+        ):
+            path = root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x")
+        (root / ".gitignore").write_text("# comment\n/build/\n*.log\n!keep.log\n")
+        (root / "src" / ".gitignore").write_text("util/deep/\n")
+        yield str(root)
+
+
+def paths(entries):
+    return [e.path for e in entries]
+
+
+class TestWalk:
+    """Tests for walk()."""
+
+    def test_recurses_to_max_depth(self, workspace):
+        """Respects max_depth"""
+        shallow = paths(walk(workspace, max_depth=1))
+        assert "src" in shallow
+        assert "src/app.py" not in shallow
+
+        deep = paths(walk(workspace, max_depth=3))
+        assert "src/util/helpers.py" in deep
+
+    def test_skips_ignore_dirs(self, workspace):
+        """Default ignore_dirs are not entered"""
+        found = paths(walk(workspace, max_depth=5))
+        assert not any(p.startswith("node_modules") for p in found)
+
+    def test_ignore_dirs_from_config(self, workspace, tmp_path, monkeypatch):
+        """context.ignore_dirs in config.yaml replaces the defaults, and edits are picked up"""
+        config = tmp_path / "config.yaml"
+        config.write_text("context:\n  ignore_dirs: [src]\n")
+        monkeypatch.setattr(walker, "CONFIG_PATHS", (config,))
+        found = paths(walk(workspace, max_depth=5))
+        assert "src" not in found
+        assert "node_modules" in found
+
+        config.write_text("context:\n  ignore_dirs: [logs]\n")
+        os.utime(config, ns=(1, 1))
+        found = paths(walk(workspace, max_depth=5))
+        assert "src" in found and "logs" not in found
+
+    def test_honours_gitignore(self, workspace):
+        """Anchored, glob, negated and nested rules apply"""
+        found = paths(walk(workspace, max_depth=5))
+        assert "build" not in found
+        assert "logs/run.log" not in found
+        assert "src/debug.log" not in found
+        assert "logs/keep.log" in found
+        assert "src/util/deep" not in found
+        assert "src/util/helpers.py" in found
+
+    def test_gitignore_can_be_disabled(self, workspace):
+        """use_gitignore=False lists everything but ignore_dirs"""
+        found = paths(walk(workspace, max_depth=5, use_gitignore=False))
+        assert "build/out.o" in found
+        assert "src/util/deep/leaf.py" in found
+
+    def test_max_entries(self, workspace):
+        """Stops after max_entries"""
+        assert len(list(walk(workspace, max_depth=5, max_entries=3))) == 3
+
+    def test_thread_pool_same_order(self, workspace):
+        """Prefetching on a pool does not change the result"""
+        serial = paths(walk(workspace, max_depth=5))
+        parallel = paths(walk(workspace, max_depth=5, workers=4))
+        assert serial == parallel
+
+
+class TestGitIgnore:
+    """Tests for pattern translation."""
+
+    def test_double_star(self):
+        """** matches across directories"""
+        ignore = GitIgnore("", ["docs/**/*.tmp"])
+        assert ignore.match("docs/a/b/c.tmp", False)
+        assert ignore.match("docs/c.tmp", False)
+        assert ignore.match("other/c.tmp", False) is None
+
+    def test_dir_only_rule(self):
+        """Trailing slash only matches directories"""
+        ignore = GitIgnore("", ["cache/"])
+        assert ignore.match("cache", True)
+        assert ignore.match("cache", False) is None
+
+
+class TestListFiles:
+    """Tests for list_files output."""
+
+    @pytest.mark.asyncio
+    async def test_lists_recursively(self, workspace):
+        """Shows nested entries with type prefix"""
+        result = await list_files(workspace, max_depth=3)
+        assert result.success
+        assert "d src" in result.output
+        assert "f src/util/helpers.py" in result.output
+
+    @pytest.mark.asyncio
+    async def test_reports_truncation(self, workspace):
+        """Marks output cut by limits"""
+        result = await list_files(workspace, max_depth=5, max_entries=2)
+        assert "truncated" in result.output
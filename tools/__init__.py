@@ -6,11 +6,28 @@ from .executor import (
     read_file,
     write_file,
     list_files,
+    search_text,
+    read_output,
     is_blocked,
     is_readonly,
     is_write_operation,
+    classify_command,
     ToolResult,
+    ShellStream,
+    OutputBuffer,
+    BatchCall,
+    BatchResult,
+    execute_batch,
+    execute_tool_batch,
+    run_tool,
 )
+from .file_reader import FileRange, read_range
+from .command_classifier import CommandClassifier, Segment, Verdict
+from .walker import WalkEntry, walk
+from .search import SearchMatch, SearchQuery, parse_query
+from .result_cache import ResultCache, get_result_cache
+from .spool import OutputSpool, clip, get_output_spool
+from .shell_session import ShellSession, ShellSessionPool, get_session_pool
 
 __all__ = [
     "execute_tool",
@@ -18,8 +35,36 @@ __all__ = [
     "read_file",
     "write_file",
     "list_files",
+    "search_text",
+    "read_output",
     "is_blocked",
     "is_readonly",
     "is_write_operation",
+    "classify_command",
+    "CommandClassifier",
+    "Segment",
+    "Verdict",
     "ToolResult",
+    "ShellStream",
+    "OutputBuffer",
+    "BatchCall",
+    "BatchResult",
+    "execute_batch",
+    "execute_tool_batch",
+    "run_tool",
+    "ResultCache",
+    "get_result_cache",
+    "ShellSession",
+    "ShellSessionPool",
+    "get_session_pool",
+    "OutputSpool",
+    "clip",
+    "get_output_spool",
+    "FileRange",
+    "read_range",
+    "WalkEntry",
+    "walk",
+    "SearchMatch",
+    "SearchQuery",
+    "parse_query",
 ]
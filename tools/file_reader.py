@@ -0,0 +1,210 @@
+"""
+Range reads for large files.
+
+Files are memory-mapped and a line-offset index is built lazily, only as
+far as the requested range needs, so reading lines 1-200 of a 500 MB log
+costs roughly the bytes returned rather than the file size. Indexes are
+cached per (path, inode, mtime, size) and dropped when the file changes.
+"""
+
+import codecs
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# Defaults from specs/file_broker_hitl_spec.md
+DEFAULT_MAX_BYTES = 32000
+HARD_MAX_BYTES = 128000
+SNIFF_BYTES = 8192
+# Files up to this size get a complete index (exact total line count)
+FULL_INDEX_BYTES = 8 * 1024 * 1024
+INDEX_CACHE_SIZE = 32
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+@dataclass
+class FileRange:
+    """Result of a range read."""
+    content: str
+    start_line: int
+    end_line: int
+    total_lines: int | None  # None when the file was not fully indexed
+    truncated: bool = False
+    encoding: str = "utf-8"
+
+
+class BinaryFileError(ValueError):
+    """Raised when a file looks binary."""
+
+
+class LineIndex:
+    """Offsets of line starts in a file, extended on demand."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.offsets = array("Q", [0])
+        self.scanned_to = 0
+        # Held while the index is extended; other files' reads don't wait
+        self.lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return self.scanned_to >= self.size
+
+    @property
+    def line_count(self) -> int:
+        """Lines found so far (exact once complete)."""
+        count = len(self.offsets)
+        if self.complete and self.offsets[-1] >= self.size and count > 1:
+            count -= 1  # trailing newline does not start a new line
+        return count
+
+    def extend(self, mm: mmap.mmap, until_line: int | None = None) -> None:
+        """Scan forward until until_line is indexed (or to EOF)."""
+        find = mm.find
+        offsets = self.offsets
+        pos = self.scanned_to
+        while pos < self.size and (until_line is None or len(offsets) <= until_line):
+            nl = find(b"\n", pos)
+            if nl == -1:
+                pos = self.size
+                break
+            pos = nl + 1
+            offsets.append(pos)
+        self.scanned_to = pos
+
+    def span(self, mm: mmap.mmap, start_line: int, end_line: int) -> tuple[int, int, int]:
+        """Return (start_offset, end_offset, last_line) for a 1-based range."""
+        self.extend(mm, end_line)
+        last = min(end_line, self.line_count)
+        start = self.offsets[start_line - 1] if start_line - 1 < len(self.offsets) else self.size
+        end = self.offsets[last] if last < len(self.offsets) else self.size
+        return start, end, last
+
+
+_index_cache: OrderedDict[tuple, LineIndex] = OrderedDict()
+# Guards the cache itself only; each index has its own lock
+_index_lock = threading.Lock()
+
+
+def _get_index(path: str, st: os.stat_result) -> LineIndex:
+    key = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+    with _index_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+        index = LineIndex(st.st_size)
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+        return index
+
+
+def sniff_encoding(head: bytes) -> str:
+    """Guess encoding from a BOM or from whether the head is valid UTF-8."""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def is_binary(head: bytes) -> bool:
+    """Files with NUL bytes in the first block are treated as binary."""
+    return b"\0" in head
+
+
+def read_range(
+    path: str,
+    start_line: int = 1,
+    end_line: int | None = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> FileRange:
+    """
+    Read lines start_line..end_line (1-based, inclusive) of a file.
+
+    Raises:
+        BinaryFileError: if the file looks binary
+        OSError: on filesystem errors
+    """
+    start_line = max(1, start_line)
+    if end_line is None:
+        end_line = start_line + 199
+    end_line = max(start_line, end_line)
+    max_bytes = max(1, min(max_bytes, HARD_MAX_BYTES))
+
+    real = os.path.realpath(path)
+    with open(real, "rb") as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            return FileRange("", start_line, start_line - 1, 0)
+
+        head = f.read(SNIFF_BYTES)
+        encoding = sniff_encoding(head)
+        if encoding == "utf-16":
+            return _read_range_utf16(f, st.st_size, start_line, end_line, max_bytes)
+        if is_binary(head):
+            raise BinaryFileError(f"Binary file ({st.st_size} bytes)")
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            index = _get_index(real, st)
+            with index.lock:
+                if st.st_size <= FULL_INDEX_BYTES:
+                    index.extend(mm)
+                start, end, last = index.span(mm, start_line, end_line)
+
+                truncated = False
+                if end - start > max_bytes:
+                    # Cut at the last full line that fits
+                    cut = mm.rfind(b"\n", start, start + max_bytes)
+                    end = cut + 1 if cut != -1 else start + max_bytes
+                    truncated = True
+                    last = _line_of(index, end, start_line)
+                total = index.line_count if index.complete else None
+
+            data = mm[start:end]
+
+    content = data.decode(encoding, errors="replace")
+    if content.endswith("\n"):
+        content = content[:-1]
+    return FileRange(content, start_line, last, total, truncated, encoding)
+
+
+def _line_of(index: LineIndex, offset: int, start_line: int) -> int:
+    """Last complete line ending at or before offset."""
+    line = start_line - 1
+    offsets = index.offsets
+    while line + 1 < len(offsets) and offsets[line + 1] <= offset:
+        line += 1
+    return max(line, start_line)
+
+
+def _read_range_utf16(f, size: int, start_line: int, end_line: int, max_bytes: int) -> FileRange:
+    """UTF-16 is rare in source trees; decode it up front (capped)."""
+    f.seek(0)
+    text = f.read(min(size, HARD_MAX_BYTES * 8)).decode("utf-16", errors="replace")
+    lines = text.split("\n")
+    selected = "\n".join(lines[start_line - 1:end_line])
+    truncated = len(selected.encode("utf-8")) > max_bytes
+    if truncated:
+        selected = selected.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
+    last = min(end_line, len(lines))
+    return FileRange(selected, start_line, last, len(lines), truncated, "utf-16")
+
+
+def clear_index_cache() -> None:
+    """Drop all cached line indexes."""
+    with _index_lock:
+        _index_cache.clear()
@@ -0,0 +1,231 @@
+"""
+Result cache for read-only tool calls.
+
+Agents repeat ``ls -la``, ``git status`` and reads of the same files many
+times per session. Results of read-only calls are kept here, keyed by
+tool, normalized command and cwd. Each entry also stores a workspace
+fingerprint: (mtime, size) of the cwd, of every existing path named in
+the command and, for git commands, of ``.git/HEAD`` and ``.git/index``.
+Listings (list_files, find, tree, ls -R) also fingerprint every directory
+below the listed path, since adding a file deep in a tree only touches
+its own directory. A hit is only served if the fingerprint still matches.
+
+mtimes do not see every change (an edit deep inside a tree does not touch
+the top directory), so entries also expire after ``ttl`` seconds and the
+executor clears the whole cache after any call that may write.
+"""
+
+import os
+import shlex
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_TTL = 30.0
+# Paths named in a command that are fingerprinted (more = slower lookups)
+MAX_FINGERPRINT_PATHS = 32
+# Directories stat'ed for a recursive listing; bigger trees are not cached
+MAX_FINGERPRINT_DIRS = 512
+# list_files is depth 2: the root and its direct subdirectories hold every entry
+LIST_FILES_DIR_DEPTH = 1
+
+
+@dataclass
+class CacheEntry:
+    """A cached result and the workspace state it was computed from."""
+    value: object
+    fingerprint: tuple
+    size: int
+    created: float
+
+
+def _stat_key(path: str) -> tuple:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def _listing_depth(tool_name: str, tokens: list[str]) -> int | None:
+    """How many directory levels a listing depends on (None = not a listing)."""
+    if tool_name == "list_files":
+        return LIST_FILES_DIR_DEPTH
+    if not tokens:
+        return None
+    if tokens[0] in ("find", "tree"):
+        return MAX_FINGERPRINT_DIRS
+    if tokens[0] == "ls" and any(
+        t == "--recursive" or (t.startswith("-") and not t.startswith("--") and "R" in t)
+        for t in tokens
+    ):
+        return MAX_FINGERPRINT_DIRS
+    return None
+
+
+def _tree_dirs(root: str, depth: int) -> list[str] | None:
+    """Directories under root down to depth, or None past the cap."""
+    dirs = []
+    level = [root]
+    for _ in range(depth):
+        below = []
+        for path in level:
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.name != ".git" and entry.is_dir(follow_symlinks=False):
+                            below.append(entry.path)
+            except OSError:
+                continue
+        if len(dirs) + len(below) > MAX_FINGERPRINT_DIRS:
+            return None
+        dirs += below
+        level = below
+        if not level:
+            break
+    return dirs
+
+
+def fingerprint(tool_name: str, command: str, cwd: str) -> tuple | None:
+    """
+    (path, mtime_ns, size) of cwd and the paths a command refers to.
+
+    Returns None when the workspace state can't be captured cheaply (a
+    listing of a very large tree); such results are not cached.
+    """
+    paths = [cwd]
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        tokens = command.split()
+    depth = _listing_depth(tool_name, tokens)
+    if tool_name == "read_file" or tool_name == "list_files":
+        tokens = [tokens[0].rsplit(":", 1)[0] if tokens else "."]
+    named = []
+    for token in tokens:
+        if token.startswith("-"):
+            continue
+        path = os.path.join(cwd, os.path.expanduser(token))
+        if os.path.exists(path):
+            named.append(path)
+            if len(named) >= MAX_FINGERPRINT_PATHS:
+                break
+    paths += named
+    if depth is not None:
+        roots = [path for path in named if os.path.isdir(path)] or [cwd]
+        for root in roots:
+            dirs = _tree_dirs(root, depth)
+            if dirs is None:
+                return None
+            paths += dirs
+    if tokens and tokens[0] == "git":
+        git_dir = os.path.join(cwd, ".git")
+        paths += [os.path.join(git_dir, "HEAD"), os.path.join(git_dir, "index")]
+    return tuple(_stat_key(path) for path in paths)
+
+
+class ResultCache:
+    """
+    LRU cache of tool results with an entry and byte budget.
+
+    Keys are (tool_name, normalized command, cwd). ``size`` is the cost of
+    a value in bytes (output + error length for ToolResult).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        # Bumped on invalidate; results computed across a bump are not stored
+        self.generation = 0
+
+    @staticmethod
+    def make_key(tool_name: str, command: str, cwd: str | None) -> tuple:
+        return (tool_name, " ".join(command.split()), os.path.realpath(cwd or os.getcwd()))
+
+    def get(self, key: tuple) -> object | None:
+        """Return the cached value if the workspace has not changed."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            fresh = time.monotonic() - entry.created < self.ttl
+            if fresh and entry.fingerprint == fingerprint(key[0], key[1], key[2]):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple, value: object, size: int, generation: int | None = None) -> None:
+        """
+        Store a value, evicting least recently used entries over budget.
+
+        Pass the ``generation`` read before computing the value; if the
+        cache was invalidated meanwhile the value may be stale and is dropped.
+        """
+        if size > self.max_bytes:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        state = fingerprint(key[0], key[1], key[2])
+        if state is None:
+            return
+        self._drop(key)
+        self.entries[key] = CacheEntry(value, state, size, time.monotonic())
+        self.bytes += size
+        while self.entries and (
+            len(self.entries) > self.max_entries or self.bytes > self.max_bytes
+        ):
+            _, oldest = self.entries.popitem(last=False)
+            self.bytes -= oldest.size
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop everything (called after any call that may write)."""
+        if self.entries:
+            self.invalidations += 1
+        self.generation += 1
+        self.entries.clear()
+        self.bytes = 0
+
+    def _drop(self, key: tuple) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+
+_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide tool result cache."""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
@@ -0,0 +1,576 @@
+"""
+Built-in code search for search_text / search / rg tools.
+
+Does not need ripgrep. Files come from the workspace walker (so ignored
+dirs and .gitignore apply) and are memory-mapped. When the pattern has a
+literal every match must contain, only the lines around its hits are
+copied out of the map and decoded; the regex never sees the rest. Larger
+trees are fanned out across a process pool in batches; matches come back
+in walk order and stop at the match/byte caps.
+
+``parse_query`` understands the common rg/grep options; anything else
+raises ``UnsupportedOption`` so the caller can hand the command to the
+real binary instead of guessing.
+"""
+
+import fnmatch
+import mmap
+import multiprocessing
+import os
+import re
+import shlex
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from .walker import walk
+
+DEFAULT_MAX_MATCHES = 200
+DEFAULT_MAX_BYTES = 64000
+MAX_LINE_CHARS = 300
+MAX_FILE_BYTES = 50 * 1024 * 1024
+SNIFF_BYTES = 8192
+# Newlines between prefilter hits are counted in slices of this size
+COUNT_CHUNK_BYTES = 1024 * 1024
+# Below this many files a pool costs more than it saves
+PARALLEL_MIN_FILES = 200
+BATCH_SIZE = 64
+
+_REGEX_META = set(".^$*+?{}[]()|\\")
+_OPTIONAL_SUFFIX = set("*?{")
+
+# rg --type names
+TYPE_GLOBS = {
+    "py": ["*.py", "*.pyi"],
+    "js": ["*.js", "*.jsx", "*.mjs", "*.cjs"],
+    "ts": ["*.ts", "*.tsx", "*.mts", "*.cts"],
+    "rust": ["*.rs"],
+    "go": ["*.go"],
+    "java": ["*.java"],
+    "c": ["*.c", "*.h"],
+    "cpp": ["*.cpp", "*.cc", "*.cxx", "*.hpp", "*.hh", "*.hxx", "*.h"],
+    "rb": ["*.rb"],
+    "ruby": ["*.rb"],
+    "sh": ["*.sh", "*.bash", "*.zsh"],
+    "md": ["*.md", "*.markdown"],
+    "markdown": ["*.md", "*.markdown"],
+    "json": ["*.json"],
+    "yaml": ["*.yaml", "*.yml"],
+    "toml": ["*.toml"],
+    "html": ["*.html", "*.htm"],
+    "css": ["*.css", "*.scss"],
+    "txt": ["*.txt"],
+}
+
+# Options that take a value (short and long forms) -> SearchQuery field
+_VALUE_OPTIONS = {
+    "-A": "after", "--after-context": "after",
+    "-B": "before", "--before-context": "before",
+    "-C": "context", "--context": "context",
+    "-m": "max_matches", "--max-count": "max_matches",
+    "-g": "glob", "--glob": "glob", "--include": "glob", "--exclude": "exclude",
+    "-t": "type", "--type": "type", "-T": "type_not", "--type-not": "type_not",
+    "-e": "regexp", "--regexp": "regexp",
+}
+# Flags without a value
+_FLAGS = {
+    "-i": "ignore_case", "--ignore-case": "ignore_case",
+    "-s": "case_sensitive", "--case-sensitive": "case_sensitive",
+    "-S": "smart_case", "--smart-case": "smart_case",
+    "-F": "fixed", "--fixed-strings": "fixed",
+    "-w": "word", "--word-regexp": "word",
+    "-l": "files_only", "--files-with-matches": "files_only",
+}
+# Accepted and ignored: always on here, or no effect on the result
+_NOOP_FLAGS = {
+    "-n", "--line-number", "-r", "-R", "--recursive", "-H", "--with-filename",
+    "-E", "--extended-regexp", "--no-heading", "--color=never", "--no-messages",
+}
+
+
+class UnsupportedOption(ValueError):
+    """The command uses an option the built-in search does not implement."""
+
+
+@dataclass
+class SearchMatch:
+    """One matching line with optional context."""
+    path: str
+    line_number: int
+    line: str
+    before: list[tuple[int, str]] = field(default_factory=list)
+    after: list[tuple[int, str]] = field(default_factory=list)
+
+
+@dataclass
+class SearchQuery:
+    """Parsed search options."""
+    pattern: str
+    path: str = "."
+    fixed: bool = False
+    ignore_case: bool = False
+    word: bool = False
+    context: int = 0
+    globs: list[str] = field(default_factory=list)
+    max_matches: int = DEFAULT_MAX_MATCHES
+    # -A / -B override context on their side
+    before: int | None = None
+    after: int | None = None
+    # --type globs: a file must match one of them (and the globs)
+    type_globs: list[str] = field(default_factory=list)
+    files_only: bool = False
+
+    def compile(self) -> re.Pattern:
+        source = re.escape(self.pattern) if self.fixed else self.pattern
+        if self.word:
+            source = rf"\b(?:{source})\b"
+        return re.compile(source, re.IGNORECASE if self.ignore_case else 0)
+
+
+def required_literal(pattern: str, fixed: bool = False) -> str | None:
+    """
+    Longest literal run every match of pattern must contain, or None.
+
+    Conservative: alternation disables the prefilter, characters made
+    optional by ``*``/``?``/``{`` are dropped, groups and classes end a run.
+    """
+    if fixed:
+        return pattern or None
+    runs = []
+    current = []
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern):
+            nxt = pattern[i + 1]
+            if nxt.isalnum():
+                # \d, \w, \b ... are classes/anchors, not literals
+                runs.append("".join(current))
+                current = []
+            elif depth == 0:
+                current.append(nxt)
+            i += 2
+            continue
+        if c == "|":
+            return None
+        if c == "[":
+            end = pattern.find("]", i + 2)
+            runs.append("".join(current))
+            current = []
+            i = end + 1 if end != -1 else len(pattern)
+            continue
+        if c == "(":
+            depth += 1
+            runs.append("".join(current))
+            current = []
+        elif c == ")":
+            depth = max(0, depth - 1)
+            runs.append("".join(current))
+            current = []
+        elif c in _OPTIONAL_SUFFIX:
+            if current:
+                current.pop()
+            runs.append("".join(current))
+            current = []
+            if c == "{":
+                end = pattern.find("}", i)
+                i = end + 1 if end != -1 else len(pattern)
+                continue
+        elif c in _REGEX_META:
+            runs.append("".join(current))
+            current = []
+        elif depth == 0:
+            current.append(c)
+        i += 1
+    runs.append("".join(current))
+    best = max(runs, key=len)
+    return best if len(best) >= 2 else None
+
+
+def _search_file(
+    path: str,
+    regex: re.Pattern,
+    literal: bytes | None,
+    context: tuple[int, int],
+    limit: int,
+) -> list[tuple[int, str, list, list]]:
+    """Search one file; returns (line_no, line, before, after) tuples."""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0 or size > MAX_FILE_BYTES:
+                return []
+            if b"\0" in f.read(SNIFF_BYTES):
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if literal is not None:
+                    return _search_hits(mm, regex, literal, context, limit)
+                lines = mm[:].decode("utf-8", errors="replace").split("\n")
+    except (OSError, ValueError):
+        return []
+
+    results = []
+    context_before, context_after = context
+    for idx, line in enumerate(lines):
+        if not regex.search(line):
+            continue
+        before = [(n + 1, lines[n]) for n in range(max(0, idx - context_before), idx)]
+        after = [(n + 1, lines[n]) for n in range(idx + 1, min(len(lines), idx + 1 + context_after))]
+        results.append((idx + 1, line, before, after))
+        if len(results) >= limit:
+            break
+    return results
+
+
+def _search_hits(
+    mm: mmap.mmap,
+    regex: re.Pattern,
+    literal: bytes,
+    context: tuple[int, int],
+    limit: int,
+) -> list[tuple[int, str, list, list]]:
+    """Check only the lines holding literal; nothing else is copied or decoded."""
+    results = []
+    context_before, context_after = context
+    size = len(mm)
+    line_no = 1
+    line_start = 0  # where line line_no starts
+    pos = mm.find(literal)
+    while pos != -1:
+        start = mm.rfind(b"\n", 0, pos) + 1
+        end = mm.find(b"\n", pos)
+        if end == -1:
+            end = size
+        line_no += _count_newlines(mm, line_start, start)
+        line_start = start
+        line = mm[start:end].decode("utf-8", errors="replace")
+        if regex.search(line):
+            before = _lines_before(mm, start, line_no, context_before)
+            after = _lines_after(mm, end, line_no, context_after)
+            results.append((line_no, line, before, after))
+            if len(results) >= limit:
+                break
+        pos = mm.find(literal, end + 1) if end < size else -1
+    return results
+
+
+def _count_newlines(mm: mmap.mmap, start: int, end: int) -> int:
+    count = 0
+    while start < end:
+        stop = min(end, start + COUNT_CHUNK_BYTES)
+        count += mm[start:stop].count(b"\n")
+        start = stop
+    return count
+
+
+def _lines_before(mm: mmap.mmap, start: int, line_no: int, count: int) -> list[tuple[int, str]]:
+    """Up to count lines ending just before offset start (line line_no)."""
+    lines = []
+    while len(lines) < count and start > 0:
+        prev = mm.rfind(b"\n", 0, start - 1) + 1
+        lines.append((line_no - len(lines) - 1, mm[prev:start - 1].decode("utf-8", errors="replace")))
+        start = prev
+    return lines[::-1]
+
+
+def _lines_after(mm: mmap.mmap, end: int, line_no: int, count: int) -> list[tuple[int, str]]:
+    """Up to count lines after the newline at offset end (line line_no)."""
+    lines = []
+    size = len(mm)
+    while len(lines) < count and end < size:
+        nxt = mm.find(b"\n", end + 1)
+        if nxt == -1:
+            nxt = size
+        lines.append((line_no + len(lines) + 1, mm[end + 1:nxt].decode("utf-8", errors="replace")))
+        end = nxt
+    return lines
+
+
+def _search_batch(
+    paths: list[tuple[str, str]],
+    pattern: str,
+    flags: int,
+    literal: bytes | None,
+    context: tuple[int, int],
+    limit: int,
+) -> list[tuple[str, list]]:
+    """Worker entry point: search a batch of (abs, rel) paths."""
+    regex = re.compile(pattern, flags)
+    found = []
+    for abs_path, rel_path in paths:
+        matches = _search_file(abs_path, regex, literal, context, limit)
+        if matches:
+            found.append((rel_path, matches))
+    return found
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        # Never fork: search() runs in a worker thread (asyncio.to_thread)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        _pool_workers = workers
+    return _pool
+
+
+def search(
+    query: SearchQuery,
+    ignore_dirs: list[str] | None = None,
+    workers: int | None = None,
+    cwd: str | None = None,
+) -> Iterator[SearchMatch]:
+    """
+    Yield matches for query under query.path in walk order.
+
+    Match paths start with query.path as given (like rg), so they can be
+    passed straight to read_file; "." adds no prefix.
+
+    Args:
+        query: Pattern and options
+        ignore_dirs: Directory names to skip (walker defaults if None)
+        workers: Process count (default: CPU count; 1 = in-process)
+        cwd: Directory a relative query.path starts from
+    """
+    regex = query.compile()
+    # The prefilter is a case-sensitive byte search; -i, (?i) and (?x) skip it
+    literal_text = None
+    if not regex.flags & (re.IGNORECASE | re.VERBOSE):
+        literal_text = required_literal(query.pattern, query.fixed)
+    literal = literal_text.encode("utf-8") if literal_text else None
+    limit = query.max_matches
+
+    root = os.path.expanduser(query.path)
+    if cwd and not os.path.isabs(root):
+        root = os.path.join(cwd, root)
+    if os.path.isfile(root):
+        files = [(root, query.path)]
+    else:
+        prefix = query.path.rstrip("/")
+        prefix = "" if prefix in ("", ".") else prefix + "/"
+        files = [
+            (os.path.join(root, entry.path), prefix + entry.path)
+            for entry in walk(root, max_depth=10_000, ignore_dirs=ignore_dirs)
+            if not entry.is_dir
+            and _glob_ok(entry.path, query.globs)
+            and (not query.type_globs or _glob_ok(entry.path, query.type_globs))
+        ]
+
+    workers = workers or os.cpu_count() or 1
+    context = (
+        query.context if query.before is None else query.before,
+        query.context if query.after is None else query.after,
+    )
+    # -l needs one match per file
+    per_file = 1 if query.files_only else limit
+    args = (regex.pattern, regex.flags, literal, context, per_file)
+    futures = []
+    if workers <= 1 or len(files) < PARALLEL_MIN_FILES:
+        batches = (_search_batch(files[i:i + BATCH_SIZE], *args)
+                   for i in range(0, len(files), BATCH_SIZE))
+    else:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_search_batch, files[i:i + BATCH_SIZE], *args)
+                   for i in range(0, len(files), BATCH_SIZE)]
+        batches = (future.result() for future in futures)
+
+    count = 0
+    try:
+        for batch in batches:
+            for rel_path, matches in batch:
+                for line_no, line, before, after in matches:
+                    yield SearchMatch(rel_path, line_no, line, before, after)
+                    count += 1
+                    if count >= limit:
+                        return
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _glob_ok(rel_path: str, globs: list[str]) -> bool:
+    if not globs:
+        return True
+    name = rel_path.rsplit("/", 1)[-1]
+    included = [g for g in globs if not g.startswith("!")]
+    excluded = [g[1:] for g in globs if g.startswith("!")]
+    if any(fnmatch.fnmatch(name, g) or fnmatch.fnmatch(rel_path, g) for g in excluded):
+        return False
+    if not included:
+        return True
+    return any(fnmatch.fnmatch(name, g) or fnmatch.fnmatch(rel_path, g) for g in included)
+
+
+def parse_query(command: str) -> SearchQuery:
+    """
+    Parse rg/grep-style arguments: [rg|grep] [OPTIONS] PATTERN [PATH]
+
+    Options: -i -s -S -F -w -l, -A/-B/-C N, -m N, -e PATTERN (repeatable),
+    -g/--include/--exclude GLOB, -t/-T TYPE; values may be attached
+    (-A2, --context=2) and value-less short flags combined (-in).
+
+    Raises:
+        UnsupportedOption: for any other option, or more than one path
+        ValueError: if no pattern is given
+    """
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        tokens = command.split()
+    if tokens and tokens[0] in ("rg", "grep"):
+        tokens = tokens[1:]
+
+    query = SearchQuery(pattern="")
+    positional: list[str] = []
+    patterns: list[str] = []
+    smart_case = False
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        i += 1
+        if tok == "--":
+            positional.extend(tokens[i:])
+            break
+        if not tok.startswith("-") or tok == "-":
+            positional.append(tok)
+            continue
+        option, value = tok, None
+        if tok.startswith("--") and "=" in tok and tok not in _NOOP_FLAGS:
+            option, value = tok.split("=", 1)
+        elif not tok.startswith("--") and len(tok) > 2 and tok[:2] in _VALUE_OPTIONS:
+            option, value = tok[:2], tok[2:]
+        elif not tok.startswith("--") and len(tok) > 2:
+            # -in, -rn: several value-less short flags
+            flags = [f"-{c}" for c in tok[1:]]
+            if all(f in _FLAGS or f in _NOOP_FLAGS for f in flags):
+                for f in flags:
+                    smart_case = _set_flag(query, f, smart_case)
+                continue
+            raise UnsupportedOption(f"unsupported option {tok}")
+
+        if option in _NOOP_FLAGS:
+            continue
+        if option in _FLAGS and value is None:
+            smart_case = _set_flag(query, option, smart_case)
+            continue
+        field_name = _VALUE_OPTIONS.get(option)
+        if field_name is None:
+            raise UnsupportedOption(f"unsupported option {tok}")
+        if value is None:
+            if i >= len(tokens):
+                raise ValueError(f"{option} needs a value")
+            value = tokens[i]
+            i += 1
+        _set_value(query, field_name, value, patterns)
+
+    if patterns:
+        # -e patterns leave every positional to be a path
+        positional.insert(0, "")
+    if not positional or not (patterns or positional[0]):
+        raise ValueError("No search pattern given")
+    if len(positional) > 2:
+        raise UnsupportedOption("more than one search path")
+    if patterns:
+        if len(patterns) == 1:
+            query.pattern = patterns[0]
+        else:
+            parts = [re.escape(p) if query.fixed else f"(?:{p})" for p in patterns]
+            query.pattern, query.fixed = "|".join(parts), False
+    else:
+        query.pattern = positional[0]
+    if len(positional) > 1:
+        query.path = positional[1]
+    if smart_case:
+        query.ignore_case = query.pattern == query.pattern.lower()
+    return query
+
+
+def _set_flag(query: SearchQuery, flag: str, smart_case: bool) -> bool:
+    """Apply a value-less flag; returns the smart-case state."""
+    name = _FLAGS.get(flag)
+    if name == "case_sensitive":
+        query.ignore_case = False
+        return False
+    if name == "smart_case":
+        return True
+    if name == "ignore_case":
+        query.ignore_case = True
+        return False
+    if name is not None:
+        setattr(query, name, True)
+    return smart_case
+
+
+def _set_value(query: SearchQuery, name: str, value: str, patterns: list[str]) -> None:
+    if name in ("after", "before", "context", "max_matches"):
+        try:
+            number = int(value)
+        except ValueError:
+            raise ValueError(f"not a number: {value!r}") from None
+        setattr(query, name, number)
+    elif name == "glob":
+        query.globs.append(value)
+    elif name == "exclude":
+        query.globs.append(f"!{value}")
+    elif name == "regexp":
+        patterns.append(value)
+    elif value not in TYPE_GLOBS:
+        raise UnsupportedOption(f"unknown file type {value!r}")
+    elif name == "type":
+        query.type_globs.extend(TYPE_GLOBS[value])
+    else:
+        query.globs.extend(f"!{g}" for g in TYPE_GLOBS[value])
+
+
+def format_matches(
+    matches: Iterator[SearchMatch],
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    files_only: bool = False,
+) -> tuple[str, int, bool]:
+    """
+    Render grep-style output. Returns (text, match_count, truncated).
+
+    files_only lists each matching path once (rg -l).
+    """
+    out = []
+    size = 0
+    count = 0
+    for match in matches:
+        if files_only:
+            if out and out[-1] == match.path:
+                continue
+            size += len(match.path) + 1
+            if size > max_bytes:
+                return "\n".join(out), count, True
+            out.append(match.path)
+            count += 1
+            continue
+        block = []
+        if out and (match.before or match.after):
+            block.append("--")
+        for n, text in match.before:
+            block.append(f"{match.path}-{n}-{_clip(text)}")
+        block.append(f"{match.path}:{match.line_number}:{_clip(match.line)}")
+        for n, text in match.after:
+            block.append(f"{match.path}-{n}-{_clip(text)}")
+        chunk = "\n".join(block)
+        size += len(chunk) + 1
+        if size > max_bytes:
+            return "\n".join(out), count, True
+        out.append(chunk)
+        count += 1
+    return "\n".join(out), count, False
+
+
+def _clip(text: str) -> str:
+    if len(text) <= MAX_LINE_CHARS:
+        return text
+    return text[:MAX_LINE_CHARS] + "..."
@@ -0,0 +1,290 @@
+"""
+Persistent shell sessions for Agent Zero CLI.
+
+Keeps long-lived bash processes so consecutive tool calls share state
+(cwd, exported variables, activated venvs) and skip fork/exec + shell
+startup on every command. Commands are framed with random sentinels:
+
+    eval '<command>' < /dev/null
+    printf '\\n<sentinel> %d\\n' $?          (stdout)
+    printf '\\n<sentinel>\\n' >&2            (stderr)
+
+Output is read until the sentinel appears on each pipe. A session that
+dies (``exit``, crash) or times out is killed and restarted on next use.
+"""
+
+import asyncio
+import codecs
+import os
+import shlex
+import shutil
+import uuid
+from collections import OrderedDict
+
+from .executor import (
+    MAX_OUTPUT_CHARS,
+    STREAM_CHUNK_BYTES,
+    OutputBuffer,
+    ToolResult,
+    _kill_process_group,
+    is_blocked,
+)
+
+DEFAULT_MAX_SESSIONS = 8
+# Seconds a shell whose pipes closed gets to exit before it is killed
+EXIT_GRACE = 1.0
+
+
+class SessionDied(Exception):
+    """Raised when the shell process exits while a command is running."""
+
+
+class ShellSession:
+    """A single long-lived bash process driven by sentinel framing."""
+
+    def __init__(self, cwd: str | None = None, shell: str | None = None):
+        self.cwd = cwd
+        self.shell = shell or shutil.which("bash") or "/bin/bash"
+        self.process: asyncio.subprocess.Process | None = None
+        self.lock = asyncio.Lock()
+        self.commands_run = 0
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        """Start (or restart) the underlying shell."""
+        if self.process is not None:
+            await self.close()
+        self.process = await asyncio.create_subprocess_exec(
+            self.shell,
+            "--noprofile",
+            "--norc",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            env={**os.environ, "TERM": "dumb"},  # Disable color codes
+            start_new_session=True,
+        )
+
+    async def close(self) -> None:
+        """Kill the shell and everything it spawned."""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        if process.returncode is None:
+            _kill_process_group(process)
+        await process.wait()
+
+    async def run(
+        self,
+        command: str,
+        timeout: int = 60,
+        max_output: int = MAX_OUTPUT_CHARS,
+    ) -> ToolResult:
+        """Run one command in this session and capture its output."""
+        async with self.lock:
+            if not self.alive:
+                await self.start()
+
+            token = f"__AZ_{uuid.uuid4().hex}__"
+            script = (
+                f"eval {shlex.quote(command)} < /dev/null\n"
+                f"printf '\\n{token} %d\\n' $?\n"
+                f"printf '\\n{token}\\n' >&2\n"
+            )
+            stdout = OutputBuffer(max_output, spool_label=command)
+            stderr = OutputBuffer(max_output, spool_label=f"{command} (stderr)")
+            marker = f"\n{token}".encode()
+
+            try:
+                self.process.stdin.write(script.encode())
+                await self.process.stdin.drain()
+                results = await asyncio.wait_for(
+                    asyncio.gather(
+                        _read_until(self.process.stdout, marker, stdout, want_code=True),
+                        _read_until(self.process.stderr, marker, stderr),
+                        return_exceptions=True,
+                    ),
+                    timeout=timeout,
+                )
+                for item in results:
+                    if isinstance(item, BaseException):
+                        raise item
+                return_code = results[0]
+            except asyncio.TimeoutError:
+                await self.close()
+                self.restarts += 1
+                return ToolResult(
+                    success=False,
+                    output=stdout.getvalue().strip(),
+                    error=f"Command timed out after {timeout}s (shell session restarted)",
+                    return_code=-1,
+                    output_handle=stdout.handle
+                )
+            except (SessionDied, BrokenPipeError, ConnectionResetError):
+                # The shell may only have closed its stdout (exec >&-) and keep running
+                try:
+                    code = await asyncio.wait_for(self.process.wait(), EXIT_GRACE) if self.process else -1
+                except asyncio.TimeoutError:
+                    code = -1
+                await self.close()
+                self.restarts += 1
+                return ToolResult(
+                    success=code == 0,
+                    output=stdout.getvalue().strip(),
+                    error=(stderr.getvalue().strip() or f"Shell session exited with code {code}"),
+                    return_code=code,
+                    output_handle=stdout.handle
+                )
+            finally:
+                stdout.close()
+                stderr.close()
+
+            self.commands_run += 1
+            return ToolResult(
+                success=return_code == 0,
+                output=stdout.getvalue().strip(),
+                error=stderr.getvalue().strip(),
+                return_code=return_code,
+                output_handle=stdout.handle
+            )
+
+
+async def _read_until(
+    stream: asyncio.StreamReader,
+    marker: bytes,
+    buffer: OutputBuffer,
+    want_code: bool = False,
+) -> int:
+    """Copy stream into buffer until marker; return the exit code after it."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = b""
+    while True:
+        try:
+            data = await stream.read(STREAM_CHUNK_BYTES)
+        except asyncio.CancelledError:
+            # Timed out: keep whatever was held back for marker matching
+            buffer.write(decoder.decode(pending, final=True))
+            raise
+        if not data:
+            buffer.write(decoder.decode(pending, final=True))
+            raise SessionDied()
+        pending += data
+        idx = pending.find(marker)
+        if idx == -1:
+            # Hold back enough bytes to catch a marker split across reads
+            keep = len(marker) - 1
+            if len(pending) > keep:
+                buffer.write(decoder.decode(pending[:-keep]))
+                pending = pending[-keep:]
+            continue
+
+        buffer.write(decoder.decode(pending[:idx], final=True))
+        rest = pending[idx + len(marker):]
+        while b"\n" not in rest:
+            data = await stream.read(STREAM_CHUNK_BYTES)
+            if not data:
+                raise SessionDied()
+            rest += data
+        if not want_code:
+            return 0
+        try:
+            return int(rest.split(b"\n", 1)[0].strip() or 0)
+        except ValueError:
+            return -1
+
+
+class ShellSessionPool:
+    """
+    Pool of persistent shells keyed by workspace or chat session.
+
+    Least recently used sessions are closed once ``max_sessions`` is hit;
+    sessions in the middle of a command are skipped.
+    """
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self.sessions: OrderedDict[str, ShellSession] = OrderedDict()
+
+    async def get(self, key: str, cwd: str | None = None) -> ShellSession:
+        """Return the session for key, creating it if needed."""
+        session = self.sessions.get(key)
+        if session is not None:
+            self.sessions.move_to_end(key)
+            return session
+
+        session = ShellSession(cwd=cwd)
+        self.sessions[key] = session
+        while len(self.sessions) > self.max_sessions:
+            idle = next(
+                (k for k, s in self.sessions.items() if s is not session and not s.lock.locked()),
+                None,
+            )
+            if idle is None:
+                break
+            await self.sessions.pop(idle).close()
+        return session
+
+    async def run(
+        self,
+        command: str,
+        key: str = "default",
+        cwd: str | None = None,
+        timeout: int = 60,
+    ) -> ToolResult:
+        """Run a command in the session for key."""
+        blocked, reason = is_blocked(command)
+        if blocked:
+            return ToolResult(
+                success=False,
+                output="",
+                error=f"Command blocked: {reason}",
+                return_code=-1
+            )
+
+        session = await self.get(key, cwd)
+        try:
+            return await session.run(command, timeout)
+        except Exception as e:
+            await session.close()
+            return ToolResult(
+                success=False,
+                output="",
+                error=f"Execution error: {str(e)}",
+                return_code=-1
+            )
+
+    async def close(self, key: str) -> None:
+        """Close one session."""
+        session = self.sessions.pop(key, None)
+        if session is not None:
+            await session.close()
+
+    async def close_all(self) -> None:
+        """Close every session in the pool."""
+        while self.sessions:
+            _, session = self.sessions.popitem()
+            await session.close()
+
+    def get_stats(self) -> dict:
+        """Get pool statistics."""
+        return {
+            "sessions": len(self.sessions),
+            "commands": sum(s.commands_run for s in self.sessions.values()),
+            "restarts": sum(s.restarts for s in self.sessions.values()),
+        }
+
+
+_pool: ShellSessionPool | None = None
+
+
+def get_session_pool() -> ShellSessionPool:
+    """Return the process-wide shell session pool."""
+    global _pool
+    if _pool is None:
+        _pool = ShellSessionPool()
+    return _pool
@@ -0,0 +1,207 @@
+"""
+Disk spool for tool output that does not fit in memory.
+
+Shell output is kept in memory as a bounded head+tail summary
+(``OutputBuffer``). Once a command prints more than that, everything it
+prints is also written to a spool file and gets a handle (``out-1``,
+``out-2``, ...). The model pages through it with the ``read_output`` tool,
+the user with ``/output`` in the CLI and TUI, so nothing that was cut from
+the summary is lost and nobody has to re-run the command to see it.
+
+Spool files live in one temporary directory per process, are evicted
+oldest-first once they use more than ``max_bytes`` and are deleted at exit.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .file_reader import DEFAULT_MAX_BYTES, FileRange, read_range
+
+# Output limits, in characters. MAX_OUTPUT_CHARS is what a tool result
+# keeps in memory and shows the model (head + tail); DISPLAY_OUTPUT_CHARS
+# is what the CLI and TUI print before pointing at the pager.
+MAX_OUTPUT_CHARS = int(os.getenv("AGENTZERO_MAX_OUTPUT_CHARS", "10000"))
+DISPLAY_OUTPUT_CHARS = int(os.getenv("AGENTZERO_DISPLAY_OUTPUT_CHARS", "4000"))
+DEFAULT_SPOOL_BYTES = int(os.getenv("AGENTZERO_SPOOL_MAX_BYTES", str(256 * 1024 * 1024)))
+# Lines returned by read_output when no limit is given
+DEFAULT_READ_LINES = 200
+
+
+@dataclass
+class SpoolEntry:
+    """One spooled output."""
+    handle: str
+    path: str
+    label: str
+    size: int = 0
+    created: float = 0.0
+    closed: bool = False
+
+
+class SpoolWriter:
+    """Append-only writer for one spool file."""
+
+    def __init__(self, spool: "OutputSpool", entry: SpoolEntry):
+        self.spool = spool
+        self.entry = entry
+        self._file = open(entry.path, "wb")
+
+    @property
+    def handle(self) -> str:
+        return self.entry.handle
+
+    def write(self, text: str) -> None:
+        if self._file is None or not text:
+            return
+        data = text.encode("utf-8", errors="replace")
+        try:
+            self._file.write(data)
+        except OSError:
+            # Disk full or spool removed: keep the in-memory summary only
+            self.close()
+            return
+        self.entry.size += len(data)
+        self.spool._grow(len(data))
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+        self.entry.closed = True
+        self.spool._grow(0)
+
+
+class OutputSpool:
+    """
+    Per-process store of spooled outputs addressed by handle.
+
+    Args:
+        directory: Parent directory for the spool (default: system temp,
+            or AGENTZERO_SPOOL_DIR)
+        max_bytes: Total size after which the oldest finished outputs are
+            deleted
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = DEFAULT_SPOOL_BYTES):
+        self.parent = directory or os.getenv("AGENTZERO_SPOOL_DIR") or None
+        self.max_bytes = max_bytes
+        self.directory: str | None = None
+        self.entries: OrderedDict[str, SpoolEntry] = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def open(self, label: str = "") -> SpoolWriter:
+        """Start a new spooled output."""
+        with self._lock:
+            if self.directory is None:
+                if self.parent:
+                    os.makedirs(self.parent, exist_ok=True)
+                self.directory = tempfile.mkdtemp(prefix="agentzero-spool-", dir=self.parent)
+                atexit.register(self.cleanup)
+            self._counter += 1
+            handle = f"out-{self._counter}"
+            entry = SpoolEntry(
+                handle,
+                os.path.join(self.directory, f"{handle}.log"),
+                " ".join(label.split())[:200],
+                created=time.time(),
+            )
+            self.entries[handle] = entry
+        return SpoolWriter(self, entry)
+
+    def get(self, handle: str) -> SpoolEntry | None:
+        return self.entries.get(handle.strip())
+
+    def read(
+        self,
+        handle: str,
+        offset: int = 0,
+        limit: int = DEFAULT_READ_LINES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> FileRange:
+        """
+        Read ``limit`` lines after the first ``offset`` lines of an output.
+
+        Raises:
+            KeyError: unknown or evicted handle
+            OSError: on filesystem errors
+        """
+        entry = self.get(handle)
+        if entry is None:
+            raise KeyError(handle)
+        start = max(0, offset) + 1
+        return read_range(entry.path, start, start + max(1, limit) - 1, max_bytes)
+
+    def recent(self, count: int = 10) -> list[SpoolEntry]:
+        """Newest outputs first."""
+        return list(reversed(self.entries.values()))[:count]
+
+    def _grow(self, size: int) -> None:
+        with self._lock:
+            self.bytes += size
+            if self.bytes <= self.max_bytes:
+                return
+            for handle in list(self.entries):
+                if self.bytes <= self.max_bytes:
+                    break
+                entry = self.entries[handle]
+                if not entry.closed:
+                    continue
+                del self.entries[handle]
+                self.bytes -= entry.size
+                self.evictions += 1
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+
+    def cleanup(self) -> None:
+        """Delete the spool directory."""
+        with self._lock:
+            if self.directory:
+                shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+            self.entries.clear()
+            self.bytes = 0
+
+    def get_stats(self) -> dict:
+        """Get spool statistics."""
+        return {
+            "outputs": len(self.entries),
+            "bytes": self.bytes,
+            "evictions": self.evictions,
+            "directory": self.directory,
+        }
+
+
+def clip(text: str, limit: int = DISPLAY_OUTPUT_CHARS, handle: str = "") -> str:
+    """Head + tail of text for display, pointing at the pager if cut."""
+    if len(text) <= limit:
+        return text
+    head = text[: limit // 2]
+    tail = text[len(text) - (limit - len(head)):]
+    where = f"; /output {handle} to page" if handle else ""
+    return f"{head}\n... ({len(text) - limit} chars not shown{where}) ...\n{tail}"
+
+
+_spool: OutputSpool | None = None
+
+
+def get_output_spool() -> OutputSpool:
+    """Return the process-wide output spool."""
+    global _spool
+    if _spool is None:
+        _spool = OutputSpool()
+    return _spool
@@ -17,9 +17,14 @@ import yaml
 from textual.app import App, ComposeResult, SystemCommand
 from textual.binding import Binding
 from textual.containers import Container, Horizontal, Vertical, VerticalScroll
-from textual.widgets import Footer, Header, Markdown, RichLog, Static
+from textual.widgets import Footer, Header, Markdown, RichLog, Static, TextArea
 
-from .chat.message_widgets import AnimatedMarkdown, AnimatedText
+from llm_providers import transport
+from llm_providers.risk_explainer import get_risk_explainer
+from tools.executor import classify_command
+from tools.spool import DISPLAY_OUTPUT_CHARS, clip
+
+from .chat.message_widgets import AnimatedMarkdown, AnimatedText, ToolOutputStream
 from .chat.multiline_input import MultilineInput
 from .chat.session import SessionManager
 from .chat.thinking_stream import ThinkingStreamWidget
@@ -27,6 +32,7 @@ from .commands.slash_commands import SlashCommandRegistry
 from .css import CSS
 from .screens.file_upload import FileUploadScreen
 from .screens.observer_config import ObserverConfigScreen
+from .screens.output_pager import OutputPagerScreen
 from .screens.space_invaders import SpaceInvadersScreen
 from .screens.tool_approval import ToolApprovalScreen
 from .themes import THEME_PRESETS, resolve_theme_name
@@ -70,7 +76,7 @@ class AgentZeroCLI(App):
     ]
 
     READONLY_TOOLS = frozenset(
-        {"read_file", "read", "list_files", "tree", "ls", "search_text", "search", "rg"}
+        {"read_file", "read", "list_files", "tree", "ls", "search_text", "search", "rg", "read_output"}
     )
 
     def __init__(self):
@@ -93,6 +99,7 @@ class AgentZeroCLI(App):
         self.session_manager = SessionManager()
         self.slash_commands = SlashCommandRegistry()
         self._menu_visible = False
+        self._prompt_started = False
         self._register_themes()
         self.theme = self.theme_name
         self._init_backend()
@@ -224,6 +231,26 @@ class AgentZeroCLI(App):
         self._feed_timer = self.set_interval(15, self._show_feed_item)
         # Show initial feed item
         self.call_later(self._show_feed_item)
+        self.run_worker(self._warm_backend())
+
+    async def on_unmount(self) -> None:
+        # Pooled connections live for the whole session
+        await transport.aclose()
+
+    async def _warm_backend(self) -> None:
+        """Pre-connect the backend's HTTP transport so the next prompt skips setup."""
+        if hasattr(self.backend, "warm_up"):
+            await self.backend.warm_up()
+        if hasattr(self.backend, "ready"):
+            # Local servers are probed in the background; show the result when it lands
+            await self.backend.ready()
+            self._refresh_side_panel()
+
+    def on_text_area_changed(self, event: TextArea.Changed) -> None:
+        # First keystroke of a prompt: connect while the user is still typing
+        if event.text_area.id == "input-area" and event.text_area.text and not self._prompt_started:
+            self._prompt_started = True
+            self.run_worker(self._warm_backend())
     
     def _show_feed_item(self) -> None:
         """Show a mixed feed item (news or project insight) in activity panel."""
@@ -236,6 +263,7 @@ class AgentZeroCLI(App):
 
     async def on_multiline_input_submitted(self, event: MultilineInput.Submitted) -> None:
         text = event.value
+        self._prompt_started = False
         if not text:
             return
         if await self.slash_commands.execute(self, text):
@@ -256,6 +284,7 @@ class AgentZeroCLI(App):
     async def _handle_events(self, event_stream) -> None:
         chat = self.query_one("#chat-container")
         thinking_widget = None
+        output_widget = None
 
         async for event in event_stream:
             event_type = event.get("type")
@@ -295,15 +324,25 @@ class AgentZeroCLI(App):
                 )
                 self._set_waiting(False)
 
+            elif event_type == "tool_output" and event.get("partial"):
+                # Live chunk from a running command - grow one widget
+                if output_widget is None:
+                    output_widget = ToolOutputStream(
+                        classes="tool-output", max_chars=DISPLAY_OUTPUT_CHARS
+                    )
+                    await chat.mount(output_widget)
+                output_widget.append(event.get("content", ""))
+
             elif event_type == "tool_output":
+                output_widget = None
                 self._append_feed("tool", event.get("content", ""))
                 await chat.mount(
                     AnimatedText(
-                        event.get("content", ""),
+                        clip(event.get("content", ""), DISPLAY_OUTPUT_CHARS, event.get("handle", "")),
                         classes="tool-output",
                         speed=0.004,
                         chunk_size=12,
-                        max_chars=4000,
+                        max_chars=DISPLAY_OUTPUT_CHARS,
                     )
                 )
 
@@ -321,6 +360,8 @@ class AgentZeroCLI(App):
                     self._append_feed("approval", f"auto-approved {command}".strip())
                     await chat.mount(Static(f"AUTO-APPROVED: {command}", classes="status-msg"))
                 else:
+                    # Explanation is fetched while the operator reads the request
+                    get_risk_explainer(self.backend).prefetch(command)
                     decision = await self.push_screen_wait(
                         ToolApprovalScreen(
                             tool_name, command, event.get("reason", ""), self.backend, tool_payload
@@ -337,19 +378,57 @@ class AgentZeroCLI(App):
                     await chat.mount(Static("REJECTED", classes="status-msg"))
                     if hasattr(self.backend, "reject_tool"):
                         await self._handle_events(self.backend.reject_tool(event))
+
+            elif event_type == "tool_batch":
+                await self._handle_tool_batch(event.get("calls") or [])
             else:
                 self._append_feed("event", str(event))
 
             chat.scroll_end()
 
+    async def _handle_tool_batch(self, calls: list[dict]) -> None:
+        """Approve each call of a batch, then run the approved ones together."""
+        chat = self.query_one("#chat-container")
+        explainer = get_risk_explainer(self.backend)
+        for call in calls:
+            if not self._should_auto_approve(call):
+                explainer.prefetch(call.get("command", ""))
+        approved = []
+        for call in calls:
+            tool_name = call.get("tool_name", "tool")
+            command = call.get("command", "")
+            self._append_feed("tool", f"{tool_name} {command}".strip())
+            if self._should_auto_approve(call):
+                approved.append(call)
+                self._append_feed("approval", f"auto-approved {command}".strip())
+                continue
+            decision = await self.push_screen_wait(
+                ToolApprovalScreen(
+                    tool_name, command, call.get("reason", ""), self.backend, call.get("payload") or call
+                )
+            )
+            if decision == "approved":
+                approved.append(call)
+                self._append_feed("approval", f"approved {command}".strip())
+            else:
+                self._append_feed("approval", f"rejected {command}".strip())
+                await chat.mount(Static(f"REJECTED: {command}", classes="status-msg"))
+
+        if not approved:
+            return
+        await chat.mount(Static(f"RUNNING {len(approved)} TOOLS", classes="status-msg"))
+        self.last_tool = f"batch: {len(approved)} tools"
+        self._refresh_side_panel()
+        if hasattr(self.backend, "execute_batch"):
+            await self._handle_events(self.backend.execute_batch(approved))
+        else:
+            for call in approved:
+                await self._handle_events(self.backend.execute_tool(call))
+
     def _is_shell_whitelisted(self, command: str) -> bool:
         whitelist = self.active_config.get("security", {}).get("whitelist") or []
-        cmd = (command or "").strip().lower()
-        for entry in whitelist:
-            entry_text = str(entry).strip().lower()
-            if entry_text and cmd.startswith(entry_text):
-                return True
-        return False
+        # Every segment must be whitelisted, so "ls; rm x" does not pass as "ls"
+        return classify_command(command or "").all_match(whitelist)
 
     def _should_auto_approve(self, event: dict) -> bool:
         mode = self.active_config.get("security", {}).get("mode", "balanced")
@@ -439,7 +518,12 @@ class AgentZeroCLI(App):
         conn = self.active_config.get("connection", {})
         url = conn.get("api_url", "not configured")
         stream = "on" if conn.get("stream", False) else "off"
-        return f"[b]CONNECTION[/b]\nAPI: {url}\nStream: {stream}"
+        card = f"[b]CONNECTION[/b]\nAPI: {url}\nStream: {stream}"
+        state = getattr(self.backend, "state", None)
+        if state:
+            model = getattr(self.backend, "model", "") or "?"
+            card += f"\nBackend: {model} ({state})"
+        return card
 
     def _render_context_card(self) -> str:
         ctx = self.active_config.get("context", {})
@@ -448,12 +532,16 @@ class AgentZeroCLI(App):
 
     def _render_live_card(self) -> str:
         waiting = "YES" if self.waiting else "NO"
-        return (
+        card = (
             "[b]LIVE[/b]\n"
             f"Status: {self.last_status}\n"
             f"Last tool: {self.last_tool}\n"
             f"Waiting: {waiting}"
         )
+        metrics = getattr(self.backend, "metrics", None)
+        if metrics is not None:
+            card += "\n" + "\n".join(metrics.summary_lines())
+        return card
 
     def _apply_ui_config(self) -> None:
         self.ui_config = self.active_config.get("ui", {})
@@ -613,6 +701,9 @@ class AgentZeroCLI(App):
         if path:
             await self.upload_file(path)
 
+    def action_show_output(self, handle: str) -> None:
+        self.push_screen(OutputPagerScreen(handle))
+
     def action_push_game(self) -> None:
         self.push_screen(SpaceInvadersScreen())
 
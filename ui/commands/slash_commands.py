@@ -4,6 +4,8 @@ import shlex
 from collections.abc import Callable
 from typing import Any
 
+from tools.spool import get_output_spool
+
 
 class SlashCommandRegistry:
     """Registry for slash commands like /theme, /project, /clear."""
@@ -25,6 +27,7 @@ class SlashCommandRegistry:
         self.register("status", self._cmd_status, "Show connection status", [])
         self.register("rename", self._cmd_rename, "Rename current chat tab", ["name"])
         self.register("observer", self._cmd_observer, "Observer status & menu", ["info?"])
+        self.register("output", self._cmd_output, "Page through spooled tool output", ["handle?"])
 
     def register(
         self,
@@ -154,6 +157,19 @@ class SlashCommandRegistry:
         )
         app.notify(status)
 
+    async def _cmd_output(self, app: Any, args: list[str]) -> None:
+        spool = get_output_spool()
+        if args:
+            app.action_show_output(args[0])
+            return
+        entries = spool.recent()
+        if not entries:
+            app.notify("No spooled output yet")
+            return
+        lines = ["Spooled output (/output <handle>):"]
+        lines += [f"  {e.handle}  {e.size} bytes  {e.label[:60]}" for e in entries]
+        app.notify("\n".join(lines))
+
     async def _cmd_rename(self, app: Any, args: list[str]) -> None:
         if args:
             new_name = " ".join(args)
@@ -2,7 +2,8 @@
 
 from .file_upload import FileUploadScreen
 from .observer_config import ObserverConfigScreen
+from .output_pager import OutputPagerScreen
 from .space_invaders import SpaceInvadersScreen
 from .tool_approval import ToolApprovalScreen
 
-__all__ = ["ToolApprovalScreen", "FileUploadScreen", "SpaceInvadersScreen", "ObserverConfigScreen"]
+__all__ = ["ToolApprovalScreen", "FileUploadScreen", "SpaceInvadersScreen", "ObserverConfigScreen", "OutputPagerScreen"]
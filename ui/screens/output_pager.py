@@ -0,0 +1,98 @@
+"""Pager for spooled tool output."""
+
+from rich.text import Text
+from textual.binding import Binding
+from textual.containers import Vertical, VerticalScroll
+from textual.screen import ModalScreen
+from textual.widgets import Static
+
+from tools.spool import OutputSpool, get_output_spool
+
+PAGE_LINES = 500
+
+
+class OutputPagerScreen(ModalScreen[None]):
+    """Page through a spooled tool output, one page in memory at a time."""
+
+    BINDINGS = [
+        Binding("escape", "close", "Close"),
+        Binding("q", "close", "Close", show=False),
+        Binding("n", "next_page", "Next page"),
+        Binding("p", "prev_page", "Previous page"),
+    ]
+
+    DEFAULT_CSS = """
+    OutputPagerScreen {
+        align: center middle;
+        background: rgba(0, 0, 0, 0.8);
+    }
+    #pager-dialog {
+        width: 90%;
+        height: 90%;
+        border: heavy $primary;
+        background: $surface;
+        padding: 0 1;
+    }
+    #pager-header {
+        height: 1;
+        text-style: bold;
+        color: $primary;
+    }
+    #pager-body {
+        height: 1fr;
+        background: $background;
+    }
+    #pager-footer {
+        height: 1;
+        color: $text-muted;
+    }
+    """
+
+    def __init__(self, handle: str, spool: OutputSpool | None = None):
+        super().__init__()
+        self.handle = handle
+        self.spool = spool or get_output_spool()
+        self.offset = 0
+        self.total_lines: int | None = None
+
+    def compose(self):
+        with Vertical(id="pager-dialog"):
+            yield Static("", id="pager-header")
+            with VerticalScroll(id="pager-body"):
+                yield Static("", id="pager-text")
+            yield Static("n: next page  p: previous page  esc: close", id="pager-footer")
+
+    def on_mount(self) -> None:
+        self._show_page()
+
+    def _show_page(self) -> None:
+        header = self.query_one("#pager-header", Static)
+        body = self.query_one("#pager-text", Static)
+        try:
+            chunk = self.spool.read(self.handle, self.offset, PAGE_LINES)
+        except KeyError:
+            header.update(f"Unknown or expired output handle: {self.handle}")
+            return
+        except OSError as e:
+            header.update(f"Read error: {e}")
+            return
+        self.total_lines = chunk.total_lines
+        total = f" of {chunk.total_lines}" if chunk.total_lines is not None else ""
+        header.update(f"{self.handle}  lines {chunk.start_line}-{chunk.end_line}{total}")
+        body.update(Text(chunk.content))
+        self.query_one("#pager-body", VerticalScroll).scroll_home(animate=False)
+
+    def action_next_page(self) -> None:
+        if self.total_lines is not None and self.offset + PAGE_LINES >= self.total_lines:
+            return
+        self.offset += PAGE_LINES
+        self._show_page()
+
+    def action_prev_page(self) -> None:
+        if self.offset == 0:
+            return
+        self.offset = max(0, self.offset - PAGE_LINES)
+        self._show_page()
+
+    def action_close(self) -> None:
+        self.dismiss(None)
@@ -8,6 +8,8 @@ from textual.containers import Container, Horizontal, VerticalScroll
 from textual.screen import ModalScreen
 from textual.widgets import Button, Label, Static
 
+from llm_providers.risk_explainer import get_risk_explainer
+
 
 class ToolApprovalScreen(ModalScreen[str]):
     """Modal screen for approving/rejecting tool execution requests."""
@@ -144,9 +146,11 @@ class ToolApprovalScreen(ModalScreen[str]):
             await self._show_explanation()
 
     async def _show_explanation(self) -> None:
-        explanation = await self.backend.explain_risk(self.command)
+        # Usually prefetched or cached; otherwise tokens appear as they arrive
         area = self.query_one("#explanation-area", Static)
-        area.update(explanation)
+        area.update("Analyzing risk...")
+        async for text in get_risk_explainer(self.backend).stream(self.command):
+            area.update(text)
 
     def action_approve(self) -> None:
         self.dismiss("approved")